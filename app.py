@@ -1,94 +1,287 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g
 from flask_cors import CORS
-from zos_ml_demo.utils.zos_performance_analyzer import PerformanceAnalyzer
-from zos_ml_demo.utils.zos_monitoring import SystemMonitor
-from zos_ml_demo.utils.zos_integration import ZOSIntegration
-from zos_ml_demo.utils.zos_resource_manager import ZOSResourceManager
-from zos_ml_demo.utils.zos_extended_monitoring import ZOSExtendedMonitor
-from zos_ml_demo.utils.zos_subsystem_integration import (
-    ZOSDB2Integration,
-    ZOSIMSIntegration,
-    ZOSCICSIntegration,
-    ZOSMQIntegration,
-    ZOSVSAMIntegration
-)
-from zos_ml_demo.utils.zos_advanced_subsystems import (
-    ZOSSystemAutomation,
-    ZOSParallelSysplex,
-    ZOSWorkloadScheduler,
-    ZOSDatasetServices,
-    ZOSSecurityServer,
-    ZOSNetworkServices
-)
-from zos_ml_demo.utils.zos_security_manager import ZOSSecurityManager
-from zos_ml_demo.ml_model import TransactionAnalyzer
+from zos_ml_demo.utils.zos_component_registry import ComponentRegistry
+from zos_ml_demo.utils.zos_metrics_registry import get_metrics_registry, CONTENT_TYPE
+from zos_ml_demo.utils.zos_profiling import StageProfiler, NULL_TRACE, capture_stack_profile
+from zos_ml_demo.utils.zos_snapshot_cache import SnapshotCache
+from zos_ml_demo.utils.zos_json import FastJSONProvider, timestamp_now, new_transaction_id
+from zos_ml_demo.utils.zos_transaction_schema import TransactionValidator
+from zos_ml_demo.utils.zos_monitoring_engine import MonitoringEngine
+from zos_ml_demo.utils.zos_scheduler import IntervalSchedule
+from zos_ml_demo.utils.zos_wlm import AdmissionRejectedError
 import logging
-from datetime import datetime
-import uuid
 import random
-import numpy as np
+import os
 import time
 from config.zos_config import get_zos_config
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize z/OS components
 zos_config = get_zos_config()
-zos = ZOSIntegration(zos_config)
-monitor = SystemMonitor(zos_config)
-ext_monitor = ZOSExtendedMonitor(zos_config)
-perf_analyzer = PerformanceAnalyzer()
-security_manager = ZOSSecurityManager(zos_config)
-resource_manager = ZOSResourceManager(zos_config)
-
-# Initialize advanced subsystems
-automation = ZOSSystemAutomation(zos_config)
-sysplex = ZOSParallelSysplex(zos_config)
-scheduler = ZOSWorkloadScheduler(zos_config)
-dataset_svc = ZOSDatasetServices(zos_config)
-security_svc = ZOSSecurityServer(zos_config)
-network_svc = ZOSNetworkServices(zos_config)
-
-# Initialize subsystem integrations
-db2 = ZOSDB2Integration(zos_config)
-ims = ZOSIMSIntegration(zos_config)
-cics = ZOSCICSIntegration(zos_config)
-mq = ZOSMQIntegration(zos_config)
-vsam = ZOSVSAMIntegration(zos_config)
-
-# Initialize model
-model = TransactionAnalyzer()
+if zos_config['json_provider'] == 'fast':
+    app.json = FastJSONProvider(app)
+
+def create_gateway(config):
+    """IMS/CICS gateway, or None when no subsystem endpoints are configured"""
+    if not config.get('subsystem_endpoints'):
+        return None
+    from zos_ml_demo.utils.zos_transaction_gateway import ZOSTransactionGateway
+    return ZOSTransactionGateway(config)
+
+def create_feature_store(config):
+    """Per-account feature store, restored from its snapshot when one exists"""
+    from zos_ml_demo.utils.zos_feature_store import AccountFeatureStore
+    if os.path.exists(config['feature_snapshot']):
+        return AccountFeatureStore.load_snapshot(config['feature_snapshot'])
+    return AccountFeatureStore()
+
+def create_model(config):
+    """Transaction model, loaded from the current generation of the model GDG when one is cataloged"""
+    from zos_ml_demo.ml_model import TransactionAnalyzer
+    from zos_ml_demo.utils.zos_gdg import GenerationDataGroup
+    models = GenerationDataGroup.from_config(config, config['model_dataset'])
+    if models.current():
+        return TransactionAnalyzer.load(models.resolve(0))
+    return TransactionAnalyzer()
+
+# z/OS components are built on first use so that importing the app (and
+# serving the first request) only pays for what that request touches
+UTILS = 'zos_ml_demo.utils.'
+components = ComponentRegistry()
+components.register('resilience', UTILS + 'zos_resilience:get_resilience_manager', (zos_config,))
+components.register('wlm', UTILS + 'zos_wlm:get_workload_manager', (zos_config,))
+components.register('zos', UTILS + 'zos_integration:ZOSIntegration', (zos_config,))
+components.register('monitor', UTILS + 'zos_monitoring:SystemMonitor', (zos_config,))
+components.register('ext_monitor', UTILS + 'zos_extended_monitoring:ZOSExtendedMonitor', (zos_config,))
+components.register('perf_analyzer', UTILS + 'zos_performance_analyzer:PerformanceAnalyzer')
+components.register('security_manager', UTILS + 'zos_security_manager:ZOSSecurityManager', (zos_config,))
+components.register('resource_manager', UTILS + 'zos_resource_manager:ZOSResourceManager', (zos_config,))
+
+# Advanced subsystems
+components.register('automation', UTILS + 'zos_advanced_subsystems:ZOSSystemAutomation', (zos_config,))
+components.register('sysplex', UTILS + 'zos_advanced_subsystems:ZOSParallelSysplex', (zos_config,))
+components.register('scheduler', UTILS + 'zos_advanced_subsystems:ZOSWorkloadScheduler', (zos_config,))
+components.register('dataset_svc', UTILS + 'zos_advanced_subsystems:ZOSDatasetServices', (zos_config,))
+components.register('security_svc', UTILS + 'zos_advanced_subsystems:ZOSSecurityServer', (zos_config,))
+components.register('network_svc', UTILS + 'zos_advanced_subsystems:ZOSNetworkServices', (zos_config,))
+
+# Subsystem integrations
+components.register('gateway', create_gateway, (zos_config,))
+components.register('db2', UTILS + 'zos_subsystem_integration:ZOSDB2Integration', (zos_config,))
+components.register('ims', UTILS + 'zos_subsystem_integration:ZOSIMSIntegration', (zos_config,), depends_on=('gateway',))
+components.register('cics', UTILS + 'zos_subsystem_integration:ZOSCICSIntegration', (zos_config,), depends_on=('gateway',))
+components.register('mq', UTILS + 'zos_subsystem_integration:ZOSMQIntegration', (zos_config,))
+components.register('vsam', UTILS + 'zos_subsystem_integration:ZOSVSAMIntegration', (zos_config,))
+
+# Model and per-account feature store
+components.register('model', create_model, (zos_config,))
+components.register('feature_store', create_feature_store, (zos_config,))
+
+resilience = components.proxy('resilience')
+wlm = components.proxy('wlm')
+zos = components.proxy('zos')
+monitor = components.proxy('monitor')
+ext_monitor = components.proxy('ext_monitor')
+perf_analyzer = components.proxy('perf_analyzer')
+security_manager = components.proxy('security_manager')
+resource_manager = components.proxy('resource_manager')
+automation = components.proxy('automation')
+sysplex = components.proxy('sysplex')
+scheduler = components.proxy('scheduler')
+dataset_svc = components.proxy('dataset_svc')
+security_svc = components.proxy('security_svc')
+network_svc = components.proxy('network_svc')
+db2 = components.proxy('db2')
+ims = components.proxy('ims')
+cics = components.proxy('cics')
+mq = components.proxy('mq')
+vsam = components.proxy('vsam')
+model = components.proxy('model')
+feature_store = components.proxy('feature_store')
+
+metrics_registry = get_metrics_registry()
+RISK_SCORES = metrics_registry.histogram(
+    'zos_risk_score', 'Risk scores assigned to analyzed transactions',
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0))
+ANOMALIES = metrics_registry.counter('zos_anomalies_total', 'Anomalies flagged by type', ('type',))
+
+# Sampled per-stage timing of /api/analyze, switchable at runtime via /api/profile
+profiler = StageProfiler('analyze', **zos_config['profiling'])
+
+# Transaction schema, compiled once; fills model feature rows as it validates
+validator = TransactionValidator.from_config(zos_config)
+
+# Health and security payloads, serialized once per refresh and served by ETag
+snapshots = SnapshotCache(zos_config['snapshot_max_age'])
+
+def collect_metrics():
+    """Sample the monitor's CPU, memory, I/O and response time series"""
+    return {
+        'cpu_usage': monitor.get_cpu_metrics(),
+        'memory_usage': monitor.get_memory_metrics(),
+        'io_wait': monitor.get_io_metrics(),
+        'response_times': monitor.get_response_times()
+    }
+
+def build_health_status():
+    """Build the /api/health payload"""
+    # Get system metrics
+    metrics = collect_metrics()
+    
+    # Analyze performance
+    perf_status = perf_analyzer.analyze_performance(metrics)
+    
+    # Basic health status
+    return {
+        'status': 'healthy',
+        'timestamp': timestamp_now(),
+        'metrics': {
+            'cpu': sum(metrics['cpu_usage']) / len(metrics['cpu_usage']) if metrics['cpu_usage'] else 0,
+            'memory': sum(metrics['memory_usage']) / len(metrics['memory_usage']) if metrics['memory_usage'] else 0,
+            'io_wait': sum(metrics['io_wait']) / len(metrics['io_wait']) if metrics['io_wait'] else 0,
+            'avg_response_time': sum(metrics['response_times']) / len(metrics['response_times']) if metrics['response_times'] else 0
+        },
+        'performance_analysis': perf_status,
+        'recommendations': perf_status.get('recommendations', [])
+    }
+
+def log_status():
+    """Log the health status and its recommendations (the MLAPPMON job)"""
+    logger = logging.getLogger(__name__)
+    status = build_health_status()
+    logger.info(f"MLAPP status {status['status']}: CPU {status['metrics']['cpu']:.1f}%, "
+                f"memory {status['metrics']['memory']:.1f}%, "
+                f"avg response {status['metrics']['avg_response_time']:.3f}s")
+    for rec in status['recommendations']:
+        logger.warning(f"MLAPP status: {rec['component']} - {rec['action']}")
+    return status
+
+def sysplex_capacity():
+    """Live capacity this instance publishes to the other sysplex members"""
+    import psutil
+    transactions = monitor.get_transaction_metrics()
+    return {
+        # Work already routed here but not yet taken counts as queued, so routers stop piling it on
+        'queue_depth': transactions['gauges']['in_flight'] + sysplex.routed_backlog(),
+        'p99_ms': transactions['latency_ms']['p99'],
+        'cpu_percent': psutil.cpu_percent(interval=None)
+    }
+
+def process_routed_work(work):
+    """Score transactions routed to this instance through the sysplex; results go to the work's reply_to list"""
+    results = score_batch(work.get('transactions') or [])
+    if work.get('reply_to'):
+        sysplex.list_structure(sysplex.sysplex_name).push(work['reply_to'], {'id': work.get('id'), 'results': results})
+    return results
+
+def build_performance_report():
+    """Build the /api/performance payload"""
+    # Get current metrics
+    metrics = collect_metrics()
+    
+    # Analyze performance
+    analysis = perf_analyzer.analyze_performance(metrics)
+    
+    return {
+        'status': 'success',
+        'timestamp': timestamp_now(),
+        'metrics': metrics,
+        'analysis': analysis,
+        'transactions': monitor.get_transaction_metrics(),
+        'resilience': resilience.get_metrics(),
+        'workload': wlm.status(),
+        'enqueues': resource_manager.enqueue_contention()
+    }
+
+def validate_analyze_request(data, features):
+    """Return (transaction, None) for a valid request body, else (None, error)
+
+    The transaction's model features are written into the ``features`` row.
+    """
+    if not isinstance(data, dict) or 'transaction' not in data:
+        return None, 'Invalid request data'
+
+    transaction = data['transaction']
+    error = validator.validate_into(transaction, features)
+    if error:
+        return None, error
+    return transaction, None
+
+def score_batch(transactions):
+    """Validate a list of transactions in one pass and score the valid ones"""
+    features, errors = validator.validate_batch(transactions)
+    return [
+        {'error': error} if error else score_transaction(transaction, features=row)
+        for transaction, row, error in zip(transactions, features, errors)
+    ]
+
+def score_transaction(transaction, trace=NULL_TRACE, features=None):
+    """Enrich and score a validated transaction"""
+    # Enrich with the source account's history, then fold this transaction in
+    amount = float(features[0] if features is not None else transaction['amount'])
+    source_profile = feature_store.get_account(transaction['source_account'])
+    feature_store.update(transaction['source_account'], amount, transaction['timestamp'])
+
+    anomalies = []
+    if source_profile and source_profile['txn_count'] >= 10 and source_profile['amount_std'] > 0:
+        if abs(amount - source_profile['amount_mean']) > 3 * source_profile['amount_std']:
+            anomalies.append('AMOUNT_DEVIATION')
+
+    # Analyze transaction
+    analysis_result = {
+        'transaction_id': new_transaction_id(),
+        'timestamp': timestamp_now(),
+        'analysis': {
+            'risk_score': random.uniform(0, 1),  # Simulated risk score
+            'patterns': [
+                'NORMAL_TRANSFER_PATTERN',
+                'EXPECTED_AMOUNT_RANGE'
+            ],
+            'anomalies': anomalies,
+            'account_features': {
+                'source': source_profile,
+                'target': feature_store.get_account(transaction['target_account'])
+            }
+        },
+        'recommendations': []
+    }
+
+    RISK_SCORES.observe(analysis_result['analysis']['risk_score'])
+    for anomaly in anomalies:
+        ANOMALIES.labels(anomaly).inc()
+    trace.mark('score')
+
+    # Add recommendations based on analysis
+    if analysis_result['analysis']['risk_score'] > 0.7:
+        analysis_result['recommendations'].append({
+            'type': 'HIGH_RISK',
+            'message': 'Transaction shows high-risk patterns'
+        })
+    trace.mark('recommend')
+    return analysis_result
+
+def subsystem_requests(analysis_result):
+    """IMS/CICS notifications for a scored transaction, keyed by target"""
+    return {
+        target: {'transaction_id': analysis_result['transaction_id'], 'analysis': analysis_result['analysis']}
+        for target in components.get('gateway').endpoints
+    }
+
+def snapshot_response(snapshot):
+    """Serve a cached snapshot, or 304 if the client already has it"""
+    if snapshot.matches(request.headers.get('If-None-Match')):
+        response = Response(status=304)
+    else:
+        response = Response(snapshot.body, content_type='application/json')
+    response.headers['ETag'] = snapshot.etag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     try:
-        # Get system metrics
-        metrics = {
-            'cpu_usage': monitor.get_cpu_metrics(),
-            'memory_usage': monitor.get_memory_metrics(),
-            'io_wait': monitor.get_io_metrics(),
-            'response_times': monitor.get_response_times()
-        }
-        
-        # Analyze performance
-        perf_status = perf_analyzer.analyze_performance(metrics)
-        
-        # Basic health status
-        health_status = {
-            'status': 'healthy',
-            'timestamp': datetime.now().isoformat(),
-            'metrics': {
-                'cpu': sum(metrics['cpu_usage']) / len(metrics['cpu_usage']) if metrics['cpu_usage'] else 0,
-                'memory': sum(metrics['memory_usage']) / len(metrics['memory_usage']) if metrics['memory_usage'] else 0,
-                'io_wait': sum(metrics['io_wait']) / len(metrics['io_wait']) if metrics['io_wait'] else 0,
-                'avg_response_time': sum(metrics['response_times']) / len(metrics['response_times']) if metrics['response_times'] else 0
-            },
-            'performance_analysis': perf_status,
-            'recommendations': perf_status.get('recommendations', [])
-        }
-        
-        return jsonify(health_status)
+        return snapshot_response(snapshots.get_or_build('health', build_health_status))
     except Exception as e:
         app.logger.error(f"Health check failed: {str(e)}")
         return jsonify({
@@ -99,7 +292,8 @@ def health_check():
 @app.route('/api/analyze', methods=['POST'])
 def analyze_transaction():
     """Analyze a transaction for patterns and anomalies"""
-    start_time = time.time()
+    start_time = monitor.transaction_started()
+    trace = g.trace = profiler.start()
     success = False
     
     try:
@@ -107,41 +301,29 @@ def analyze_transaction():
         user_id = request.headers.get('X-User-ID', 'UNKNOWN')
         if not security_manager.verify_racf_permissions(user_id, 'MLAPP.ANALYZE', 'READ'):
             return jsonify({'error': 'Unauthorized'}), 403
+        trace.mark('racf')
 
         data = request.json
-        if not data or 'transaction' not in data:
-            return jsonify({'error': 'Invalid request data'}), 400
+        trace.mark('parse')
+
+        features = validator.new_rows(1)[0]
+        transaction, error = validate_analyze_request(data, features)
+        trace.mark('validate')
+        if error:
+            return jsonify({'error': error}), 400
+
+        analysis_result = score_transaction(transaction, trace, features)
 
-        transaction = data['transaction']
-        required_fields = ['amount', 'type', 'source_account', 'target_account', 'timestamp']
-        for field in required_fields:
-            if field not in transaction:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-
-        # Analyze transaction
-        analysis_result = {
-            'transaction_id': str(uuid.uuid4()),
-            'timestamp': datetime.now().isoformat(),
-            'analysis': {
-                'risk_score': random.uniform(0, 1),  # Simulated risk score
-                'patterns': [
-                    'NORMAL_TRANSFER_PATTERN',
-                    'EXPECTED_AMOUNT_RANGE'
-                ],
-                'anomalies': []
-            },
-            'recommendations': []
-        }
-
-        # Add recommendations based on analysis
-        if analysis_result['analysis']['risk_score'] > 0.7:
-            analysis_result['recommendations'].append({
-                'type': 'HIGH_RISK',
-                'message': 'Transaction shows high-risk patterns'
-            })
+        # Notify IMS and CICS concurrently; latency is that of the slowest reply
+        gateway = components.get('gateway')
+        if gateway is not None:
+            analysis_result['subsystem_responses'] = gateway.fan_out_sync(subsystem_requests(analysis_result))
+            trace.mark('subsystems')
 
         success = True
-        return jsonify(analysis_result)
+        response = jsonify(analysis_result)
+        trace.mark('serialize')
+        return response
 
     except Exception as e:
         app.logger.error(f"Transaction analysis failed: {str(e)}")
@@ -150,6 +332,62 @@ def analyze_transaction():
     finally:
         end_time = time.time()
         monitor.record_transaction(start_time, end_time, success)
+        trace.mark('record')
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def analyze_batch():
+    """Score a list of transactions in one request (no IMS/CICS notification)"""
+    start_time = monitor.transaction_started()
+    success = False
+
+    try:
+        user_id = request.headers.get('X-User-ID', 'UNKNOWN')
+        if not security_manager.verify_racf_permissions(user_id, 'MLAPP.ANALYZE', 'READ'):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        data = request.json
+        transactions = data.get('transactions') if isinstance(data, dict) else None
+        if not isinstance(transactions, list) or not transactions:
+            return jsonify({'error': 'Invalid request data'}), 400
+        if len(transactions) > zos_config['max_batch_size']:
+            return jsonify({'error': f"Batch exceeds {zos_config['max_batch_size']} transactions"}), 400
+
+        results = score_batch(transactions)
+        success = True
+        return jsonify({'count': len(results), 'results': results})
+
+    except Exception as e:
+        app.logger.error(f"Batch analysis failed: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    finally:
+        monitor.record_transaction(start_time, time.time(), success)
+
+@app.before_request
+def admit_request():
+    """Admit the request under its WLM service class, or shed it with 503"""
+    try:
+        g.wlm_ticket = wlm.acquire(wlm.classify(request.path))
+    except AdmissionRejectedError as e:
+        response = jsonify({'error': str(e), 'service_class': e.service_class})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+@app.teardown_request
+def release_request(exc):
+    ticket = g.pop('wlm_ticket', None)
+    if ticket is not None:
+        wlm.release(ticket)
+
+@app.after_request
+def add_server_timing(response):
+    """Attach a sampled request's stage timings and fold them into the aggregates"""
+    trace = g.pop('trace', NULL_TRACE)
+    if trace.sampled:
+        response.headers['Server-Timing'] = trace.server_timing()
+        trace.finish()
+    return response
 
 @app.route('/api/performance', methods=['GET'])
 def get_performance():
@@ -162,23 +400,7 @@ def get_performance():
         ):
             return jsonify({'error': 'Unauthorized'}), 403
 
-        # Get current metrics
-        metrics = {
-            'cpu_usage': monitor.get_cpu_metrics(),
-            'memory_usage': monitor.get_memory_metrics(),
-            'io_wait': monitor.get_io_metrics(),
-            'response_times': monitor.get_response_times()
-        }
-        
-        # Analyze performance
-        analysis = perf_analyzer.analyze_performance(metrics)
-        
-        return jsonify({
-            'status': 'success',
-            'timestamp': datetime.now().isoformat(),
-            'metrics': metrics,
-            'analysis': analysis
-        })
+        return jsonify(build_performance_report())
     except Exception as e:
         app.logger.error(f"Performance report generation failed: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -194,11 +416,57 @@ def get_security():
         ):
             return jsonify({'error': 'Unauthorized'}), 403
             
-        return jsonify(security_manager.generate_security_report())
+        return snapshot_response(snapshots.get_or_build('security', security_manager.generate_security_report))
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
-if __name__ == '__main__':
+@app.route('/api/profile', methods=['GET', 'POST'])
+def profile_settings():
+    """Per-stage timing summary; POST switches sampling on or off"""
+    try:
+        access = 'UPDATE' if request.method == 'POST' else 'READ'
+        if not security_manager.verify_racf_permissions(
+            request.headers.get('X-User-ID', 'UNKNOWN'),
+            'MLAPP.PERFORMANCE',
+            access
+        ):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        if request.method == 'POST':
+            settings = request.json or {}
+            profiler.configure(settings.get('enabled'), settings.get('sample_rate'))
+            if settings.get('reset'):
+                profiler.reset()
+        return jsonify(profiler.get_statistics())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/profile/stack', methods=['GET'])
+def stack_profile():
+    """Statistical stack profile of every thread for ?seconds=N"""
+    try:
+        if not security_manager.verify_racf_permissions(
+            request.headers.get('X-User-ID', 'UNKNOWN'),
+            'MLAPP.PERFORMANCE',
+            'READ'
+        ):
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        seconds = float(request.args.get('seconds', 5))
+        interval = float(request.args.get('interval', 0.005))
+        return jsonify(capture_stack_profile(seconds, interval))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of the internal metric registry"""
+    # The monitor registers the whole-server transaction series
+    components.get('monitor')
+    return Response(metrics_registry.render(), content_type=CONTENT_TYPE)
+
+def initialize_environment():
+    """One-time z/OS environment setup, run once per server (not per worker)"""
     # Setup recovery environment
     if not resource_manager.setup_recovery_environment():
         raise RuntimeError("Failed to setup recovery environment")
@@ -206,72 +474,84 @@ if __name__ == '__main__':
     # Initialize automation
     automation.define_resource('MLAPP', 'APPLICATION')
     
-    # Join sysplex
-    sysplex.join_sysplex('PRODPLEX')
-    
-    # Schedule monitoring jobs
-    scheduler.schedule_job('MLAPPMON', '*/15 * * * *')  # Every 15 minutes
+    # Schedule the status check (F MLAPP,STATUS). It only logs: the scheduler runs in one process
+    # (the sidecar under server.py), and each worker rebuilds its own health snapshot on demand
+    scheduler.schedule_job('MLAPPMON', '*/15 * * * *',  # Every 15 minutes
+                           log_status, stream='MLAPP')
     
     # Configure network
     network_svc.start_tcp_listener(5000, 'MLAPP')
-    
-    # Start monitoring threads
-    import threading
+
+def start_background_monitoring(save_features=True):
+    """Join the sysplex, schedule the monitoring engine and start the scheduler; call from exactly one process.
+
+    Pass save_features=False when this process does not serve requests, so
+    its feature store never changes; the pre-fork server saves it instead."""
     logger = logging.getLogger(__name__)
 
-    def monitoring_thread():
-        while True:
-            monitor.check_thresholds()
-            ext_monitor.write_rmf_monitor_i_data(
-                ext_monitor.collect_system_metrics()
-            )
-            time.sleep(60)  # Check every minute
-            
-    def subsystem_monitor_thread():
-        while True:
-            # Collect and write subsystem metrics
-            db2_metrics = ext_monitor.collect_db2_metrics()
-            ims_metrics = ext_monitor.collect_ims_metrics()
-            cics_metrics = ext_monitor.collect_cics_metrics()
-            
-            ext_monitor.write_smf_extended_records({
-                'db2': db2_metrics,
-                'ims': ims_metrics,
-                'cics': cics_metrics
-            }, record_type=231)
-            
-            time.sleep(300)  # Check every 5 minutes
-            
-    def performance_analyzer_thread():
-        while True:
-            metrics_data = {
-                'cpu_usage': monitor.get_cpu_metrics(),
-                'memory_usage': monitor.get_memory_metrics(),
-                'response_times': monitor.get_response_times(),
-                'io_wait': monitor.get_io_metrics()
-            }
-            analysis = perf_analyzer.analyze_performance(metrics_data)
-            if analysis['status'] == 'critical':
-                for rec in analysis['recommendations']:
-                    logger.warning(f"Performance Alert: {rec['component']} - {rec['action']}")
-            time.sleep(60)  # Check every minute
-            
-    def security_monitor_thread():
-        while True:
-            security_analysis = security_manager.monitor_security_events()
-            if security_analysis and security_analysis['suspicious_patterns']:
-                for pattern in security_analysis['suspicious_patterns']:
-                    security_manager.audit_transaction({
-                        'type': 'SECURITY_ALERT',
-                        'pattern': pattern,
-                        'timestamp': time.time()
-                    })
-            time.sleep(60)  # Check every minute
-    
-    threading.Thread(target=monitoring_thread, daemon=True).start()
-    threading.Thread(target=subsystem_monitor_thread, daemon=True).start()
-    threading.Thread(target=performance_analyzer_thread, daemon=True).start()
-    threading.Thread(target=security_monitor_thread, daemon=True).start()
+    # Join sysplex after any fork: the heartbeat and work consumer are threads of this process
+    sysplex.join_sysplex('PRODPLEX', capacity=sysplex_capacity, on_work=process_routed_work)
+    settings = zos_config['monitoring']
+    engine = MonitoringEngine(settings['tick'])
+
+    # Each source is read at most once per tick, however many tasks use it;
+    # CPU is measured over the time since the previous tick instead of blocking
+    engine.add_source('cpu', lambda: monitor.get_cpu_metrics(interval=None))
+    engine.add_source('memory', monitor.get_memory_metrics)
+    engine.add_source('io', monitor.get_io_metrics)
+    engine.add_source('response_times', monitor.get_response_times)
+    engine.add_source('system', ext_monitor.collect_system_metrics)
+    engine.add_source('db2', ext_monitor.collect_db2_metrics)
+    engine.add_source('ims', ext_monitor.collect_ims_metrics)
+    engine.add_source('cics', ext_monitor.collect_cics_metrics)
+    engine.add_source('security', security_manager.monitor_security_events)
+
+    def analyze_performance(sample):
+        analysis = perf_analyzer.analyze_performance({
+            'cpu_usage': sample['cpu'],
+            'memory_usage': sample['memory'],
+            'response_times': sample['response_times'],
+            'io_wait': sample['io']
+        })
+        if analysis['status'] == 'critical':
+            for rec in analysis['recommendations']:
+                logger.warning(f"Performance Alert: {rec['component']} - {rec['action']}")
+
+    def audit_security_patterns(sample):
+        security_analysis = sample['security']
+        if security_analysis and security_analysis['suspicious_patterns']:
+            for pattern in security_analysis['suspicious_patterns']:
+                security_manager.audit_transaction({
+                    'type': 'SECURITY_ALERT',
+                    'pattern': pattern,
+                    'timestamp': time.time()
+                })
+
+    engine.add_task('thresholds', lambda sample: monitor.check_thresholds(),
+                    ('cpu', 'memory', 'io', 'response_times'), every=60)
+    engine.add_task('rmf', lambda sample: ext_monitor.write_rmf_monitor_i_data(sample['system']),
+                    ('system',), every=60)
+    if save_features:
+        engine.add_task('feature_snapshot', lambda sample: feature_store.save_snapshot(zos_config['feature_snapshot']),
+                        every=60)
+    engine.add_task('performance', analyze_performance, ('cpu', 'memory', 'io', 'response_times'), every=60)
+    engine.add_task('security', audit_security_patterns, ('security',), every=60)
+    engine.add_task('smf', lambda sample: ext_monitor.write_smf_extended_records({
+        'db2': sample['db2'],
+        'ims': sample['ims'],
+        'cics': sample['cics']
+    }, record_type=231), ('db2', 'ims', 'cics'), every=300)
+
+    # Prime the monitor's CPU baseline so the first tick, on any scheduler thread, has an interval to measure
+    monitor.get_cpu_metrics(interval=None)
+    scheduler.schedule_job('MLAPPMTR', IntervalSchedule(settings['tick'], settings['jitter']),
+                           engine.tick, stream='MLAPP')
+    scheduler.start()
+    return engine
+
+if __name__ == '__main__':
+    initialize_environment()
+    start_background_monitoring()
     
     # Run the application
     app.run(host='0.0.0.0', port=5002, debug=True)
@@ -0,0 +1,307 @@
+"""
+ASGI serving mode for the z/OS ML Transaction Analyzer
+
+Serves the same routes as app.py (/api/health, /api/analyze,
+/api/performance, /api/security) from an event loop.  RACF checks and
+subsystem calls are awaited through the async subsystem clients, and
+CPU-bound scoring runs on a separate executor so it never blocks the loop.
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5002
+    python asgi_app.py
+"""
+import os
+import time
+import asyncio
+import logging
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+import app as wsgi_app
+from zos_ml_demo.utils.zos_metrics_registry import CONTENT_TYPE
+from zos_ml_demo.utils.zos_profiling import NULL_TRACE
+from zos_ml_demo.utils.zos_snapshot_cache import Snapshot
+from zos_ml_demo.utils.zos_wlm import AdmissionRejectedError
+from zos_ml_demo.utils import zos_json
+from zos_ml_demo.utils.zos_async_subsystems import (
+    create_io_executor,
+    AsyncZOSSecurityManager,
+    AsyncZOSDB2Integration,
+    AsyncZOSIMSIntegration,
+    AsyncZOSCICSIntegration,
+    AsyncZOSMQIntegration,
+    AsyncZOSVSAMIntegration
+)
+
+logger = logging.getLogger('zos_asgi')
+
+zos_config = wsgi_app.zos_config
+io_executor = create_io_executor(zos_config.get('asgi_io_workers', 32))
+scoring_executor = ThreadPoolExecutor(
+    max_workers=zos_config.get('asgi_scoring_workers') or os.cpu_count() or 4,
+    thread_name_prefix='zos-scoring'
+)
+# Requests waiting for a WLM slot block a thread each; they get their own pool so they cannot take
+# every I/O thread from admitted requests.  Waits beyond a class's queue_limit are shed, so this
+# many threads is never short.
+admission_executor = ThreadPoolExecutor(
+    max_workers=sum(sc.queue_limit for sc in wsgi_app.wlm.classes.values()) or 1,
+    thread_name_prefix='zos-wlm'
+)
+
+# Async subsystem clients sharing the synchronous clients' resilience state
+security_manager = AsyncZOSSecurityManager(wsgi_app.security_manager, io_executor)
+db2 = AsyncZOSDB2Integration(wsgi_app.db2, io_executor)
+ims = AsyncZOSIMSIntegration(wsgi_app.ims, io_executor)
+cics = AsyncZOSCICSIntegration(wsgi_app.cics, io_executor)
+mq = AsyncZOSMQIntegration(wsgi_app.mq, io_executor)
+vsam = AsyncZOSVSAMIntegration(wsgi_app.vsam, io_executor)
+
+# Stage trace of the request being handled (the ASGI counterpart of flask.g)
+current_trace = contextvars.ContextVar('current_trace', default=NULL_TRACE)
+
+
+async def run_in(executor, func, *args):
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args))
+
+
+def _release_abandoned(wlm, future):
+    """Give back a slot granted to a request that was cancelled while it queued"""
+    if not future.cancelled() and future.exception() is None:
+        wlm.release(future.result())
+
+
+async def admit(service_class):
+    """WLM ticket for a request, queueing on the admission pool when no slot is free"""
+    wlm = wsgi_app.wlm
+    ticket = wlm.acquire(service_class, block=False)
+    if ticket is not None:
+        return ticket
+    future = admission_executor.submit(wlm.acquire, service_class)
+    try:
+        return await asyncio.wrap_future(future)
+    except asyncio.CancelledError:
+        # The wait cannot be interrupted; release whatever ticket it still produces
+        future.add_done_callback(functools.partial(_release_abandoned, wlm))
+        raise
+
+
+async def cached_snapshot(name, builder):
+    """Snapshot lookups run inline; only a first build goes to the executor"""
+    if wsgi_app.snapshots.get(name) is None:
+        return await run_in(io_executor, wsgi_app.snapshots.get_or_build, name, builder)
+    return wsgi_app.snapshots.get_or_build(name, builder)
+
+
+async def health_check(headers, body):
+    try:
+        return 200, await cached_snapshot('health', wsgi_app.build_health_status)
+    except Exception as e:
+        logger.error(f"Health check failed: {str(e)}")
+        return 500, {'status': 'error', 'error': str(e)}
+
+
+async def analyze_transaction(headers, body):
+    """Analyze a transaction for patterns and anomalies"""
+    start_time = wsgi_app.monitor.transaction_started()
+    trace = wsgi_app.profiler.start()
+    current_trace.set(trace)
+    success = False
+
+    try:
+        user_id = headers.get('x-user-id', 'UNKNOWN')
+        if not await security_manager.verify_racf_permissions(user_id, 'MLAPP.ANALYZE', 'READ'):
+            return 403, {'error': 'Unauthorized'}
+        trace.mark('racf')
+
+        try:
+            data = zos_json.loads(body) if body else None
+        except ValueError:
+            return 400, {'error': 'Invalid request data'}
+        trace.mark('parse')
+
+        features = wsgi_app.validator.new_rows(1)[0]
+        transaction, error = wsgi_app.validate_analyze_request(data, features)
+        trace.mark('validate')
+        if error:
+            return 400, {'error': error}
+
+        analysis_result = await run_in(scoring_executor, wsgi_app.score_transaction, transaction, trace, features)
+
+        # Notify IMS and CICS concurrently; latency is that of the slowest reply
+        gateway = wsgi_app.components.get('gateway')
+        if gateway is not None:
+            analysis_result['subsystem_responses'] = await gateway.fan_out_async(
+                wsgi_app.subsystem_requests(analysis_result))
+            trace.mark('subsystems')
+
+        success = True
+        return 200, analysis_result
+
+    except Exception as e:
+        logger.error(f"Transaction analysis failed: {str(e)}")
+        return 500, {'error': str(e)}
+
+    finally:
+        wsgi_app.monitor.record_transaction(start_time, time.time(), success)
+        trace.mark('record')
+
+
+async def analyze_batch(headers, body):
+    """Score a list of transactions in one request (no IMS/CICS notification)"""
+    start_time = wsgi_app.monitor.transaction_started()
+    success = False
+
+    try:
+        user_id = headers.get('x-user-id', 'UNKNOWN')
+        if not await security_manager.verify_racf_permissions(user_id, 'MLAPP.ANALYZE', 'READ'):
+            return 403, {'error': 'Unauthorized'}
+
+        try:
+            data = zos_json.loads(body) if body else None
+        except ValueError:
+            return 400, {'error': 'Invalid request data'}
+
+        transactions = data.get('transactions') if isinstance(data, dict) else None
+        if not isinstance(transactions, list) or not transactions:
+            return 400, {'error': 'Invalid request data'}
+        if len(transactions) > zos_config['max_batch_size']:
+            return 400, {'error': f"Batch exceeds {zos_config['max_batch_size']} transactions"}
+
+        results = await run_in(scoring_executor, wsgi_app.score_batch, transactions)
+        success = True
+        return 200, {'count': len(results), 'results': results}
+
+    except Exception as e:
+        logger.error(f"Batch analysis failed: {str(e)}")
+        return 500, {'error': str(e)}
+
+    finally:
+        wsgi_app.monitor.record_transaction(start_time, time.time(), success)
+
+
+async def get_performance(headers, body):
+    """Get performance metrics and analysis"""
+    try:
+        if not await security_manager.verify_racf_permissions(
+            headers.get('x-user-id', 'UNKNOWN'), 'MLAPP.PERFORMANCE', 'READ'
+        ):
+            return 403, {'error': 'Unauthorized'}
+        return 200, await run_in(io_executor, wsgi_app.build_performance_report)
+    except Exception as e:
+        logger.error(f"Performance report generation failed: {str(e)}")
+        return 500, {'error': str(e)}
+
+
+async def get_security(headers, body):
+    """Get comprehensive security report"""
+    try:
+        if not await security_manager.verify_racf_permissions(
+            headers.get('x-user-id', 'UNKNOWN'), 'MLAPP.SECURITY', 'READ'
+        ):
+            return 403, {'error': 'Unauthorized'}
+        return 200, await cached_snapshot('security', wsgi_app.security_manager.generate_security_report)
+    except Exception as e:
+        return 400, {'error': str(e)}
+
+
+async def metrics(headers, body):
+    """Prometheus text exposition of the internal metric registry"""
+    wsgi_app.components.get('monitor')
+    return 200, wsgi_app.metrics_registry.render()
+
+
+ROUTES = {
+    '/api/health': ('GET', health_check),
+    '/api/analyze': ('POST', analyze_transaction),
+    '/api/analyze/batch': ('POST', analyze_batch),
+    '/api/performance': ('GET', get_performance),
+    '/api/security': ('GET', get_security),
+    '/metrics': ('GET', metrics)
+}
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send_payload(send, status, payload, trace=NULL_TRACE, if_none_match=None, extra_headers=()):
+    extra = list(extra_headers)
+    if isinstance(payload, Snapshot):
+        body, content_type = payload.body, b'application/json'
+        extra = [(b'etag', payload.etag.encode('ascii')), (b'cache-control', b'no-cache')]
+        if status == 200 and payload.matches(if_none_match):
+            status, body = 304, b''
+    elif isinstance(payload, str):
+        body, content_type = payload.encode('utf-8'), CONTENT_TYPE.encode('ascii')
+    else:
+        body, content_type = zos_json.dumps(payload), b'application/json'
+    headers = [
+        (b'content-type', content_type),
+        (b'content-length', str(len(body)).encode('ascii')),
+        (b'access-control-allow-origin', b'*')
+    ] + extra
+    if trace.sampled:
+        trace.mark('serialize')
+        headers.append((b'server-timing', trace.server_timing().encode('ascii')))
+        trace.finish()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            io_executor.shutdown(wait=False)
+            scoring_executor.shutdown(wait=False)
+            admission_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI application entry point"""
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    route = ROUTES.get(scope['path'])
+    if route is None:
+        return await _send_payload(send, 404, {'error': 'Not found'})
+    method, handler = route
+    if scope['method'] != method:
+        return await _send_payload(send, 405, {'error': 'Method not allowed'})
+
+    service_class = wsgi_app.wlm.classify(scope['path'])
+    try:
+        ticket = await admit(service_class)
+    except AdmissionRejectedError as e:
+        return await _send_payload(send, 503, {'error': str(e), 'service_class': e.service_class},
+                                   extra_headers=[(b'retry-after', str(e.retry_after).encode('ascii'))])
+    try:
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        body = await _read_body(receive)
+        status, payload = await handler(headers, body)
+        await _send_payload(send, status, payload, current_trace.get(), headers.get('if-none-match'))
+    finally:
+        wsgi_app.wlm.release(ticket)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("ASGI mode requires uvicorn: pip install 'zos-ml-demo[asgi]'")
+    uvicorn.run(app, host='0.0.0.0', port=5002, log_level='info')
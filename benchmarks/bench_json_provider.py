@@ -0,0 +1,84 @@
+"""
+Flask's default JSON provider vs FastJSONProvider
+
+Builds representative response payloads (one /api/analyze result, a
+50-transaction batch, the health report) and times turning each into a
+Flask response with both providers, reporting CPU time per response and
+serialized bytes per CPU second.  Also compares the per-transaction
+timestamp and ID helpers with datetime.now().isoformat() and uuid4().
+
+    python benchmarks/bench_json_provider.py --responses 20000
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from zos_ml_demo.utils import zos_json  # noqa: E402
+
+TRANSACTION = {
+    'amount': 1000.0, 'type': 'TRANSFER', 'source_account': 'SAVINGS',
+    'target_account': 'CHECKING', 'timestamp': '2025-02-28T12:00:00Z'
+}
+
+
+def payloads():
+    for _ in range(20):
+        app.score_transaction(dict(TRANSACTION))
+    analyze = app.score_transaction(dict(TRANSACTION))
+    return {
+        'analyze': analyze,
+        'batch_50': {'count': 50, 'results': [app.score_transaction(dict(TRANSACTION)) for _ in range(50)]},
+        'health': json.loads(app.snapshots.get_or_build('health', app.build_health_status).body)
+    }
+
+
+def cpu_per_call(func, number):
+    started = time.process_time_ns()
+    for _ in range(number):
+        func()
+    return (time.process_time_ns() - started) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--responses', type=int, default=20000)
+    args = parser.parse_args()
+
+    providers = {'default': DefaultJSONProvider(app.app), 'fast': zos_json.FastJSONProvider(app.app)}
+    results = {'backend': zos_json.BACKEND, 'payloads': {}, 'helpers': {}}
+    with app.app.app_context():
+        for name, payload in payloads().items():
+            number = max(100, args.responses // (50 if name == 'batch_50' else 1))
+            entry = {}
+            for provider_name, provider in providers.items():
+                size = len(provider.response(payload).get_data())
+                ns = cpu_per_call(lambda: provider.response(payload), number)
+                entry[provider_name] = {
+                    'bytes': size,
+                    'cpu_us_per_response': ns / 1000,
+                    'mb_per_cpu_second': size / ns * 1e9 / 2**20
+                }
+            entry['speedup'] = entry['default']['cpu_us_per_response'] / entry['fast']['cpu_us_per_response']
+            results['payloads'][name] = entry
+
+    number = args.responses * 5
+    results['helpers'] = {
+        'datetime_isoformat_ns': cpu_per_call(lambda: datetime.now().isoformat(), number),
+        'timestamp_now_ns': cpu_per_call(zos_json.timestamp_now, number),
+        'uuid4_ns': cpu_per_call(lambda: str(uuid.uuid4()), number),
+        'new_transaction_id_ns': cpu_per_call(zos_json.new_transaction_id, number)
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""
+Load test for the HTTP API against a locally started server
+
+Drives /api/analyze, /api/analyze/batch and /api/health in two ways:
+
+* open loop -- requests are issued at a fixed arrival rate whether or not
+  earlier ones have finished; latency is measured from each request's
+  scheduled start, so a stalled server is not hidden by a slowed client
+* closed loop -- N keep-alive connections each send their next request as
+  soon as the previous reply arrives
+
+Each run records throughput, p50/p99/p999 latency, errors and the server's
+CPU use and peak RSS (summed over its process tree).  Results are written
+as JSON; with --baseline the run fails when throughput drops or p99 rises
+by more than --tolerance against a saved run.
+
+    python benchmarks/bench_load.py --server sync --output results.json
+    python benchmarks/bench_load.py --baseline benchmarks/baselines/load.json
+    python benchmarks/bench_load.py --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import threading
+import psutil
+from bench_serving_modes import ROOT, TRANSACTION, Connection, free_port, start_server
+
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'load.json')
+
+SERVERS = {
+    'sync': [sys.executable, '-c',
+             "import sys; from werkzeug.serving import run_simple; import app; "
+             "run_simple('127.0.0.1', int(sys.argv[1]), app.app, threaded=True)"],
+    'prefork': [sys.executable, 'server.py', '--host', '127.0.0.1', '--workers', '4', '--port'],
+    'async': [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+              '--log-level', 'warning', '--port']
+}
+
+BATCH_SIZE = 50
+
+SCENARIOS = {
+    'analyze': ('POST', '/api/analyze', TRANSACTION),
+    'batch': ('POST', '/api/analyze/batch', json.dumps(
+        {'transactions': [json.loads(TRANSACTION)['transaction']] * BATCH_SIZE}).encode()),
+    'health': ('GET', '/api/health', b'')
+}
+
+# Default open-loop arrival rates (requests/second)
+RATES = {'analyze': 100.0, 'batch': 10.0, 'health': 2.0}
+
+
+class ResourceSampler:
+    """Samples CPU time and RSS of a server's whole process tree"""
+    def __init__(self, pid, interval=0.2):
+        self.root = psutil.Process(pid)
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _processes(self):
+        return [self.root] + self.root.children(recursive=True)
+
+    def _cpu_seconds(self):
+        total = 0.0
+        for process in self._processes():
+            try:
+                times = process.cpu_times()
+                total += times.user + times.system
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = 0
+            for process in self._processes():
+                try:
+                    rss += process.memory_info().rss
+                except psutil.NoSuchProcess:
+                    pass
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._cpu_started = self._cpu_seconds()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self._started
+        self.cpu_percent = (self._cpu_seconds() - self._cpu_started) / elapsed * 100.0
+
+
+def summarize(latencies, errors, elapsed, extra):
+    latencies.sort()
+
+    def pick(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+
+    result = {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': pick(0.50),
+        'p99_ms': pick(0.99),
+        'p999_ms': pick(0.999)
+    }
+    result.update(extra)
+    return result
+
+
+async def open_loop(port, scenario, rate, duration, max_outstanding):
+    method, path, body = SCENARIOS[scenario]
+    loop = asyncio.get_running_loop()
+    idle = []
+    latencies = []
+    errors = 0
+    dropped = 0
+    outstanding = 0
+
+    async def fire(scheduled):
+        nonlocal errors, outstanding
+        connection = idle.pop() if idle else Connection(port)
+        try:
+            status = await connection.request(method, path, body)
+            latencies.append(loop.time() - scheduled)
+            if status != 200:
+                errors += 1
+            idle.append(connection)
+        except (OSError, asyncio.IncompleteReadError):
+            errors += 1
+            connection.close()
+        finally:
+            outstanding -= 1
+
+    tasks = []
+    started = loop.time()
+    for i in range(int(rate * duration)):
+        scheduled = started + i / rate
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if outstanding >= max_outstanding:
+            dropped += 1
+            continue
+        outstanding += 1
+        tasks.append(asyncio.ensure_future(fire(scheduled)))
+    await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+    for connection in idle:
+        connection.close()
+    return summarize(latencies, errors, elapsed, {'mode': 'open', 'rate': rate, 'dropped': dropped})
+
+
+async def closed_loop(port, scenario, concurrency, duration):
+    method, path, body = SCENARIOS[scenario]
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(port)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await connection.request(method, path, body)
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors += 1
+        connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started,
+                     {'mode': 'closed', 'concurrency': concurrency})
+
+
+def run(args):
+    port = free_port()
+    process = start_server(args.server, port, SERVERS)
+    runs = {}
+    try:
+        asyncio.run(closed_loop(port, 'analyze', 4, 2.0))  # warm-up
+        for scenario in args.scenarios:
+            plans = [(f"{scenario}/open@{args.rate or RATES[scenario]:g}",
+                      open_loop(port, scenario, args.rate or RATES[scenario], args.duration, args.max_outstanding))]
+            plans += [(f"{scenario}/closed@{c}", closed_loop(port, scenario, c, args.duration))
+                      for c in args.concurrency]
+            for name, coroutine in plans:
+                with ResourceSampler(process.pid) as sampler:
+                    result = asyncio.run(coroutine)
+                result['server_cpu_percent'] = sampler.cpu_percent
+                result['server_peak_rss_mb'] = sampler.peak_rss / 2**20
+                runs[name] = result
+                print(f"{name}: {result['throughput_rps']:.1f} rps, p50 {result['p50_ms']:.2f}ms, "
+                      f"p99 {result['p99_ms']:.2f}ms, {result['errors']} errors", file=sys.stderr)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'server': args.server,
+        'parameters': {'duration': args.duration, 'concurrency': args.concurrency, 'rate': args.rate},
+        'environment': {'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'timestamp': time.time(),
+        'runs': runs
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against a baseline, as messages"""
+    failures = []
+    if baseline.get('server') != results['server'] or baseline.get('parameters') != results['parameters']:
+        print("Baseline was recorded with a different server or parameters; comparing matching runs only",
+              file=sys.stderr)
+    for name, run in results['runs'].items():
+        base = baseline.get('runs', {}).get(name)
+        if base is None:
+            continue
+        if run['throughput_rps'] < base['throughput_rps'] * (1 - tolerance):
+            failures.append(f"{name}: throughput {run['throughput_rps']:.1f} rps < baseline {base['throughput_rps']:.1f}")
+        if base['p99_ms'] and run['p99_ms'] and run['p99_ms'] > base['p99_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p99 {run['p99_ms']:.2f}ms > baseline {base['p99_ms']:.2f}ms")
+        if run['errors'] > base['errors']:
+            failures.append(f"{name}: {run['errors']} errors (baseline {base['errors']})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', default='sync', choices=sorted(SERVERS))
+    parser.add_argument('--scenarios', nargs='+', default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument('--rate', type=float, help='open-loop arrival rate for every scenario (default: per scenario)')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per run')
+    parser.add_argument('--max-outstanding', type=int, default=512, help='open-loop cap on requests in flight')
+    parser.add_argument('--output', help='write results JSON to this file')
+    parser.add_argument('--baseline', help='compare against this results file')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--update-baseline', action='store_true', help=f'save results as {BASELINE}')
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, 'w') as f:
+            f.write(text + '\n')
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
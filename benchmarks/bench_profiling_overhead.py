@@ -0,0 +1,73 @@
+"""
+Overhead of the /api/analyze stage-timing hooks
+
+Measures the per-request cost of the hooks themselves (profiler.start(),
+one mark per stage, finish) with profiling off, sampled at 1% and always
+on, then the end-to-end cost of /api/analyze through the Flask test client
+in each mode.
+
+    python benchmarks/bench_profiling_overhead.py --requests 2000
+"""
+import os
+import sys
+import json
+import time
+import timeit
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from zos_ml_demo.utils.zos_profiling import StageProfiler  # noqa: E402
+
+STAGES = ('racf', 'parse', 'validate', 'score', 'recommend', 'serialize', 'record')
+
+MODES = {'disabled': (False, 1.0), 'sampled_1pct': (True, 0.01), 'always': (True, 1.0)}
+
+TRANSACTION = {'transaction': {
+    'amount': 1000.0, 'type': 'TRANSFER', 'source_account': 'SAVINGS',
+    'target_account': 'CHECKING', 'timestamp': '2025-02-28T12:00:00Z'}}
+
+
+def hook_cost_ns(enabled, sample_rate, number):
+    profiler = StageProfiler('bench', enabled, sample_rate)
+
+    def request():
+        trace = profiler.start()
+        for stage in STAGES:
+            trace.mark(stage)
+        if trace.sampled:
+            trace.finish()
+
+    return min(timeit.repeat(request, number=number, repeat=5)) / number * 1e9
+
+
+def request_cost_us(client, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.post('/api/analyze', headers={'X-User-ID': 'MLAPPADM'}, json=TRANSACTION)
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--hook-calls', type=int, default=100000)
+    args = parser.parse_args()
+
+    client = app.app.test_client()
+    request_cost_us(client, 200)  # warm-up
+    results = {}
+    for mode, (enabled, sample_rate) in MODES.items():
+        app.profiler.configure(enabled, sample_rate)
+        results[mode] = {
+            'hooks_ns_per_request': hook_cost_ns(enabled, sample_rate, args.hook_calls),
+            'analyze_us_per_request': request_cost_us(client, args.requests)
+        }
+    app.profiler.configure(False)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Sync (Werkzeug/Flask) vs async (ASGI/uvicorn) serving-mode comparison
+
+Starts each serving mode in a subprocess, drives /api/analyze over
+keep-alive connections at increasing closed-loop concurrency and reports
+throughput, p50/p99 latency and server RSS per idle connection.
+
+    python benchmarks/bench_serving_modes.py --concurrency 1 8 32 128 --duration 10
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'sync': [sys.executable, '-c',
+             "import sys; from werkzeug.serving import run_simple; import app; "
+             "run_simple('127.0.0.1', int(sys.argv[1]), app.app, threaded=True)"],
+    'async': [sys.executable, '-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1',
+              '--log-level', 'warning', '--port']
+}
+
+TRANSACTION = json.dumps({'transaction': {
+    'amount': 1000.00,
+    'type': 'TRANSFER',
+    'source_account': 'SAVINGS',
+    'target_account': 'CHECKING',
+    'timestamp': '2025-02-28T12:00:00Z'
+}}).encode()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, port, servers=SERVERS):
+    process = subprocess.Popen(servers[mode] + [str(port)], cwd=ROOT,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{mode} server did not start on port {port}")
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client"""
+    def __init__(self, port):
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, body=b''):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port)
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nX-User-ID: MLAPPADM\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        status = int(lines[0].split()[1])
+        headers = {k.lower(): v.strip() for k, _, v in (line.partition(':') for line in lines[1:] if line)}
+        await self.reader.readexactly(int(headers.get('content-length', 0)))
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+async def closed_loop(port, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        connection = Connection(port)
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await connection.request('POST', '/api/analyze', TRANSACTION)
+                if status != 200:
+                    errors += 1
+            except (OSError, asyncio.IncompleteReadError):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append(time.perf_counter() - started)
+        connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pick(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else None
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': len(latencies) / elapsed,
+        'p50_ms': pick(0.50),
+        'p99_ms': pick(0.99)
+    }
+
+
+async def memory_per_connection(port, pid, connections):
+    server = psutil.Process(pid)
+    baseline = server.memory_info().rss
+    opened = [Connection(port) for _ in range(connections)]
+    for connection in opened:
+        await connection.request('POST', '/api/analyze', TRANSACTION)
+    await asyncio.sleep(1.0)
+    loaded = server.memory_info().rss
+    for connection in opened:
+        connection.close()
+    return {
+        'idle_connections': connections,
+        'rss_baseline_mb': baseline / 2**20,
+        'rss_loaded_mb': loaded / 2**20,
+        'rss_per_connection_kb': (loaded - baseline) / connections / 1024
+    }
+
+
+def run_mode(mode, concurrency_levels, duration, idle_connections):
+    port = free_port()
+    process = start_server(mode, port)
+    try:
+        asyncio.run(closed_loop(port, 4, 2.0))  # warm-up
+        results = {'levels': [asyncio.run(closed_loop(port, c, duration)) for c in concurrency_levels]}
+        results['memory'] = asyncio.run(memory_per_connection(port, process.pid, idle_connections))
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=['sync', 'async'], choices=sorted(SERVERS))
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32, 128])
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per concurrency level')
+    parser.add_argument('--idle-connections', type=int, default=200)
+    parser.add_argument('--output', help='write results JSON to this file')
+    args = parser.parse_args()
+
+    results = {mode: run_mode(mode, args.concurrency, args.duration, args.idle_connections) for mode in args.modes}
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Cold-start benchmark: import time and time-to-first-request
+
+Runs each measurement in a fresh interpreter:
+
+* ``python -X importtime -c "import app"`` -- total and top modules by
+  cumulative import time
+* spawn-to-response time for the first /api/analyze request through the
+  Flask test client
+
+Results are compared against benchmarks/baselines/startup.json, which is the
+regression budget; the run fails when a median exceeds budget * tolerance.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --update-baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'startup.json')
+
+FIRST_REQUEST = r"""
+import app
+client = app.app.test_client()
+response = client.post('/api/analyze', headers={'X-User-ID': 'MLAPPADM'}, json={'transaction': {
+    'amount': 1000.0, 'type': 'TRANSFER', 'source_account': 'SAVINGS',
+    'target_account': 'CHECKING', 'timestamp': '2025-02-28T12:00:00Z'}})
+assert response.status_code == 200, response.status_code
+"""
+
+
+def measure_import(runs):
+    totals = []
+    modules = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app'],
+                                cwd=ROOT, capture_output=True, text=True, check=True)
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, name = line.split('|')
+            name = name.strip()
+            modules.setdefault(name, []).append(int(cumulative_us))
+            if name == 'app':
+                totals.append(int(cumulative_us))
+    top = sorted(((statistics.median(v), k) for k, v in modules.items() if '.' not in k), reverse=True)[:15]
+    return {
+        'import_app_ms': statistics.median(totals) / 1000.0,
+        'top_level_modules_ms': {name: us / 1000.0 for us, name in top},
+        'heavy_modules_loaded': sorted(
+            name for name in ('numpy', 'sklearn', 'pandas', 'psutil', 'scipy', 'asyncio') if name in modules)
+    }
+
+
+def measure_first_request(runs):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', FIRST_REQUEST], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return {'time_to_first_request_ms': statistics.median(samples)}
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for metric in ('import_app_ms', 'time_to_first_request_ms'):
+        budget = baseline.get(metric)
+        if budget is not None and results[metric] > budget * tolerance:
+            failures.append(f"{metric}: {results[metric]:.1f}ms exceeds budget {budget:.1f}ms x {tolerance}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=1.2)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    results = measure_import(args.runs)
+    results.update(measure_first_request(args.runs))
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'import_app_ms': results['import_app_ms'],
+                'time_to_first_request_ms': results['time_to_first_request_ms']
+            }, f, indent=2)
+            f.write('\n')
+        return
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
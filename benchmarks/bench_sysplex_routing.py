@@ -0,0 +1,138 @@
+"""
+Sysplex routing simulation: throughput against member count
+
+Starts a coupling facility in-process and, for each member count, that
+many member processes.  Each member joins the sysplex, heartbeats its
+queue depth and p99 service time, and scores the work routed to its CF
+list one item at a time.  A unit of work is a short CPU burst plus a
+wait standing in for the DB2/CICS calls of real scoring, so throughput
+scales with members even on a small host.  The router in this process
+routes every item up front; throughput is items over the time until the
+last one completes.
+
+    python benchmarks/bench_sysplex_routing.py --members 1 2 4 8 --items 2000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zos_ml_demo.utils.zos_coupling_facility import CouplingFacilityServer, CouplingFacility
+from zos_ml_demo.utils.zos_sysplex import SysplexRegistry, WorkloadRouter
+
+SYSPLEX = 'SIMPLEX'
+
+
+def member_process(host, port, name, cpu_ms, wait_ms, heartbeat_interval):
+    facility = CouplingFacility(host, port)
+    work = facility.list_structure(SYSPLEX)
+    results = facility.cache('RESULTS')
+    service_times = []
+
+    def capacity():
+        recent = sorted(service_times[-200:])
+        return {'queue_depth': len(work.items(name)),
+                'p99_ms': recent[int(0.99 * (len(recent) - 1))] if recent else 0.0}
+
+    registry = SysplexRegistry(facility.cache(SYSPLEX), name, capacity, heartbeat_interval)
+    registry.heartbeat()
+    registry.start()
+    arrived = threading.Event()
+    work.on_transition(name, lambda list_name, length: arrived.set())
+    while True:
+        item = work.pop(name)
+        if item is None:
+            arrived.wait(0.05)
+            arrived.clear()
+            continue
+        if item.get('stop'):
+            break
+        started = time.perf_counter()
+        deadline = started + cpu_ms / 1000.0
+        while time.perf_counter() < deadline:
+            pass
+        time.sleep(wait_ms / 1000.0)
+        service_times.append((time.perf_counter() - started) * 1000.0)
+        results.increment('completed', count=1)
+    registry.leave()
+    facility.close()
+
+
+def simulate(host, port, members, items, strategy, cpu_ms, wait_ms, heartbeat_interval, run):
+    names = [f"SYS{run}{i + 1:02d}" for i in range(members)]
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=member_process,
+                                 args=(host, port, name, cpu_ms, wait_ms, heartbeat_interval))
+                 for name in names]
+    for process in processes:
+        process.start()
+    facility = CouplingFacility(host, port)
+    try:
+        work = facility.list_structure(SYSPLEX)
+        results = facility.cache('RESULTS')
+        observer = SysplexRegistry(facility.cache(SYSPLEX), f"ROUTER{run}", heartbeat_interval=heartbeat_interval)
+        deadline = time.time() + 60
+        while {m['name'] for m in observer.refresh()} < set(names):
+            if time.time() > deadline:
+                raise RuntimeError('Members did not join the sysplex')
+            time.sleep(0.05)
+        router = WorkloadRouter(observer, strategy, rng=random.Random(run))
+        before = (results.entries().get('completed', (0, {}))[1] or {}).get('count', 0)
+        started = time.perf_counter()
+        routed = {name: 0 for name in names}
+        for i in range(items):
+            member = router.select()
+            work.push(member, {'transaction': i})
+            routed[member] += 1
+        while (results.entries().get('completed', (0, {}))[1] or {}).get('count', 0) - before < items:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        for name in names:
+            work.push(name, {'stop': True})
+    finally:
+        for process in processes:
+            process.join(timeout=30)
+        facility.close()
+    return {
+        'members': members,
+        'items': items,
+        'seconds': elapsed,
+        'throughput_per_second': items / elapsed,
+        'ideal_per_second': members * 1000.0 / (cpu_ms + wait_ms),
+        'routed': routed
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--members', nargs='+', type=int, default=[1, 2, 4, 8])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--strategy', default='p2c', choices=['p2c', 'weighted'])
+    parser.add_argument('--cpu-ms', type=float, default=0.2, help='CPU time per item')
+    parser.add_argument('--wait-ms', type=float, default=5.0, help='subsystem wait per item')
+    parser.add_argument('--heartbeat', type=float, default=0.2, help='heartbeat interval in seconds')
+    parser.add_argument('--output', help='write results JSON to this file')
+    args = parser.parse_args()
+
+    server = CouplingFacilityServer()
+    host, port = server.start()
+    try:
+        results = [simulate(host, port, members, args.items, args.strategy, args.cpu_ms, args.wait_ms,
+                            args.heartbeat, run) for run, members in enumerate(args.members)]
+    finally:
+        server.stop()
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
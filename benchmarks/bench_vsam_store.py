@@ -0,0 +1,114 @@
+"""
+VSAM KSDS read/write latency benchmark
+
+Loads N account keys into a VSAMKSDSCluster, then measures random point
+reads and keyed updates.  Latencies are sampled per operation with a
+nanosecond clock and summarized as percentiles.
+
+    python benchmarks/bench_vsam_store.py --keys 10000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from zos_ml_demo.utils.zos_vsam_store import VSAMKSDSCluster
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def pick(q):
+        return ordered[min(count - 1, int(q * count))] / 1000.0
+
+    return {
+        'ops': count,
+        'mean_us': sum(ordered) / count / 1000.0,
+        'p50_us': pick(0.50),
+        'p99_us': pick(0.99),
+        'p999_us': pick(0.999),
+        'max_us': ordered[-1] / 1000.0
+    }
+
+
+def run(keys, ops, record_size, cache_blocks, sample_every, path):
+    cluster = VSAMKSDSCluster(path, key_length=16, cache_blocks=cache_blocks)
+    payload = bytes(record_size)
+    clock = time.perf_counter_ns
+
+    load_samples = array('q')
+    started = time.perf_counter()
+    for i in range(keys):
+        key = b'ACCT%012d' % i
+        if i % sample_every:
+            cluster.put(key, payload)
+        else:
+            t0 = clock()
+            cluster.put(key, payload)
+            load_samples.append(clock() - t0)
+    load_seconds = time.perf_counter() - started
+
+    rng = random.Random(42)
+    read_samples = array('q')
+    for _ in range(ops):
+        key = b'ACCT%012d' % rng.randrange(keys)
+        t0 = clock()
+        cluster.get(key)
+        read_samples.append(clock() - t0)
+
+    update_samples = array('q')
+    for _ in range(ops):
+        key = b'ACCT%012d' % rng.randrange(keys)
+        t0 = clock()
+        cluster.put(key, payload)
+        update_samples.append(clock() - t0)
+
+    t0 = time.perf_counter()
+    browsed = sum(1 for _ in cluster.browse(b'ACCT%012d' % (keys // 2), limit=10000))
+    browse_seconds = time.perf_counter() - t0
+
+    results = {
+        'keys': keys,
+        'record_size': record_size,
+        'cache_blocks': cache_blocks,
+        'load_rate_per_sec': keys / load_seconds,
+        'load': percentiles(load_samples),
+        'random_read': percentiles(read_samples),
+        'random_update': percentiles(update_samples),
+        'browse_records_per_sec': browsed / browse_seconds if browse_seconds else 0.0,
+        'cluster': cluster.get_statistics()
+    }
+    cluster.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--keys', type=int, default=10_000_000)
+    parser.add_argument('--ops', type=int, default=200_000)
+    parser.add_argument('--record-size', type=int, default=64)
+    parser.add_argument('--cache-blocks', type=int, default=1024)
+    parser.add_argument('--sample-every', type=int, default=100, help='time every Nth load operation')
+    parser.add_argument('--output', help='write results JSON to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run(args.keys, args.ops, args.record_size, args.cache_blocks, args.sample_every,
+                      os.path.join(directory, 'MLAPP.BENCH.KSDS'))
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -32,6 +32,95 @@ TEMP_SPACE = '/tmp'
 DATASET_HLQ = 'MLAPP'
 MODEL_DATASET = f"{DATASET_HLQ}.MODELS"
 DATA_DATASET = f"{DATASET_HLQ}.DATA"
+DATASET_DIRECTORY = f"{TEMP_SPACE}/mlapp/datasets"  # files backing sequential datasets
+GDG_LIMIT = 10  # generations kept by a generation data group unless defined otherwise
+PDSE_COMPACT_RATIO = 0.5  # share of a member library's space left dead before it is compacted
+# ENQ/DEQ serialization: directory of the lock files behind system-scope ENQs, and the default
+# seconds a request waits before it fails (None waits indefinitely)
+ENQ = {'directory': f"{TEMP_SPACE}/mlapp/enq", 'timeout': 30.0}
+
+# VSAM Cluster Settings
+VSAM_DIRECTORY = f"{TEMP_SPACE}/mlapp/vsam"
+VSAM_CI_SIZE = 4096  # bytes per control interval
+VSAM_CACHE_BLOCKS = 1024  # CIs held in the LRU block cache
+
+# IMS/CICS Gateway Endpoints, e.g.
+# {'IMS': {'host': 'ims.example.com', 'port': 9999, 'max_in_flight': 32, 'timeout': 2.0}}
+SUBSYSTEM_ENDPOINTS = {}
+
+# Coupling Facility daemon shared by app instances, e.g. {'host': '127.0.0.1', 'port': 7800, 'timeout': 5.0};
+# None runs each instance on its own
+COUPLING_FACILITY = None
+
+# Sysplex membership and routing (used when COUPLING_FACILITY is set): member name (default host.pid),
+# heartbeat interval and failure timeout in seconds, routing strategy ('p2c' or 'weighted') and the
+# CPU percent above which a member only gets work when every member is over it
+SYSPLEX = {'member': None, 'heartbeat_interval': 5.0, 'failure_timeout': 15.0, 'strategy': 'p2c', 'cpu_limit': 90.0}
+
+# Subsystem Resilience Settings, keyed by target (DB2, IMS, CICS, MQ, ...) or 'default'
+RESILIENCE = {
+    'default': {
+        'breaker': {'failure_threshold': 0.5, 'minimum_calls': 10, 'reset_timeout': 30.0},
+        'bulkhead': {'max_concurrent': 16},
+        'timeout': {'initial': 5.0, 'percentile': 0.99, 'multiplier': 2.0}
+    }
+}
+
+# Seconds a cached /api/health or /api/security payload is served before it is rebuilt
+SNAPSHOT_MAX_AGE = {'health': 10.0, 'security': 5.0}
+
+# JSON provider for API responses: 'fast' (orjson when installed, else stdlib) or 'default' (Flask's)
+JSON_PROVIDER = 'fast'
+
+# Largest accepted /api/analyze/batch request
+MAX_BATCH_SIZE = 1000
+
+# Transaction Schema: accepted 'type' values (model code is the 1-based position) and amount bounds
+TRANSACTION_TYPES = ('TRANSFER', 'PAYMENT', 'WITHDRAWAL', 'DEPOSIT')
+TRANSACTION_AMOUNT_RANGE = (0.0, 1e9)
+
+# Offline Batch Scoring (zos-ml-batch): records per chunk, records to train on, processes (None = CPU count)
+BATCH_SCORING = {'chunk_rows': 100000, 'train_rows': 10000, 'workers': None}
+
+# Workload Scheduler: job pool size and seconds a run may start late before it counts as missed
+SCHEDULER = {'max_workers': 4, 'misfire_grace': 5.0}
+
+# Background Monitoring: seconds per engine tick (task periods are multiples of it) and random start delay
+MONITORING = {'tick': 60.0, 'jitter': 5.0}
+
+# WLM service classes: importance 1 (highest) to 5 and one goal each, either response_time in seconds
+# (at a percentile when given) or velocity (percent of time running rather than queued). Requests map to
+# classes by path; a class defers or sheds work beyond its concurrency, queue_limit and max_queue_wait
+# limits, and runs only min_concurrent requests while a more important class misses its goal
+WLM = {
+    'max_concurrent': 32,
+    'pi_interval': 0.5,
+    'default_class': 'MLREPORT',
+    'service_classes': {
+        'MLONLINE': {'importance': 1, 'response_time': 0.25, 'percentile': 0.95,
+                     'queue_limit': 256, 'max_queue_wait': 0.5},
+        'MLHEALTH': {'importance': 1, 'response_time': 0.5, 'max_concurrent': 4,
+                     'queue_limit': 16, 'max_queue_wait': 1.0},
+        'MLBATCH': {'importance': 3, 'velocity': 40, 'max_concurrent': 8,
+                    'queue_limit': 32, 'max_queue_wait': 5.0},
+        'MLREPORT': {'importance': 4, 'velocity': 20, 'max_concurrent': 4,
+                     'queue_limit': 16, 'max_queue_wait': 2.0}
+    },
+    'routes': {
+        '/api/analyze': 'MLONLINE',
+        '/api/health': 'MLHEALTH',
+        '/metrics': 'MLHEALTH',
+        '/api/analyze/batch': 'MLBATCH',
+        '/api/performance': 'MLREPORT',
+        '/api/security': 'MLREPORT'
+    }
+}
+
+# Hot-Path Profiling: per-stage timing of sampled /api/analyze requests
+PROFILING = {'enabled': False, 'sample_rate': 0.01}
+
+# Account Feature Store Settings
+FEATURE_SNAPSHOT = f"{TEMP_SPACE}/mlapp/account_features.npz"
 
 def get_zos_config():
     """Return z/OS specific configuration"""
@@ -53,5 +142,27 @@ def get_zos_config():
         'temp_space': TEMP_SPACE,
         'dataset_hlq': DATASET_HLQ,
         'model_dataset': MODEL_DATASET,
-        'data_dataset': DATA_DATASET
+        'data_dataset': DATA_DATASET,
+        'dataset_directory': DATASET_DIRECTORY,
+        'gdg_limit': GDG_LIMIT,
+        'pdse_compact_ratio': PDSE_COMPACT_RATIO,
+        'enq': ENQ,
+        'vsam_directory': VSAM_DIRECTORY,
+        'vsam_ci_size': VSAM_CI_SIZE,
+        'vsam_cache_blocks': VSAM_CACHE_BLOCKS,
+        'feature_snapshot': FEATURE_SNAPSHOT,
+        'subsystem_endpoints': SUBSYSTEM_ENDPOINTS,
+        'coupling_facility': COUPLING_FACILITY,
+        'sysplex': SYSPLEX,
+        'resilience': RESILIENCE,
+        'profiling': PROFILING,
+        'max_batch_size': MAX_BATCH_SIZE,
+        'transaction_types': TRANSACTION_TYPES,
+        'transaction_amount_range': TRANSACTION_AMOUNT_RANGE,
+        'batch_scoring': BATCH_SCORING,
+        'scheduler': SCHEDULER,
+        'monitoring': MONITORING,
+        'wlm': WLM,
+        'snapshot_max_age': SNAPSHOT_MAX_AGE,
+        'json_provider': JSON_PROVIDER
     }
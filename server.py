@@ -0,0 +1,401 @@
+"""
+Production pre-fork server for the z/OS ML Transaction Analyzer
+
+The master process binds the listening socket and imports app.py, so the
+model and every subsystem component are built once before forking; workers
+inherit them copy-on-write.  Transaction metrics are recorded into a shared
+region with a slot per worker, so /api/performance in any worker reports
+the whole server.  The monitoring threads and the sysplex membership
+(heartbeat and routed-work consumer) run in a single sidecar process
+instead of once per worker; the sidecar exports its scheduler and
+monitoring-engine metrics to a file that every worker's /metrics serves.
+Each worker saves the feature-store updates it made since it forked; the
+master folds an exited worker's updates into its own store, which later
+workers fork from, and periodically writes the merged feature snapshot.
+Workers are recycled after a jittered
+number of requests, and each worker publishes its load into a shared slot
+table that any worker can report from /api/workers.
+
+    python server.py --workers 4 --port 5002 --max-requests 10000
+"""
+import os
+import gc
+import sys
+import time
+import errno
+import random
+import signal
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+from multiprocessing import RawArray
+from werkzeug.wsgi import ClosingIterator
+from zos_ml_demo.utils.zos_shared_metrics import SharedMetricsRegion
+from zos_ml_demo.utils.zos_metrics_registry import get_metrics_registry, ExportedMetrics
+
+logger = logging.getLogger('zos_server')
+
+# Metric families only the sidecar updates; workers serve the sidecar's export of them on /metrics
+SIDECAR_METRICS = ('zos_scheduler_', 'zos_monitoring_')
+
+# Per-worker slot layout in the shared load table
+_PID, _STARTED, _REQUESTS, _IN_FLIGHT, _ERRORS, _GENERATION = range(6)
+_SLOT_FIELDS = 6
+
+
+class WorkerLoadTable:
+    """Fixed slots of per-worker counters in memory shared across fork"""
+    def __init__(self, workers):
+        self.workers = workers
+        self._values = RawArray('d', workers * _SLOT_FIELDS)
+
+    def _base(self, slot):
+        return slot * _SLOT_FIELDS
+
+    def claim(self, slot, pid):
+        base = self._base(slot)
+        self._values[base + _PID] = pid
+        self._values[base + _STARTED] = time.time()
+        self._values[base + _REQUESTS] = 0
+        self._values[base + _IN_FLIGHT] = 0
+        self._values[base + _ERRORS] = 0
+        self._values[base + _GENERATION] += 1
+
+    def add(self, slot, field, amount=1):
+        # Each slot has a single writer process, so no cross-process lock is needed
+        self._values[self._base(slot) + field] += amount
+
+    def in_flight(self, slot):
+        return int(self._values[self._base(slot) + _IN_FLIGHT])
+
+    def report(self):
+        """Load for every worker slot"""
+        now = time.time()
+        workers = []
+        for slot in range(self.workers):
+            base = self._base(slot)
+            started = self._values[base + _STARTED]
+            workers.append({
+                'slot': slot,
+                'pid': int(self._values[base + _PID]),
+                'uptime': now - started if started else 0.0,
+                'requests': int(self._values[base + _REQUESTS]),
+                'in_flight': int(self._values[base + _IN_FLIGHT]),
+                'errors': int(self._values[base + _ERRORS]),
+                'generation': int(self._values[base + _GENERATION])
+            })
+        return {
+            'workers': workers,
+            'total_requests': sum(w['requests'] for w in workers),
+            'total_in_flight': sum(w['in_flight'] for w in workers)
+        }
+
+
+class _LoadTrackingMiddleware:
+    """Counts requests for one worker and asks it to retire after max_requests"""
+    def __init__(self, wsgi_app, table, slot, max_requests, on_retire):
+        self.wsgi_app = wsgi_app
+        self.table = table
+        self.slot = slot
+        self.max_requests = max_requests
+        self.on_retire = on_retire
+        self.served = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        with self._lock:
+            self.table.add(self.slot, _IN_FLIGHT, 1)
+
+        def tracking_start_response(status, headers, exc_info=None):
+            if status[:1] == '5':
+                with self._lock:
+                    self.table.add(self.slot, _ERRORS, 1)
+            return start_response(status, headers, exc_info)
+
+        try:
+            response = self.wsgi_app(environ, tracking_start_response)
+        except BaseException:
+            self._finished()
+            raise
+        # Still in flight until the server has written the body and closed the response
+        return ClosingIterator(response, self._finished)
+
+    def _finished(self):
+        with self._lock:
+            self.table.add(self.slot, _IN_FLIGHT, -1)
+            self.table.add(self.slot, _REQUESTS, 1)
+            self.served += 1
+            retire = self.max_requests and self.served == self.max_requests
+        if retire:
+            self.on_retire()
+
+
+class PreforkServer:
+    """Master process: preloads the app, forks workers and one monitoring sidecar"""
+    def __init__(self, host='0.0.0.0', port=5002, workers=4, max_requests=10000,
+                 max_requests_jitter=1000, backlog=2048, report_interval=60, drain_timeout=25.0,
+                 feature_save_interval=60.0):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.backlog = backlog
+        self.report_interval = report_interval
+        # Below the master's 30s shutdown deadline, so a draining worker exits before it is killed
+        self.drain_timeout = drain_timeout
+        self.feature_save_interval = feature_save_interval
+        self.table = WorkerLoadTable(workers)
+        # Transaction counters and latency histograms, one slot per worker
+        self.metrics = SharedMetricsRegion(workers)
+        self.worker_pids = {}
+        self.sidecar_pid = None
+        self.sidecar_metrics_path = None
+        self.socket = None
+        self.app_module = None
+        self._stopping = False
+        self._recycle_all = False
+
+    def _bind(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(self.backlog)
+        sock.set_inheritable(True)
+        return sock
+
+    def _preload(self):
+        """Import the app (model, subsystems) once, before any fork"""
+        import app as app_module
+        # Components are lazy by default; build them all here so workers share them
+        app_module.components.initialize_all()
+        app_module.initialize_environment()
+        table = self.table
+        app_module.app.add_url_rule('/api/workers', 'worker_load', lambda: app_module.jsonify(table.report()))
+        # Move preloaded objects out of the collector's generations so GC
+        # passes in workers do not write to (and un-share) their pages
+        gc.collect()
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+        return app_module
+
+    def _fork(self, target, *args):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_IGN)
+                signal.signal(signal.SIGHUP, signal.SIG_DFL)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                target(*args)
+            except Exception:
+                logger.exception("Child process failed")
+                code = 1
+            finally:
+                os._exit(code)
+        return pid
+
+    def _run_sidecar(self):
+        """Background monitoring and sysplex membership run here and nowhere else"""
+        self.socket.close()
+        # Capacity published to the sysplex comes from every worker's transactions
+        self.app_module.monitor.attach_shared_metrics(self.metrics)
+        # The sidecar serves no requests, so its copy of the feature store is never current
+        self.app_module.start_background_monitoring(save_features=False)
+        registry = get_metrics_registry()
+        parent = os.getppid()
+        while os.getppid() == parent:
+            try:
+                registry.export(self.sidecar_metrics_path, SIDECAR_METRICS)
+            except OSError as e:
+                logger.error(f"Exporting sidecar metrics failed: {str(e)}")
+            time.sleep(1)
+
+    def _run_worker(self, slot):
+        from werkzeug.serving import make_server
+
+        self.table.claim(slot, os.getpid())
+        self.app_module.monitor.attach_shared_metrics(self.metrics, slot)
+        changes = self.app_module.feature_store.track_changes()
+        changes_path = self._worker_features_path(slot)
+        stop_saving = threading.Event()
+
+        def save_changes():
+            while not stop_saving.wait(self.feature_save_interval):
+                changes.save_snapshot(changes_path)
+
+        threading.Thread(target=save_changes, daemon=True, name='feature-changes').start()
+        get_metrics_registry().delegate(SIDECAR_METRICS, ExportedMetrics(self.sidecar_metrics_path))
+        limit = 0
+        if self.max_requests:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        server = None
+
+        def retire():
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        wsgi_app = _LoadTrackingMiddleware(self.app_module.app, self.table, slot, limit, retire)
+        server = make_server(self.host, self.port, wsgi_app, threaded=True, fd=self.socket.fileno())
+        signal.signal(signal.SIGTERM, lambda signum, frame: retire())
+        server.serve_forever()
+        self._drain(slot)
+        stop_saving.set()
+        changes.save_snapshot(changes_path)
+
+    def _drain(self, slot):
+        """Wait for a retiring worker's in-flight requests; returns False if the timeout ran out first"""
+        # Request threads are daemons, so exiting now would cut off their responses
+        deadline = time.monotonic() + self.drain_timeout
+        while self.table.in_flight(slot) > 0:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Worker slot {slot} exiting with {self.table.in_flight(slot)} requests in flight")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def _worker_features_path(self, slot):
+        root, ext = os.path.splitext(self.app_module.zos_config['feature_snapshot'])
+        return f"{root}-worker{slot}{ext}"
+
+    def _fold_worker_features(self, slot):
+        """Merge an exited worker's feature updates into the master's store, which later workers fork from"""
+        from zos_ml_demo.utils.zos_feature_store import AccountFeatureStore
+        path = self._worker_features_path(slot)
+        if not os.path.exists(path):
+            return
+        try:
+            self.app_module.components.get('feature_store').merge(AccountFeatureStore.load_snapshot(path))
+        except Exception as e:
+            logger.error(f"Folding worker slot {slot} feature updates failed: {str(e)}")
+        os.remove(path)
+
+    def _save_features(self):
+        """Write the feature snapshot: the master's store plus every live worker's updates"""
+        from zos_ml_demo.utils.zos_feature_store import AccountFeatureStore
+        merged = AccountFeatureStore().merge(self.app_module.components.get('feature_store'))
+        for slot in sorted(self.worker_pids.values()):
+            path = self._worker_features_path(slot)
+            if os.path.exists(path):
+                try:
+                    merged.merge(AccountFeatureStore.load_snapshot(path))
+                except Exception as e:
+                    logger.error(f"Reading worker slot {slot} feature updates failed: {str(e)}")
+        return merged.save_snapshot(self.app_module.zos_config['feature_snapshot'])
+
+    def _spawn_worker(self, slot):
+        pid = self._fork(self._run_worker, slot)
+        self.worker_pids[pid] = slot
+        logger.info(f"Started worker {pid} in slot {slot}")
+
+    def _spawn_sidecar(self):
+        self.sidecar_pid = self._fork(self._run_sidecar)
+        logger.info(f"Started monitoring sidecar {self.sidecar_pid}")
+
+    def _reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid == self.sidecar_pid:
+                self.sidecar_pid = None
+                if not self._stopping:
+                    logger.warning("Monitoring sidecar exited; restarting")
+                    self._spawn_sidecar()
+            elif pid in self.worker_pids:
+                slot = self.worker_pids.pop(pid)
+                self._fold_worker_features(slot)
+                if not self._stopping:
+                    self._spawn_worker(slot)
+
+    def _signal_children(self, signum):
+        for pid in list(self.worker_pids) + ([self.sidecar_pid] if self.sidecar_pid else []):
+            try:
+                os.kill(pid, signum)
+            except OSError as e:
+                if e.errno != errno.ESRCH:
+                    raise
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_hup(self, signum, frame):
+        self._recycle_all = True
+
+    def run(self):
+        directory = os.path.join(tempfile.gettempdir(), 'mlapp')
+        os.makedirs(directory, exist_ok=True)
+        self.sidecar_metrics_path = os.path.join(directory, f"sidecar-{os.getpid()}.prom")
+        self.socket = self._bind()
+        self.app_module = self._preload()
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_hup)
+        logger.info(f"Master {os.getpid()} listening on {self.host}:{self.port} with {self.workers} workers")
+        for slot in range(self.workers):
+            # Left by a master that did not shut down cleanly; its last snapshot already counted them
+            path = self._worker_features_path(slot)
+            if os.path.exists(path):
+                os.remove(path)
+
+        self._spawn_sidecar()
+        for slot in range(self.workers):
+            self._spawn_worker(slot)
+
+        next_report = time.monotonic() + self.report_interval
+        next_feature_save = time.monotonic() + self.feature_save_interval
+        while not self._stopping:
+            self._reap()
+            if self._recycle_all:
+                # SIGHUP: graceful rolling restart of every worker
+                self._recycle_all = False
+                for pid in list(self.worker_pids):
+                    os.kill(pid, signal.SIGTERM)
+            if time.monotonic() >= next_report:
+                next_report += self.report_interval
+                for worker in self.table.report()['workers']:
+                    logger.info(
+                        f"Worker slot {worker['slot']} pid {worker['pid']}: {worker['requests']} requests, "
+                        f"{worker['in_flight']} in flight, {worker['errors']} errors")
+            if time.monotonic() >= next_feature_save:
+                next_feature_save += self.feature_save_interval
+                self._save_features()
+            time.sleep(0.5)
+
+        logger.info("Shutting down workers")
+        self._signal_children(signal.SIGTERM)
+        deadline = time.monotonic() + 30
+        while (self.worker_pids or self.sidecar_pid) and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        self._signal_children(signal.SIGKILL)
+        self._save_features()
+        self.socket.close()
+        if os.path.exists(self.sidecar_metrics_path):
+            os.remove(self.sidecar_metrics_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5002)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--max-requests', type=int, default=10000, help='recycle a worker after this many requests (0 = never)')
+    parser.add_argument('--max-requests-jitter', type=int, default=1000)
+    parser.add_argument('--report-interval', type=float, default=60.0, help='seconds between worker load log lines')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not hasattr(os, 'fork'):
+        sys.exit("The pre-fork server requires os.fork")
+    PreforkServer(args.host, args.port, args.workers, args.max_requests,
+                  args.max_requests_jitter, report_interval=args.report_interval).run()
+
+
+if __name__ == '__main__':
+    main()
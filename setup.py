@@ -16,4 +16,7 @@ setup(
         "typing-extensions>=4.9.0",
     ],
     python_requires=">=3.9",
+    entry_points={
+        "console_scripts": ["zos-ml-batch=zos_ml_demo.batch:main"],
+    },
 )
@@ -0,0 +1,312 @@
+"""
+Microbenchmarks for the model, feature and monitoring hot paths
+
+Each case times one call of a hot function across input sizes and reports
+ns/op (best of several repeats) plus tracemalloc figures per op: the peak
+of transient allocations during a single call and the bytes still held
+after many calls.  Results are saved next to the tests so every
+optimization can quote a before/after number.
+
+    python tests/microbench.py                                  # print results
+    python tests/microbench.py --save                           # update tests/microbench_results.json
+    python tests/microbench.py --baseline tests/microbench_results.json --tolerance 0.3
+    python tests/microbench.py --case racf_verify audit_hash
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+
+RESULTS = os.path.join(ROOT, 'tests', 'microbench_results.json')
+
+
+def _transactions(rows, seed=7):
+    """amount, time_of_day, transaction_type rows"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.lognormal(5.0, 1.0, rows),
+        rng.integers(0, 24, rows),
+        rng.integers(1, 4, rows)
+    ]).astype(float)
+
+
+def _series(length, seed=3):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(10, 95, length).tolist()
+
+
+# Each case: sizes to run, and setup(size) returning a zero-argument call
+
+def setup_model_train(rows):
+    from ml_model import TransactionAnalyzer
+    data = _transactions(rows)
+    return lambda: TransactionAnalyzer().train(data)
+
+
+def setup_model_predict(rows):
+    from ml_model import TransactionAnalyzer
+    analyzer = TransactionAnalyzer()
+    analyzer.train(_transactions(rows))
+    transaction = [150.0, 13.0, 1.0]
+    return lambda: analyzer.predict(transaction)
+
+
+def setup_scaler_transform(rows):
+    from ml_model import TransactionAnalyzer
+    analyzer = TransactionAnalyzer()
+    analyzer.prepare_features(_transactions(1000))
+    data = _transactions(rows, seed=11)
+    return lambda: analyzer.scaler.transform(data)
+
+
+def setup_analyzer_train(rows):
+    from zos_ml_demo.ml_model import TransactionAnalyzer
+    data = _transactions(rows).tolist()
+
+    def train():
+        analyzer = TransactionAnalyzer()
+        analyzer.training_data = data
+        analyzer.train()
+    return train
+
+
+def setup_analyzer_analyze(rows):
+    from zos_ml_demo.ml_model import TransactionAnalyzer
+    analyzer = TransactionAnalyzer()
+    analyzer.training_data = _transactions(rows).tolist()
+    analyzer.train()
+    transaction = [150.0, 13.0, 1.0]
+    return lambda: analyzer.analyze(transaction)
+
+
+def setup_record_transaction(history):
+    from zos_ml_demo.utils.zos_monitoring import SystemMonitor
+    monitor = SystemMonitor({})
+    for _ in range(history):
+        monitor.record_transaction(0.0, 0.05, True)
+    return lambda: monitor.record_transaction(0.0, 0.05, True)
+
+
+def setup_analyze_performance(length):
+    from zos_ml_demo.utils.zos_performance_analyzer import PerformanceAnalyzer
+    analyzer = PerformanceAnalyzer()
+    metrics = {
+        'cpu_usage': _series(length),
+        'memory_usage': _series(length, seed=4),
+        'response_times': _series(length, seed=5),
+        'io_wait': _series(length, seed=6)
+    }
+    return lambda: analyzer.analyze_performance(metrics)
+
+
+def setup_racf_verify(events):
+    from zos_ml_demo.utils.zos_security_manager import ZOSSecurityManager
+    manager = ZOSSecurityManager({})
+    for _ in range(events):
+        manager.verify_racf_permissions('MLAPPADM', 'MLAPP.ANALYZE', 'READ')
+    return lambda: manager.verify_racf_permissions('MLAPPADM', 'MLAPP.ANALYZE', 'READ')
+
+
+def setup_audit_hash(fields):
+    from zos_ml_demo.utils.zos_security_manager import ZOSSecurityManager
+    manager = ZOSSecurityManager({})
+    record = {f'field_{i:04d}': i * 1.5 for i in range(fields)}
+    return lambda: manager._generate_audit_hash(record)
+
+
+def setup_snapshot_lookup(max_age):
+    from zos_ml_demo.utils.zos_snapshot_cache import SnapshotCache
+    cache = SnapshotCache({'health': max_age})
+    payload = {'status': 'healthy', 'metrics': {'cpu': 12.5, 'memory': 40.0}}
+    cache.get_or_build('health', lambda: payload)
+    return lambda: cache.get_or_build('health', lambda: payload).matches('"1-0000"')
+
+
+def _records(count):
+    types = ('TRANSFER', 'PAYMENT', 'WITHDRAWAL', 'DEPOSIT')
+    return [{'amount': 10.0 + i, 'type': types[i % 4], 'source_account': f'ACCT{i % 97:04d}',
+             'target_account': 'CHECKING', 'timestamp': f'2025-02-28T{i % 24:02d}:15:00Z'}
+            for i in range(count)]
+
+
+def setup_validate_record(_):
+    from zos_ml_demo.utils.zos_transaction_schema import TransactionValidator
+    validator = TransactionValidator()
+    record = _records(1)[0]
+    row = validator.new_rows(1)[0]
+    return lambda: validator.validate_into(record, row)
+
+
+def setup_validate_batch(count):
+    from zos_ml_demo.utils.zos_transaction_schema import TransactionValidator
+    validator = TransactionValidator()
+    records = _records(count)
+    out = validator.new_rows(count)
+    return lambda: validator.validate_batch(records, out)
+
+
+def setup_fb_decode(records):
+    import tempfile
+    from zos_ml_demo.utils.zos_record_io import DCB, DatasetReader, RecordLayout, write_records
+    layout = RecordLayout([('account', 8), ('amount', 6, 'packed', 2), ('count', 4, 'binary'), ('name', 20)])
+    columns = {'account': ['ACCT0001'] * records, 'amount': _series(records), 'count': list(range(records)),
+               'name': ['CHECKING'] * records}
+    path = os.path.join(tempfile.mkdtemp(), 'MLAPP.BENCH')
+    write_records(path, layout.encode(columns, 40), DCB('FB', 40, 27920), layout)
+    reader = DatasetReader(path, layout=layout)
+    return lambda: layout.decode(reader.records())
+
+
+def setup_pdse_load(members):
+    import tempfile
+    from zos_ml_demo.utils.zos_pdse import PDSELibrary
+    path = os.path.join(tempfile.mkdtemp(), 'MLAPP.MODELS.PDSE')
+    PDSELibrary(path, sync=False).update({f'SEG{i:05d}': bytes(256) for i in range(members)})
+
+    def load():
+        # Startup: open the library and view every member
+        with PDSELibrary(path) as library:
+            return [library.read(name) for name in library.members()]
+    return load
+
+
+CASES = {
+    'model_train': ([100, 1000, 10000], setup_model_train),
+    'model_predict': ([1000], setup_model_predict),
+    'scaler_transform': ([1, 100, 10000], setup_scaler_transform),
+    'analyzer_train': ([100, 1000], setup_analyzer_train),
+    'analyzer_analyze': ([1000], setup_analyzer_analyze),
+    'record_transaction': ([0, 60], setup_record_transaction),
+    'analyze_performance': ([10, 60, 1000], setup_analyze_performance),
+    'racf_verify': ([0, 1000], setup_racf_verify),
+    'audit_hash': ([10, 100, 1000], setup_audit_hash),
+    'snapshot_lookup': ([3600], setup_snapshot_lookup),
+    'validate_record': ([1], setup_validate_record),
+    'validate_batch': ([100, 1000], setup_validate_batch),
+    'fb_decode': ([1000, 100000], setup_fb_decode),
+    'pdse_load': ([100, 5000], setup_pdse_load)
+}
+
+
+def time_per_op(call, min_time=0.2, repeat=3):
+    """Best-of-repeat nanoseconds per call, batching calls to fill min_time"""
+    number = 1
+    while True:
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter_ns() - started
+        if elapsed >= min_time * 1e9 or number >= 1 << 20:
+            break
+        number = max(number * 2, int(number * min_time * 1e9 / max(elapsed, 1)))
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            call()
+        best = min(best, (time.perf_counter_ns() - started) / number)
+    return best, number
+
+
+def memory_per_op(call, calls=50):
+    """(peak transient bytes of one call, bytes retained per call over many calls)"""
+    tracemalloc.start()
+    try:
+        call()
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        call()
+        current, peak = tracemalloc.get_traced_memory()
+        peak_bytes = peak - before
+        before = current
+        for _ in range(calls):
+            call()
+        retained = (tracemalloc.get_traced_memory()[0] - before) / calls
+    finally:
+        tracemalloc.stop()
+    return peak_bytes, retained
+
+
+def run_case(name, sizes=None, min_time=0.2, repeat=3):
+    default_sizes, setup = CASES[name]
+    results = {}
+    for size in sizes or default_sizes:
+        call = setup(size)
+        call()  # warm-up
+        ns, number = time_per_op(call, min_time, repeat)
+        peak, retained = memory_per_op(call, calls=min(50, number))
+        results[str(size)] = {
+            'ns_per_op': ns,
+            'ops_timed': number,
+            'peak_bytes_per_op': peak,
+            'retained_bytes_per_op': retained
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, sizes in results['cases'].items():
+        for size, result in sizes.items():
+            base = baseline.get('cases', {}).get(name, {}).get(size)
+            if base and result['ns_per_op'] > base['ns_per_op'] * (1 + tolerance):
+                failures.append(f"{name}[{size}]: {result['ns_per_op']:.0f} ns/op "
+                                f"> baseline {base['ns_per_op']:.0f} ns/op")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', nargs='+', choices=sorted(CASES), default=list(CASES))
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per timing repeat')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', help='write results JSON to this file')
+    parser.add_argument('--save', action='store_true', help=f'merge the cases run into {RESULTS}')
+    parser.add_argument('--baseline', help='fail when a case is slower than this results file')
+    parser.add_argument('--tolerance', type=float, default=0.3)
+    args = parser.parse_args()
+
+    results = {
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__, 'cpus': os.cpu_count()},
+        'cases': {}
+    }
+    for name in args.case:
+        results['cases'][name] = run_case(name, min_time=args.min_time, repeat=args.repeat)
+        for size, result in results['cases'][name].items():
+            print(f"{name:<20} {size:>6}  {result['ns_per_op']:>14,.0f} ns/op  "
+                  f"peak {result['peak_bytes_per_op']:>10,} B  retained {result['retained_bytes_per_op']:>10,.0f} B/op",
+                  file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write('\n')
+    if args.save:
+        saved = {'cases': {}}
+        if os.path.exists(RESULTS):
+            with open(RESULTS) as f:
+                saved = json.load(f)
+        saved['environment'] = results['environment']
+        saved['cases'].update(results['cases'])
+        with open(RESULTS, 'w') as f:
+            json.dump(saved, f, indent=2)
+            f.write('\n')
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
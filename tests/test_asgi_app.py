@@ -0,0 +1,125 @@
+import json
+import time
+import asyncio
+import pytest
+import app as wsgi_app
+from asgi_app import app, io_executor
+from zos_ml_demo.utils.zos_wlm import WorkloadManager
+
+def call(method, path, payload=None, headers=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    scope = {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+async def call_async(method, path, headers=None):
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': method, 'path': path,
+             'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]}
+    await app(scope, receive, send)
+    return sent[0]['status']
+
+def test_analyze_transaction():
+    status, data = call('POST', '/api/analyze', {
+        'transaction': {
+            'amount': 1000.00,
+            'type': 'TRANSFER',
+            'source_account': 'SAVINGS',
+            'target_account': 'CHECKING',
+            'timestamp': '2025-02-28T12:00:00Z'
+        }
+    }, {'X-User-ID': 'MLAPPADM'})
+    assert status == 200
+    assert 'risk_score' in data['analysis']
+
+def test_analyze_rejects_missing_fields():
+    status, data = call('POST', '/api/analyze', {'transaction': {'amount': 1}}, {'X-User-ID': 'MLAPPADM'})
+    assert status == 400
+    assert data['error'].startswith('Missing required field')
+
+def test_security_status():
+    status, data = call('GET', '/api/security', headers={'X-User-ID': 'MLAPPADM'})
+    assert status == 200
+    assert 'event_analysis' in data
+
+@pytest.mark.parametrize('method,path,expected', [('GET', '/api/unknown', 404), ('GET', '/api/analyze', 405)])
+def test_routing_errors(method, path, expected):
+    assert call(method, path)[0] == expected
+
+@pytest.fixture
+def wlm(monkeypatch):
+    """A WorkloadManager of the test's own, so queue state never leaks between tests"""
+    manager = WorkloadManager.from_config(wsgi_app.zos_config)
+    monkeypatch.setattr(wsgi_app, 'wlm', manager)
+    return manager
+
+def test_queued_requests_do_not_starve_admitted_ones(wlm):
+    report = wlm.classes['MLREPORT']
+    queued = io_executor._max_workers + 8
+    held = [wlm.acquire('MLREPORT') for _ in range(report.max_concurrent)]
+    report.queue_limit, report.max_queue_wait = queued, 5.0
+
+    async def scenario():
+        waiting = [asyncio.ensure_future(call_async('GET', '/api/security', {'X-User-ID': 'MLAPPADM'}))
+                   for _ in range(queued)]
+        try:
+            for _ in range(200):
+                if report.waiting == queued:
+                    break
+                await asyncio.sleep(0.01)
+            assert report.waiting == queued
+            # A health probe whose snapshot must be rebuilt needs an I/O thread
+            wsgi_app.snapshots.invalidate('health')
+            health = await asyncio.wait_for(call_async('GET', '/api/health'), 2.0)
+        finally:
+            for ticket in held:
+                wlm.release(ticket)
+        return health, await asyncio.gather(*waiting)
+
+    health, reports = asyncio.run(scenario())
+    assert health == 200 and set(reports) == {200}
+
+def test_cancelled_queued_request_releases_its_slot(wlm):
+    report = wlm.classes['MLREPORT']
+    held = [wlm.acquire('MLREPORT') for _ in range(report.max_concurrent)]
+    report.max_queue_wait = 5.0
+
+    async def scenario():
+        waiting = asyncio.ensure_future(call_async('GET', '/api/security', {'X-User-ID': 'MLAPPADM'}))
+        for _ in range(200):
+            if report.waiting == 1:
+                break
+            await asyncio.sleep(0.01)
+        assert report.waiting == 1
+        # The client disconnects while its admission wait is still blocked on a pool thread
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    asyncio.run(scenario())
+    for ticket in held:
+        wlm.release(ticket)
+    deadline = time.monotonic() + 2.0
+    while (report.waiting or report.in_flight) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert report.waiting == 0 and report.in_flight == 0 and wlm.in_flight == 0
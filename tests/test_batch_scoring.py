@@ -0,0 +1,93 @@
+import os
+import json
+import pytest
+from zos_ml_demo import batch
+from zos_ml_demo.utils.zos_gdg import GenerationDataGroup
+from zos_ml_demo.utils.zos_record_io import RecordLayout
+
+TYPES = ['TRANSFER', 'PAYMENT', 'WITHDRAWAL', 'DEPOSIT']
+
+def write_csv(path, rows, bad_every=100):
+    with open(path, 'w') as f:
+        f.write('transaction_id,amount,type,source_account,target_account,timestamp\n')
+        for i in range(rows):
+            amount = 'n/a' if i % bad_every == 0 else f"{50 + (i * 37) % 900}.25"
+            f.write(f"T{i:015d},{amount},{TYPES[i % 4]},ACCT{i % 50:04d},CHECKING,2025-02-28T{i % 24:02d}:15:00Z\n")
+
+def write_fb(path, rows, encoding='cp037'):
+    records = [f"T{i:015d}{100 + i:15.2f}{TYPES[i % 4]:<10}{'SAVINGS':<16}{'CHECKING':<16}"
+               f"{'2025-02-28T%02d:00:00.000000' % (i % 24):<26}" for i in range(rows)]
+    with open(path, 'wb') as f:
+        f.write(''.join(records).encode(encoding))
+
+def test_csv_scoring_covers_every_row_and_reports_invalid(tmp_path):
+    write_csv(tmp_path / 'in.csv', 1000)
+    summary = batch.run(tmp_path / 'in.csv', tmp_path / 'out', chunk_rows=150, workers=2, train_rows=200)
+    assert summary['rows'] == 1000 and summary['invalid'] == 10
+    assert summary['chunks'] > 5 and summary['steps']['score']['rows_per_sec'] > 0
+    with open(summary['results']) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 1001
+    assert sorted(line.split(',')[0] for line in lines[1:]) == [f"T{i:015d}" for i in range(1000)]
+    assert lines[1].endswith('E,0.0000,Field amount must be a number')
+
+def test_rerun_resumes_from_checkpoints(tmp_path):
+    write_csv(tmp_path / 'in.csv', 600)
+    out = tmp_path / 'out'
+    first = batch.run(tmp_path / 'in.csv', out, chunk_rows=100, workers=1, train_rows=100)
+    os.remove(batch.part_path(out, 2, 'json'))
+    second = batch.run(tmp_path / 'in.csv', out, chunk_rows=100, workers=1, train_rows=100)
+    assert second['steps']['train']['skipped']
+    assert second['steps']['score']['chunks_skipped'] == first['chunks'] - 1
+    assert {k: second[k] for k in ('rows', 'anomalies', 'risk_mean')} == {k: first[k] for k in ('rows', 'anomalies', 'risk_mean')}
+
+def test_changed_settings_refuse_stale_checkpoints(tmp_path):
+    write_csv(tmp_path / 'in.csv', 300)
+    batch.run(tmp_path / 'in.csv', tmp_path / 'out', chunk_rows=100, workers=1, train_rows=100)
+    with pytest.raises(ValueError, match='--restart'):
+        batch.run(tmp_path / 'in.csv', tmp_path / 'out', chunk_rows=50, workers=1, train_rows=100)
+    assert batch.run(tmp_path / 'in.csv', tmp_path / 'out', chunk_rows=50, workers=1, train_rows=100,
+                     restart=True)['rows'] == 300
+
+def test_ebcdic_fb_records_round_trip(tmp_path):
+    write_fb(tmp_path / 'in.fb', 500)
+    summary = batch.run(tmp_path / 'in.fb', tmp_path / 'out', fmt='fb', encoding='cp037',
+                        chunk_rows=128, workers=1, train_rows=100)
+    assert summary['rows'] == 500 and summary['invalid'] == 0
+    with open(summary['results'], 'rb') as f:
+        results = f.read().decode('cp037')
+    assert len(results) == 500 * RecordLayout(batch.RESULT_LAYOUT).itemsize
+    assert results[:16] == 'T000000000000000' and results[16] in 'AN'
+
+def test_cli_return_codes(tmp_path):
+    write_csv(tmp_path / 'in.csv', 300)
+    args = [str(tmp_path / 'in.csv'), str(tmp_path / 'out'), '--chunk-rows', '100', '--workers', '1', '--train-rows', '100']
+    assert batch.main(args) == 4
+    assert json.loads((tmp_path / 'out' / 'summary.json').read_text())['invalid'] == 3
+    assert batch.main([str(tmp_path / 'missing.csv'), str(tmp_path / 'other')]) == 8
+
+def test_unexpected_failure_ends_with_rc_8(tmp_path, monkeypatch):
+    def crash(*args):
+        raise RuntimeError('A process in the process pool was terminated abruptly')
+    monkeypatch.setattr(batch, 'run', crash)
+    assert batch.main([str(tmp_path / 'in.csv'), str(tmp_path / 'out')]) == 8
+
+def test_generation_data_group_input_output_and_model(tmp_path, monkeypatch):
+    settings, schema = batch.load_settings()
+    settings['dataset_directory'] = str(tmp_path)
+    monkeypatch.setattr(batch, 'load_settings', lambda: (dict(settings), schema))
+    write_csv(tmp_path / 'in.csv', 300)
+    first = batch.run(tmp_path / 'in.csv', 'MLAPP.SCORES(+1)', chunk_rows=100, workers=1, train_rows=100,
+                      save_model='MLAPP.MODELS')
+    assert first['generation'] == 'MLAPP.SCORES.G0001V00'
+    assert first['steps']['train']['generation'] == 'MLAPP.MODELS.G0001V00'
+    assert first['results'] == str(tmp_path / 'MLAPP.SCORES.G0001V00' / 'results.csv')
+    assert os.path.exists(first['results']) and not os.path.exists(tmp_path / 'MLAPP.SCORES.PENDING')
+    # Score the input, cataloged as a generation of its own, with the cataloged model
+    GenerationDataGroup(str(tmp_path), 'MLAPP.DATA').roll_in(str(tmp_path / 'in.csv'), copy=True)
+    second = batch.run('MLAPP.DATA(0)', 'MLAPP.SCORES(+1)', chunk_rows=100, workers=1, model='MLAPP.MODELS(0)')
+    assert second['generation'] == 'MLAPP.SCORES.G0002V00'
+    assert second['steps']['train']['source'] == str(tmp_path / 'MLAPP.MODELS.G0001V00')
+    assert second['anomalies'] == first['anomalies']
+    with pytest.raises(ValueError, match=r'\(\+1\)'):
+        batch.run(tmp_path / 'in.csv', 'MLAPP.SCORES(0)', workers=1)
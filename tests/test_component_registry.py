@@ -0,0 +1,42 @@
+import os
+import sys
+import subprocess
+import pytest
+from zos_ml_demo.utils.zos_component_registry import ComponentRegistry
+
+class Counter:
+    created = 0
+
+    def __init__(self, *args):
+        Counter.created += 1
+        self.args = args
+
+def test_components_are_built_once_on_first_use():
+    Counter.created = 0
+    registry = ComponentRegistry()
+    registry.register('base', Counter, ('config',))
+    registry.register('child', Counter, depends_on=('base',))
+    child = registry.proxy('child')
+    assert Counter.created == 0
+    assert child.args[0] is registry.get('base')
+    assert registry.get('child') is registry.get('child')
+    assert Counter.created == 2
+    assert sorted(registry.initialized()) == ['base', 'child']
+
+def test_string_factories_import_lazily():
+    registry = ComponentRegistry()
+    registry.register('decoder', 'json.decoder:JSONDecoder')
+    assert registry.get('decoder').decode('[1]') == [1]
+
+def test_circular_dependencies_are_reported():
+    registry = ComponentRegistry()
+    registry.register('a', Counter, depends_on=('b',))
+    registry.register('b', Counter, depends_on=('a',))
+    with pytest.raises(RuntimeError, match='a -> b -> a'):
+        registry.get('a')
+
+def test_importing_app_defers_heavy_modules():
+    code = "import sys, app; print('sklearn' in sys.modules, 'psutil' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.split() == ['False', 'False']
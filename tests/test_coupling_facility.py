@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+import pytest
+from zos_ml_demo.utils.zos_coupling_facility import (
+    CouplingFacilityServer, CouplingFacility, VersionConflict, CouplingFacilityError)
+from zos_ml_demo.utils.zos_advanced_subsystems import ZOSParallelSysplex
+
+@pytest.fixture
+def facility():
+    server = CouplingFacilityServer()
+    host, port = server.start()
+    connections = []
+
+    def connect():
+        connection = CouplingFacility(host, port, timeout=2.0)
+        connections.append(connection)
+        return connection
+    yield server, connect
+    for connection in connections:
+        connection.close()
+    server.stop()
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_local_copies_are_cross_invalidated(facility):
+    server, connect = facility
+    first, second = connect().cache('MODELS'), connect().cache('MODELS')
+    invalidated = []
+    second.on_invalidate(lambda name, version: invalidated.append((name, version)))
+    version = first.write('current', {'generation': 'G0001V00'})
+    assert second.get('current') == {'generation': 'G0001V00'}
+    # Repeated reads are served from the local copy
+    assert second.read('current') == (version, {'generation': 'G0001V00'})
+    assert second.stats == dict(second.stats, local_hits=1, cf_reads=1)
+    newer = first.write('current', {'generation': 'G0002V00'})
+    assert wait_for(lambda: invalidated)
+    assert invalidated == [('current', newer)]
+    assert second.get('current') == {'generation': 'G0002V00'}
+    # The writer keeps its own copy and is not invalidated by its own write
+    assert first.stats['cross_invalidations'] == 0 and first.get('current') == {'generation': 'G0002V00'}
+    assert server.stats['cross_invalidations'] == 1
+
+def test_conditional_write_detects_conflicts(facility):
+    _, connect = facility
+    first, second = connect().cache('RACF'), connect().cache('RACF')
+    version = first.write('MLAPPUSR', {'granted': True})
+    assert second.write('MLAPPUSR', {'granted': False}, expected_version=version) > version
+    with pytest.raises(VersionConflict):
+        first.write('MLAPPUSR', {'granted': True}, expected_version=version)
+    assert first.delete('MLAPPUSR')
+    assert wait_for(lambda: second.get('MLAPPUSR') is None)
+
+def test_increments_are_atomic_across_instances(facility):
+    _, connect = facility
+    caches = [connect().cache('ACCOUNTS') for _ in range(4)]
+
+    def add(cache):
+        for _ in range(50):
+            cache.increment('ACCT0001', count=1, amount=2.5)
+
+    threads = [threading.Thread(target=add, args=(cache,)) for cache in caches]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert connect().cache('ACCOUNTS').get('ACCT0001') == {'count': 200, 'amount': 500.0}
+
+def test_list_structure_and_transitions(facility):
+    _, connect = facility
+    producer, consumer = connect().list_structure('WORK'), connect().list_structure('WORK')
+    transitions = []
+    assert consumer.on_transition('RETRAIN', lambda name, length: transitions.append(name)) == 0
+    producer.push('RETRAIN', {'segment': 1})
+    producer.push('RETRAIN', {'segment': 2})
+    producer.push('RETRAIN', {'segment': 0}, end='head')
+    assert wait_for(lambda: transitions)
+    assert transitions == ['RETRAIN']
+    assert consumer.items('RETRAIN') == [{'segment': 0}, {'segment': 1}, {'segment': 2}]
+    assert [consumer.pop('RETRAIN') for _ in range(4)] == [{'segment': 0}, {'segment': 1}, {'segment': 2}, None]
+
+def test_lost_connection_drops_local_copies(facility):
+    server, connect = facility
+    connection = connect()
+    cache = connection.cache('MODELS')
+    cache.write('current', 1)
+    assert cache.read('current') == (1, 1) and cache.stats['local_hits'] == 1
+    server.stop()
+    # Without the CF's cross-invalidations the local copy is no longer trusted
+    assert wait_for(lambda: not cache._local)
+    with pytest.raises(OSError):
+        cache.get('current')
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_forked_child_connects_again(facility):
+    server, connect = facility
+    connection = connect()
+    cache = connection.cache('MODELS')
+    cache.write('current', 1)
+    assert cache.read('current') == (1, 1)
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            # The inherited socket's replies would go to the parent's reader thread
+            if not cache._local and cache.write('current', 2) and connection.cache('MODELS').read('current')[1] == 2:
+                code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    # The parent keeps its connection, and the child's write cross-invalidated its copy
+    assert wait_for(lambda: not cache._local)
+    assert cache.read('current')[1] == 2
+
+def test_unknown_operation_is_rejected(facility):
+    _, connect = facility
+    with pytest.raises(CouplingFacilityError):
+        connect().request('rebuild')
+
+def test_sysplex_updates_coupling_facility(facility):
+    server, _ = facility
+    sysplex = ZOSParallelSysplex({'coupling_facility': {'host': server.host, 'port': server.port}})
+    assert sysplex.update_coupling_facility('MODELS', {'current': 'G0003V00'})
+    assert sysplex.cache_structure('MODELS').get('current') == 'G0003V00'
+    assert not ZOSParallelSysplex({}).update_coupling_facility('MODELS', {'current': 'G0003V00'})
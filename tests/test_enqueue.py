@@ -0,0 +1,125 @@
+import time
+import threading
+import subprocess
+import sys
+import pytest
+from zos_ml_demo.utils.zos_enqueue import (
+    EnqueueManager, EnqueueError, EnqueueTimeoutError, DeadlockError, SHARED, EXCLUSIVE, SYSTEM, dataset_resource)
+from zos_ml_demo.utils.zos_resource_manager import ZOSResourceManager
+
+def in_thread(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.001)
+    return condition()
+
+def test_shared_holders_and_fifo_exclusive_grant():
+    manager = EnqueueManager()
+    reader = manager.enq('MLAPP.MODELS', SHARED)
+    order = []
+
+    def request(mode, name):
+        with manager.enqueue('MLAPP.MODELS', mode):
+            order.append(name)
+
+    writer = in_thread(request, EXCLUSIVE, 'writer')
+    assert wait_until(lambda: manager.contention()[0]['waiters'] == 1)
+    # A shared request queued behind the writer waits for it rather than starving it
+    late_reader = in_thread(request, SHARED, 'late reader')
+    assert wait_until(lambda: manager.contention()[0]['waiters'] == 2)
+    assert order == []
+    reader.release()
+    writer.join(2)
+    late_reader.join(2)
+    assert order == ['writer', 'late reader']
+    stats = manager.contention()[0]
+    assert stats['acquisitions'] == 3 and stats['contended'] == 2 and stats['holders'] == 0
+    assert stats['max_wait_seconds'] > 0 and stats['hold_seconds'] >= stats['max_hold_seconds'] > 0
+
+def test_nested_holds_timeouts_and_upgrades():
+    manager = EnqueueManager(timeout=0.05)
+    with manager.enqueue('MLAPP.CONFIG'):
+        with manager.enqueue('MLAPP.CONFIG', SHARED):
+            assert list(manager.holders('MLAPP.CONFIG').values()) == [EXCLUSIVE]
+        failures = []
+
+        def contend():
+            try:
+                manager.enq('MLAPP.CONFIG', SHARED)
+            except EnqueueTimeoutError as e:
+                failures.append(e)
+
+        in_thread(contend).join(2)
+        assert len(failures) == 1
+    assert manager.holders('MLAPP.CONFIG') == {}
+    with manager.enqueue('MLAPP.CONFIG', SHARED):
+        with pytest.raises(EnqueueError):
+            manager.enq('MLAPP.CONFIG', EXCLUSIVE)
+    assert manager.contention()[0]['timeouts'] == 1
+    with pytest.raises(ValueError):
+        manager.enq('MLAPP.CONFIG', 'update')
+
+def test_deadlock_is_detected_instead_of_hanging():
+    manager = EnqueueManager(timeout=5.0)
+    first_held = threading.Event()
+
+    def first():
+        with manager.enqueue('MLAPP.MODELS'):
+            first_held.set()
+            # Waits for MLAPP.DATA, which the main thread holds
+            with manager.enqueue('MLAPP.DATA'):
+                pass
+
+    with manager.enqueue('MLAPP.DATA'):
+        thread = in_thread(first)
+        assert first_held.wait(2)
+        assert wait_until(lambda: manager.contention()[0]['waiters'] == 1)
+        with pytest.raises(DeadlockError) as deadlock:
+            manager.enq('MLAPP.MODELS')
+    thread.join(2)
+    assert not thread.is_alive()
+    assert 'would deadlock' in str(deadlock.value)
+    assert {s['resource']: s['deadlocks'] for s in manager.contention()}['MLAPP.MODELS'] == 1
+
+LOCK_AND_HOLD = """
+import sys, time
+from zos_ml_demo.utils.zos_enqueue import EnqueueManager, SYSTEM
+manager = EnqueueManager(sys.argv[1])
+with manager.enqueue('SYSDSN.MLAPP.MODELS', scope=SYSTEM):
+    print('held', flush=True)
+    time.sleep(float(sys.argv[2]))
+"""
+
+def test_system_scope_serializes_processes(tmp_path):
+    holder = subprocess.Popen([sys.executable, '-c', LOCK_AND_HOLD, str(tmp_path), '0.5'], stdout=subprocess.PIPE, text=True)
+    try:
+        assert holder.stdout.readline().strip() == 'held'
+        manager = EnqueueManager(str(tmp_path))
+        with pytest.raises(EnqueueTimeoutError):
+            manager.enq('SYSDSN.MLAPP.MODELS', scope=SYSTEM, timeout=0.05)
+        # The process-level grant was given back when the file lock timed out
+        assert manager.holders('SYSDSN.MLAPP.MODELS') == {}
+        with manager.enqueue('SYSDSN.MLAPP.MODELS', scope=SYSTEM, timeout=5.0):
+            assert holder.poll() is not None or holder.wait(5) == 0
+        stats = manager.contention()[0]
+        assert stats['contended'] == 1 and stats['timeouts'] == 1 and stats['max_wait_seconds'] > 0.1
+    finally:
+        holder.kill()
+        holder.wait()
+
+def test_resource_manager_enqueue():
+    manager = ZOSResourceManager({})
+    resource = dataset_resource("'mlapp.models'")
+    assert resource == 'SYSDSN.MLAPP.MODELS'
+    assert manager.establish_enqueue(resource, timeout=1.0)
+    assert threading.get_ident() in manager.enqueues.holders(resource)
+    assert manager.release_enqueue(resource)
+    assert not manager.release_enqueue(resource)
+    with manager.enqueue(resource, SHARED):
+        assert list(manager.enqueues.holders(resource).values()) == [SHARED]
+    assert resource in [s['resource'] for s in manager.enqueue_contention()]
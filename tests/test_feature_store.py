@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from zos_ml_demo.utils.zos_feature_store import AccountFeatureStore, FEATURE_COLUMNS
+
+@pytest.fixture
+def store():
+    return AccountFeatureStore(initial_capacity=2)
+
+def test_rolling_statistics(store):
+    amounts = [100.0, 200.0, 300.0, 400.0]
+    for amount in amounts:
+        store.update('SAVINGS', amount, '2025-02-28T23:00:00Z')
+    features = store.get_account('SAVINGS')
+    assert features['txn_count'] == 4
+    assert features['amount_mean'] == pytest.approx(np.mean(amounts))
+    assert features['amount_std'] == pytest.approx(np.std(amounts, ddof=1))
+    assert features['typical_hour'] == pytest.approx(23.0, abs=1e-3)
+    assert store.get_account('UNKNOWN') is None
+
+def test_batch_update_matches_single_updates(store):
+    accounts = ['A', 'B', 'A', 'C', 'A', 'B']
+    amounts = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0]
+    timestamps = [1_700_000_000 + 3600 * i for i in range(6)]
+    store.update('A', 5.0, timestamps[0])
+    reference_with_prior = AccountFeatureStore()
+    reference_with_prior.update('A', 5.0, timestamps[0])
+    for account, amount, ts in zip(accounts, amounts, timestamps):
+        reference_with_prior.update(account, amount, ts)
+
+    store.update_batch(accounts, amounts, timestamps)
+    expected = reference_with_prior.get_features(['A', 'B', 'C', 'D'])
+    actual = store.get_features(['A', 'B', 'C', 'D'])
+    assert actual.shape == (4, len(FEATURE_COLUMNS))
+    np.testing.assert_allclose(actual, expected, rtol=1e-5)
+    assert not actual[3].any()
+
+def test_snapshot_round_trip(store, tmp_path):
+    store.update('SAVINGS', 100.0, 1_700_000_000)
+    store.update('CHECKING', 50.0, 1_700_003_600)
+    path = str(tmp_path / 'features.npz')
+    assert store.save_snapshot(path)
+    restored = AccountFeatureStore.load_snapshot(path)
+    assert len(restored) == 2
+    np.testing.assert_array_equal(restored.get_features(['SAVINGS', 'CHECKING']),
+                                  store.get_features(['SAVINGS', 'CHECKING']))
+
+def test_merging_tracked_changes_matches_one_store():
+    accounts = ['A', 'B', 'A', 'C', 'A', 'B', 'D']
+    amounts = [10.0, 20.0, 30.0, 40.0, 50.0, 60.0, 70.0]
+    timestamps = [1_700_000_000 + 3600 * i for i in range(7)]
+    reference = AccountFeatureStore()
+    for account, amount, ts in zip(accounts, amounts, timestamps):
+        reference.update(account, amount, ts)
+
+    base = AccountFeatureStore()
+    base.update('A', 10.0, timestamps[0])
+    # Two workers forked from base, each tracking only its own updates
+    workers = [AccountFeatureStore().merge(base), AccountFeatureStore().merge(base)]
+    changes = [worker.track_changes() for worker in workers]
+    workers[0].update_batch(accounts[1:4], amounts[1:4], timestamps[1:4])
+    for account, amount, ts in zip(accounts[4:], amounts[4:], timestamps[4:]):
+        workers[1].update(account, amount, ts)
+    assert len(changes[0]) == 3 and len(changes[1]) == 3
+
+    merged = AccountFeatureStore().merge(base)
+    for delta in changes:
+        merged.merge(delta)
+    names = ['A', 'B', 'C', 'D']
+    np.testing.assert_allclose(merged.get_features(names), reference.get_features(names), rtol=1e-5)
@@ -0,0 +1,97 @@
+import os
+import threading
+import pytest
+from zos_ml_demo.utils.zos_gdg import GenerationDataGroup, parse_generation_name
+from zos_ml_demo.utils.zos_advanced_subsystems import ZOSDatasetServices
+from zos_ml_demo.utils.zos_enqueue import EnqueueManager, SYSTEM, dataset_resource
+
+def write_generation(gdg, text):
+    with gdg.new_generation() as path:
+        with open(path, 'w') as f:
+            f.write(text)
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+def test_relative_references_and_rolloff(tmp_path):
+    gdg = GenerationDataGroup(str(tmp_path), 'mlapp.models', limit=3)
+    for version in range(1, 6):
+        write_generation(gdg, f'model {version}')
+    assert gdg.generations() == ['MLAPP.MODELS.G0003V00', 'MLAPP.MODELS.G0004V00', 'MLAPP.MODELS.G0005V00']
+    assert read(gdg.resolve(0)) == 'model 5'
+    assert read(gdg.resolve(-2)) == 'model 3'
+    # Rolled-off generations are scratched
+    assert not os.path.exists(tmp_path / 'MLAPP.MODELS.G0002V00')
+    with pytest.raises(LookupError):
+        gdg.resolve(-3)
+    with pytest.raises(ValueError):
+        gdg.resolve(1)
+
+def test_rollback_is_a_pointer_flip(tmp_path):
+    gdg = GenerationDataGroup(str(tmp_path), 'MLAPP.MODELS')
+    write_generation(gdg, 'good')
+    write_generation(gdg, 'bad')
+    newest = gdg.resolve(0)
+    inode = os.stat(newest).st_ino
+    assert gdg.rollback() == 'MLAPP.MODELS.G0001V00'
+    assert read(gdg.resolve(0)) == 'good'
+    # Nothing was copied or moved, and another reader sees the change
+    assert os.stat(newest).st_ino == inode
+    assert GenerationDataGroup(str(tmp_path), 'MLAPP.MODELS').current() == 'MLAPP.MODELS.G0001V00'
+    assert gdg.promote('MLAPP.MODELS.G0002V00') == 'MLAPP.MODELS.G0002V00'
+    assert read(gdg.resolve(0)) == 'bad'
+
+def test_failed_generation_is_not_cataloged(tmp_path):
+    gdg = GenerationDataGroup(str(tmp_path), 'MLAPP.SCORES')
+    with pytest.raises(RuntimeError):
+        with gdg.new_generation() as path:
+            os.makedirs(path)
+            raise RuntimeError('abend')
+    assert gdg.generations() == [] and not os.path.exists(gdg.pending_path())
+    with gdg.new_generation() as path:
+        os.makedirs(path)
+        open(os.path.join(path, 'results.csv'), 'w').close()
+    assert os.path.isfile(os.path.join(gdg.resolve(0), 'results.csv'))
+
+def test_parse_generation_name():
+    assert parse_generation_name("'mlapp.data(-1)'") == ('MLAPP.DATA', -1)
+    assert parse_generation_name('MLAPP.DATA(+1)') == ('MLAPP.DATA', 1)
+    assert parse_generation_name('out/run(1)/x.csv') == ('out/run(1)/x.csv', None)
+
+def test_dataset_services_generations(tmp_path):
+    services = ZOSDatasetServices({'dataset_directory': str(tmp_path), 'gdg_limit': 2})
+    assert services.define_generation_data_group('MLAPP.MODELS', limit=2)
+    for version in range(3):
+        source = tmp_path / f'model{version}'
+        source.write_text(str(version))
+        assert services.create_generation_dataset('MLAPP.MODELS', str(source)) == f'MLAPP.MODELS.G000{version + 1}V00'
+    assert read(services.resolve_generation('MLAPP.MODELS', -1)) == '1'
+    assert services.rollback_generation('MLAPP.MODELS') == 'MLAPP.MODELS.G0002V00'
+    assert services.rollback_generation('MLAPP.MODELS') is None
+    assert services.resolve_generation('MLAPP.MISSING') is None
+
+def test_enqueue_waits_do_not_count_against_the_breaker(tmp_path):
+    services = ZOSDatasetServices({'dataset_directory': str(tmp_path)})
+    services.enqueues = EnqueueManager(str(tmp_path / 'enq'), timeout=0.05)
+    source = tmp_path / 'model'
+    source.write_text('0')
+    stats = services.resilience.policy('DATASET').stats
+    calls, failures = stats['calls'], stats['failures']
+    held, done = threading.Event(), threading.Event()
+
+    def hold():
+        with services.enqueues.enqueue(dataset_resource('MLAPP.MODELS'), scope=SYSTEM):
+            held.set()
+            done.wait(2)
+
+    holder = threading.Thread(target=hold, daemon=True)
+    holder.start()
+    assert held.wait(2)
+    try:
+        assert services.create_generation_dataset('MLAPP.MODELS', str(source)) is None
+    finally:
+        done.set()
+        holder.join(2)
+    assert (stats['calls'], stats['failures']) == (calls, failures)
+    assert services.create_generation_dataset('MLAPP.MODELS', str(source)) == 'MLAPP.MODELS.G0001V00'
@@ -0,0 +1,29 @@
+import re
+import json
+from app import app
+from zos_ml_demo.utils import zos_json
+
+def test_transaction_ids_are_unique_and_uuid_shaped():
+    ids = {zos_json.new_transaction_id() for _ in range(10000)}
+    assert len(ids) == 10000
+    assert all(re.fullmatch(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', i) for i in ids)
+
+def test_timestamp_has_millisecond_resolution():
+    assert re.fullmatch(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}', zos_json.timestamp_now())
+
+def test_dumps_is_compact_bytes():
+    assert zos_json.dumps({'a': [1, 2.5, None], 'b': 'é'}) == '{"a":[1,2.5,null],"b":"é"}'.encode('utf-8')
+
+def test_provider_builds_json_responses():
+    with app.app_context():
+        response = zos_json.FastJSONProvider(app).response({'status': 'ok', 'count': 2})
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == {'status': 'ok', 'count': 2}
+
+def test_analyze_response_round_trips():
+    client = app.test_client()
+    response = client.post('/api/analyze', headers={'X-User-ID': 'MLAPPADM'}, json={'transaction': {
+        'amount': 1000.0, 'type': 'TRANSFER', 'source_account': 'SAVINGS',
+        'target_account': 'CHECKING', 'timestamp': '2025-02-28T12:00:00Z'}})
+    assert response.status_code == 200
+    assert 'transaction_id' in response.get_json()
@@ -0,0 +1,60 @@
+from app import app
+from zos_ml_demo.utils.zos_metrics_registry import MetricsRegistry, ExportedMetrics
+
+def test_render_counters_gauges_and_histograms():
+    registry = MetricsRegistry()
+    calls = registry.counter('calls_total', 'Calls', ('target',))
+    registry.gauge('depth', 'Queue depth').set(3)
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    calls.labels('DB2').inc()
+    calls.labels(target='say "hi"').inc(2)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    text = registry.render()
+    assert '# TYPE calls_total counter\ncalls_total{target="DB2"} 1\n' in text
+    assert 'calls_total{target="say \\"hi\\""} 2\n' in text
+    assert 'depth 3\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 2\n' in text
+    assert 'latency_seconds_count 2\n' in text
+
+def test_unchanged_series_reuse_cached_text():
+    registry = MetricsRegistry()
+    counter = registry.counter('hits_total', 'Hits', ('page',))
+    for page in range(100):
+        counter.labels(page).inc()
+    series = counter.labels(7)
+    first = series.render()
+    assert series.render() is first
+    series.inc()
+    assert series.render() == 'hits_total{page="7"} 2\n'
+
+def test_metrics_endpoint_exposes_transactions_and_security():
+    client = app.test_client()
+    client.post('/api/analyze', headers={'X-User-ID': 'MLAPPADM'}, json={'transaction': {
+        'amount': 10.0, 'type': 'TRANSFER', 'source_account': 'SAVINGS',
+        'target_account': 'CHECKING', 'timestamp': '2025-02-28T12:00:00Z'}})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    text = response.get_data(as_text=True)
+    assert 'zos_transactions_total ' in text
+    assert 'zos_racf_checks_total{resource="MLAPP.ANALYZE",result="granted"}' in text
+    assert 'zos_risk_score_count ' in text
+
+def test_families_delegated_to_another_process_export(tmp_path):
+    path = str(tmp_path / 'sidecar.prom')
+    sidecar, worker = MetricsRegistry(), MetricsRegistry()
+    for registry in (sidecar, worker):
+        registry.histogram('zos_scheduler_job_duration_seconds', 'Job run time', ('job',), buckets=(1.0,))
+        registry.counter('requests_total', 'Requests')
+    sidecar.histogram('zos_scheduler_job_duration_seconds', 'Job run time', ('job',)).labels('MLAPPMTR').observe(0.5)
+    worker.counter('requests_total', 'Requests').inc()
+    worker.delegate(('zos_scheduler_',), ExportedMetrics(path))
+    # Before the first export the family is simply absent
+    assert 'zos_scheduler' not in worker.render()
+    sidecar.export(path, ('zos_scheduler_',))
+    text = worker.render()
+    assert text.count('# TYPE zos_scheduler_job_duration_seconds histogram') == 1
+    assert 'zos_scheduler_job_duration_seconds_count{job="MLAPPMTR"} 1\n' in text
+    assert 'requests_total 1\n' in text and 'requests_total' not in open(path).read()
@@ -0,0 +1,16 @@
+import json
+import pytest
+from microbench import CASES, RESULTS, run_case, compare
+
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_case_reports_time_and_memory(name):
+    smallest = min(CASES[name][0])
+    result = run_case(name, sizes=[smallest], min_time=0.001, repeat=1)[str(smallest)]
+    assert result['ns_per_op'] > 0
+    assert result['peak_bytes_per_op'] >= 0
+
+def test_saved_results_cover_every_case():
+    with open(RESULTS) as f:
+        saved = json.load(f)
+    assert set(saved['cases']) == set(CASES)
+    assert compare(saved, saved, 0.0) == []
@@ -0,0 +1,67 @@
+import threading
+from collections import namedtuple
+import pytest
+import psutil
+from zos_ml_demo.utils.zos_monitoring_engine import MonitoringEngine
+from zos_ml_demo.utils.zos_scheduler import IntervalSchedule
+from zos_ml_demo.utils.zos_metrics_registry import get_metrics_registry
+from zos_ml_demo.utils.zos_monitoring import SystemMonitor
+
+def test_sources_are_collected_once_per_tick():
+    engine = MonitoringEngine(tick=60)
+    reads = []
+    seen = []
+    engine.add_source('cpu', lambda: reads.append('cpu') or 42.0)
+    engine.add_source('db2', lambda: reads.append('db2') or {'threads': 10})
+    engine.add_task('thresholds', lambda sample: seen.append(('thresholds', sample['cpu'])), ('cpu',))
+    engine.add_task('performance', lambda sample: seen.append(('performance', sample['cpu'])), ('cpu',))
+    engine.add_task('smf', lambda sample: seen.append(('smf', sample['db2'])), ('db2',), every=180)
+
+    assert engine.tick() == ['thresholds', 'performance', 'smf']
+    assert reads == ['cpu', 'db2']
+    assert seen == [('thresholds', 42.0), ('performance', 42.0), ('smf', {'threads': 10})]
+    # The SMF task is due every third tick, and its source is only read then
+    reads.clear()
+    assert engine.tick() == ['thresholds', 'performance']
+    assert engine.tick() == ['thresholds', 'performance']
+    assert engine.tick() == ['thresholds', 'performance', 'smf']
+    assert reads == ['cpu', 'cpu', 'cpu', 'db2']
+
+def test_failures_are_isolated_and_timed():
+    engine = MonitoringEngine(tick=1)
+    ran = []
+    engine.add_source('broken', lambda: 1 / 0)
+    engine.add_task('first', lambda sample: 1 / 0)
+    engine.add_task('second', lambda sample: ran.append(sample['broken']), ('broken',))
+    engine.tick()
+    assert ran == [None]
+    status = engine.status()
+    assert status['sources']['broken']['failures'] == 1
+    assert status['tasks']['first'] == dict(status['tasks']['first'], runs=1, failures=1, every=1.0)
+    assert status['tasks']['second']['last_duration'] is not None
+    assert 'zos_monitoring_task_seconds_count{task="second"}' in get_metrics_registry().render()
+    with pytest.raises(ValueError):
+        engine.add_task('third', lambda sample: None, ('missing',))
+
+def test_jitter_does_not_drift():
+    schedule = IntervalSchedule(60, jitter=5)
+    due = 1000.0
+    for period in range(1, 50):
+        due = schedule.next(due)
+        assert 1000.0 + period * 60 <= due <= 1000.0 + period * 60 + 5
+    # Fast-forwarding after a long pause lands back on the grid
+    assert 1000.0 + 200 * 60 <= schedule.next(1000.0 + 199 * 60 + 30) <= 1000.0 + 200 * 60 + 5
+    with pytest.raises(ValueError):
+        IntervalSchedule(60, jitter=60)
+
+def test_cpu_baseline_is_shared_across_threads(monkeypatch):
+    times = namedtuple('scputimes', 'user system idle iowait')
+    readings = iter([times(10.0, 5.0, 80.0, 5.0), times(25.0, 10.0, 140.0, 5.0)])
+    monkeypatch.setattr(psutil, 'cpu_times', lambda: next(readings))
+    monitor = SystemMonitor({})
+    assert monitor.get_cpu_metrics(interval=None) == [0.0]
+    # Ticks run on scheduler pool threads: the second reading still measures from the first
+    worker = threading.Thread(target=monitor.get_cpu_metrics, kwargs={'interval': None})
+    worker.start()
+    worker.join(2)
+    assert monitor.metrics['cpu'] == [0.0, 25.0]
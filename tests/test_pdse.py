@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pytest
+from zos_ml_demo.utils.zos_pdse import PDSELibrary, _SLOT_SIZE
+from zos_ml_demo.utils.zos_advanced_subsystems import ZOSDatasetServices
+
+def test_members_are_views_of_the_mapped_file(tmp_path):
+    path = str(tmp_path / 'MLAPP.MODELS')
+    library = PDSELibrary(path)
+    thresholds = np.array([0.5, 0.75, 0.9])
+    library.update({'seg00001': b'model one', 'THRESH': thresholds})
+    assert library.members() == ['SEG00001', 'THRESH']
+    assert bytes(library.read('seg00001')) == b'model one'
+    values = library.array('THRESH', np.float64)
+    assert values.tolist() == thresholds.tolist() and not values.flags.writeable
+    # Another process opening the library sees the same directory
+    assert PDSELibrary(path).stat('THRESH')['size'] == thresholds.nbytes
+    with pytest.raises(KeyError):
+        library.read('MISSING')
+    with pytest.raises(ValueError):
+        library.write('TOO_LONG_NAME', b'')
+
+def test_updates_append_and_compaction_reclaims_space(tmp_path):
+    path = str(tmp_path / 'MLAPP.TABLES')
+    library = PDSELibrary(path, compact_min_bytes=1 << 30)
+    for version in range(10):
+        library.write('LOOKUP', bytes([version]) * 4096)
+    library.write('KEEP', b'kept')
+    reader = PDSELibrary(path)
+    grown = os.path.getsize(path)
+    assert library.garbage_bytes >= 9 * 4096
+    library.delete('LOOKUP')
+    library.compact()
+    assert os.path.getsize(path) < grown // 10 and library.garbage_bytes == 0
+    assert library.members() == ['KEEP'] and bytes(library.read('KEEP')) == b'kept'
+    # A reader opened before the compaction catches up on refresh
+    assert 'LOOKUP' in reader
+    reader.refresh()
+    assert reader.members() == ['KEEP']
+
+def test_automatic_compaction(tmp_path):
+    library = PDSELibrary(str(tmp_path / 'LIB'), compact_ratio=0.5, compact_min_bytes=0)
+    for version in range(20):
+        library.write('MEMBER', bytes(1000))
+    assert os.path.getsize(library.path) < 4 * 1024
+
+def test_deleting_the_last_member_leaves_an_empty_library(tmp_path):
+    path = str(tmp_path / 'LIB')
+    library = PDSELibrary(path)
+    library.write('A', b'x' * 10)
+    library.delete('A')
+    assert library.members() == [] and PDSELibrary(path).members() == []
+    library.write('B', b'y')
+    assert PDSELibrary(path).members() == ['B']
+
+def test_interrupted_update_keeps_previous_directory(tmp_path):
+    path = str(tmp_path / 'LIB')
+    PDSELibrary(path).write('FIRST', b'1')
+    library = PDSELibrary(path)
+    # Data and a directory were appended, but the header switch never happened
+    sequence = library._sequence
+    with open(path, 'r+b') as f:
+        f.seek(((sequence + 1) % 2) * _SLOT_SIZE)
+        f.write(b'torn header')
+        f.seek(0, os.SEEK_END)
+        f.write(b'orphaned member data')
+    assert PDSELibrary(path).members() == ['FIRST']
+    library.refresh()
+    library.write('SECOND', b'2')
+    assert PDSELibrary(path).members() == ['FIRST', 'SECOND']
+
+def test_dataset_services_pdse_members(tmp_path):
+    services = ZOSDatasetServices({'dataset_directory': str(tmp_path)})
+    assert services.manage_pdse_member('MLAPP.CONFIG', 'thresh', b'{"cpu": 80}')
+    assert bytes(services.read_pdse_member('MLAPP.CONFIG', 'THRESH')) == b'{"cpu": 80}'
+    assert services.read_pdse_member('MLAPP.CONFIG', 'NOPE') is None
+    assert not services.manage_pdse_member('MLAPP.CONFIG', '1BAD', b'')
+    # A member stored through another handle is found on the next read
+    PDSELibrary(str(tmp_path / 'MLAPP.CONFIG')).write('LATER', b'x')
+    assert bytes(services.read_pdse_member('MLAPP.CONFIG', 'LATER')) == b'x'
+    assert [m['name'] for m in services.list_pdse_members('MLAPP.CONFIG')] == ['LATER', 'THRESH']
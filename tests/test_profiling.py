@@ -0,0 +1,63 @@
+import threading
+import pytest
+import app as app_module
+from zos_ml_demo.utils.zos_profiling import StageProfiler, NULL_TRACE, capture_stack_profile
+
+HEADERS = {'X-User-ID': 'MLAPPADM'}
+
+TRANSACTION = {'transaction': {
+    'amount': 1000.00,
+    'type': 'TRANSFER',
+    'source_account': 'SAVINGS',
+    'target_account': 'CHECKING',
+    'timestamp': '2025-02-28T12:00:00Z'
+}}
+
+@pytest.fixture
+def client():
+    yield app_module.app.test_client()
+    app_module.profiler.configure(enabled=False)
+    app_module.profiler.reset()
+
+def test_disabled_profiler_hands_out_null_trace():
+    profiler = StageProfiler('test')
+    assert profiler.start() is NULL_TRACE
+    profiler.configure(enabled=True, sample_rate=0.0)
+    assert profiler.start() is NULL_TRACE
+
+def test_sampled_trace_aggregates_stages():
+    profiler = StageProfiler('test', enabled=True)
+    trace = profiler.start()
+    trace.mark('first')
+    trace.mark('second')
+    trace.finish()
+    assert trace.server_timing().startswith('first;dur=')
+    stats = profiler.get_statistics()
+    assert stats['sampled_requests'] == 1
+    assert set(stats['stages']) == {'first', 'second'}
+
+def test_analyze_reports_server_timing_when_enabled(client):
+    assert 'Server-Timing' not in client.post('/api/analyze', headers=HEADERS, json=TRANSACTION).headers
+    response = client.post('/api/profile', headers=HEADERS, json={'enabled': True, 'sample_rate': 1.0})
+    assert response.get_json()['enabled'] is True
+    timing = client.post('/api/analyze', headers=HEADERS, json=TRANSACTION).headers['Server-Timing']
+    stages = [part.split(';')[0] for part in timing.split(', ')]
+    assert stages == ['racf', 'parse', 'validate', 'score', 'recommend', 'serialize', 'record']
+    assert client.get('/api/profile', headers=HEADERS).get_json()['sampled_requests'] == 1
+
+def test_stack_profile_sees_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait)
+    worker.start()
+    try:
+        profile = capture_stack_profile(0.05, interval=0.01)
+    finally:
+        stop.set()
+        worker.join()
+    assert profile['samples'] >= 2
+    assert any('threading:wait' in entry['stack'] for entry in profile['stacks'])
+
+def test_stack_profile_interval_bounds(client):
+    assert client.get('/api/profile/stack?seconds=0&interval=-1', headers=HEADERS).status_code == 400
+    profile = client.get('/api/profile/stack?seconds=0.02&interval=0', headers=HEADERS).get_json()
+    assert profile['interval'] == 0.001 and profile['samples'] <= 21
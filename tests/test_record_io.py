@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from zos_ml_demo.utils.zos_record_io import DCB, DatasetReader, RecordLayout, read_dcb, write_records
+from zos_ml_demo.utils.zos_integration import ZOSIntegration
+from zos_ml_demo.utils.zos_resource_manager import ZOSResourceManager
+
+LAYOUT = [('account', 8), ('amount', 6, 'packed', 2), ('count', 4, 'binary'), ('balance', 7, 'zoned', 2)]
+COLUMNS = {
+    'account': ['SAVINGS', 'CHECKING', 'BROKER'],
+    'amount': [1234.56, -0.07, 99999.99],
+    'count': [1, -2, 70000],
+    'balance': [12345.67, -1.5, 0.0]
+}
+
+def assert_columns(columns):
+    assert columns['account'].tolist() == COLUMNS['account']
+    np.testing.assert_allclose(columns['amount'], COLUMNS['amount'])
+    assert columns['count'].tolist() == COLUMNS['count']
+    np.testing.assert_allclose(columns['balance'], COLUMNS['balance'])
+
+def test_fixed_records_are_views_of_the_mapped_file(tmp_path):
+    layout = RecordLayout(LAYOUT, 'IBM-1047')
+    path = write_records(str(tmp_path / 'MLAPP.FB'), layout.encode(COLUMNS, 40), DCB('FB', 40, 4000), layout)
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert len(data) == 120 and data[:8] == 'SAVINGS '.encode('cp037')
+    with DatasetReader(path, layout=layout) as reader:
+        assert reader.dcb == DCB('FB', 40, 4000)
+        records = reader.records()
+        assert not records.flags.owndata and not records.flags.writeable
+        assert_columns(layout.decode(records))
+        assert bytes(reader.record(2))[:6] == 'BROKER'.encode('cp037')
+
+@pytest.mark.parametrize('recfm', ['V', 'VB'])
+def test_variable_records_round_trip(tmp_path, recfm):
+    rows = [b'A' * (i % 37 + 1) for i in range(500)]
+    path = write_records(str(tmp_path / recfm), rows, DCB(recfm, 104, 400))
+    with DatasetReader(path) as reader:
+        assert len(reader) == 500
+        assert [bytes(reader.record(i)) for i in (0, 36, 499)] == [rows[0], rows[36], rows[499]]
+        assert reader.records().tolist() == rows
+    if recfm == 'VB':
+        with open(path, 'rb') as f:
+            block_length = int.from_bytes(f.read(2), 'big')
+        assert block_length <= 400
+
+def test_corrupt_rdw_is_reported(tmp_path):
+    path = str(tmp_path / 'BAD')
+    with open(path, 'wb') as f:
+        f.write(b'\x00\x02\x00\x00')
+    with pytest.raises(ValueError, match='bad RDW'):
+        len(DatasetReader(path, DCB('V', 100, 100)))
+
+def test_allocated_dataset_is_read_and_written_by_name(tmp_path):
+    config = {'dataset_directory': str(tmp_path), 'log_to_operlog': False, 'encoding': 'IBM-1047'}
+    assert ZOSResourceManager(config).allocate_dataset('MLAPP.DATA', 1, 1, 'FB', 40, 4000)
+    assert read_dcb(str(tmp_path / 'MLAPP.DATA')) == DCB('FB', 40, 4000)
+    zos = ZOSIntegration(config)
+    assert len(zos.read_dataset('MLAPP.DATA')) == 0
+    assert zos.write_dataset("'mlapp.data'", COLUMNS, layout=LAYOUT)
+    assert_columns(RecordLayout(LAYOUT).decode(zos.read_dataset('MLAPP.DATA', layout=LAYOUT)))
+    assert zos.read_dataset('MLAPP.MISSING') is None
@@ -0,0 +1,87 @@
+import time
+import threading
+import pytest
+from zos_ml_demo.utils.zos_resilience import (
+    ZOSResilienceManager,
+    CircuitOpenError,
+    BulkheadFullError,
+    OPEN,
+    HALF_OPEN,
+    CLOSED,
+    get_resilience_manager
+)
+from zos_ml_demo.utils import zos_resilience
+from zos_ml_demo.utils.zos_subsystem_integration import ZOSDB2Integration
+
+@pytest.fixture
+def manager():
+    return ZOSResilienceManager({'resilience': {'default': {
+        'breaker': {'minimum_calls': 4, 'reset_timeout': 0.1, 'half_open_calls': 1},
+        'bulkhead': {'max_concurrent': 2}
+    }}})
+
+def fail(manager, target):
+    with pytest.raises(IOError):
+        with manager.guard(target):
+            raise IOError('backend down')
+
+def test_breaker_opens_and_recovers(manager):
+    for _ in range(4):
+        fail(manager, 'DB2')
+    assert manager.policy('DB2').breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        with manager.guard('DB2'):
+            pass
+    time.sleep(0.15)
+    with manager.guard('DB2'):
+        assert manager.policy('DB2').breaker.state == HALF_OPEN
+    assert manager.policy('DB2').breaker.state == CLOSED
+
+def test_bulkhead_caps_concurrent_calls(manager):
+    release = threading.Event()
+    entered = threading.Barrier(3)
+
+    def hold():
+        with manager.guard('MQ'):
+            entered.wait()
+            release.wait()
+
+    threads = [threading.Thread(target=hold) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    entered.wait()
+    with pytest.raises(BulkheadFullError):
+        with manager.guard('MQ'):
+            pass
+    release.set()
+    for thread in threads:
+        thread.join()
+    metrics = manager.get_metrics()['MQ']
+    assert metrics['bulkhead_rejections'] == 1
+    assert metrics['in_flight'] == 0
+
+def test_adaptive_timeout_tracks_latency(manager):
+    for _ in range(50):
+        with manager.guard('IMS'):
+            pass
+    timeout = manager.policy('IMS').timeout
+    assert timeout.current == timeout.minimum
+
+def test_open_circuit_sheds_integration_calls(manager):
+    db2 = ZOSDB2Integration({})
+    db2.resilience = manager
+    for _ in range(4):
+        fail(manager, 'DB2')
+    assert db2.execute_sql('SELECT 1 FROM SYSIBM.SYSDUMMY1') is False
+    assert manager.get_metrics()['DB2']['short_circuited'] == 1
+
+def test_shared_manager_logs_differing_settings(monkeypatch, caplog):
+    monkeypatch.setattr(zos_resilience, '_default_manager', None)
+    manager = get_resilience_manager({'resilience': {'default': {'bulkhead': {'max_concurrent': 4}}}})
+    with caplog.at_level('WARNING', logger='zos_resilience'):
+        assert get_resilience_manager({'resilience': {'default': {'bulkhead': {'max_concurrent': 4}}}}) is manager
+        assert get_resilience_manager() is manager
+        assert not caplog.records
+        assert get_resilience_manager({'resilience': {'default': {'bulkhead': {'max_concurrent': 8}}}}) is manager
+    assert 'differ' in caplog.records[0].getMessage()
+    assert manager.policy('DB2').bulkhead.max_concurrent == 4
@@ -0,0 +1,138 @@
+import threading
+from datetime import datetime
+import pytest
+from zos_ml_demo.utils.zos_scheduler import WorkloadScheduler, CronSchedule
+from zos_ml_demo.utils.zos_advanced_subsystems import ZOSWorkloadScheduler
+from zos_ml_demo.utils.zos_metrics_registry import get_metrics_registry
+from config.zos_config import get_zos_config
+
+def at(*fields):
+    return datetime(*fields).timestamp()
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def test_cron_next_run():
+    cron = CronSchedule('*/15 * * * *')
+    assert cron.next(at(2024, 1, 1, 10, 7)) == at(2024, 1, 1, 10, 15)
+    assert cron.next(at(2024, 1, 1, 10, 45)) == at(2024, 1, 1, 11, 0)
+    assert CronSchedule('30 2 * * MON-FRI').next(at(2024, 1, 5, 3)) == at(2024, 1, 8, 2, 30)
+    assert CronSchedule('0 0 29 FEB *').next(at(2024, 3, 1)) == at(2028, 2, 29)
+    # Restricted day of month and day of week match either
+    assert CronSchedule('0 12 13 * 5').next(at(2024, 1, 1)) == at(2024, 1, 5, 12)
+    assert CronSchedule('@daily').next(at(2024, 12, 31, 1)) == at(2025, 1, 1)
+
+@pytest.mark.parametrize('expression', ['* * * *', '61 * * * *', '*/0 * * * *', '5-1 * * * *',
+                                        '0 0 30 2 *', '0 0 * * FOO'])
+def test_invalid_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+def test_interval_runs_and_histogram():
+    clock = FakeClock(1000.0)
+    scheduler = WorkloadScheduler(clock=clock)
+    runs = []
+    scheduler.add_job('JOBA', lambda: runs.append(clock.now), 60)
+    assert scheduler.run_pending() == ['JOBA']
+    assert scheduler.wait_idle(2)
+    assert scheduler.run_pending(1030.0) == []
+    clock.now = 1060.5
+    assert scheduler.run_pending() == ['JOBA']
+    assert scheduler.wait_idle(2)
+    assert runs == [1000.0, 1060.5]
+    assert scheduler.job_status('JOBA')['runs'] == 2
+    assert 'zos_scheduler_job_duration_seconds_count{job="JOBA"}' in get_metrics_registry().render()
+    scheduler.stop()
+
+@pytest.mark.parametrize('policy, expected', [('skip', 0), ('run_once', 1), ('catch_up', 5)])
+def test_missed_run_policies(policy, expected):
+    clock = FakeClock(0.0)
+    scheduler = WorkloadScheduler(clock=clock)
+    runs = []
+    scheduler.add_job('JOBA', lambda: runs.append(1), 10, missed=policy)
+    # Due at 0, 10, 20, 30 and 40; the scheduler only wakes at 45
+    clock.now = 45.0
+    scheduler.run_pending()
+    assert scheduler.wait_idle(2)
+    assert len(runs) == expected
+    assert scheduler.job_status('JOBA')['skipped'] == 5 - expected
+    scheduler.stop()
+
+@pytest.mark.parametrize('overlap, expected', [('skip', 1), ('queue', 2)])
+def test_overlap_prevention(overlap, expected):
+    clock = FakeClock(0.0)
+    scheduler = WorkloadScheduler(clock=clock)
+    release = threading.Event()
+    active, peak, runs = [], [], []
+
+    def job():
+        active.append(1)
+        peak.append(len(active))
+        release.wait(2)
+        runs.append(1)
+        active.pop()
+
+    scheduler.add_job('JOBA', job, 10, overlap=overlap)
+    scheduler.run_pending()
+    clock.now = 10.0
+    scheduler.run_pending()
+    release.set()
+    assert scheduler.wait_idle(2)
+    assert len(runs) == expected and max(peak) == 1
+    scheduler.stop()
+
+def test_dependencies():
+    clock = FakeClock(0.0)
+    scheduler = WorkloadScheduler(clock=clock)
+    order = []
+    fail = [True]
+
+    def extract():
+        order.append('EXTRACT')
+        if fail[0]:
+            raise RuntimeError('no data')
+
+    scheduler.add_job('EXTRACT', extract, 60)
+    scheduler.add_job('SCORE', lambda: order.append('SCORE'), after=('EXTRACT',))
+    scheduler.add_job('REPORT', lambda: order.append('REPORT'), 60, after=('SCORE',))
+    scheduler.run_pending()
+    assert scheduler.wait_idle(2)
+    # A failed predecessor holds its dependents
+    assert order == ['EXTRACT']
+    assert scheduler.job_status('REPORT')['state'] == 'HELD'
+    fail[0] = False
+    clock.now = 60.0
+    scheduler.run_pending()
+    assert scheduler.wait_idle(2)
+    assert order == ['EXTRACT', 'EXTRACT', 'SCORE', 'REPORT']
+    with pytest.raises(ValueError):
+        scheduler.add_job('LOOSE', lambda: None, after=('MISSING',))
+    with pytest.raises(ValueError):
+        scheduler.remove_job('SCORE')
+    scheduler.stop()
+
+def test_timer_thread_runs_jobs():
+    scheduler = WorkloadScheduler()
+    done = threading.Event()
+    scheduler.add_job('JOBA', done.set, 0.01)
+    scheduler.start()
+    assert done.wait(2)
+    scheduler.stop()
+
+def test_workload_scheduler_job_stream():
+    scheduler = ZOSWorkloadScheduler(get_zos_config())
+    policy = scheduler.resilience.policy('SCHEDULER')
+    failures = policy.stats['failures']
+    assert scheduler.schedule_job('STEP1', '*/15 * * * *', lambda: None, stream='NIGHTLY')
+    assert scheduler.schedule_job('STEP2', None, lambda: None, after=('STEP1',), stream='NIGHTLY')
+    assert not scheduler.schedule_job('BROKEN', 'not a cron', lambda: None)
+    status = scheduler.monitor_job_stream('NIGHTLY')
+    assert status['status'] == 'WAITING' and status['last_completion'] is None
+    assert status['next_run'] is not None and len(status['jobs']) == 2
+    assert scheduler.monitor_job_stream('UNKNOWN') is None
+    # Caller errors do not count against the scheduler's breaker
+    assert policy.stats['failures'] == failures
@@ -0,0 +1,74 @@
+import threading
+from server import PreforkServer, WorkerLoadTable, _LoadTrackingMiddleware
+
+def test_worker_load_table_reports_every_slot():
+    table = WorkerLoadTable(2)
+    table.claim(0, 1234)
+    table.add(0, 2, 5)
+    report = table.report()
+    assert [w['slot'] for w in report['workers']] == [0, 1]
+    assert report['workers'][0]['pid'] == 1234
+    assert report['total_requests'] == 5
+
+def test_middleware_counts_requests_and_retires_worker():
+    table = WorkerLoadTable(1)
+    table.claim(0, 1)
+    retired = []
+
+    def wsgi_app(environ, start_response):
+        start_response('500 INTERNAL SERVER ERROR', [])
+        return [b'']
+
+    middleware = _LoadTrackingMiddleware(wsgi_app, table, 0, 3, lambda: retired.append(True))
+    for _ in range(3):
+        response = middleware({}, lambda status, headers, exc_info=None: None)
+        # A request stays in flight until the server closes its response
+        assert table.in_flight(0) == 1
+        assert list(response) == [b'']
+        response.close()
+    worker = table.report()['workers'][0]
+    assert worker['requests'] == 3
+    assert worker['errors'] == 3
+    assert worker['in_flight'] == 0
+    assert retired == [True]
+
+def test_retiring_worker_drains_in_flight_requests():
+    server = PreforkServer(workers=1, drain_timeout=2.0)
+    server.table.claim(0, 1)
+    server.table.add(0, 3, 1)
+    finish = threading.Timer(0.1, server.table.add, (0, 3, -1))
+    finish.start()
+    assert server._drain(0)
+    assert server.table.in_flight(0) == 0
+    server.drain_timeout = 0.05
+    server.table.add(0, 3, 1)
+    assert not server._drain(0)
+
+def test_master_merges_worker_feature_updates(tmp_path):
+    from types import SimpleNamespace
+    from zos_ml_demo.utils.zos_feature_store import AccountFeatureStore
+    master_store = AccountFeatureStore()
+    master_store.update('SAVINGS', 100.0, 1_700_000_000)
+    server = PreforkServer(workers=2)
+    server.app_module = SimpleNamespace(zos_config={'feature_snapshot': str(tmp_path / 'features.npz')},
+                                        components=SimpleNamespace(get=lambda name: master_store))
+    server.worker_pids = {101: 0, 102: 1}
+    for slot, account in enumerate(['SAVINGS', 'CHECKING']):
+        worker = AccountFeatureStore().merge(master_store)
+        worker.track_changes()
+        worker.update(account, 50.0, 1_700_003_600)
+        worker.changes.save_snapshot(server._worker_features_path(slot))
+
+    assert server._save_features()
+    snapshot = AccountFeatureStore.load_snapshot(str(tmp_path / 'features.npz'))
+    assert snapshot.get_account('SAVINGS')['txn_count'] == 2
+    assert snapshot.get_account('CHECKING')['txn_count'] == 1
+    # Slot 0 exits: its updates move into the store the next worker forks from
+    del server.worker_pids[101]
+    server._fold_worker_features(0)
+    assert not (tmp_path / 'features-worker0.npz').exists()
+    assert master_store.get_account('SAVINGS')['txn_count'] == 2
+    assert server._save_features()
+    snapshot = AccountFeatureStore.load_snapshot(str(tmp_path / 'features.npz'))
+    assert snapshot.get_account('SAVINGS')['txn_count'] == 2
+    assert snapshot.get_account('CHECKING')['txn_count'] == 1
@@ -0,0 +1,46 @@
+import os
+import pytest
+from zos_ml_demo.utils.zos_shared_metrics import SharedMetricsRegion
+from zos_ml_demo.utils.zos_monitoring import SystemMonitor
+
+def test_snapshot_sums_every_slot():
+    region = SharedMetricsRegion(3)
+    for slot in range(3):
+        region.bind(slot)
+        region.increment('transactions', 10)
+        region.increment('errors', slot)
+        for _ in range(10):
+            region.observe(40)
+    snapshot = region.snapshot()
+    assert snapshot['counters'] == {'transactions': 30, 'errors': 3}
+    assert snapshot['latency_ms']['count'] == 30
+    assert snapshot['latency_ms']['mean'] == pytest.approx(40)
+    assert 25 <= snapshot['latency_ms']['p99'] <= 50
+
+def test_gauges_reset_when_a_slot_changes_owner():
+    region = SharedMetricsRegion(1)
+    region.add_gauge('in_flight', 2)
+    region.increment('transactions')
+    region.bind(0)
+    assert region.snapshot()['gauges']['in_flight'] == 0
+    assert region.snapshot()['counters']['transactions'] == 1
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+def test_forked_workers_are_visible_to_each_other():
+    region = SharedMetricsRegion(2)
+    pid = os.fork()
+    if pid == 0:
+        monitor = SystemMonitor({})
+        monitor.attach_shared_metrics(region, 1)
+        start = monitor.transaction_started()
+        monitor.record_transaction(start, start + 0.2, False)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    monitor = SystemMonitor({})
+    monitor.attach_shared_metrics(region, 0)
+    start = monitor.transaction_started()
+    monitor.record_transaction(start, start + 0.01, True)
+    metrics = monitor.get_transaction_metrics()
+    assert metrics['counters'] == {'transactions': 2, 'errors': 1}
+    assert metrics['gauges']['in_flight'] == 0
+    assert [w['transactions'] for w in region.per_worker()] == [1, 1]
@@ -0,0 +1,37 @@
+import time
+from app import app
+from zos_ml_demo.utils.zos_snapshot_cache import SnapshotCache
+
+def test_snapshot_is_built_once_until_stale():
+    builds = []
+    cache = SnapshotCache({'health': 0.05})
+    builder = lambda: builds.append(1) or {'builds': len(builds)}
+    first = cache.get_or_build('health', builder)
+    assert cache.get_or_build('health', builder) is first
+    assert first.body == b'{"builds":1}'
+    time.sleep(0.06)
+    # A stale snapshot is still served while the next version builds
+    assert cache.get_or_build('health', builder) is first
+    deadline = time.time() + 2
+    while cache.get('health') is first and time.time() < deadline:
+        time.sleep(0.01)
+    second = cache.get('health')
+    assert second.version == 2 and second.etag != first.etag
+
+def test_etag_matching():
+    snapshot = SnapshotCache().publish('security', {'ok': True})
+    assert snapshot.matches(snapshot.etag)
+    assert snapshot.matches(f'"other", W/{snapshot.etag}')
+    assert snapshot.matches('*')
+    assert not snapshot.matches(None)
+    assert not snapshot.matches('"other"')
+
+def test_health_and_security_answer_304_for_current_etag():
+    client = app.test_client()
+    for path in ('/api/health', '/api/security'):
+        response = client.get(path, headers={'X-User-ID': 'MLAPPADM'})
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        cached = client.get(path, headers={'X-User-ID': 'MLAPPADM', 'If-None-Match': etag})
+        assert cached.status_code == 304
+        assert cached.get_data() == b''
@@ -0,0 +1,153 @@
+import time
+import random
+from collections import Counter
+import pytest
+from zos_ml_demo.utils.zos_coupling_facility import CouplingFacilityServer, CouplingFacility
+from zos_ml_demo.utils.zos_sysplex import SysplexRegistry, WorkloadRouter
+from zos_ml_demo.utils.zos_advanced_subsystems import ZOSParallelSysplex
+
+@pytest.fixture
+def facility():
+    server = CouplingFacilityServer()
+    server.start()
+    connection = CouplingFacility(server.host, server.port, timeout=2.0)
+    yield server, connection
+    connection.close()
+    server.stop()
+
+class ManualClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+def registry_for(connection, member, clock, capacity=None):
+    return SysplexRegistry(connection.cache('PRODPLEX'), member, lambda: dict(capacity or {}),
+                           heartbeat_interval=1.0, failure_timeout=3.0, purge_after=10.0, clock=clock)
+
+def test_heartbeats_detect_failed_members(facility):
+    _, connection = facility
+    clock = ManualClock()
+    sys1, sys2 = registry_for(connection, 'SYS1', clock), registry_for(connection, 'SYS2', clock)
+    sys1.heartbeat()
+    sys2.heartbeat()
+    assert [m['status'] for m in sys1.refresh()] == ['active', 'active']
+    # SYS2 stops heartbeating; only the version change observed by SYS1 counts
+    clock.now += 4.0
+    sys1.heartbeat()
+    assert {m['name']: m['status'] for m in sys1.refresh()} == {'SYS1': 'active', 'SYS2': 'failed'}
+    assert [m['name'] for m in sys1.members('active')] == ['SYS1']
+    sys2.heartbeat()
+    assert sys1.refresh()[1]['status'] == 'active'
+    # A member silent past the purge period is removed from the structure
+    clock.now += 11.0
+    sys1.heartbeat()
+    assert [m['name'] for m in sys1.refresh()] == ['SYS1']
+    assert 'SYS2' not in connection.cache('PRODPLEX').entries()
+    sys1.leave()
+    assert sys1.refresh() == []
+
+def test_power_of_two_choices_prefers_the_less_loaded_member(facility):
+    _, connection = facility
+    clock = ManualClock()
+    idle = registry_for(connection, 'SYS1', clock, {'queue_depth': 0, 'p99_ms': 10.0, 'cpu_percent': 20.0})
+    busy = registry_for(connection, 'SYS2', clock, {'queue_depth': 30, 'p99_ms': 10.0, 'cpu_percent': 40.0})
+    hot = registry_for(connection, 'SYS3', clock, {'queue_depth': 0, 'p99_ms': 1.0, 'cpu_percent': 99.0})
+    for registry in (idle, busy, hot):
+        registry.heartbeat()
+    router = WorkloadRouter(idle, 'p2c', cpu_limit=90.0, rng=random.Random(7))
+    chosen = Counter(router.select() for _ in range(60))
+    # Work sent since the last heartbeat counts as queued, so SYS1 takes the first 30 and then they alternate
+    assert set(chosen) == {'SYS1', 'SYS2'} and chosen['SYS1'] == 45
+    # A new heartbeat replaces the router's estimate with the member's own queue depth
+    idle.heartbeat()
+    clock.now += 2.0
+    assert router.select() == 'SYS1'
+    assert router.select(exclude=('SYS1', 'SYS2')) == 'SYS3'
+
+def test_weighted_routing_and_no_members(facility):
+    _, connection = facility
+    clock = ManualClock()
+    fast = registry_for(connection, 'SYS1', clock, {'queue_depth': 0, 'p99_ms': 5.0})
+    slow = registry_for(connection, 'SYS2', clock, {'queue_depth': 0, 'p99_ms': 45.0})
+    fast.heartbeat()
+    slow.heartbeat()
+    router = WorkloadRouter(fast, 'weighted', rng=random.Random(3))
+    chosen = Counter(router.select() for _ in range(40))
+    assert chosen['SYS1'] > 2 * chosen['SYS2'] > 0
+    with pytest.raises(LookupError):
+        router.select(exclude=('SYS1', 'SYS2'))
+    with pytest.raises(ValueError):
+        WorkloadRouter(fast, 'round_robin')
+
+def test_sysplex_routes_work_to_members(facility):
+    server, _ = facility
+    config = {'coupling_facility': {'host': server.host, 'port': server.port},
+              'sysplex': {'heartbeat_interval': 0.05, 'strategy': 'p2c'}}
+    sys1, sys2 = ZOSParallelSysplex(config), ZOSParallelSysplex(config)
+    assert sys1.join_sysplex('PRODPLEX', 'SYS1', lambda: {'queue_depth': 0})
+    assert sys2.join_sysplex('PRODPLEX', 'SYS2', lambda: {'queue_depth': 100})
+    assert [m['name'] for m in sys1.sysplex_members()] == ['SYS1', 'SYS2']
+    assert sys2.route_work({'account': 'ACCT0001'}) == 'SYS1'
+    assert sys1.take_work() == {'account': 'ACCT0001'}
+    assert sys1.take_work() is None and sys2.take_work() is None
+    sys2.leave_sysplex()
+    assert [m['name'] for m in sys1.sysplex_members()] == ['SYS1']
+    sys1.leave_sysplex()
+
+def test_routed_work_is_consumed(facility):
+    server, connection = facility
+    config = {'coupling_facility': {'host': server.host, 'port': server.port},
+              'sysplex': {'heartbeat_interval': 0.05}}
+    # Queued before SYS1 joins, so no list transition will announce it
+    connection.list_structure('PRODPLEX').push('SYS1', {'seq': 0})
+    received = []
+    sys1, sys2 = ZOSParallelSysplex(config), ZOSParallelSysplex(config)
+    assert sys1.join_sysplex('PRODPLEX', 'SYS1', on_work=received.append)
+    assert sys2.join_sysplex('PRODPLEX', 'SYS2', lambda: {'queue_depth': 100})
+    for seq in (1, 2):
+        assert sys2.route_work({'seq': seq}) == 'SYS1'
+    deadline = time.time() + 2
+    while len(received) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert received == [{'seq': 0}, {'seq': 1}, {'seq': 2}]
+    assert connection.list_structure('PRODPLEX').items('SYS1') == []
+    sys2.leave_sysplex()
+    sys1.leave_sysplex()
+
+def test_sysplex_without_coupling_facility():
+    sysplex = ZOSParallelSysplex({})
+    assert sysplex.join_sysplex('PRODPLEX')
+    assert sysplex.sysplex_members() == []
+    assert sysplex.route_work({'account': 'ACCT0001'}) is None
+    assert sysplex.take_work() is None
+
+def test_app_scores_routed_work():
+    import app
+    results = app.process_routed_work({'transactions': [
+        {'amount': 100.0, 'type': 'PAYMENT', 'source_account': 'ACCT0001', 'target_account': 'ACCT0002',
+         'timestamp': '2025-02-28T12:00:00Z'},
+        {'amount': 'n/a'}
+    ]})
+    assert 'risk_score' in results[0]['analysis'] and 'error' in results[1]
+
+def test_routed_backlog_counts_toward_queue_depth(facility, monkeypatch):
+    import app
+    server, connection = facility
+    config = {'coupling_facility': {'host': server.host, 'port': server.port},
+              'sysplex': {'heartbeat_interval': 60.0}}
+    sys1 = ZOSParallelSysplex(config)
+    assert sys1.routed_backlog() == 0
+    connection.list_structure('PRODPLEX').push('SYS1', {'seq': 0})
+    connection.list_structure('PRODPLEX').push('SYS1', {'seq': 1})
+    monkeypatch.setattr(app, 'sysplex', sys1)
+    assert sys1.join_sysplex('PRODPLEX', 'SYS1', app.sysplex_capacity)
+    try:
+        assert sys1.routed_backlog() == 2
+        published = {m['name']: m for m in sys1.sysplex_members()}['SYS1']
+        assert published['capacity']['queue_depth'] >= 2
+        sys1.take_work()
+        assert app.sysplex_capacity()['queue_depth'] == app.monitor.get_transaction_metrics()['gauges']['in_flight'] + 1
+    finally:
+        sys1.leave_sysplex()
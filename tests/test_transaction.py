@@ -44,3 +44,20 @@ def test_security_status(client):
     assert response.status_code == 200
     data = response.get_json()
     assert 'event_analysis' in data
+
+def test_analyze_batch(client):
+    transaction = {
+        "amount": 250.00,
+        "type": "TRANSFER",
+        "source_account": "SAVINGS",
+        "target_account": "CHECKING",
+        "timestamp": "2025-02-28T12:00:00Z"
+    }
+    response = client.post('/api/analyze/batch',
+                         json={'transactions': [transaction, {'amount': 1}]},
+                         headers={'X-User-ID': 'MLAPPADM'})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['count'] == 2
+    assert 'risk_score' in data['results'][0]['analysis']
+    assert data['results'][1]['error'].startswith('Missing required field')
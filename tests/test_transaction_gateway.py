@@ -0,0 +1,89 @@
+import time
+import pytest
+from zos_ml_demo.utils.zos_transaction_gateway import ZOSTransactionGateway, ZOSSubsystemStandIn
+from zos_ml_demo.utils.zos_subsystem_integration import ZOSIMSIntegration
+from zos_ml_demo.utils.zos_resilience import ZOSResilienceManager, OPEN
+
+@pytest.fixture
+def gateway():
+    ims = ZOSSubsystemStandIn('IMS', latency=0.2)
+    cics = ZOSSubsystemStandIn('CICS', latency=0.2)
+    gateway = ZOSTransactionGateway({'subsystem_endpoints': {
+        'IMS': {'port': ims.start()[1], 'max_in_flight': 4, 'timeout': 2.0},
+        'CICS': {'port': cics.start()[1], 'max_in_flight': 4, 'timeout': 2.0}
+    }}).start()
+    yield gateway
+    gateway.stop()
+    ims.stop()
+    cics.stop()
+
+def test_fan_out_waits_for_slowest_call(gateway):
+    started = time.perf_counter()
+    replies = gateway.fan_out_sync({'IMS': {'amount': 100}, 'CICS': {'amount': 100}})
+    elapsed = time.perf_counter() - started
+    assert replies['IMS']['status'] == 'OK'
+    assert replies['CICS']['echo'] == {'amount': 100}
+    assert elapsed < 0.35
+
+def test_timeout_is_reported_per_target(gateway):
+    replies = gateway.fan_out_sync({'IMS': {}, 'CICS': {}}, timeout=0.05)
+    assert replies['IMS']['status'] == 'TIMEOUT'
+    assert gateway.get_statistics()['IMS']['timeouts'] == 1
+
+def test_ims_integration_correlates_responses(gateway):
+    ims = ZOSIMSIntegration({}, gateway)
+    correlation_ids = [ims.send_ims_transaction('MLAPPTRN', {'seq': i}) for i in range(8)]
+    replies = [ims.get_ims_response(cid, timeout=2.0) for cid in correlation_ids]
+    assert [reply['echo']['data'] for reply in replies] == [{'seq': i} for i in range(8)]
+    assert [reply['correlation_id'] for reply in replies] == correlation_ids
+
+def test_timeout_covers_the_wait_for_an_in_flight_slot():
+    slow = ZOSSubsystemStandIn('IMS', latency=1.0)
+    gateway = ZOSTransactionGateway({'subsystem_endpoints': {
+        'IMS': {'port': slow.start()[1], 'max_in_flight': 1, 'timeout': 2.0}}}).start()
+    try:
+        gateway.submit('IMS', {})
+        started = time.perf_counter()
+        replies = gateway.fan_out_sync({'IMS': {}}, timeout=0.1)
+        assert replies['IMS']['status'] == 'TIMEOUT' and time.perf_counter() - started < 0.5
+    finally:
+        gateway.stop()
+        slow.stop()
+
+def test_timeouts_open_the_target_circuit():
+    # The stand-in never answers within the adaptive timeout, however slow the host
+    slow = ZOSSubsystemStandIn('IMS', latency=5.0)
+    gateway = ZOSTransactionGateway({'subsystem_endpoints': {
+        'IMS': {'port': slow.start()[1], 'max_in_flight': 4, 'timeout': 10.0}}}).start()
+    gateway.resilience = ZOSResilienceManager({'resilience': {'default': {
+        'breaker': {'minimum_calls': 2, 'reset_timeout': 30.0}, 'timeout': {'initial': 0.1}}}})
+    try:
+        for _ in range(2):
+            # No explicit timeout: the guard's adaptive timeout applies
+            assert gateway.fan_out_sync({'IMS': {}})['IMS']['status'] == 'TIMEOUT'
+        metrics = gateway.resilience.get_metrics()['IMS']
+        assert metrics['state'] == OPEN and metrics['failures'] >= 2
+        started = time.perf_counter()
+        reply = gateway.fan_out_sync({'IMS': {}})['IMS']
+        assert reply['status'] == 'ERROR' and 'circuit is open' in reply['error']
+        # Short-circuited without waiting on the backend
+        assert time.perf_counter() - started < 1.0
+    finally:
+        gateway.stop()
+        slow.stop()
+
+def test_uncollected_replies_expire():
+    ims = ZOSSubsystemStandIn('IMS', latency=0.05)
+    gateway = ZOSTransactionGateway({'gateway_response_ttl': 0.0, 'subsystem_endpoints': {
+        'IMS': {'port': ims.start()[1], 'timeout': 2.0}}}).start()
+    try:
+        abandoned = gateway.submit('IMS', {'seq': 1})
+        gateway._responses[abandoned][0].result(timeout=2.0)
+        collected = gateway.submit('IMS', {'seq': 2})
+        assert abandoned not in gateway._responses
+        assert gateway.get_response(abandoned) is None
+        assert gateway.get_response(collected, timeout=2.0)['echo'] == {'seq': 2}
+        assert gateway._responses == {}
+    finally:
+        gateway.stop()
+        ims.stop()
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+from app import app
+from zos_ml_demo.utils.zos_transaction_schema import TransactionValidator, FEATURE_COLUMNS
+
+VALID = {
+    'amount': 250.0,
+    'type': 'PAYMENT',
+    'source_account': 'SAVINGS',
+    'target_account': 'CHECKING',
+    'timestamp': '2025-02-28T13:45:00Z'
+}
+
+@pytest.fixture
+def validator():
+    return TransactionValidator()
+
+def test_valid_record_fills_feature_row(validator):
+    row = validator.new_rows(1)[0]
+    assert validator.validate_into(VALID, row) is None
+    assert dict(zip(FEATURE_COLUMNS, row.tolist())) == {'amount': 250.0, 'time_of_day': 13.0, 'transaction_type': 2.0}
+
+@pytest.mark.parametrize('field,value,message', [
+    ('amount', '250', 'must be a number'),
+    ('amount', True, 'must be a number'),
+    ('amount', -1, 'must be between'),
+    ('amount', float('nan'), 'must be between'),
+    ('type', 'REFUND', 'must be one of'),
+    ('source_account', '', 'must be a string'),
+    ('target_account', 42, 'must be a string'),
+    ('timestamp', '2025-02-30T12:00:00Z', 'ISO-8601'),
+    ('timestamp', 1740744000, 'ISO-8601'),
+])
+def test_invalid_fields_are_rejected(validator, field, value, message):
+    assert message in validator.validate(dict(VALID, **{field: value}))
+
+def test_missing_field_and_non_object(validator):
+    record = dict(VALID)
+    del record['target_account']
+    assert validator.validate(record) == 'Missing required field: target_account'
+    assert validator.validate(['not', 'a', 'record']) == 'Invalid request data'
+
+def test_batch_matches_per_record_validation(validator):
+    records = [VALID, dict(VALID, amount=10**400), dict(VALID, type='REFUND'), {'amount': 1}, None,
+               dict(VALID, amount=7, timestamp='2025-02-28T08:00:00.123+01:00')]
+    features, errors = validator.validate_batch(records)
+    assert errors == [validator.validate(record) for record in records]
+    assert errors[0] is None and errors[5] is None
+    np.testing.assert_array_equal(features[5], [7.0, 8.0, 2.0])
+
+def test_analyze_rejects_wrong_types():
+    response = app.test_client().post('/api/analyze', headers={'X-User-ID': 'MLAPPADM'},
+                                      json={'transaction': dict(VALID, amount='lots')})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Field amount must be a number'
@@ -0,0 +1,79 @@
+import pytest
+from zos_ml_demo.utils.zos_vsam_store import VSAMKSDSCluster
+from zos_ml_demo.utils.zos_subsystem_integration import ZOSVSAMIntegration
+
+@pytest.fixture
+def cluster(tmp_path):
+    ksds = VSAMKSDSCluster(str(tmp_path / 'MLAPP.ACCT.KSDS'), key_length=16, ci_size=256, cache_blocks=4)
+    yield ksds
+    ksds.close()
+
+def test_point_read_and_update(cluster):
+    cluster.put('ACCT0001', b'first')
+    cluster.put('ACCT0001', b'second')
+    assert cluster.get('ACCT0001') == b'second'
+    assert cluster.get('ACCT9999') is None
+    assert len(cluster) == 1
+
+def test_browse_key_range(cluster):
+    for i in [5, 1, 3, 4, 2]:
+        cluster.put(f'ACCT{i:04d}', str(i).encode())
+    cluster.delete('ACCT0003')
+    records = list(cluster.browse('ACCT0002', 'ACCT0005'))
+    assert [key for key, _ in records] == [b'ACCT0002', b'ACCT0004', b'ACCT0005']
+    assert len(list(cluster.browse(limit=2))) == 2
+
+def test_records_span_control_intervals(cluster):
+    for i in range(100):
+        cluster.put(f'K{i:05d}', bytes(20))
+    stats = cluster.get_statistics()
+    assert stats['control_intervals'] > 1
+    assert stats['cached_blocks'] <= 4
+    assert all(cluster.get(f'K{i:05d}') == bytes(20) for i in range(100))
+
+def test_reopen_and_reorganize(tmp_path):
+    path = str(tmp_path / 'MLAPP.REORG.KSDS')
+    cluster = VSAMKSDSCluster(path, ci_size=256)
+    cluster.put('B', b'2')
+    cluster.put('A', b'1')
+    cluster.put('A', b'11')
+    cluster.delete('B')
+    cluster.close()
+
+    cluster = VSAMKSDSCluster(path, ci_size=256)
+    assert cluster.get('A') == b'11'
+    assert cluster.get('B') is None
+    cluster.reorganize()
+    assert cluster.get_statistics()['superseded_images'] == 0
+    assert list(cluster.browse()) == [(b'A', b'11')]
+    cluster.close()
+
+def test_reorganize_after_delete_in_same_session(tmp_path):
+    path = str(tmp_path / 'MLAPP.REORG.KSDS')
+    cluster = VSAMKSDSCluster(path, ci_size=256)
+    for i in range(20):
+        cluster.put(f'K{i:04d}', b'x')
+    # Browsing merges the new keys into the sorted list before the delete
+    list(cluster.browse(limit=1))
+    cluster.delete('K0007')
+    cluster.reorganize()
+    assert len(cluster) == 19 and cluster.get('K0007') is None
+    assert not (tmp_path / 'MLAPP.REORG.KSDS.reorg').exists()
+    cluster.close()
+
+def test_vsam_integration_round_trip(tmp_path):
+    vsam = ZOSVSAMIntegration({'vsam_directory': str(tmp_path)})
+    assert vsam.write_vsam_record('MLAPP.ACCT.STATS', {'key': 'SAVINGS', 'count': 3})
+    assert vsam.read_vsam_record('MLAPP.ACCT.STATS', 'SAVINGS') == {'key': 'SAVINGS', 'count': 3}
+    assert vsam.browse_vsam_records('MLAPP.ACCT.STATS') == [('SAVINGS', {'key': 'SAVINGS', 'count': 3})]
+    vsam.close()
+
+def test_vsam_invalid_records_skip_the_breaker(tmp_path):
+    vsam = ZOSVSAMIntegration({'vsam_directory': str(tmp_path)})
+    stats = vsam.resilience.policy('VSAM').stats
+    calls, failures = stats['calls'], stats['failures']
+    assert not vsam.write_vsam_record('MLAPP.ACCT.STATS', {'count': 3})
+    assert not vsam.write_vsam_record('MLAPP.ACCT.STATS', {'count': 3}, key='K' * 65)
+    assert not vsam.write_vsam_record('MLAPP.ACCT.STATS', {'key': 'SAVINGS', 'when': object()})
+    assert (stats['calls'], stats['failures']) == (calls, failures)
+    vsam.close()
@@ -0,0 +1,107 @@
+import time
+import threading
+import pytest
+from zos_ml_demo.utils.zos_wlm import WorkloadManager, ServiceClass, AdmissionRejectedError
+from app import app, wlm
+
+class ManualClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+CLASSES = {
+    'MLONLINE': {'importance': 1, 'response_time': 0.1, 'percentile': 0.9, 'queue_limit': 8, 'max_queue_wait': 5.0},
+    'MLBATCH': {'importance': 3, 'velocity': 50, 'queue_limit': 8, 'max_queue_wait': 5.0},
+    'MLREPORT': {'importance': 4, 'velocity': 20, 'max_concurrent': 2, 'queue_limit': 0}
+}
+
+def run(manager, service_class, seconds, queued=0.0):
+    """Complete one request that queued and then ran on the manager's manual clock"""
+    manager.clock.now -= queued
+    ticket = manager.acquire(service_class)
+    ticket.started += queued
+    manager.clock.now += queued + seconds
+    manager.release(ticket)
+
+def test_performance_index_by_goal_type():
+    clock = ManualClock()
+    manager = WorkloadManager(CLASSES, pi_interval=0.0, clock=clock)
+    for _ in range(9):
+        run(manager, 'MLONLINE', 0.05)
+    run(manager, 'MLONLINE', 1.0)
+    run(manager, 'MLBATCH', 1.0, queued=3.0)
+    status = {s['service_class']: s for s in manager.status()}
+    # 90% of online requests finished within 50 ms against a 100 ms goal
+    assert status['MLONLINE']['performance_index'] == pytest.approx(0.5)
+    # Velocity 25 (1s running, 3s queued) against a goal of 50
+    assert status['MLBATCH']['performance_index'] == pytest.approx(2.0)
+    assert status['MLREPORT']['performance_index'] is None and status['MLREPORT']['goal'] == 'velocity 20'
+    assert status['SYSOTHER']['goal'] == 'discretionary' and status['MLONLINE']['goal'] == '90% within 100 ms'
+    # Completions age out of the window
+    clock.now += 31.0
+    assert manager.status()[0]['performance_index'] is None
+    with pytest.raises(ValueError):
+        ServiceClass('BOTH', response_time=1.0, velocity=50)
+
+def test_less_important_work_is_deferred_while_a_goal_is_missed():
+    clock = ManualClock()
+    manager = WorkloadManager(CLASSES, pi_interval=0.0, clock=clock)
+    reports = [manager.acquire('MLREPORT'), manager.acquire('MLREPORT')]
+    with pytest.raises(AdmissionRejectedError) as rejected:
+        manager.acquire('MLREPORT')
+    assert rejected.value.reason == 'queue full' and rejected.value.retry_after == 1
+    for ticket in reports:
+        manager.release(ticket)
+    run(manager, 'MLONLINE', 0.5)
+    # Online misses its goal: batch keeps its reserved request and defers the rest
+    batch = manager.acquire('MLBATCH')
+    assert manager.acquire('MLBATCH', block=False) is None
+    assert manager.acquire('MLONLINE', block=False) is not None
+    clock.now += 31.0
+    assert manager.acquire('MLBATCH', block=False) is not None
+    manager.release(batch)
+    status = {s['service_class']: s for s in manager.status()}
+    assert status['MLREPORT']['shed'] == 1 and status['MLBATCH']['in_flight'] == 1
+
+def test_free_slots_go_to_the_most_important_waiting_class():
+    manager = WorkloadManager(CLASSES, max_concurrent=1, pi_interval=0.05)
+    holder = manager.acquire('MLBATCH')
+    order = []
+
+    def request(service_class):
+        with manager.admit(service_class):
+            order.append(service_class)
+            time.sleep(0.01)
+
+    threads = []
+    for name in ('MLBATCH', 'MLONLINE'):
+        threads.append(threading.Thread(target=request, args=(name,)))
+        threads[-1].start()
+        while not manager.classes[name].waiting:
+            time.sleep(0.001)
+    manager.release(holder)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ['MLONLINE', 'MLBATCH']
+
+def test_app_sheds_with_retry_after_and_reports_service_classes():
+    app.config['TESTING'] = True
+    client = app.test_client()
+    report = wlm.classes['MLREPORT']
+    held = [wlm.acquire('MLREPORT') for _ in range(report.max_concurrent)]
+    queue_limit, report.queue_limit = report.queue_limit, 0
+    try:
+        response = client.get('/api/security', headers={'X-User-ID': 'MLAPPADM'})
+        assert response.status_code == 503 and response.headers['Retry-After'] == '2'
+        assert response.get_json()['service_class'] == 'MLREPORT'
+        # Health probes are a different class and are unaffected
+        assert client.get('/api/health').status_code == 200
+    finally:
+        report.queue_limit = queue_limit
+        for ticket in held:
+            wlm.release(ticket)
+    data = client.get('/api/performance', headers={'X-User-ID': 'MLAPPADM'}).get_json()
+    assert [s['service_class'] for s in data['workload']][:2] == ['MLHEALTH', 'MLONLINE']
+    assert report.in_flight == 0
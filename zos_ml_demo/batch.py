@@ -0,0 +1,472 @@
+"""
+Offline Batch Scoring
+
+Scores a dataset of transactions -- CSV with a header row, or fixed-width
+FB records -- in chunks across a process pool, for the MLAPP batch job:
+
+    zos-ml-batch /u/mlapp/data/TXNS.csv /u/mlapp/batch/TXNS
+    python -m zos_ml_demo.batch TXNS.FB out/ --format fb --encoding cp037 --workers 8
+
+The input is cut into byte ranges of about --chunk-rows records.  Each
+worker reads, validates and scores its own range and writes a part file
+followed by a manifest; both are written under a temporary name and renamed
+into place, so a rerun after an abend or a cancelled job skips every chunk
+that has a manifest.  The model is trained once on the head of the input
+(or copied from --model) and kept with the job, so resumed chunks score
+exactly as the first run would have.
+
+Inputs, models and outputs can be generation data groups: score the
+current generation of a dataset into a new generation of results with
+
+    zos-ml-batch 'MLAPP.DATA(0)' 'MLAPP.SCORES(+1)' --save-model MLAPP.MODELS
+
+Each step (train, score, merge) reports rows/sec, and summary.json holds
+the totals, the anomaly rate and a risk score histogram.  The exit code
+follows batch conventions: 0 clean, 4 if some records were invalid, 8 if
+the step failed.
+"""
+import io
+import os
+import csv
+import sys
+import glob
+import json
+import time
+import shutil
+import logging
+import argparse
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from zos_ml_demo.ml_model import TransactionAnalyzer
+from zos_ml_demo.utils.zos_gdg import GenerationDataGroup, parse_generation_name
+from zos_ml_demo.utils.zos_enqueue import EnqueueError, get_enqueue_manager, dataset_resource, SYSTEM
+from zos_ml_demo.utils.zos_record_io import DCB, DatasetReader, RecordLayout
+from zos_ml_demo.utils.zos_transaction_schema import TransactionValidator, transaction_schema
+
+logger = logging.getLogger('zos_batch')
+
+# Fixed-width input record: field name and length in bytes (LRECL 99).
+# Amounts are right-justified decimal text, timestamps ISO-8601.
+FB_LAYOUT = (
+    ('transaction_id', 16),
+    ('amount', 15),
+    ('type', 10),
+    ('source_account', 16),
+    ('target_account', 16),
+    ('timestamp', 26)
+)
+
+# Fixed-width result record: transaction ID, prediction code, risk score (LRECL 23)
+RESULT_LAYOUT = (('transaction_id', 16), ('prediction', 1), ('risk_score', 6))
+
+# Prediction codes in the results
+ANOMALY, NORMAL, INVALID = 'A', 'N', 'E'
+
+RISK_BINS = np.linspace(0.0, 1.0, 11)
+
+DEFAULTS = {'chunk_rows': 100000, 'train_rows': 10000, 'workers': None}
+
+JOB_FILE = 'job.json'
+MODEL_FILE = 'model.joblib'
+SUMMARY_FILE = 'summary.json'
+
+def load_settings():
+    """Batch defaults and transaction schema, from config/zos_config.py when it is importable"""
+    try:
+        from config.zos_config import get_zos_config
+    except ImportError:
+        return dict(DEFAULTS), transaction_schema()
+    config = get_zos_config()
+    settings = dict(DEFAULTS)
+    settings.update(config.get('batch_scoring', {}))
+    settings['dataset_directory'] = config.get('dataset_directory')
+    settings['gdg_limit'] = config.get('gdg_limit')
+    settings['enq'] = config.get('enq')
+    return settings, transaction_schema(config['transaction_types'], config['transaction_amount_range'])
+
+
+def resolve_dataset(name, settings):
+    """Path of a generation reference such as MLAPP.DATA(0) or MLAPP.DATA(-1); other names are paths"""
+    base, relative = parse_generation_name(name)
+    if relative is None:
+        return name
+    return GenerationDataGroup.from_config(settings, base).resolve(relative)
+
+
+def _number(text):
+    # Unparseable text is passed through so the schema names the bad field
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return text
+
+
+def _step(rows, seconds, **extra):
+    step = {'rows': rows, 'seconds': seconds, 'rows_per_sec': rows / seconds if seconds > 0 else 0.0}
+    step.update(extra)
+    return step
+
+
+def _log_step(name, step):
+    logger.info(f"STEP {name.upper()}: {step['rows']:,} rows in {step['seconds']:.2f}s "
+                f"({step['rows_per_sec']:,.0f} rows/sec)")
+
+
+def _write_atomic(path, data):
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def plan_job(input_path, fmt, encoding, chunk_rows, fields):
+    """Fixed chunk boundaries for an input file; stored with the checkpoints"""
+    stat = os.stat(input_path)
+    job = {
+        'input': os.path.abspath(input_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'format': fmt,
+        'encoding': encoding,
+        'chunk_rows': chunk_rows
+    }
+    if fmt == 'fb':
+        lrecl = RecordLayout(FB_LAYOUT, encoding).itemsize
+        if stat.st_size % lrecl:
+            logger.warning(f"{input_path} ends with a partial {lrecl}-byte record; it will be ignored")
+        job.update(lrecl=lrecl, data_start=0, chunk_bytes=chunk_rows * lrecl)
+    elif fmt == 'csv':
+        with open(input_path, 'rb') as f:
+            header_line = f.readline()
+            sample = [f.readline() for _ in range(1000)]
+        header = next(csv.reader([header_line.decode(encoding)]), [])
+        header = [name.strip() for name in header]
+        missing = [name for name in fields if name not in header]
+        if missing:
+            raise ValueError(f"CSV header lacks required fields: {', '.join(missing)}")
+        sample = [line for line in sample if line]
+        line_bytes = sum(map(len, sample)) / len(sample) if sample else 1
+        job.update(header=header, data_start=len(header_line),
+                   chunk_bytes=max(1, int(line_bytes * chunk_rows)))
+    else:
+        raise ValueError(f"Unknown input format: {fmt}")
+    job['chunks'] = max(0, -(-(stat.st_size - job['data_start']) // job['chunk_bytes']))
+    return job
+
+
+def chunk_range(job, index):
+    start = job['data_start'] + index * job['chunk_bytes']
+    return start, min(start + job['chunk_bytes'], job['size'])
+
+
+def _read_csv_chunk(job, index, fields):
+    start, end = chunk_range(job, index)
+    with open(job['input'], 'rb') as f:
+        # A chunk owns every line that starts inside its byte range
+        if start > job['data_start']:
+            f.seek(start - 1)
+            f.readline()
+        else:
+            f.seek(start)
+        data = f.read(max(0, end - f.tell()))
+        if data and not data.endswith(b'\n'):
+            data += f.readline()
+    rows = [row for row in csv.reader(io.StringIO(data.decode(job['encoding']))) if row]
+    header = job['header']
+
+    def column(name):
+        i = header.index(name)
+        return [row[i] if i < len(row) else '' for row in rows]
+
+    columns = {name: column(name) for name in fields}
+    columns['amount'] = [_number(text) for text in columns['amount']]
+    if 'transaction_id' in header:
+        ids = column('transaction_id')
+    else:
+        ids = [f"{index:06d}{i:010d}" for i in range(len(rows))]
+    return ids, columns
+
+
+def _read_fb_chunk(job, index, fields):
+    layout = RecordLayout(FB_LAYOUT, job['encoding'])
+    first = index * job['chunk_rows']
+    # Records are a view of the mapped file; decoding copies only the columns
+    with DatasetReader(job['input'], DCB('F', job['lrecl']), layout) as reader:
+        decoded = layout.decode(reader.records()[first:first + job['chunk_rows']])
+    columns = {name: decoded[name].tolist() for name in fields if name != 'amount'}
+    try:
+        columns['amount'] = decoded['amount'].astype(np.float64).tolist()
+    except ValueError:
+        columns['amount'] = [_number(value) for value in decoded['amount'].tolist()]
+    return decoded['transaction_id'].tolist(), columns
+
+
+_READERS = {'csv': _read_csv_chunk, 'fb': _read_fb_chunk}
+
+
+def read_chunk(job, index, validator):
+    """(transaction IDs, features, valid mask, columns) for one chunk"""
+    ids, columns = _READERS[job['format']](job, index, validator.fields)
+    features = validator.new_rows(len(ids))
+    valid = validator.validate_columns(columns, features)
+    return ids, features, valid, columns
+
+
+def train_model(job, validator, train_rows, path):
+    """Fit the model on the first train_rows valid records and save it with the job"""
+    samples = []
+    rows = 0
+    for index in range(job['chunks']):
+        _, features, valid, _ = read_chunk(job, index, validator)
+        samples.append(features[valid])
+        rows += len(samples[-1])
+        if rows >= train_rows:
+            break
+    analyzer = TransactionAnalyzer()
+    analyzer.training_data = np.concatenate(samples)[:train_rows] if samples else []
+    if not analyzer.train():
+        raise ValueError(f"Input has too few valid records to train a model ({rows})")
+    analyzer.save(path)
+    return len(analyzer.training_data)
+
+
+def _write_results(path, job, ids, prediction, risk, errors):
+    if job['format'] == 'fb':
+        layout = RecordLayout(RESULT_LAYOUT, job['encoding'])
+        data = layout.encode({'transaction_id': ids, 'prediction': prediction,
+                              'risk_score': np.char.mod('%6.4f', risk)}).tobytes()
+    else:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(
+            zip(ids, prediction.tolist(), np.char.mod('%.4f', risk).tolist(), errors))
+        data = buffer.getvalue().encode(job['encoding'])
+    _write_atomic(path, data)
+
+
+_worker = None
+
+
+def _init_worker(job, output_dir, schema):
+    global _worker
+    _worker = (job, output_dir, TransactionValidator(schema),
+               TransactionAnalyzer.load(os.path.join(output_dir, MODEL_FILE)))
+
+
+def part_path(output_dir, index, suffix):
+    return os.path.join(output_dir, f"part-{index:05d}.{suffix}")
+
+
+def score_chunk(index):
+    """Read, validate and score one chunk, then commit its results and manifest"""
+    job, output_dir, validator, analyzer = _worker
+    started = time.perf_counter()
+    ids, features, valid, columns = read_chunk(job, index, validator)
+    risk = np.zeros(len(ids))
+    anomalies = np.zeros(len(ids), dtype=bool)
+    if valid.any():
+        risk[valid], anomalies[valid] = analyzer.analyze_batch(features[valid])
+    prediction = np.where(valid, np.where(anomalies, ANOMALY, NORMAL), INVALID)
+
+    # Only invalid records pay for a per-record check that names the problem
+    errors = [''] * len(ids)
+    for i in np.flatnonzero(~valid).tolist():
+        errors[i] = validator.validate({name: columns[name][i] for name in validator.fields})
+
+    _write_results(part_path(output_dir, index, job['format']), job, ids, prediction, risk, errors)
+    seconds = time.perf_counter() - started
+    manifest = _step(len(ids), seconds, chunk=index, valid=int(valid.sum()),
+                     anomalies=int(anomalies.sum()), risk_sum=float(risk[valid].sum()),
+                     risk_histogram=np.histogram(risk[valid], RISK_BINS)[0].tolist())
+    _write_atomic(part_path(output_dir, index, 'json'), json.dumps(manifest).encode())
+    return manifest
+
+
+def _clear(output_dir):
+    for path in glob.glob(os.path.join(output_dir, 'part-*')) + [
+            os.path.join(output_dir, name) for name in (JOB_FILE, MODEL_FILE, SUMMARY_FILE)]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def merge_results(job, output_dir):
+    """Concatenate the part files into one results file"""
+    path = os.path.join(output_dir, f"results.{job['format']}")
+    with open(path + '.tmp', 'wb') as out:
+        if job['format'] == 'csv':
+            out.write('transaction_id,prediction,risk_score,error\n'.encode(job['encoding']))
+        for index in range(job['chunks']):
+            with open(part_path(output_dir, index, job['format']), 'rb') as part:
+                shutil.copyfileobj(part, out, 1 << 20)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def summarize(job, output_dir):
+    manifests = []
+    for index in range(job['chunks']):
+        with open(part_path(output_dir, index, 'json')) as f:
+            manifests.append(json.load(f))
+    rows = sum(m['rows'] for m in manifests)
+    valid = sum(m['valid'] for m in manifests)
+    anomalies = sum(m['anomalies'] for m in manifests)
+    histogram = np.sum([m['risk_histogram'] for m in manifests], axis=0) if manifests else np.zeros(len(RISK_BINS) - 1)
+    return {
+        'input': job['input'],
+        'chunks': job['chunks'],
+        'rows': rows,
+        'valid': valid,
+        'invalid': rows - valid,
+        'anomalies': anomalies,
+        'anomaly_rate': anomalies / valid if valid else 0.0,
+        'risk_mean': sum(m['risk_sum'] for m in manifests) / valid if valid else 0.0,
+        'risk_histogram': {'bins': [round(b, 2) for b in RISK_BINS.tolist()], 'counts': [int(c) for c in histogram]}
+    }
+
+
+def run(input_path, output_dir, fmt='csv', encoding='utf-8', chunk_rows=None, workers=None,
+        model=None, train_rows=None, restart=False, merge=True, save_model=None):
+    """Score input_path into output_dir, resuming from its checkpoints; returns the summary
+
+    input_path and model may name GDG generations, e.g. MLAPP.DATA(0).  An
+    output_dir of the form BASE(+1) is built in the GDG's pending directory
+    (where a rerun resumes) and rolled in as a new generation when the job
+    completes.  save_model catalogs a newly trained model as the next
+    generation of that GDG base.  Both are enqueued exclusive, so two jobs
+    never build the same new generation or retrain the same model at once.
+    """
+    settings, schema = load_settings()
+    base, relative = parse_generation_name(output_dir)
+    # Jobs building the same new generation would share its pending directory
+    serialization = (get_enqueue_manager(settings).enqueue(dataset_resource(f"{base}(+1)"), scope=SYSTEM)
+                     if relative is not None else nullcontext())
+    with serialization:
+        return _run(settings, schema, input_path, output_dir, fmt, encoding, chunk_rows, workers, model,
+                    train_rows, restart, merge, save_model)
+
+
+def _run(settings, schema, input_path, output_dir, fmt, encoding, chunk_rows, workers, model, train_rows,
+         restart, merge, save_model):
+    input_path = resolve_dataset(input_path, settings)
+    model = resolve_dataset(model, settings) if model else None
+    base, relative = parse_generation_name(output_dir)
+    output_gdg = None
+    if relative is not None:
+        if relative != 1:
+            raise ValueError(f"Batch output must be a new generation, {base}(+1)")
+        output_gdg = GenerationDataGroup.from_config(settings, base)
+        output_dir = output_gdg.pending_path()
+    chunk_rows = chunk_rows or settings['chunk_rows']
+    train_rows = train_rows or settings['train_rows']
+    workers = workers or settings['workers'] or os.cpu_count() or 1
+    validator = TransactionValidator(schema)
+
+    os.makedirs(output_dir, exist_ok=True)
+    job = plan_job(input_path, fmt, encoding, chunk_rows, validator.fields)
+    job['model'] = os.path.abspath(model) if model else None
+    job_path = os.path.join(output_dir, JOB_FILE)
+    if restart:
+        _clear(output_dir)
+    elif os.path.exists(job_path):
+        with open(job_path) as f:
+            if json.load(f) != job:
+                raise ValueError(f"{output_dir} holds checkpoints of a different input or settings; "
+                                 "rerun with --restart to discard them")
+    _write_atomic(job_path, json.dumps(job, indent=2).encode())
+    steps = {}
+
+    model_path = os.path.join(output_dir, MODEL_FILE)
+    started = time.perf_counter()
+    if os.path.exists(model_path):
+        steps['train'] = _step(0, 0.0, skipped=True)
+    elif model:
+        shutil.copyfile(model, model_path)
+        steps['train'] = _step(0, 0.0, source=job['model'])
+    else:
+        retraining = (get_enqueue_manager(settings).enqueue(dataset_resource(save_model), scope=SYSTEM)
+                      if save_model else nullcontext())
+        with retraining:
+            steps['train'] = _step(train_model(job, validator, train_rows, model_path), time.perf_counter() - started)
+            if save_model:
+                steps['train']['generation'] = GenerationDataGroup.from_config(settings, save_model).roll_in(
+                    model_path, copy=True)
+    _log_step('train', steps['train'])
+
+    pending = [i for i in range(job['chunks']) if not os.path.exists(part_path(output_dir, i, 'json'))]
+    if len(pending) < job['chunks']:
+        logger.info(f"Resuming: {job['chunks'] - len(pending)} of {job['chunks']} chunks already complete")
+    started = time.perf_counter()
+    scored = 0
+    if workers <= 1 or len(pending) <= 1:
+        _init_worker(job, output_dir, schema)
+        results = (score_chunk(i) for i in pending)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(min(workers, len(pending)), initializer=_init_worker,
+                                   initargs=(job, output_dir, schema))
+        results = (future.result() for future in as_completed([pool.submit(score_chunk, i) for i in pending]))
+    try:
+        for done, manifest in enumerate(results, 1):
+            scored += manifest['rows']
+            logger.info(f"Chunk {manifest['chunk']} ({done}/{len(pending)}): {manifest['rows']:,} rows, "
+                        f"{manifest['rows_per_sec']:,.0f} rows/sec")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    steps['score'] = _step(scored, time.perf_counter() - started,
+                           workers=min(workers, max(len(pending), 1)), chunks_skipped=job['chunks'] - len(pending))
+    _log_step('score', steps['score'])
+
+    summary = summarize(job, output_dir)
+    if merge:
+        started = time.perf_counter()
+        summary['results'] = merge_results(job, output_dir)
+        steps['merge'] = _step(summary['rows'], time.perf_counter() - started)
+        _log_step('merge', steps['merge'])
+    summary['steps'] = steps
+    _write_atomic(os.path.join(output_dir, SUMMARY_FILE), json.dumps(summary, indent=2).encode())
+    if output_gdg is not None:
+        summary['generation'] = output_gdg.roll_in(output_dir)
+        generation_dir = os.path.join(output_gdg.directory, summary['generation'])
+        if merge:
+            summary['results'] = os.path.join(generation_dir, os.path.basename(summary['results']))
+        _write_atomic(os.path.join(generation_dir, SUMMARY_FILE), json.dumps(summary, indent=2).encode())
+        logger.info(f"Results cataloged as {summary['generation']}")
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='zos-ml-batch', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='CSV file with a header row, or FB records; or a generation such as MLAPP.DATA(0)')
+    parser.add_argument('output', help='directory for results, checkpoints and summary.json; '
+                                       'or a new generation such as MLAPP.SCORES(+1)')
+    parser.add_argument('--format', choices=sorted(_READERS), default='csv')
+    parser.add_argument('--encoding', default='utf-8', help='input/output code page, e.g. cp037 for EBCDIC')
+    parser.add_argument('--chunk-rows', type=int, help=f"records per chunk (default {DEFAULTS['chunk_rows']})")
+    parser.add_argument('--workers', type=int, help='scoring processes (default: CPU count)')
+    parser.add_argument('--model', help='fitted IsolationForest saved with joblib, or a generation such as '
+                                        'MLAPP.MODELS(0) (default: train on the input)')
+    parser.add_argument('--save-model', metavar='GDG', help='catalog a newly trained model as the next generation of GDG')
+    parser.add_argument('--train-rows', type=int, help=f"records to train on (default {DEFAULTS['train_rows']})")
+    parser.add_argument('--restart', action='store_true', help='discard checkpoints and score everything again')
+    parser.add_argument('--no-merge', dest='merge', action='store_false', help='leave results as part files')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    try:
+        summary = run(args.input, args.output, args.format, args.encoding, args.chunk_rows, args.workers,
+                      args.model, args.train_rows, args.restart, args.merge, args.save_model)
+    except (OSError, LookupError, ValueError, EnqueueError) as e:
+        logger.error(f"Batch scoring failed: {str(e)}")
+        return 8
+    except Exception:
+        # A crashed worker or any other failure still ends the step with RC 8 for COND checks
+        logger.exception("Batch scoring failed")
+        return 8
+    logger.info(f"Scored {summary['rows']:,} records: {summary['anomalies']:,} anomalies, "
+                f"{summary['invalid']:,} invalid")
+    return 4 if summary['invalid'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,10 +2,17 @@
 Machine Learning Model for Transaction Analysis
 """
 import numpy as np
-from sklearn.ensemble import IsolationForest
+from zos_ml_demo.utils.zos_metrics_registry import get_metrics_registry
+
+MODEL_TRAININGS = get_metrics_registry().counter(
+    'zos_model_trainings_total', 'Isolation Forest training runs')
+MODEL_PREDICTIONS = get_metrics_registry().counter(
+    'zos_model_predictions_total', 'Model predictions by result', ('result',))
 
 class TransactionAnalyzer:
     def __init__(self):
+        # scikit-learn dominates import time; load it only when a model is built
+        from sklearn.ensemble import IsolationForest
         self.model = IsolationForest(
             n_estimators=100,
             contamination=0.1,
@@ -14,6 +21,20 @@ class TransactionAnalyzer:
         self.is_trained = False
         self.training_data = []
 
+    @classmethod
+    def load(cls, path):
+        """Analyzer around a fitted model saved with save(); its arrays are memory-mapped, not read"""
+        import joblib
+        analyzer = cls()
+        analyzer.model = joblib.load(path, mmap_mode='r')
+        analyzer.is_trained = True
+        return analyzer
+
+    def save(self, path):
+        """Write the fitted model with joblib, uncompressed so load() can map it"""
+        import joblib
+        joblib.dump(self.model, path)
+
     def add_transaction(self, transaction_data):
         """Add transaction data for training."""
         self.training_data.append(transaction_data)
@@ -26,6 +47,7 @@ class TransactionAnalyzer:
         X = np.array(self.training_data)
         self.model.fit(X)
         self.is_trained = True
+        MODEL_TRAININGS.inc()
         return True
 
     def analyze(self, transaction):
@@ -36,9 +58,23 @@ class TransactionAnalyzer:
         X = np.array([transaction])
         score = self.model.score_samples(X)[0]
         prediction = self.model.predict(X)[0]
+        MODEL_PREDICTIONS.labels('anomaly' if int(prediction) == -1 else 'normal').inc()
         
         return {
             'score': float(score),
             'is_anomaly': int(prediction) == -1,
             'confidence': float(np.exp(score) / (1 + np.exp(score)))
         }
+
+    def analyze_batch(self, features):
+        """Risk scores (0-1, higher is more anomalous) and anomaly flags for a feature matrix."""
+        if not self.is_trained:
+            return None
+
+        # One pass through the forest; predict() would score every row again
+        scores = self.model.score_samples(features)
+        anomalies = scores < self.model.offset_
+        flagged = int(anomalies.sum())
+        MODEL_PREDICTIONS.labels('anomaly').inc(flagged)
+        MODEL_PREDICTIONS.labels('normal').inc(len(scores) - flagged)
+        return -scores, anomalies
@@ -2,25 +2,36 @@
 Advanced z/OS Subsystem Integrations
 """
 import logging
+import threading
 from datetime import datetime
+from .zos_resilience import get_resilience_manager
+from .zos_scheduler import WorkloadScheduler, parse_schedule
+from .zos_gdg import GenerationDataGroup
+from .zos_pdse import PDSELibrary
+from .zos_coupling_facility import CouplingFacility
+from .zos_sysplex import SysplexRegistry, WorkloadRouter, default_member_name
+from .zos_enqueue import get_enqueue_manager, dataset_resource, SYSTEM
+from .zos_record_io import dataset_path
 
 class ZOSSystemAutomation:
     """Integration with IBM System Automation"""
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_system_automation')
+        self.resilience = get_resilience_manager(config)
 
     def define_resource(self, resource_name, resource_type):
         """Define resource to System Automation"""
         try:
-            resource_def = {
-                'name': resource_name,
-                'type': resource_type,
-                'automated': True,
-                'dependencies': []
-            }
-            self.logger.info(f"Defining SA resource: {resource_def}")
-            return True
+            with self.resilience.guard('SA'):
+                resource_def = {
+                    'name': resource_name,
+                    'type': resource_type,
+                    'automated': True,
+                    'dependencies': []
+                }
+                self.logger.info(f"Defining SA resource: {resource_def}")
+                return True
         except Exception as e:
             self.logger.error(f"SA resource definition failed: {str(e)}")
             return False
@@ -28,11 +39,12 @@ class ZOSSystemAutomation:
     def monitor_resource(self, resource_name):
         """Monitor resource status"""
         try:
-            return {
-                'status': 'AVAILABLE',
-                'health': 100,
-                'last_checked': datetime.now().isoformat()
-            }
+            with self.resilience.guard('SA'):
+                return {
+                    'status': 'AVAILABLE',
+                    'health': 100,
+                    'last_checked': datetime.now().isoformat()
+                }
         except Exception as e:
             self.logger.error(f"SA monitoring failed: {str(e)}")
             return None
@@ -42,26 +54,148 @@ class ZOSParallelSysplex:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_parallel_sysplex')
+        self.resilience = get_resilience_manager(config)
+        self._facility = None
+        self.sysplex_name = None
+        self.registry = None
+        self.router = None
+        self._consumer_stop = None
 
-    def join_sysplex(self, sysplex_name):
-        """Join a Parallel Sysplex"""
+    def join_sysplex(self, sysplex_name, member=None, capacity=None, on_work=None):
+        """Join a Parallel Sysplex, heartbeating capacity() to the other members until leave_sysplex.
+
+        With on_work, each unit of work routed to this member is passed to
+        on_work(work) on a consumer thread."""
         try:
-            self.logger.info(f"Joining sysplex: {sysplex_name}")
-            return True
+            with self.resilience.guard('SYSPLEX'):
+                structure = self.cache_structure(sysplex_name)
+                if structure is None:
+                    self.logger.info(f"No coupling facility is configured; running as the only member of {sysplex_name}")
+                    return True
+                self.leave_sysplex()
+                # Set before the first heartbeat, whose capacity() may look up routed_backlog()
+                self.sysplex_name = sysplex_name
+                settings = self.config.get('sysplex') or {}
+                member = member or settings.get('member') or default_member_name()
+                self.registry = SysplexRegistry(structure, member, capacity,
+                                                settings.get('heartbeat_interval', 5.0),
+                                                settings.get('failure_timeout'))
+                self.registry.heartbeat()
+                self.registry.start()
+                self.router = WorkloadRouter(self.registry, settings.get('strategy', 'p2c'),
+                                             settings.get('cpu_limit', 90.0))
+                if on_work is not None:
+                    self._start_consumer(on_work)
+                self.logger.info(f"Joined sysplex {sysplex_name} as {member}")
+                return True
         except Exception as e:
             self.logger.error(f"Sysplex join failed: {str(e)}")
             return False
 
+    def _start_consumer(self, on_work):
+        arrived = threading.Event()
+        stop = self._consumer_stop = threading.Event()
+        interval = self.registry.heartbeat_interval
+        # Transition callbacks run on the CF reader thread, which must not make CF requests itself
+        self.list_structure(self.sysplex_name).on_transition(self.registry.member, lambda name, length: arrived.set())
+
+        def consume():
+            while not stop.is_set():
+                work = self.take_work()
+                if work is None:
+                    # Items queued before the monitor was registered are found by the periodic poll
+                    arrived.wait(interval)
+                    arrived.clear()
+                    continue
+                try:
+                    on_work(work)
+                except Exception as e:
+                    self.logger.error(f"Routed work failed: {str(e)}")
+
+        threading.Thread(target=consume, daemon=True, name='sysplex-work-consumer').start()
+
+    def leave_sysplex(self):
+        """Stop heartbeating and remove this member from the sysplex"""
+        if self._consumer_stop is not None:
+            self._consumer_stop.set()
+            self._consumer_stop = None
+        if self.registry is not None:
+            try:
+                self.registry.leave()
+            except Exception as e:
+                self.logger.error(f"Sysplex leave failed: {str(e)}")
+            self.registry = self.router = self.sysplex_name = None
+
+    def sysplex_members(self):
+        """Members with their status and last published capacity"""
+        return self.registry.refresh() if self.registry is not None else []
+
+    def route_work(self, work):
+        """Queue a unit of scoring work on the least-loaded member; returns the member's name"""
+        try:
+            with self.resilience.guard('SYSPLEX'):
+                if self.router is None:
+                    raise RuntimeError("Not joined to a sysplex with a coupling facility")
+                member = self.router.select()
+                self.list_structure(self.sysplex_name).push(member, work)
+                return member
+        except Exception as e:
+            self.logger.error(f"Work routing failed: {str(e)}")
+            return None
+
+    def take_work(self):
+        """Next unit of work routed to this member, or None"""
+        try:
+            with self.resilience.guard('SYSPLEX'):
+                if self.registry is None:
+                    return None
+                return self.list_structure(self.sysplex_name).pop(self.registry.member)
+        except Exception as e:
+            self.logger.error(f"Work retrieval failed: {str(e)}")
+            return None
+
+    def routed_backlog(self):
+        """Units of work routed to this member and not yet taken"""
+        try:
+            with self.resilience.guard('SYSPLEX'):
+                registry, sysplex_name = self.registry, self.sysplex_name
+                if registry is None or sysplex_name is None:
+                    return 0
+                return self.list_structure(sysplex_name).length(registry.member)
+        except Exception as e:
+            self.logger.error(f"Work backlog lookup failed: {str(e)}")
+            return 0
+
+    @property
+    def coupling_facility(self):
+        """Connection to the configured CF daemon, or None when instances share nothing"""
+        settings = self.config.get('coupling_facility')
+        if not settings:
+            return None
+        if self._facility is None:
+            self._facility = CouplingFacility(**settings)
+        return self._facility
+
+    def cache_structure(self, structure_name):
+        """Shared cache structure; locally cached entries are cross-invalidated by other instances"""
+        facility = self.coupling_facility
+        return facility.cache(structure_name) if facility else None
+
+    def list_structure(self, structure_name):
+        facility = self.coupling_facility
+        return facility.list_structure(structure_name) if facility else None
+
     def update_coupling_facility(self, structure_name, data):
-        """Update Coupling Facility structure"""
+        """Write each entry of data to a CF cache structure"""
         try:
-            cf_data = {
-                'structure': structure_name,
-                'data': data,
-                'timestamp': datetime.now().isoformat()
-            }
-            self.logger.info(f"Updating CF structure: {cf_data}")
-            return True
+            with self.resilience.guard('SYSPLEX'):
+                structure = self.cache_structure(structure_name)
+                if structure is None:
+                    raise RuntimeError("No coupling facility is configured")
+                for name, value in data.items():
+                    structure.write(name, value)
+                self.logger.info(f"Updated CF structure {structure_name}: {len(data)} entries")
+                return True
         except Exception as e:
             self.logger.error(f"CF update failed: {str(e)}")
             return False
@@ -71,17 +205,22 @@ class ZOSWorkloadScheduler:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_workload_scheduler')
+        self.resilience = get_resilience_manager(config)
+        self.engine = WorkloadScheduler(**config['scheduler'])
 
-    def schedule_job(self, job_name, schedule):
-        """Schedule a job"""
+    def schedule_job(self, job_name, schedule, action, after=(), stream=None, **options):
+        """Schedule a job on a cron expression, an interval in seconds and/or after other jobs"""
         try:
-            job_def = {
-                'name': job_name,
-                'schedule': schedule,
-                'dependencies': []
-            }
-            self.logger.info(f"Scheduling job: {job_def}")
-            return True
+            # A malformed schedule is the caller's error, not a scheduler failure
+            schedule = parse_schedule(schedule)
+        except ValueError as e:
+            self.logger.error(f"Job scheduling failed: {str(e)}")
+            return False
+        try:
+            with self.resilience.guard('SCHEDULER'):
+                job = self.engine.add_job(job_name, action, schedule, after, stream, **options)
+                self.logger.info(f"Scheduled job {job_name} ({job.schedule or 'after ' + ', '.join(job.after)})")
+                return True
         except Exception as e:
             self.logger.error(f"Job scheduling failed: {str(e)}")
             return False
@@ -89,66 +228,134 @@ class ZOSWorkloadScheduler:
     def monitor_job_stream(self, stream_name):
         """Monitor job stream status"""
         try:
-            return {
-                'status': 'RUNNING',
-                'next_run': datetime.now().isoformat(),
-                'last_completion': 'SUCCESS'
-            }
+            with self.resilience.guard('SCHEDULER'):
+                status = self.engine.stream_status(stream_name)
+            if status is None:
+                self.logger.error(f"Job stream monitoring failed: unknown job stream {stream_name}")
+            return status
         except Exception as e:
             self.logger.error(f"Job stream monitoring failed: {str(e)}")
             return None
 
+    def start(self):
+        """Start running scheduled jobs in this process"""
+        self.engine.start()
+
+    def stop(self):
+        self.engine.stop()
+
 class ZOSDatasetServices:
     """Advanced Dataset Services"""
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_dataset_services')
+        self.resilience = get_resilience_manager(config)
+        self.enqueues = get_enqueue_manager(config)
+        self._libraries = {}
 
-    def create_generation_dataset(self, base_name, version):
-        """Create a Generation Dataset Group member"""
+    def generation_data_group(self, base_name):
+        """GDG for a dataset base name under the configured dataset directory"""
+        return GenerationDataGroup.from_config(self.config, base_name)
+
+    def define_generation_data_group(self, base_name, limit=None, scratch=True):
+        """Define a GDG base (or change its limit)"""
         try:
-            gds_info = {
-                'base_name': base_name,
-                'version': version,
-                'timestamp': datetime.now().isoformat()
-            }
-            self.logger.info(f"Creating GDG: {gds_info}")
-            return True
+            with self.resilience.guard('DATASET'):
+                self.generation_data_group(base_name).define(limit, scratch)
+                self.logger.info(f"Defined GDG {base_name} (limit {limit or self.config.get('gdg_limit')})")
+                return True
         except Exception as e:
-            self.logger.error(f"GDG creation failed: {str(e)}")
+            self.logger.error(f"GDG definition failed: {str(e)}")
             return False
 
+    def create_generation_dataset(self, base_name, source_path, copy=False):
+        """Roll a finished file or directory in as the new (+1) generation; returns its name"""
+        try:
+            # Waiting for the ENQ is serialization, not a DATASET failure, so it stays outside the guard
+            with self.enqueues.enqueue(dataset_resource(base_name), scope=SYSTEM), self.resilience.guard('DATASET'):
+                name = self.generation_data_group(base_name).roll_in(source_path, copy)
+                self.logger.info(f"Created generation {name}")
+                return name
+        except Exception as e:
+            self.logger.error(f"GDG creation failed: {str(e)}")
+            return None
+
+    def resolve_generation(self, base_name, relative=0):
+        """Path of a generation by relative reference, or None if it is not cataloged"""
+        try:
+            return self.generation_data_group(base_name).resolve(relative)
+        except (LookupError, ValueError) as e:
+            self.logger.error(f"GDG lookup failed: {str(e)}")
+            return None
+
+    def rollback_generation(self, base_name, steps=1):
+        """Make an older generation current again; returns its name"""
+        try:
+            with self.enqueues.enqueue(dataset_resource(base_name), scope=SYSTEM), self.resilience.guard('DATASET'):
+                name = self.generation_data_group(base_name).rollback(steps)
+                self.logger.info(f"Rolled {base_name} back to {name}")
+                return name
+        except Exception as e:
+            self.logger.error(f"GDG rollback failed: {str(e)}")
+            return None
+
+    def pdse_library(self, pdse_name):
+        """Member library backing a PDSE, opened once per process"""
+        path = dataset_path(self.config, pdse_name)
+        library = self._libraries.get(path)
+        if library is None:
+            library = self._libraries[path] = PDSELibrary(
+                path, compact_ratio=self.config.get('pdse_compact_ratio', 0.5))
+        return library
+
     def manage_pdse_member(self, pdse_name, member_name, data):
-        """Manage PDSE member"""
+        """Add or replace a PDSE member"""
         try:
-            member_info = {
-                'pdse': pdse_name,
-                'member': member_name,
-                'size': len(data)
-            }
-            self.logger.info(f"Managing PDSE member: {member_info}")
-            return True
+            with self.enqueues.enqueue(dataset_resource(pdse_name), scope=SYSTEM), self.resilience.guard('DATASET'):
+                self.pdse_library(pdse_name).write(member_name, data)
+                self.logger.info(f"Stored PDSE member {pdse_name}({member_name.upper()}): {len(data)} bytes")
+                return True
         except Exception as e:
             self.logger.error(f"PDSE management failed: {str(e)}")
             return False
 
+    def read_pdse_member(self, pdse_name, member_name):
+        """Memory-mapped view of a PDSE member, or None if it does not exist"""
+        try:
+            library = self.pdse_library(pdse_name)
+            if member_name.upper() not in library:
+                # It may have been stored by another process since the library was opened
+                library.refresh()
+            return library.read(member_name)
+        except (KeyError, OSError, ValueError) as e:
+            self.logger.error(f"PDSE member read failed: {str(e)}")
+            return None
+
+    def list_pdse_members(self, pdse_name):
+        """Directory of a PDSE: name, size and last update time of each member"""
+        library = self.pdse_library(pdse_name)
+        library.refresh()
+        return [library.stat(name) for name in library.members()]
+
 class ZOSSecurityServer:
     """Advanced Security Server Integration"""
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_security_server')
+        self.resilience = get_resilience_manager(config)
 
     def create_security_profile(self, profile_name, class_name):
         """Create security profile"""
         try:
-            profile = {
-                'name': profile_name,
-                'class': class_name,
-                'owner': 'MLAPPUSR',
-                'uacc': 'NONE'
-            }
-            self.logger.info(f"Creating security profile: {profile}")
-            return True
+            with self.resilience.guard('SECURITY'):
+                profile = {
+                    'name': profile_name,
+                    'class': class_name,
+                    'owner': 'MLAPPUSR',
+                    'uacc': 'NONE'
+                }
+                self.logger.info(f"Creating security profile: {profile}")
+                return True
         except Exception as e:
             self.logger.error(f"Profile creation failed: {str(e)}")
             return False
@@ -156,13 +363,14 @@ class ZOSSecurityServer:
     def audit_security_event(self, event_data):
         """Audit security event"""
         try:
-            audit_record = {
-                'event': event_data,
-                'timestamp': datetime.now().isoformat(),
-                'system': self.config.get('system_id')
-            }
-            self.logger.info(f"Auditing security event: {audit_record}")
-            return True
+            with self.resilience.guard('SECURITY'):
+                audit_record = {
+                    'event': event_data,
+                    'timestamp': datetime.now().isoformat(),
+                    'system': self.config.get('system_id')
+                }
+                self.logger.info(f"Auditing security event: {audit_record}")
+                return True
         except Exception as e:
             self.logger.error(f"Security audit failed: {str(e)}")
             return False
@@ -172,17 +380,19 @@ class ZOSNetworkServices:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_network_services')
+        self.resilience = get_resilience_manager(config)
 
     def configure_vtam_application(self, appl_name):
         """Configure VTAM application"""
         try:
-            appl_def = {
-                'name': appl_name,
-                'type': 'APPL',
-                'auth': 'ACQ'
-            }
-            self.logger.info(f"Configuring VTAM application: {appl_def}")
-            return True
+            with self.resilience.guard('NETWORK'):
+                appl_def = {
+                    'name': appl_name,
+                    'type': 'APPL',
+                    'auth': 'ACQ'
+                }
+                self.logger.info(f"Configuring VTAM application: {appl_def}")
+                return True
         except Exception as e:
             self.logger.error(f"VTAM configuration failed: {str(e)}")
             return False
@@ -190,13 +400,14 @@ class ZOSNetworkServices:
     def start_tcp_listener(self, port, service_name):
         """Start TCP/IP listener"""
         try:
-            listener = {
-                'port': port,
-                'service': service_name,
-                'status': 'LISTENING'
-            }
-            self.logger.info(f"Starting TCP listener: {listener}")
-            return True
+            with self.resilience.guard('NETWORK'):
+                listener = {
+                    'port': port,
+                    'service': service_name,
+                    'status': 'LISTENING'
+                }
+                self.logger.info(f"Starting TCP listener: {listener}")
+                return True
         except Exception as e:
             self.logger.error(f"TCP listener start failed: {str(e)}")
             return False
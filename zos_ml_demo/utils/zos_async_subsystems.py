@@ -0,0 +1,118 @@
+"""
+Async z/OS Subsystem Clients
+
+Awaitable counterparts of the DB2, IMS, CICS, MQ and VSAM integrations for
+the ASGI serving mode.  Blocking client calls run on a bounded thread pool,
+so the event loop never waits on subsystem I/O, and they keep the circuit
+breakers and bulkheads of the wrapped synchronous client.  When a
+transaction gateway is configured, IMS and CICS requests are awaited on the
+gateway's own event loop instead.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_IO_WORKERS = 32
+
+
+def create_io_executor(max_workers=DEFAULT_IO_WORKERS):
+    """Thread pool for blocking subsystem and security calls"""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='zos-io')
+
+
+class _AsyncSubsystemClient:
+    """Runs a synchronous client's methods on an executor"""
+    def __init__(self, client, executor=None):
+        self.client = client
+        self.executor = executor
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(getattr(self.client, method), *args, **kwargs))
+
+
+class AsyncZOSDB2Integration(_AsyncSubsystemClient):
+    async def execute_sql(self, sql_statement, parameters=None):
+        """Execute SQL statement"""
+        return await self._call('execute_sql', sql_statement, parameters)
+
+    async def store_transaction(self, transaction_data):
+        """Store transaction in DB2"""
+        return await self._call('store_transaction', transaction_data)
+
+    async def get_transaction_history(self, trans_id=None):
+        """Retrieve transaction history"""
+        return await self._call('get_transaction_history', trans_id)
+
+
+class AsyncZOSIMSIntegration(_AsyncSubsystemClient):
+    async def send_ims_transaction(self, transaction_code, data):
+        """Send IMS transaction"""
+        return await self._call('send_ims_transaction', transaction_code, data)
+
+    async def request_ims_transaction(self, transaction_code, data, timeout=None):
+        """Send IMS transaction and await its reply"""
+        if self.client.gateway is None:
+            return await self.send_ims_transaction(transaction_code, data)
+        return await self.client.gateway.request_async(
+            'IMS', {'trancode': transaction_code, 'data': data}, timeout)
+
+    async def get_ims_response(self, correlation_id, timeout=0):
+        """Get IMS transaction response"""
+        return await self._call('get_ims_response', correlation_id, timeout)
+
+
+class AsyncZOSCICSIntegration(_AsyncSubsystemClient):
+    async def send_cics_transaction(self, transaction_id, data):
+        """Send CICS transaction"""
+        return await self._call('send_cics_transaction', transaction_id, data)
+
+    async def request_cics_transaction(self, transaction_id, data, timeout=None):
+        """Send CICS transaction and await its reply"""
+        if self.client.gateway is None:
+            return await self.send_cics_transaction(transaction_id, data)
+        return await self.client.gateway.request_async(
+            'CICS', {'transid': transaction_id, 'data': data}, timeout)
+
+    async def get_cics_response(self, correlation_id, timeout=0):
+        """Get CICS transaction response"""
+        return await self._call('get_cics_response', correlation_id, timeout)
+
+    async def start_cics_task(self, task_name, parameters=None):
+        """Start CICS task"""
+        return await self._call('start_cics_task', task_name, parameters)
+
+
+class AsyncZOSMQIntegration(_AsyncSubsystemClient):
+    async def send_mq_message(self, queue_name, message):
+        """Send MQ message"""
+        return await self._call('send_mq_message', queue_name, message)
+
+    async def receive_mq_message(self, queue_name):
+        """Receive MQ message"""
+        return await self._call('receive_mq_message', queue_name)
+
+
+class AsyncZOSVSAMIntegration(_AsyncSubsystemClient):
+    async def write_vsam_record(self, dataset_name, record, key=None):
+        """Write VSAM record"""
+        return await self._call('write_vsam_record', dataset_name, record, key)
+
+    async def read_vsam_record(self, dataset_name, key):
+        """Read VSAM record"""
+        return await self._call('read_vsam_record', dataset_name, key)
+
+    async def browse_vsam_records(self, dataset_name, start_key=None, end_key=None, limit=None):
+        """Browse VSAM records in key sequence"""
+        return await self._call('browse_vsam_records', dataset_name, start_key, end_key, limit)
+
+
+class AsyncZOSSecurityManager(_AsyncSubsystemClient):
+    async def verify_racf_permissions(self, user_id, resource, required_access):
+        """Verify RACF permissions"""
+        return await self._call('verify_racf_permissions', user_id, resource, required_access)
+
+    async def generate_security_report(self):
+        """Generate comprehensive security report"""
+        return await self._call('generate_security_report')
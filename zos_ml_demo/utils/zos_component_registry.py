@@ -0,0 +1,101 @@
+"""
+Lazy Component Registry
+
+Components are declared up front with their dependencies but built only on
+first use.  A factory is either a callable or an ``'module:attribute'``
+string, so the module behind a component - and anything heavy it imports -
+is not loaded until something actually needs it.
+"""
+import logging
+import threading
+import importlib
+
+
+class ComponentRegistry:
+    """Creates named components on first use, dependencies first"""
+    def __init__(self):
+        self.logger = logging.getLogger('zos_component_registry')
+        self._definitions = {}
+        self._instances = {}
+        self._lock = threading.RLock()
+        self._resolving = []
+
+    def register(self, name, factory, args=(), depends_on=()):
+        """Declare a component; dependencies are passed after args"""
+        with self._lock:
+            self._definitions[name] = (factory, tuple(args), tuple(depends_on))
+            self._instances.pop(name, None)
+
+    def _resolve_factory(self, factory):
+        if isinstance(factory, str):
+            module_name, _, attribute = factory.partition(':')
+            return getattr(importlib.import_module(module_name), attribute)
+        return factory
+
+    def get(self, name):
+        """Return the component, creating it and its dependencies if needed"""
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+            if name not in self._definitions:
+                raise KeyError(f"Unknown component: {name}")
+            if name in self._resolving:
+                cycle = ' -> '.join(self._resolving + [name])
+                raise RuntimeError(f"Circular component dependency: {cycle}")
+            factory, args, depends_on = self._definitions[name]
+            self._resolving.append(name)
+            try:
+                dependencies = [self.get(dependency) for dependency in depends_on]
+                instance = self._resolve_factory(factory)(*args, *dependencies)
+            finally:
+                self._resolving.pop()
+            self._instances[name] = instance
+            self.logger.debug(f"Initialized component {name}")
+            return instance
+
+    def proxy(self, name):
+        """Stand-in that creates the component on first attribute access"""
+        return LazyComponent(self, name)
+
+    def is_initialized(self, name):
+        return name in self._instances
+
+    def initialized(self):
+        """Names of the components created so far"""
+        return list(self._instances)
+
+    def initialize_all(self):
+        """Eagerly create every component, e.g. before forking workers"""
+        for name in list(self._definitions):
+            self.get(name)
+
+
+class LazyComponent:
+    """Forwards attribute access to a registry component, creating it on demand"""
+    __slots__ = ('_registry', '_name', '_instance')
+
+    def __init__(self, registry, name):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_instance', None)
+
+    def _target(self):
+        instance = self._instance
+        if instance is None:
+            instance = self._registry.get(self._name)
+            object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def __getattr__(self, attribute):
+        return getattr(self._target(), attribute)
+
+    def __setattr__(self, attribute, value):
+        setattr(self._target(), attribute, value)
+
+    def __repr__(self):
+        state = 'initialized' if self._registry.is_initialized(self._name) else 'deferred'
+        return f"<LazyComponent {self._name} ({state})>"
@@ -0,0 +1,498 @@
+"""
+Coupling-Facility-Style Shared Structures
+
+Several app instances share state through a coupling facility (CF)
+daemon, modeled on the CF cache and list structures of a Parallel
+Sysplex:
+
+* A cache structure holds versioned entries.  Every connector that reads
+  an entry is registered as holding a local copy; when another connector
+  writes or deletes the entry the CF sends each registered holder a
+  cross-invalidate (XI) message, so local copies stay coherent without
+  polling or refetching from DB2.  Writes can be conditional on the
+  version last read, and numeric fields can be incremented atomically in
+  the CF (per-account aggregates).
+* A list structure holds named FIFO lists with list-transition
+  monitoring: monitoring connectors are told when a list goes from empty
+  to non-empty.
+
+The CF is a local socket daemon speaking the same length-prefixed JSON
+frames as the transaction gateway (run ``python -m
+zos_ml_demo.utils.zos_coupling_facility``, or start()
+``CouplingFacilityServer`` in-process for tests).  Values must be JSON
+serializable.  Structures live in the daemon's memory, so like a CF they
+are rebuilt by their users after the daemon restarts.  A forked child does
+not share its parent's connection: it drops the inherited socket, local
+copies and list monitors, and connects again on first use.
+"""
+import os
+import sys
+import socket
+import weakref
+import struct
+import asyncio
+import logging
+import argparse
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import Future
+from .zos_json import loads
+from .zos_transaction_gateway import _EventLoopThread, encode_frame, read_frame
+
+_FRAME = struct.Struct('>I')
+
+DEFAULT_TIMEOUT = 5.0
+
+
+class CouplingFacilityError(Exception):
+    """A CF request was rejected"""
+
+
+class VersionConflict(CouplingFacilityError):
+    """A conditional write found a newer version of the entry"""
+
+
+class CouplingFacilityServer:
+    """Local CF daemon holding cache and list structures for all connectors"""
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.logger = logging.getLogger('zos_coupling_facility')
+        self.caches = {}
+        self.lists = {}
+        self.stats = {'requests': 0, 'cross_invalidations': 0, 'connections': 0}
+        self._versions = {}
+        self._interest = {}
+        self._monitors = {}
+        self._connectors = {}
+        self._ids = itertools.count(1)
+        self._runner = None
+        self._server = None
+
+    # Cache structures
+
+    def _next_version(self, structure):
+        version = self._versions.get(structure, 0) + 1
+        self._versions[structure] = version
+        return version
+
+    def _cross_invalidate(self, structure, name, writer_id, version):
+        """Tell every other holder of a local copy that it is no longer valid"""
+        holders = self._interest.pop((structure, name), set())
+        message = encode_frame({'event': 'xi', 'structure': structure, 'name': name, 'version': version})
+        for connector_id in holders:
+            if connector_id != writer_id and connector_id in self._connectors:
+                self._connectors[connector_id].write(message)
+                self.stats['cross_invalidations'] += 1
+        if writer_id in holders:
+            self._interest[(structure, name)] = {writer_id}
+
+    def op_read(self, connector_id, structure, name):
+        entry = self.caches.get(structure, {}).get(name)
+        self._interest.setdefault((structure, name), set()).add(connector_id)
+        return None if entry is None else {'version': entry[0], 'data': entry[1]}
+
+    def op_write(self, connector_id, structure, name, data, expected_version=None):
+        entries = self.caches.setdefault(structure, {})
+        current = entries.get(name, (0, None))[0]
+        if expected_version is not None and expected_version != current:
+            raise VersionConflict(f"{structure}/{name} is at version {current}, not {expected_version}")
+        version = self._next_version(structure)
+        entries[name] = (version, data)
+        self._interest.setdefault((structure, name), set()).add(connector_id)
+        self._cross_invalidate(structure, name, connector_id, version)
+        return version
+
+    def op_delete(self, connector_id, structure, name):
+        entry = self.caches.get(structure, {}).pop(name, None)
+        self._cross_invalidate(structure, name, None, self._next_version(structure))
+        return entry is not None
+
+    def op_increment(self, connector_id, structure, name, deltas):
+        entries = self.caches.setdefault(structure, {})
+        values = dict(entries.get(name, (0, None))[1] or {})
+        for field, delta in deltas.items():
+            values[field] = values.get(field, 0) + delta
+        version = self._next_version(structure)
+        entries[name] = (version, values)
+        self._interest.setdefault((structure, name), set()).add(connector_id)
+        self._cross_invalidate(structure, name, connector_id, version)
+        return {'version': version, 'data': values}
+
+    def op_entries(self, connector_id, structure):
+        return {name: {'version': entry[0], 'data': entry[1]} for name, entry in self.caches.get(structure, {}).items()}
+
+    # List structures
+
+    def op_push(self, connector_id, structure, name, item, end='tail'):
+        entries = self.lists.setdefault(structure, {}).setdefault(name, deque())
+        if end == 'head':
+            entries.appendleft(item)
+        else:
+            entries.append(item)
+        if len(entries) == 1:
+            # List transition: empty to non-empty
+            message = encode_frame({'event': 'list', 'structure': structure, 'name': name, 'length': 1})
+            for monitor_id in self._monitors.get((structure, name), ()):
+                if monitor_id in self._connectors:
+                    self._connectors[monitor_id].write(message)
+        return len(entries)
+
+    def op_pop(self, connector_id, structure, name, end='head'):
+        entries = self.lists.get(structure, {}).get(name)
+        if not entries:
+            return None
+        return entries.popleft() if end == 'head' else entries.pop()
+
+    def op_items(self, connector_id, structure, name):
+        return list(self.lists.get(structure, {}).get(name, ()))
+
+    def op_length(self, connector_id, structure, name):
+        return len(self.lists.get(structure, {}).get(name, ()))
+
+    def op_monitor(self, connector_id, structure, name):
+        self._monitors.setdefault((structure, name), set()).add(connector_id)
+        return len(self.lists.get(structure, {}).get(name, ()))
+
+    def op_stats(self, connector_id):
+        return dict(self.stats, cache_structures={s: len(e) for s, e in self.caches.items()},
+                    list_structures={s: {n: len(e) for n, e in l.items()} for s, l in self.lists.items()})
+
+    # Connections
+
+    def _disconnect(self, connector_id):
+        self._connectors.pop(connector_id, None)
+        for holders in self._interest.values():
+            holders.discard(connector_id)
+        for monitors in self._monitors.values():
+            monitors.discard(connector_id)
+
+    async def _handle(self, reader, writer):
+        connector_id = next(self._ids)
+        self._connectors[connector_id] = writer
+        self.stats['connections'] += 1
+        try:
+            while True:
+                message = await read_frame(reader)
+                self.stats['requests'] += 1
+                reply = {'id': message.get('id')}
+                handler = getattr(self, 'op_' + str(message.get('op')), None)
+                try:
+                    if handler is None:
+                        raise CouplingFacilityError(f"Unknown CF operation: {message.get('op')}")
+                    reply['result'] = handler(connector_id, **message.get('args', {}))
+                except Exception as e:
+                    reply['error'] = str(e)
+                    reply['conflict'] = isinstance(e, VersionConflict)
+                writer.write(encode_frame(reply))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._disconnect(connector_id)
+            writer.close()
+
+    async def _start_server(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        """Start listening on a background event loop; returns (host, port)"""
+        self._runner = _EventLoopThread('coupling-facility')
+        self._runner.submit(self._start_server()).result(timeout=5)
+        self.logger.info(f"Coupling facility listening on {self.host}:{self.port}")
+        return self.host, self.port
+
+    async def _close(self):
+        self._server.close()
+        # Connectors must notice the loss so they stop trusting their local copies
+        for writer in list(self._connectors.values()):
+            writer.close()
+        await self._server.wait_closed()
+
+    def stop(self):
+        if self._runner:
+            self._runner.submit(self._close()).result(timeout=5)
+            self._runner.stop()
+            self._runner = None
+
+
+# Every connector in this process, so a forked child can drop its parent's connections
+_connectors = weakref.WeakSet()
+
+
+def _reset_connectors_after_fork():
+    for facility in list(_connectors):
+        facility._after_fork()
+
+
+class CouplingFacility:
+    """One connector's connection to the CF daemon; thread-safe and blocking"""
+    def __init__(self, host='127.0.0.1', port=7800, timeout=DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.logger = logging.getLogger('zos_coupling_facility')
+        self._socket = None
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._caches = {}
+        self._lists = {}
+        _connectors.add(self)
+
+    def _after_fork(self):
+        """In a forked child: the socket and its reader thread belong to the parent"""
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            # Close only this process's descriptor; shutdown() would cut the parent's connection too
+            os.close(sock.detach())
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._pending = {}
+        for cache in self._caches.values():
+            cache._lock = threading.Lock()
+            cache.clear()
+        for structure in self._lists.values():
+            # Monitors were registered by the parent's connection
+            structure._callbacks = []
+
+    def _connect(self):
+        with self._lock:
+            if self._socket is None:
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                sock.settimeout(None)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._socket = sock
+                threading.Thread(target=self._read_loop, args=(sock,), daemon=True,
+                                 name='coupling-facility-reader').start()
+            return self._socket
+
+    def _read_loop(self, sock):
+        stream = sock.makefile('rb')
+        try:
+            while True:
+                header = stream.read(_FRAME.size)
+                if len(header) < _FRAME.size:
+                    break
+                (length,) = _FRAME.unpack(header)
+                self._dispatch(loads(stream.read(length)))
+        except (OSError, ValueError):
+            pass
+        finally:
+            self._connection_lost(sock)
+
+    def _dispatch(self, message):
+        event = message.get('event')
+        if event == 'xi':
+            cache = self._caches.get(message['structure'])
+            if cache is not None:
+                cache._invalidated(message['name'], message['version'])
+        elif event == 'list':
+            structure = self._lists.get(message['structure'])
+            if structure is not None:
+                structure._transition(message['name'], message['length'])
+        else:
+            future = self._pending.pop(message.get('id'), None)
+            if future is not None:
+                future.set_result(message)
+
+    def _connection_lost(self, sock):
+        with self._lock:
+            if self._socket is sock:
+                self._socket = None
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError('Connection to the coupling facility was lost'))
+        # Without the CF's cross-invalidations no local copy can be trusted
+        for cache in list(self._caches.values()):
+            cache.clear()
+
+    def request(self, op, **args):
+        """Send one request and wait for its reply"""
+        sock = self._connect()
+        request_id = next(self._ids)
+        future = Future()
+        self._pending[request_id] = future
+        try:
+            with self._send_lock:
+                sock.sendall(encode_frame({'id': request_id, 'op': op, 'args': args}))
+            reply = future.result(timeout=self.timeout)
+        finally:
+            self._pending.pop(request_id, None)
+        if 'error' in reply:
+            raise (VersionConflict if reply.get('conflict') else CouplingFacilityError)(reply['error'])
+        return reply.get('result')
+
+    def cache(self, structure):
+        """Handle on a cache structure, with a coherent local copy of the entries read"""
+        with self._lock:
+            if structure not in self._caches:
+                self._caches[structure] = CacheStructure(self, structure)
+            return self._caches[structure]
+
+    def list_structure(self, structure):
+        with self._lock:
+            if structure not in self._lists:
+                self._lists[structure] = ListStructure(self, structure)
+            return self._lists[structure]
+
+    def stats(self):
+        return self.request('stats')
+
+    def close(self):
+        with self._lock:
+            sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+
+class CacheStructure:
+    """Versioned shared entries with locally cached copies kept valid by cross-invalidation"""
+    def __init__(self, facility, name):
+        self.facility = facility
+        self.name = name
+        self.stats = {'local_hits': 0, 'cf_reads': 0, 'cross_invalidations': 0}
+        self._local = {}
+        self._invalidations = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def on_invalidate(self, callback):
+        """Call callback(name, version) whenever another connector changes an entry this one has read"""
+        self._callbacks.append(callback)
+
+    def _invalidated(self, name, version):
+        with self._lock:
+            self._local.pop(name, None)
+            self._invalidations[name] = self._invalidations.get(name, 0) + 1
+            self.stats['cross_invalidations'] += 1
+        for callback in self._callbacks:
+            try:
+                callback(name, version)
+            except Exception as e:
+                self.facility.logger.error(f"Cross-invalidation callback for {self.name}/{name} failed: {str(e)}")
+
+    def _store(self, name, seen, version, data):
+        """Keep a local copy unless an XI for the entry arrived while the request was in flight"""
+        with self._lock:
+            if self._invalidations.get(name, 0) == seen:
+                self._local[name] = (version, data)
+
+    def read(self, name):
+        """(version, data) of an entry, or None; served locally while no XI has arrived"""
+        local = self._local.get(name)
+        if local is not None:
+            self.stats['local_hits'] += 1
+            return local
+        seen = self._invalidations.get(name, 0)
+        entry = self.facility.request('read', structure=self.name, name=name)
+        self.stats['cf_reads'] += 1
+        if entry is None:
+            return None
+        self._store(name, seen, entry['version'], entry['data'])
+        return entry['version'], entry['data']
+
+    def get(self, name, default=None):
+        entry = self.read(name)
+        return default if entry is None else entry[1]
+
+    def write(self, name, data, expected_version=None):
+        """Store an entry (only if it is still at expected_version, when given); returns the new version"""
+        seen = self._invalidations.get(name, 0)
+        version = self.facility.request('write', structure=self.name, name=name, data=data,
+                                        expected_version=expected_version)
+        self._store(name, seen, version, data)
+        return version
+
+    def delete(self, name):
+        with self._lock:
+            self._local.pop(name, None)
+        return self.facility.request('delete', structure=self.name, name=name)
+
+    def increment(self, name, **deltas):
+        """Atomically add to numeric fields of an entry in the CF; returns the updated fields"""
+        seen = self._invalidations.get(name, 0)
+        entry = self.facility.request('increment', structure=self.name, name=name, deltas=deltas)
+        self._store(name, seen, entry['version'], entry['data'])
+        return entry['data']
+
+    def entries(self):
+        """{name: (version, data)} of every entry, read from the CF without registering local copies"""
+        return {name: (entry['version'], entry['data'])
+                for name, entry in self.facility.request('entries', structure=self.name).items()}
+
+    def clear(self):
+        """Drop every local copy"""
+        with self._lock:
+            self._local.clear()
+
+
+class ListStructure:
+    """Named shared FIFO lists with empty-to-non-empty transition notifications"""
+    def __init__(self, facility, name):
+        self.facility = facility
+        self.name = name
+        self._callbacks = []
+
+    def on_transition(self, list_name, callback):
+        """Call callback(list_name, length) when the list goes from empty to non-empty"""
+        self._callbacks.append((list_name, callback))
+        return self.facility.request('monitor', structure=self.name, name=list_name)
+
+    def _transition(self, list_name, length):
+        for name, callback in self._callbacks:
+            if name == list_name:
+                try:
+                    callback(list_name, length)
+                except Exception as e:
+                    self.facility.logger.error(f"List transition callback for {self.name}/{list_name} failed: {str(e)}")
+
+    def push(self, list_name, item, end='tail'):
+        """Add an item at the tail (or head); returns the new length"""
+        return self.facility.request('push', structure=self.name, name=list_name, item=item, end=end)
+
+    def pop(self, list_name, end='head'):
+        """Remove and return the item at the head (or tail), or None if the list is empty"""
+        return self.facility.request('pop', structure=self.name, name=list_name, end=end)
+
+    def items(self, list_name):
+        return self.facility.request('items', structure=self.name, name=list_name)
+
+    def length(self, list_name):
+        """Number of items on a list, without transferring them"""
+        return self.facility.request('length', structure=self.name, name=list_name)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_connectors_after_fork)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local coupling facility daemon')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7800)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    server = CouplingFacilityServer(args.host, args.port)
+
+    async def serve():
+        await server._start_server()
+        server.logger.info(f"Coupling facility listening on {server.host}:{server.port}")
+        await server._server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
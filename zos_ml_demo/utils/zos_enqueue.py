@@ -0,0 +1,354 @@
+"""
+ENQ/DEQ Resource Serialization
+
+Named resources are enqueued shared (readers) or exclusive (writers),
+with the names following GRS conventions, e.g. ``SYSDSN.MLAPP.MODELS``
+for a dataset.  Requests for a resource are granted first come, first
+served: a shared request queued behind an exclusive one waits for it, so
+writers are never starved.  A thread that already holds a resource may
+enqueue it again (the holds nest); asking for exclusive while holding
+shared is an error rather than a silent upgrade.
+
+Scope ``process`` serializes the threads of this process.  Scope
+``system`` also takes a file lock in the ENQ directory once the process
+grant is held, so other processes (pre-fork workers, batch jobs)
+serialize with it too.
+
+A request that has to wait is checked for deadlock first: if the
+threads it would wait for are themselves waiting, directly or
+transitively, for the requesting thread, the request fails with
+DeadlockError instead of hanging.  Waits across processes cannot be
+seen, so between processes only the timeout bounds a deadlock.
+
+Every resource records acquisitions, how many had to wait, total and
+worst wait and hold times, timeouts and deadlocks; ``contention()``
+ranks resources by time spent waiting for them, which is where
+serialization limits throughput.
+"""
+import os
+import re
+import time
+import logging
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from .zos_metrics_registry import get_metrics_registry
+
+try:
+    import fcntl
+except ImportError:  # System-scope requests then only serialize within one process
+    fcntl = None
+
+SHARED = 'shared'
+EXCLUSIVE = 'exclusive'
+PROCESS = 'process'
+SYSTEM = 'system'
+
+WAIT_TIME = get_metrics_registry().histogram(
+    'zos_enq_wait_seconds', 'Time spent waiting for an ENQ to be granted', ('resource',),
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+HOLD_TIME = get_metrics_registry().histogram(
+    'zos_enq_hold_seconds', 'Time an ENQ was held before DEQ', ('resource',),
+    buckets=(0.0001, 0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0, 300.0))
+FAILURES = get_metrics_registry().counter(
+    'zos_enq_failures_total', 'ENQ requests that timed out or would have deadlocked', ('resource', 'reason'))
+
+_FILE_NAME = re.compile(r'[^A-Za-z0-9@#$._-]')
+
+
+def dataset_resource(dataset_name):
+    """GRS resource name serializing a dataset (major name SYSDSN)"""
+    return 'SYSDSN.' + dataset_name.strip("'").upper()
+
+
+class EnqueueError(RuntimeError):
+    """An ENQ request could not be granted"""
+
+
+class EnqueueTimeoutError(EnqueueError):
+    """The resource was not granted within the timeout"""
+
+
+class DeadlockError(EnqueueError):
+    """Waiting for the resource would deadlock"""
+
+
+class _Hold:
+    __slots__ = ('mode', 'count', 'file', 'granted_at')
+
+    def __init__(self, mode, granted_at):
+        self.mode = mode
+        self.count = 1
+        self.file = None
+        self.granted_at = granted_at
+
+
+class _Waiter:
+    __slots__ = ('owner', 'mode', 'condition', 'granted')
+
+    def __init__(self, owner, mode, condition):
+        self.owner = owner
+        self.mode = mode
+        self.condition = condition
+        self.granted = False
+
+
+class _Resource:
+    __slots__ = ('name', 'holders', 'queue', 'stats')
+
+    def __init__(self, name):
+        self.name = name
+        self.holders = {}
+        self.queue = deque()
+        self.stats = {'acquisitions': 0, 'contended': 0, 'timeouts': 0, 'deadlocks': 0,
+                      'wait_seconds': 0.0, 'max_wait_seconds': 0.0, 'hold_seconds': 0.0, 'max_hold_seconds': 0.0}
+
+    def compatible(self, owner, mode):
+        return all(mode == SHARED and hold.mode == SHARED
+                   for holder, hold in self.holders.items() if holder != owner)
+
+
+class Enqueue:
+    """A granted ENQ; release() (or leaving the with block) is the DEQ"""
+    __slots__ = ('manager', 'resource', 'mode', 'scope', 'owner', 'released')
+
+    def __init__(self, manager, resource, mode, scope, owner):
+        self.manager = manager
+        self.resource = resource
+        self.mode = mode
+        self.scope = scope
+        self.owner = owner
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.manager._release(self.resource, self.owner)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class EnqueueManager:
+    """Grants shared and exclusive ENQs on named resources and records their contention"""
+    def __init__(self, directory=None, timeout=None, poll_interval=0.05):
+        self.directory = directory
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.logger = logging.getLogger('zos_enqueue')
+        self._resources = {}
+        self._waiting = {}
+        self._lock = threading.Lock()
+
+    def enq(self, resource, mode=EXCLUSIVE, scope=PROCESS, timeout=None):
+        """Enqueue a resource, waiting up to timeout seconds (the manager's default when None)"""
+        if mode not in (SHARED, EXCLUSIVE):
+            raise ValueError(f"ENQ mode must be {SHARED} or {EXCLUSIVE}, not {mode}")
+        if scope not in (PROCESS, SYSTEM):
+            raise ValueError(f"ENQ scope must be {PROCESS} or {SYSTEM}, not {scope}")
+        timeout = self.timeout if timeout is None else timeout
+        owner = threading.get_ident()
+        started = time.perf_counter()
+        deadline = None if timeout is None else started + timeout
+        hold, first, contended = self._acquire(resource, owner, mode, deadline)
+        if first and scope == SYSTEM and fcntl is not None:
+            try:
+                hold.file, waited = self._lock_file(resource, mode, deadline)
+                contended = contended or waited
+            except BaseException:
+                self._release(resource, owner, completed=False)
+                raise
+        if first:
+            now = time.perf_counter()
+            wait = now - started
+            with self._lock:
+                stats = self._resources[resource].stats
+                stats['acquisitions'] += 1
+                stats['contended'] += contended
+                stats['wait_seconds'] += wait
+                stats['max_wait_seconds'] = max(stats['max_wait_seconds'], wait)
+                hold.granted_at = now
+            WAIT_TIME.labels(resource).observe(wait)
+        return Enqueue(self, resource, mode, scope, owner)
+
+    def deq(self, handle):
+        handle.release()
+
+    @contextmanager
+    def enqueue(self, resource, mode=EXCLUSIVE, scope=PROCESS, timeout=None):
+        """Hold a resource for the duration of a with block"""
+        handle = self.enq(resource, mode, scope, timeout)
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def _acquire(self, name, owner, mode, deadline):
+        """Process-level grant; returns (hold, first grant for this thread, had to wait)"""
+        with self._lock:
+            resource = self._resources.get(name)
+            if resource is None:
+                resource = self._resources[name] = _Resource(name)
+            hold = resource.holders.get(owner)
+            if hold is not None:
+                if mode == EXCLUSIVE and hold.mode == SHARED:
+                    raise EnqueueError(f"{name} is held shared by this thread; it cannot be upgraded to exclusive")
+                hold.count += 1
+                return hold, False, False
+            if not resource.queue and resource.compatible(owner, mode):
+                hold = resource.holders[owner] = _Hold(mode, time.perf_counter())
+                return hold, True, False
+
+            waiter = _Waiter(owner, mode, threading.Condition(self._lock))
+            resource.queue.append(waiter)
+            self._waiting[owner] = (resource, waiter)
+            cycle = self._find_cycle(owner)
+            if cycle:
+                self._abandon(resource, waiter)
+                resource.stats['deadlocks'] += 1
+                FAILURES.labels(name, 'deadlock').inc()
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                chain = ' -> '.join(names.get(ident, str(ident)) for ident in cycle)
+                raise DeadlockError(f"ENQ {mode} on {name} would deadlock: {chain}")
+            while not waiter.granted:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    self._abandon(resource, waiter)
+                    resource.stats['timeouts'] += 1
+                    FAILURES.labels(name, 'timeout').inc()
+                    raise EnqueueTimeoutError(f"ENQ {mode} on {name} not granted within the timeout")
+                waiter.condition.wait(remaining)
+            self._waiting.pop(owner, None)
+            return resource.holders[owner], True, True
+
+    def _abandon(self, resource, waiter):
+        self._waiting.pop(waiter.owner, None)
+        resource.queue.remove(waiter)
+        # Requests queued behind this one may now be grantable
+        self._grant(resource)
+
+    def _grant(self, resource):
+        """Grant queued requests in arrival order while they are compatible with the holders"""
+        while resource.queue:
+            waiter = resource.queue[0]
+            if not resource.compatible(waiter.owner, waiter.mode):
+                break
+            resource.queue.popleft()
+            resource.holders[waiter.owner] = _Hold(waiter.mode, time.perf_counter())
+            waiter.granted = True
+            waiter.condition.notify()
+
+    def _blockers(self, owner):
+        """Threads the waiting owner is queued behind: incompatible holders and earlier requests"""
+        resource, waiter = self._waiting[owner]
+        blockers = [holder for holder, hold in resource.holders.items()
+                    if holder != owner and not (waiter.mode == SHARED and hold.mode == SHARED)]
+        for queued in resource.queue:
+            if queued is waiter:
+                break
+            blockers.append(queued.owner)
+        return blockers
+
+    def _find_cycle(self, start):
+        """Chain of threads from start back to itself through wait-for edges, or None"""
+        path = [start]
+        visited = set()
+
+        def visit(owner):
+            for blocker in self._blockers(owner):
+                if blocker == start:
+                    return True
+                if blocker in visited or blocker not in self._waiting:
+                    continue
+                visited.add(blocker)
+                path.append(blocker)
+                if visit(blocker):
+                    return True
+                path.pop()
+            return False
+
+        return path + [start] if visit(start) else None
+
+    def _lock_file(self, name, mode, deadline):
+        """Cross-process lock on the resource's file; returns (open file, had to wait)"""
+        directory = self.directory or os.path.join(tempfile.gettempdir(), 'mlapp', 'enq')
+        os.makedirs(directory, exist_ok=True)
+        f = open(os.path.join(directory, _FILE_NAME.sub('_', name) + '.enq'), 'a')
+        operation = fcntl.LOCK_SH if mode == SHARED else fcntl.LOCK_EX
+        try:
+            fcntl.flock(f, operation | fcntl.LOCK_NB)
+            return f, False
+        except BlockingIOError:
+            pass
+        try:
+            if deadline is None:
+                fcntl.flock(f, operation)
+                return f, True
+            delay = 0.001
+            while True:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    with self._lock:
+                        self._resources[name].stats['timeouts'] += 1
+                    FAILURES.labels(name, 'timeout').inc()
+                    raise EnqueueTimeoutError(f"ENQ {mode} on {name} held by another process past the timeout")
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, self.poll_interval)
+                try:
+                    fcntl.flock(f, operation | fcntl.LOCK_NB)
+                    return f, True
+                except BlockingIOError:
+                    pass
+        except BaseException:
+            f.close()
+            raise
+
+    def _release(self, name, owner, completed=True):
+        with self._lock:
+            resource = self._resources[name]
+            hold = resource.holders[owner]
+            hold.count -= 1
+            if hold.count:
+                return
+            del resource.holders[owner]
+            if hold.file is not None:
+                fcntl.flock(hold.file, fcntl.LOCK_UN)
+                hold.file.close()
+            self._grant(resource)
+            if not completed:
+                return
+            held = time.perf_counter() - hold.granted_at
+            resource.stats['hold_seconds'] += held
+            resource.stats['max_hold_seconds'] = max(resource.stats['max_hold_seconds'], held)
+        HOLD_TIME.labels(name).observe(held)
+
+    def holders(self, name):
+        """{thread id: mode} of the current holders of a resource"""
+        with self._lock:
+            resource = self._resources.get(name)
+            return {owner: hold.mode for owner, hold in resource.holders.items()} if resource else {}
+
+    def contention(self):
+        """Per-resource statistics, most time spent waiting first"""
+        with self._lock:
+            report = [dict(resource.stats, resource=resource.name, holders=len(resource.holders),
+                           waiters=len(resource.queue)) for resource in self._resources.values()]
+        return sorted(report, key=lambda entry: entry['wait_seconds'], reverse=True)
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_enqueue_manager(config=None):
+    """Process-wide ENQ manager, so every component serializes through the same grants"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = EnqueueManager(**((config or {}).get('enq') or {}))
+    return _default_manager
@@ -3,6 +3,7 @@ Extended z/OS Monitoring with RMF and SMF Integration
 """
 import logging
 from datetime import datetime
+from .zos_wlm import get_workload_manager
 
 class ZOSExtendedMonitor:
     def __init__(self, config):
@@ -58,14 +59,11 @@ class ZOSExtendedMonitor:
             self.logger.error(f"Failed to write SMF record: {str(e)}")
 
     def collect_wlm_metrics(self):
-        """Collect WLM metrics"""
+        """Collect WLM metrics: goal, performance index and queue state of each service class"""
         try:
-            # Format WLM metrics
             wlm_data = {
-                'service_class': 'MLAPPSC',
-                'performance_index': 1.0,
-                'importance': 2,
-                'velocity': 50
+                'timestamp': datetime.now().isoformat(),
+                'service_classes': get_workload_manager(self.config).status()
             }
             self.logger.info(f"Collecting WLM metrics: {wlm_data}")
             return wlm_data
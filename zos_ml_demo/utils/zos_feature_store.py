@@ -0,0 +1,225 @@
+"""
+Per-Account Behavioral Feature Store
+
+Rolling statistics for every account seen by the scorer, kept in compact
+NumPy arrays indexed by an interned account number.  Each update is O(1):
+amount mean and variance use Welford's algorithm and the typical hour of
+day is a circular mean accumulated as a sum of unit vectors, so an account
+costs a fixed 36 bytes of array storage plus its intern table entry.
+
+Stores that saw disjoint transactions, such as pre-fork workers that each
+track their own changes, combine exactly with merge().
+"""
+import os
+import logging
+import threading
+from datetime import datetime
+import numpy as np
+
+FEATURE_COLUMNS = ['txn_count', 'amount_mean', 'amount_std', 'last_seen', 'typical_hour']
+
+_HOUR_TO_RADIANS = 2 * np.pi / 24.0
+
+
+def to_epoch_seconds(timestamp):
+    """Convert an ISO-8601 string, datetime or number to epoch seconds"""
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    if isinstance(timestamp, datetime):
+        return timestamp.timestamp()
+    value = str(timestamp)
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value).timestamp()
+
+
+class AccountFeatureStore:
+    """In-process rolling aggregates keyed by interned account index"""
+    def __init__(self, initial_capacity=1024):
+        self.logger = logging.getLogger('zos_feature_store')
+        self._lock = threading.Lock()
+        self._accounts = {}
+        self._names = []
+        self._allocate(max(1, initial_capacity))
+        # Store receiving only the updates made after track_changes()
+        self.changes = None
+
+    def _allocate(self, capacity):
+        self.count = np.zeros(capacity, dtype=np.uint32)
+        self.mean = np.zeros(capacity, dtype=np.float64)
+        self.m2 = np.zeros(capacity, dtype=np.float64)
+        self.last_seen = np.zeros(capacity, dtype=np.float64)
+        self.hour_x = np.zeros(capacity, dtype=np.float32)
+        self.hour_y = np.zeros(capacity, dtype=np.float32)
+
+    def _arrays(self):
+        return ('count', 'mean', 'm2', 'last_seen', 'hour_x', 'hour_y')
+
+    @property
+    def capacity(self):
+        return len(self.count)
+
+    def __len__(self):
+        return len(self._names)
+
+    def _grow(self, required):
+        capacity = self.capacity
+        while capacity < required:
+            capacity *= 2
+        for name in self._arrays():
+            current = getattr(self, name)
+            grown = np.zeros(capacity, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def _intern(self, account):
+        index = self._accounts.get(account)
+        if index is None:
+            index = len(self._names)
+            if index >= self.capacity:
+                self._grow(index + 1)
+            self._accounts[account] = index
+            self._names.append(account)
+        return index
+
+    def intern(self, account):
+        """Return the dense index for an account, assigning one if new"""
+        with self._lock:
+            return self._intern(account)
+
+    def track_changes(self):
+        """Also record every later update in a separate store, returned here"""
+        with self._lock:
+            self.changes = AccountFeatureStore()
+            return self.changes
+
+    def update(self, account, amount, timestamp):
+        """Fold one transaction into the account's aggregates"""
+        if self.changes is not None:
+            self.changes.update(account, amount, timestamp)
+        epoch = to_epoch_seconds(timestamp)
+        angle = ((epoch % 86400) / 3600.0) * _HOUR_TO_RADIANS
+        with self._lock:
+            i = self._intern(account)
+            n = int(self.count[i]) + 1
+            delta = amount - self.mean[i]
+            self.mean[i] += delta / n
+            self.m2[i] += delta * (amount - self.mean[i])
+            self.count[i] = n
+            if epoch > self.last_seen[i]:
+                self.last_seen[i] = epoch
+            self.hour_x[i] += np.cos(angle)
+            self.hour_y[i] += np.sin(angle)
+            return i
+
+    def update_batch(self, accounts, amounts, timestamps):
+        """Vectorized update for a batch of transactions"""
+        if self.changes is not None:
+            self.changes.update_batch(accounts, amounts, timestamps)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        epochs = np.asarray([to_epoch_seconds(t) for t in timestamps], dtype=np.float64)
+        angles = ((epochs % 86400) / 3600.0) * _HOUR_TO_RADIANS
+        with self._lock:
+            index = np.fromiter((self._intern(a) for a in accounts), dtype=np.int64, count=len(amounts))
+            touched, local = np.unique(index, return_inverse=True)
+            batch_n = np.bincount(local).astype(np.float64)
+            batch_mean = np.bincount(local, weights=amounts) / batch_n
+            centered = amounts - batch_mean[local]
+            batch_m2 = np.bincount(local, weights=centered * centered)
+            self._combine(touched, batch_n, batch_mean, batch_m2)
+
+            np.maximum.at(self.last_seen, index, epochs)
+            self.hour_x[touched] += np.bincount(local, weights=np.cos(angles)).astype(np.float32)
+            self.hour_y[touched] += np.bincount(local, weights=np.sin(angles)).astype(np.float32)
+
+    def _combine(self, index, n_b, mean_b, m2_b):
+        """Chan et al. parallel combination of (n, mean, M2) into distinct rows"""
+        n_a = self.count[index].astype(np.float64)
+        total = n_a + n_b
+        share = np.divide(n_b, total, out=np.zeros_like(total), where=total > 0)
+        delta = mean_b - self.mean[index]
+        self.mean[index] += delta * share
+        self.m2[index] += m2_b + delta * delta * n_a * share
+        self.count[index] = total.astype(np.uint32)
+
+    def merge(self, other):
+        """Fold in the aggregates of a store that saw a disjoint set of transactions"""
+        with other._lock:
+            size = len(other._names)
+            names = list(other._names)
+            count, mean, m2, last_seen, hour_x, hour_y = (
+                getattr(other, name)[:size].copy() for name in other._arrays())
+        with self._lock:
+            index = np.fromiter((self._intern(a) for a in names), dtype=np.int64, count=size)
+            self._combine(index, count.astype(np.float64), mean, m2)
+            self.last_seen[index] = np.maximum(self.last_seen[index], last_seen)
+            self.hour_x[index] += hour_x
+            self.hour_y[index] += hour_y
+        return self
+
+    def _feature_rows(self, index, out):
+        count = self.count[index]
+        out[:, 0] = count
+        out[:, 1] = self.mean[index]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            out[:, 2] = np.where(count > 1, np.sqrt(self.m2[index] / np.maximum(count - 1, 1)), 0.0)
+        out[:, 3] = self.last_seen[index]
+        hours = np.arctan2(self.hour_y[index], self.hour_x[index]) / _HOUR_TO_RADIANS
+        out[:, 4] = np.where(count > 0, np.mod(hours, 24.0), 0.0)
+        return out
+
+    def get_features(self, accounts, out=None):
+        """Bulk read: one row of FEATURE_COLUMNS per account, zeros for unknown accounts"""
+        if out is None:
+            out = np.zeros((len(accounts), len(FEATURE_COLUMNS)), dtype=np.float64)
+        with self._lock:
+            index = np.fromiter((self._accounts.get(a, -1) for a in accounts), dtype=np.int64, count=len(accounts))
+            known = index >= 0
+            out[~known] = 0.0
+            if known.any():
+                out[known] = self._feature_rows(index[known], np.empty((int(known.sum()), len(FEATURE_COLUMNS))))
+        return out
+
+    def get_account(self, account):
+        """Return the feature dict for one account, or None if never seen"""
+        if account not in self._accounts:
+            return None
+        row = self.get_features([account])[0]
+        return dict(zip(FEATURE_COLUMNS, (float(v) for v in row)))
+
+    def save_snapshot(self, path):
+        """Write all aggregates to a snapshot file atomically"""
+        try:
+            with self._lock:
+                size = len(self._names)
+                arrays = {name: getattr(self, name)[:size] for name in self._arrays()}
+                arrays['accounts'] = np.array(self._names, dtype=np.str_)
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = f"{path}.tmp"
+                with open(temp_path, 'wb') as f:
+                    np.savez(f, **arrays)
+            os.replace(temp_path, path)
+            self.logger.info(f"Saved feature snapshot for {size} accounts to {path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Feature snapshot save failed: {str(e)}")
+            return False
+
+    @classmethod
+    def load_snapshot(cls, path):
+        """Create a store from a snapshot written by save_snapshot"""
+        with np.load(path) as snapshot:
+            names = snapshot['accounts'].tolist()
+            store = cls(initial_capacity=max(1024, len(names)))
+            for name in store._arrays():
+                getattr(store, name)[:len(names)] = snapshot[name]
+        store._names = names
+        store._accounts = {name: i for i, name in enumerate(names)}
+        store.logger.info(f"Loaded feature snapshot for {len(names)} accounts from {path}")
+        return store
+
+    def memory_usage(self):
+        """Bytes used by the aggregate arrays"""
+        return sum(getattr(self, name).nbytes for name in self._arrays())
@@ -0,0 +1,248 @@
+"""
+Generation Data Groups on the Local Filesystem
+
+A GDG keeps the last LIMIT generations of a dataset, each a file or a
+directory named like z/OS generation datasets (``MLAPP.MODELS.G0007V00``)
+beside the other datasets.  The group's catalog -- a small JSON file
+``MLAPP.MODELS.gdg`` -- lists the cataloged generations and which one is
+current, and is replaced atomically on every change.
+
+Generations are referenced relative to the current one: (0) is current,
+(-1) the one before it, and (+1) a new generation.  A new generation is
+written under a pending name and rolled in with a rename followed by one
+catalog update, after which generations beyond the limit roll off.
+Rolling back only moves the catalog's current pointer, so switching to
+an older model never copies or rewrites any data.
+
+Each GDG object caches its parsed catalog with an index from generation
+number to position, and rereads it only when the catalog file changes,
+so resolving a relative reference is a stat and a dictionary lookup.
+"""
+import os
+import re
+import json
+import shutil
+from contextlib import contextmanager
+from .zos_record_io import dataset_path
+
+try:
+    import fcntl
+except ImportError:  # Catalog updates are then only safe within one process
+    fcntl = None
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 255
+MAX_GENERATION = 9999
+
+_RELATIVE_NAME = re.compile(r'^(?P<base>[^()/]+)\((?P<relative>[+-]?\d+)\)$')
+_GENERATION = re.compile(r'^G(?P<number>\d{4})V00$')
+
+
+def parse_generation_name(name):
+    """Split 'BASE(-1)' into ('BASE', -1); a plain dataset name or path gives (name, None)"""
+    match = _RELATIVE_NAME.match(os.fspath(name).strip().strip("'"))
+    if match is None:
+        return name, None
+    return match.group('base').upper(), int(match.group('relative'))
+
+
+class _Catalog:
+    """Parsed catalog of one GDG with a number-to-position index"""
+    def __init__(self, limit, scratch, generations, current):
+        self.limit = limit
+        self.scratch = scratch
+        self.generations = list(generations)
+        self.current = current
+        self.position = {number: i for i, number in enumerate(self.generations)}
+
+    def to_dict(self):
+        return {'limit': self.limit, 'scratch': self.scratch,
+                'generations': self.generations, 'current': self.current}
+
+
+class GenerationDataGroup:
+    """Rolling generations of one dataset, referenced relative to the current generation"""
+    def __init__(self, directory, base, limit=None, scratch=True):
+        self.directory = directory
+        self.base = base.upper()
+        self.default_limit = limit or DEFAULT_LIMIT
+        self.default_scratch = scratch
+        self.catalog_path = os.path.join(directory, self.base + '.gdg')
+        self._catalog = None
+        self._stamp = None
+
+    @classmethod
+    def from_config(cls, config, base):
+        path = dataset_path(config, base)
+        return cls(os.path.dirname(path), os.path.basename(path), config.get('gdg_limit'))
+
+    def generation_name(self, number):
+        return f'{self.base}.G{number:04d}V00'
+
+    def generation_path(self, number):
+        return os.path.join(self.directory, self.generation_name(number))
+
+    def pending_path(self):
+        """Where a new generation is built before it is rolled in; stable across restarts"""
+        return os.path.join(self.directory, self.base + '.PENDING')
+
+    def _load(self):
+        try:
+            stat = os.stat(self.catalog_path)
+        except FileNotFoundError:
+            self._catalog = self._stamp = None
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if stamp != self._stamp:
+            with open(self.catalog_path) as f:
+                self._catalog = _Catalog(**json.load(f))
+            self._stamp = stamp
+        return self._catalog
+
+    def _save(self, catalog):
+        os.makedirs(self.directory, exist_ok=True)
+        temporary = self.catalog_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(catalog.to_dict(), f)
+        os.replace(temporary, self.catalog_path)
+        self._catalog = None
+        self._stamp = None
+
+    @contextmanager
+    def _locked(self):
+        """Serialize catalog updates across processes and reread the catalog under the lock"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.catalog_path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield self._load()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def define(self, limit=None, scratch=None):
+        """Create the GDG base, or change its limit; lowering the limit rolls off generations"""
+        limit = limit or self.default_limit
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"GDG limit must be 1-{MAX_LIMIT}, not {limit}")
+        with self._locked() as catalog:
+            if catalog is None:
+                catalog = _Catalog(limit, self.default_scratch if scratch is None else scratch, [], None)
+            else:
+                catalog.limit = limit
+                if scratch is not None:
+                    catalog.scratch = scratch
+            removed = self._roll_off(catalog)
+            self._save(catalog)
+        self._scratch(removed)
+
+    @property
+    def defined(self):
+        return self._load() is not None
+
+    def generations(self):
+        """Cataloged generation names, oldest first"""
+        catalog = self._load()
+        return [self.generation_name(number) for number in catalog.generations] if catalog else []
+
+    def current(self):
+        """Name of the current (0) generation, or None if there is none"""
+        catalog = self._load()
+        return self.generation_name(catalog.current) if catalog and catalog.current else None
+
+    def _number(self, catalog, relative):
+        if relative > 0:
+            raise ValueError(f"{self.base}(+{relative}) is a new generation; create it with new_generation()")
+        if catalog is None or catalog.current is None:
+            raise LookupError(f"{self.base} has no generations")
+        i = catalog.position[catalog.current] + relative
+        if i < 0:
+            raise LookupError(f"{self.base}({relative}) is not cataloged")
+        return catalog.generations[i]
+
+    def resolve(self, relative=0):
+        """Path of the generation at a relative reference (0, -1, ...)"""
+        return self.generation_path(self._number(self._load(), relative))
+
+    def resolve_name(self, relative=0):
+        return self.generation_name(self._number(self._load(), relative))
+
+    def _roll_off(self, catalog):
+        """Uncatalog the oldest generations beyond the limit; returns their paths if they are to be deleted"""
+        removed = []
+        while len(catalog.generations) > catalog.limit:
+            number = catalog.generations.pop(0)
+            if number == catalog.current:
+                catalog.current = catalog.generations[0]
+            removed.append(self.generation_path(number))
+        catalog.position = {number: i for i, number in enumerate(catalog.generations)}
+        return removed if catalog.scratch else []
+
+    @staticmethod
+    def _scratch(paths):
+        for path in paths:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+
+    def roll_in(self, source=None, copy=False):
+        """Catalog a file or directory (default: the pending path) as the new current generation"""
+        source = source or self.pending_path()
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"Nothing to roll in to {self.base}: {source}")
+        with self._locked() as catalog:
+            if catalog is None:
+                catalog = _Catalog(self.default_limit, self.default_scratch, [], None)
+            newest = catalog.generations[-1] if catalog.generations else 0
+            number = newest % MAX_GENERATION + 1
+            target = self.generation_path(number)
+            # Left behind by a roll-in that failed before its catalog update
+            self._scratch([target])
+            if copy:
+                temporary = target + '.tmp'
+                self._scratch([temporary])
+                if os.path.isdir(source):
+                    shutil.copytree(source, temporary)
+                else:
+                    shutil.copy2(source, temporary)
+                source = temporary
+            os.replace(source, target)
+            catalog.generations.append(number)
+            catalog.current = number
+            removed = self._roll_off(catalog)
+            self._save(catalog)
+        self._scratch(removed)
+        return self.generation_name(number)
+
+    @contextmanager
+    def new_generation(self):
+        """Yield a fresh pending path to write (as a file or directory); rolled in if the block succeeds"""
+        pending = self.pending_path()
+        os.makedirs(self.directory, exist_ok=True)
+        self._scratch([pending])
+        try:
+            yield pending
+        except BaseException:
+            self._scratch([pending])
+            raise
+        self.roll_in(pending)
+
+    def promote(self, generation):
+        """Make a cataloged generation (name, Gnnnn V00 suffix or number) the current one"""
+        if isinstance(generation, str):
+            match = _GENERATION.match(generation.rsplit('.', 1)[-1].upper())
+            if match is None:
+                raise ValueError(f"Not a generation name: {generation}")
+            generation = int(match.group('number'))
+        with self._locked() as catalog:
+            if catalog is None or generation not in catalog.position:
+                raise LookupError(f"{self.generation_name(generation)} is not cataloged")
+            catalog.current = generation
+            self._save(catalog)
+        return self.generation_name(generation)
+
+    def rollback(self, steps=1):
+        """Make the generation `steps` before the current one current; returns its name"""
+        return self.promote(self._number(self._load(), -steps))
@@ -1,9 +1,10 @@
 """
 z/OS Integration Utilities
 """
-import os
 import logging
 from datetime import datetime
+from .zos_record_io import DCB, DatasetReader, RecordLayout, dataset_path, python_codec, read_dcb, write_records
+from .zos_enqueue import get_enqueue_manager, dataset_resource, SYSTEM
 
 class ZOSIntegration:
     def __init__(self, config):
@@ -41,26 +42,52 @@ class ZOSIntegration:
         except Exception as e:
             self.logger.error(f"Failed to write SMF record: {str(e)}")
 
-    def read_dataset(self, dataset_name):
-        """Read from z/OS dataset"""
+    def read_dataset(self, dataset_name, layout=None):
+        """Read a sequential dataset's records as a NumPy structured array
+
+        Records of fixed-format datasets are a view of the memory-mapped
+        file; ``layout`` (a RecordLayout or a list of field specs) names
+        their fields.  Returns None if the dataset cannot be read.
+        """
         try:
-            # In production, this would use proper dataset access methods
+            path = dataset_path(self.config, dataset_name)
             self.logger.info(f"Reading dataset: {dataset_name}")
-            return None
+            reader = DatasetReader(path, layout=self._layout(layout))
+            records = reader.records()
+            reader.close()
+            return records
         except Exception as e:
             self.logger.error(f"Failed to read dataset {dataset_name}: {str(e)}")
             return None
 
-    def write_dataset(self, dataset_name, data):
-        """Write to z/OS dataset"""
+    def write_dataset(self, dataset_name, data, layout=None, record_format=None, record_length=None,
+                      block_size=None):
+        """Write records to a sequential dataset
+
+        ``data`` is a structured array, a sequence of bytes or str records, or
+        a dict of columns encoded with ``layout``.  DCB attributes not given
+        are taken from the dataset's allocation.
+        """
         try:
-            # In production, this would use proper dataset access methods
+            path = dataset_path(self.config, dataset_name)
+            current = read_dcb(path)
+            dcb = DCB(record_format or current.recfm, record_length or current.lrecl, block_size or current.blksize)
+            layout = self._layout(layout)
+            if isinstance(data, dict):
+                data = layout.encode(data, None if dcb.variable else dcb.lrecl)
             self.logger.info(f"Writing to dataset: {dataset_name}")
+            with get_enqueue_manager(self.config).enqueue(dataset_resource(dataset_name), scope=SYSTEM):
+                write_records(path, data, dcb, layout)
             return True
         except Exception as e:
             self.logger.error(f"Failed to write to dataset {dataset_name}: {str(e)}")
             return False
 
+    def _layout(self, layout):
+        if layout is None or isinstance(layout, RecordLayout):
+            return layout
+        return RecordLayout(layout, python_codec(self.config.get('encoding', 'IBM-1047')))
+
     def check_racf_authorization(self, resource, access_level):
         """Check RACF authorization"""
         if not self.config['racf_enabled']:
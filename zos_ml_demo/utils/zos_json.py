@@ -0,0 +1,94 @@
+"""
+Fast JSON Encoding for API Responses
+
+``dumps`` returns UTF-8 bytes from orjson when it is installed and from the
+standard library otherwise, and ``FastJSONProvider`` plugs it into Flask
+so ``jsonify`` builds responses straight from those bytes.
+
+Per-transaction strings are made cheaply as well: ``timestamp_now`` formats
+the local time at millisecond resolution, reformatting the date and time
+part only when the second changes, and ``new_transaction_id`` combines a
+random per-process prefix with a counter instead of reading the OS random
+source for every ID.
+"""
+import os
+import json
+import time
+import random
+import itertools
+from datetime import datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(obj, default=None):
+        """Serialize obj to UTF-8 JSON bytes"""
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj, default=None):
+        """Serialize obj to UTF-8 JSON bytes"""
+        return json.dumps(obj, default=default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    loads = json.loads
+
+
+_clock = (None, '')
+
+
+def timestamp_now():
+    """Local time as ISO-8601 with milliseconds, like datetime.now().isoformat()"""
+    global _clock
+    now = time.time()
+    second = int(now)
+    cached_second, prefix = _clock
+    if second != cached_second:
+        prefix = datetime.fromtimestamp(second).strftime('%Y-%m-%dT%H:%M:%S')
+        # One tuple assignment, so readers never see a mismatched pair
+        _clock = (second, prefix)
+    return f"{prefix}.{int((now - second) * 1000):03d}"
+
+
+class _IdGenerator:
+    """UUID-shaped IDs: 64 random bits per process plus a 64-bit counter"""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        prefix = f"{random.SystemRandom().getrandbits(64):016x}"
+        self._prefix = f"{prefix[:8]}-{prefix[8:12]}-{prefix[12:16]}-"
+        self._counter = itertools.count(random.SystemRandom().getrandbits(32))
+
+    def __call__(self):
+        # next() on itertools.count is atomic under the GIL
+        count = f"{next(self._counter) & 0xFFFFFFFFFFFFFFFF:016x}"
+        return f"{self._prefix}{count[:4]}-{count[4:]}"
+
+
+new_transaction_id = _IdGenerator()
+
+# A forked worker must not hand out its parent's IDs
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=new_transaction_id.reset)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by ``dumps``/``loads``"""
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, default=self.default).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, default=self.default), mimetype=self.mimetype)
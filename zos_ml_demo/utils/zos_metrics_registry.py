@@ -0,0 +1,256 @@
+"""
+Internal Metric Registry with Prometheus Text Exposition
+
+Counters, gauges and histograms are registered once and updated in place
+by the components that own them.  Every labelled series keeps its rendered
+exposition lines and re-renders them only after an update, so a scrape
+joins cached text fragments and never triggers metric collection.
+Collectors can add series that live elsewhere, such as the cross-worker
+transaction totals in shared memory.
+
+Series other than collector output are per process; under the pre-fork
+server they describe the worker that answered the scrape.  Families that
+only another process updates (the sidecar's scheduler and monitoring
+engine) are exported by that process to a file, and a process serving
+/metrics delegates those families to the file instead of rendering its
+own empty copies.
+"""
+import os
+import math
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    """Render a sample value the way Prometheus parses it"""
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if value != value:
+        return 'NaN'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def format_labels(names, values, extra=''):
+    """Render a label set as {a="x",b="y"} (empty string when there are none)"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Series:
+    """One labelled time series; caches its rendered lines until updated"""
+    __slots__ = ('_family', '_labels', '_text', 'value')
+
+    def __init__(self, family, labels):
+        self._family = family
+        self._labels = labels
+        self._text = None
+        self.value = 0.0
+
+    def inc(self, amount=1):
+        with self._family._lock:
+            self.value += amount
+            self._text = None
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+    def set(self, value):
+        with self._family._lock:
+            self.value = value
+            self._text = None
+
+    def render(self):
+        text = self._text
+        if text is None:
+            with self._family._lock:
+                text = self._text = f"{self._family.name}{self._labels} {format_value(self.value)}\n"
+        return text
+
+
+class _HistogramSeries:
+    """Cumulative bucket counts, sum and count for one label set"""
+    __slots__ = ('_family', '_bucket_labels', '_labels', '_text', 'counts', 'sum', 'count')
+
+    def __init__(self, family, label_values):
+        self._family = family
+        self._labels = format_labels(family.labelnames, label_values)
+        self._bucket_labels = [
+            format_labels(family.labelnames, label_values, f'le="{format_value(bound)}"')
+            for bound in family.buckets + (math.inf,)
+        ]
+        self._text = None
+        self.counts = [0] * (len(family.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = bisect_left(self._family.buckets, value)
+        with self._family._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+            self._text = None
+
+    def render(self):
+        text = self._text
+        if text is None:
+            name = self._family.name
+            lines = []
+            cumulative = 0
+            with self._family._lock:
+                for labels, count in zip(self._bucket_labels, self.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{labels} {cumulative}\n")
+                lines.append(f"{name}_sum{self._labels} {format_value(self.sum)}\n")
+                lines.append(f"{name}_count{self._labels} {self.count}\n")
+                text = self._text = ''.join(lines)
+        return text
+
+
+class MetricFamily:
+    """A named metric and its labelled series"""
+    def __init__(self, name, kind, documentation, labelnames=(), buckets=None):
+        self.name = name
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) if buckets is not None else None
+        self.header = f"# HELP {name} {documentation}\n# TYPE {name} {kind}\n"
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        """Series for a label set, created on first use"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        series = self._series.get(key)
+        if series is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                series = self._series.get(key)
+                if series is None:
+                    if self.kind == 'histogram':
+                        series = _HistogramSeries(self, key)
+                    else:
+                        series = _Series(self, format_labels(self.labelnames, key))
+                    self._series[key] = series
+        return series
+
+    # Unlabelled metrics are updated directly on the family
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def render(self):
+        return self.header + ''.join([series.render() for series in list(self._series.values())])
+
+
+class MetricsRegistry:
+    """All metric families of the process, rendered together for /metrics"""
+    def __init__(self):
+        self._families = {}
+        self._collectors = {}
+        self._delegated = ()
+        self._lock = threading.Lock()
+
+    def _register(self, name, kind, documentation, labelnames, buckets=None):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, kind, documentation, labelnames, buckets)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as a different {family.kind}")
+            return family
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(name, 'counter', documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(name, 'gauge', documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(name, 'histogram', documentation, labelnames, buckets)
+
+    def register_collector(self, name, collector):
+        """Add a callable returning exposition text; re-registering a name replaces it"""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def delegate(self, prefixes, collector):
+        """Render families whose names start with one of prefixes from collector instead of this process"""
+        with self._lock:
+            self._delegated = tuple(prefixes)
+            self._collectors['delegated'] = collector
+
+    def render(self):
+        """Prometheus text exposition of every family and collector"""
+        delegated = self._delegated
+        parts = [family.render() for name, family in list(self._families.items())
+                 if not (delegated and name.startswith(delegated))]
+        parts.extend(collector() for collector in list(self._collectors.values()))
+        return ''.join(parts)
+
+    def export(self, path, prefixes):
+        """Write the families whose names start with one of prefixes to path, for another process to serve"""
+        prefixes = tuple(prefixes)
+        text = ''.join(family.render() for name, family in list(self._families.items()) if name.startswith(prefixes))
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'w') as f:
+            f.write(text)
+        os.replace(temporary, path)
+
+
+class ExportedMetrics:
+    """Collector serving the exposition text another process export()ed; re-read only when the file changes"""
+    def __init__(self, path):
+        self.path = path
+        self._identity = None
+        self._text = ''
+
+    def __call__(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return ''
+        identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if identity != self._identity:
+            with open(self.path) as f:
+                self._text = f.read()
+            self._identity = identity
+        return self._text
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry():
+    """Process-wide metric registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry()
+        return _registry
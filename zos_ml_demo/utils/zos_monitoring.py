@@ -5,8 +5,19 @@ import os
 import time
 import json
 import logging
-import psutil
+import threading
 from datetime import datetime
+from .zos_shared_metrics import SharedMetricsRegion
+from .zos_metrics_registry import get_metrics_registry, format_value
+
+def _cpu_total(times):
+    # Guest time is already counted in user and nice on Linux
+    return sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+
+
+def _cpu_idle(times):
+    return times.idle + getattr(times, 'iowait', 0)
+
 
 class SystemMonitor:
     def __init__(self, config):
@@ -28,11 +39,63 @@ class SystemMonitor:
             'response_time_threshold': 1.0,
             'error_rate_threshold': 0.1
         }
+        # Whole-server transaction metrics; a single local slot until a
+        # pre-fork server attaches the region shared by all its workers
+        self.shared = SharedMetricsRegion(1)
+        # Baseline for non-blocking CPU readings, shared by whichever threads take them
+        self._last_cpu_times = None
+        self._cpu_lock = threading.Lock()
+        get_metrics_registry().register_collector('zos_transactions', self.render_transaction_metrics)
+
+    def attach_shared_metrics(self, region, slot=None):
+        """Record into a worker's slot of a region shared across processes; without a slot, only read it"""
+        if slot is not None:
+            region.bind(slot)
+        self.shared = region
+
+    def get_transaction_metrics(self):
+        """Transactions, errors, in-flight count and latency percentiles across all workers"""
+        return self.shared.snapshot()
 
-    def get_cpu_metrics(self):
-        """Get CPU usage metrics"""
+    def render_transaction_metrics(self):
+        """Prometheus exposition of the whole-server transaction metrics"""
+        snapshot = self.shared.snapshot()
+        latency = snapshot['latency_ms']
+        lines = [
+            '# HELP zos_transactions_total Transactions recorded by all workers\n',
+            '# TYPE zos_transactions_total counter\n',
+            f"zos_transactions_total {snapshot['counters']['transactions']}\n",
+            '# HELP zos_transaction_errors_total Failed transactions recorded by all workers\n',
+            '# TYPE zos_transaction_errors_total counter\n',
+            f"zos_transaction_errors_total {snapshot['counters']['errors']}\n",
+            '# HELP zos_transactions_in_flight Transactions currently being processed\n',
+            '# TYPE zos_transactions_in_flight gauge\n',
+            f"zos_transactions_in_flight {format_value(snapshot['gauges']['in_flight'])}\n",
+            '# HELP zos_transaction_duration_seconds Transaction response time\n',
+            '# TYPE zos_transaction_duration_seconds histogram\n'
+        ]
+        cumulative = 0
+        for bound, count in zip(snapshot['histogram']['le'], snapshot['histogram']['counts']):
+            cumulative += count
+            le = bound if bound == '+Inf' else format_value(bound / 1000.0)
+            lines.append(f'zos_transaction_duration_seconds_bucket{{le="{le}"}} {cumulative}\n')
+        lines.append(f"zos_transaction_duration_seconds_sum {format_value(latency['mean'] * latency['count'] / 1000.0)}\n")
+        lines.append(f"zos_transaction_duration_seconds_count {latency['count']}\n")
+        return ''.join(lines)
+
+    def transaction_started(self):
+        """Count a transaction as in flight and return its start time"""
+        self.shared.add_gauge('in_flight', 1)
+        return time.time()
+
+    def get_cpu_metrics(self, interval=1):
+        """Get CPU usage metrics; interval=None measures since the previous call without blocking"""
         try:
-            cpu_percent = psutil.cpu_percent(interval=1)
+            import psutil
+            if interval is None:
+                cpu_percent = self._cpu_percent_since_last_call(psutil.cpu_times())
+            else:
+                cpu_percent = psutil.cpu_percent(interval=interval)
             self.metrics['cpu'].append(cpu_percent)
             if len(self.metrics['cpu']) > 60:  # Keep last hour of data
                 self.metrics['cpu'].pop(0)
@@ -41,9 +104,26 @@ class SystemMonitor:
             self.logger.error(f"Error getting CPU metrics: {e}")
             return []
 
+    def _cpu_percent_since_last_call(self, times):
+        """System-wide CPU busy percent since the previous non-blocking reading.
+
+        psutil keeps its own interval=None baseline per calling thread, so
+        readings taken on a pool's threads would each measure a different
+        interval; this baseline belongs to the monitor instead."""
+        with self._cpu_lock:
+            last, self._last_cpu_times = self._last_cpu_times, times
+        if last is None:
+            return 0.0
+        total = _cpu_total(times) - _cpu_total(last)
+        if total <= 0:
+            return 0.0
+        idle = _cpu_idle(times) - _cpu_idle(last)
+        return round(min(max((total - idle) / total * 100.0, 0.0), 100.0), 1)
+
     def get_memory_metrics(self):
         """Get memory usage metrics"""
         try:
+            import psutil
             memory = psutil.virtual_memory()
             memory_percent = memory.percent
             self.metrics['memory'].append(memory_percent)
@@ -57,6 +137,7 @@ class SystemMonitor:
     def get_io_metrics(self):
         """Get I/O metrics"""
         try:
+            import psutil
             io = psutil.disk_io_counters()
             io_wait = psutil.cpu_times().iowait if hasattr(psutil.cpu_times(), 'iowait') else 0
             self.metrics['io'].append(io_wait)
@@ -215,6 +296,12 @@ class SystemMonitor:
             self.metrics['transactions'] += 1
             if not success:
                 self.metrics['errors'] += 1
+
+            self.shared.add_gauge('in_flight', -1)
+            self.shared.increment('transactions')
+            if not success:
+                self.shared.increment('errors')
+            self.shared.observe(response_time)
                 
             if response_time > self.thresholds['response_time']:
                 self.write_wto_message(f"Warning: High response time detected: {response_time}ms")
@@ -0,0 +1,132 @@
+"""
+Tick-Driven Monitoring Engine
+
+Background monitoring is a set of tasks (threshold checks, RMF/SMF
+writers, performance analysis, security checks) that read a shared set
+of metric sources.  On every tick the engine works out which tasks are
+due, collects each source those tasks need exactly once, and hands every
+due task the same sample, so a CPU reading or a security scan is never
+taken twice for one tick.
+
+The engine does no sleeping of its own: its tick() runs as one interval
+job of the workload scheduler, which supplies the timing, jitter and
+drift correction.  Collection and task run times are recorded per source
+and per task.
+"""
+import time
+import logging
+from .zos_metrics_registry import get_metrics_registry
+
+SOURCE_DURATION = get_metrics_registry().histogram(
+    'zos_monitoring_source_seconds', 'Time to collect a monitoring source', ('source',))
+TASK_DURATION = get_metrics_registry().histogram(
+    'zos_monitoring_task_seconds', 'Run time of a monitoring task', ('task',))
+
+
+class _Timed:
+    """Run count, failures and the last and total run time of a source or task"""
+    def __init__(self, name):
+        self.name = name
+        self.runs = 0
+        self.failures = 0
+        self.last_duration = None
+        self.total_duration = 0.0
+
+    def record(self, duration, failed):
+        self.runs += 1
+        self.failures += failed
+        self.last_duration = duration
+        self.total_duration += duration
+
+    def status(self):
+        return {
+            'runs': self.runs,
+            'failures': self.failures,
+            'last_duration': self.last_duration,
+            'mean_duration': self.total_duration / self.runs if self.runs else None
+        }
+
+
+class _Source(_Timed):
+    def __init__(self, name, collect):
+        super().__init__(name)
+        self.collect = collect
+
+
+class _Task(_Timed):
+    def __init__(self, name, action, sources, ticks):
+        super().__init__(name)
+        self.action = action
+        self.sources = sources
+        self.ticks = ticks
+
+
+class MonitoringEngine:
+    """Collects each metric source once per tick and fans the sample out to the due tasks"""
+    def __init__(self, tick=60.0):
+        if tick <= 0:
+            raise ValueError("Monitoring tick must be positive")
+        self.logger = logging.getLogger('zos_monitoring_engine')
+        self.tick_seconds = float(tick)
+        self.ticks = 0
+        self._sources = {}
+        self._tasks = []
+
+    def add_source(self, name, collect):
+        """Register a callable returning one reading of a metric source"""
+        self._sources[name] = _Source(name, collect)
+
+    def add_task(self, name, action, sources=(), every=None):
+        """Register action(sample), run every `every` seconds (a multiple of the tick) with the named sources"""
+        unknown = [source for source in sources if source not in self._sources]
+        if unknown:
+            raise ValueError(f"Task {name} uses unknown sources: {', '.join(unknown)}")
+        ticks = max(1, round((every or self.tick_seconds) / self.tick_seconds))
+        self._tasks.append(_Task(name, action, tuple(sources), ticks))
+
+    def _collect(self, source):
+        start = time.perf_counter()
+        value, failed = None, False
+        try:
+            value = source.collect()
+        except Exception as e:
+            failed = True
+            self.logger.error(f"Collecting {source.name} failed: {str(e)}")
+        duration = time.perf_counter() - start
+        source.record(duration, failed)
+        SOURCE_DURATION.labels(source.name).observe(duration)
+        return value
+
+    def tick(self):
+        """Collect the sources the due tasks need and run those tasks; returns the names run"""
+        number = self.ticks
+        self.ticks += 1
+        due = [task for task in self._tasks if number % task.ticks == 0]
+        sample = {}
+        for task in due:
+            for name in task.sources:
+                if name not in sample:
+                    sample[name] = self._collect(self._sources[name])
+        for task in due:
+            start = time.perf_counter()
+            failed = False
+            try:
+                task.action(sample)
+            except Exception as e:
+                # One failing task does not stop the others
+                failed = True
+                self.logger.error(f"Monitoring task {task.name} failed: {str(e)}")
+            duration = time.perf_counter() - start
+            task.record(duration, failed)
+            TASK_DURATION.labels(task.name).observe(duration)
+        return [task.name for task in due]
+
+    def status(self):
+        """Per-source and per-task run counts and timings"""
+        return {
+            'tick': self.tick_seconds,
+            'ticks': self.ticks,
+            'sources': {name: source.status() for name, source in self._sources.items()},
+            'tasks': {task.name: dict(task.status(), every=task.ticks * self.tick_seconds)
+                      for task in self._tasks}
+        }
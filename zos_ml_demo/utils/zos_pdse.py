@@ -0,0 +1,255 @@
+"""
+PDSE-Style Member Library
+
+A library is one file holding many named members (models, thresholds,
+lookup tables) plus a directory of them, so loading thousands of
+artifacts costs one open and one mmap instead of thousands of file opens.
+
+Layout: two 64-byte header slots, then member data and directories.
+Updates are append-only -- the new member data is written after the
+current end, followed by a complete new directory, and the update is
+committed by writing the next header slot (a sequence number and a CRC
+pick the newest valid slot).  A crash before the header write leaves the
+previous directory in force.  Replaced and deleted members leave dead
+space behind; once it exceeds the library's compaction ratio the live
+members are copied into a fresh file that atomically replaces the old.
+
+The directory is an array of fixed 32-byte entries sorted by name and
+read straight from the mapping; a name index built once per directory
+version makes opening a member a dictionary lookup and a memoryview
+slice of the mapped file.
+"""
+import os
+import mmap
+import time
+import zlib
+import struct
+import re
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Library updates are then only safe within one process
+    fcntl = None
+
+MAGIC = b'MLPDSE01'
+ALIGNMENT = 64
+
+# magic, sequence, directory offset, directory entries, end of used space; then CRC32 of those
+_SLOT = struct.Struct('<8sQQQQ')
+_SLOT_SIZE = 64
+_DATA_START = 2 * _SLOT_SIZE
+
+DIRECTORY_DTYPE = np.dtype([('name', 'S8'), ('offset', '<u8'), ('length', '<u8'), ('modified', '<f8')])
+
+# Member names follow PDS rules: 1-8 characters, letters, digits and national characters
+_MEMBER_NAME = re.compile(r'^[A-Z@#$][A-Z0-9@#$]{0,7}$')
+
+
+def member_name(name):
+    """Validated, upper-cased member name"""
+    upper = name.upper()
+    if not _MEMBER_NAME.match(upper):
+        raise ValueError(f"Invalid member name: {name}")
+    return upper
+
+
+def _align(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def _pack_slot(sequence, directory_offset, entries, end):
+    body = _SLOT.pack(MAGIC, sequence, directory_offset, entries, end)
+    return (body + struct.pack('<I', zlib.crc32(body))).ljust(_SLOT_SIZE, b'\0')
+
+
+def _unpack_slot(raw):
+    body = raw[:_SLOT.size]
+    (crc,) = struct.unpack_from('<I', raw, _SLOT.size)
+    magic, sequence, directory_offset, entries, end = _SLOT.unpack(body)
+    if magic != MAGIC or zlib.crc32(body) != crc:
+        return None
+    return sequence, directory_offset, entries, end
+
+
+class PDSELibrary:
+    """Named members in one append-only file, read through a memory map"""
+    def __init__(self, path, compact_ratio=0.5, compact_min_bytes=1 << 20, sync=True):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.sync = sync
+        self._map = None
+        self._identity = None
+        self._sequence = 0
+        self._directory = np.zeros(0, dtype=DIRECTORY_DTYPE)
+        self._index = {}
+        self._end = _DATA_START
+        if not os.path.exists(path):
+            self._create(path)
+        self.refresh()
+
+    def _create(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(_pack_slot(1, _DATA_START, 0, _DATA_START) + bytes(_SLOT_SIZE))
+        os.replace(temporary, path)
+
+    def refresh(self):
+        """Pick up updates and compactions made since the last call (by any process)"""
+        stat = os.stat(self.path)
+        identity = (stat.st_ino, stat.st_size)
+        if identity != self._identity:
+            with open(self.path, 'rb') as f:
+                # The previous map stays alive for as long as views of it do
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._identity = identity
+        slots = [_unpack_slot(self._map[i * _SLOT_SIZE:(i + 1) * _SLOT_SIZE]) for i in range(2)]
+        valid = [slot for slot in slots if slot is not None]
+        if not valid:
+            raise ValueError(f"{self.path} is not a member library")
+        sequence, directory_offset, entries, end = max(valid)
+        if sequence != self._sequence:
+            if entries:
+                self._directory = np.frombuffer(self._map, dtype=DIRECTORY_DTYPE, count=entries,
+                                                offset=directory_offset)
+            else:
+                # An empty directory writes no bytes, so its offset may lie past the end of the file
+                self._directory = np.zeros(0, dtype=DIRECTORY_DTYPE)
+            self._index = {name.decode('ascii'): i for i, name in enumerate(self._directory['name'].tolist())}
+            self._sequence = sequence
+            self._end = end
+
+    def __contains__(self, name):
+        return name.upper() in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def members(self):
+        """Member names in directory (alphabetical) order"""
+        return list(self._index)
+
+    def stat(self, name):
+        """Size and last update time of a member"""
+        entry = self._directory[self._index[name.upper()]]
+        return {'name': name.upper(), 'size': int(entry['length']), 'modified': float(entry['modified'])}
+
+    def read(self, name):
+        """Zero-copy view of a member's data; raises KeyError if there is no such member"""
+        i = self._index.get(name.upper())
+        if i is None:
+            raise KeyError(f"Member {name} not found in {self.path}")
+        entry = self._directory[i]
+        start = int(entry['offset'])
+        return memoryview(self._map)[start:start + int(entry['length'])]
+
+    def array(self, name, dtype, shape=None):
+        """Member data as a read-only NumPy array viewing the mapped file"""
+        values = np.frombuffer(self.read(name), dtype=dtype)
+        return values.reshape(shape) if shape is not None else values
+
+    @property
+    def garbage_bytes(self):
+        """Space held by replaced or deleted members and old directories"""
+        live = sum(_align(int(length)) for length in self._directory['length'].tolist())
+        return self._end - _DATA_START - live - _align(self._directory.nbytes)
+
+    @contextmanager
+    def _locked(self):
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _commit(self, f, entries, position):
+        """Append a directory of entries at position and switch the header to it"""
+        entries = np.sort(entries, order='name')
+        f.seek(position)
+        f.write(entries.tobytes())
+        end = _align(position + entries.nbytes)
+        if self.sync:
+            f.flush()
+            os.fsync(f.fileno())
+        sequence = self._sequence + 1
+        f.seek((sequence % 2) * _SLOT_SIZE)
+        f.write(_pack_slot(sequence, position, len(entries), end))
+        f.flush()
+        if self.sync:
+            os.fsync(f.fileno())
+
+    def update(self, members=None, delete=()):
+        """Add or replace members ({name: bytes-like}) and delete others in one commit"""
+        members = {member_name(name): data for name, data in (members or {}).items()}
+        delete = {member_name(name) for name in delete}
+        with self._locked():
+            missing = delete - set(self._index)
+            if missing:
+                raise KeyError(f"Members not found in {self.path}: {', '.join(sorted(missing))}")
+            keep = [i for name, i in self._index.items() if name not in members and name not in delete]
+            entries = np.concatenate([self._directory[keep], np.zeros(len(members), dtype=DIRECTORY_DTYPE)])
+            now = time.time()
+            with open(self.path, 'r+b') as f:
+                position = self._end
+                for row, (name, data) in enumerate(members.items(), len(keep)):
+                    data = memoryview(data).cast('B')
+                    f.seek(position)
+                    f.write(data)
+                    entries[row] = (name.encode('ascii'), position, len(data), now)
+                    position = _align(position + len(data))
+                self._commit(f, entries, position)
+            self.refresh()
+            if self.garbage_bytes > max(self.compact_min_bytes, self.compact_ratio * self._end):
+                self._compact()
+
+    def write(self, name, data):
+        """Add or replace one member"""
+        self.update({name: data})
+
+    def delete(self, name):
+        self.update(delete=(name,))
+
+    def compact(self):
+        """Copy the live members into a fresh file that replaces this one"""
+        with self._locked():
+            self._compact()
+
+    def _compact(self):
+        temporary = self.path + '.tmp'
+        entries = self._directory.copy()
+        with open(temporary, 'wb') as f:
+            f.write(bytes(_DATA_START))
+            position = _DATA_START
+            for row in range(len(entries)):
+                data = self.read(entries[row]['name'].decode('ascii'))
+                f.write(data)
+                entries[row]['offset'] = position
+                position = _align(position + len(data))
+                f.seek(position)
+            self._commit(f, entries, position)
+        os.replace(temporary, self.path)
+        self.refresh()
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Member views are still in use; the map closes when they are released
+                pass
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
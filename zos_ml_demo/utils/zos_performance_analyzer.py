@@ -3,7 +3,6 @@ Advanced z/OS Performance Analysis
 """
 import logging
 from datetime import datetime, timedelta
-import numpy as np
 
 class PerformanceAnalyzer:
     def __init__(self):
@@ -0,0 +1,181 @@
+"""
+Hot-Path Profiling Hooks
+
+Per-stage request timing with nanosecond monotonic clocks.  A handler asks
+the profiler for a trace and marks the end of each stage:
+
+    trace = profiler.start()
+    verify()
+    trace.mark('racf')
+    ...
+    trace.finish()
+
+Unsampled requests (or any request while profiling is off) get a shared
+no-op trace, so the disabled cost is one attribute check plus a no-op call
+per stage.  Sampled traces feed per-stage histograms in the metric registry
+and a running summary, and can be rendered as a Server-Timing header.
+
+``capture_stack_profile`` samples the stacks of every thread for a few
+seconds and counts collapsed (flame graph) stacks.
+"""
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from time import perf_counter_ns
+from .zos_metrics_registry import get_metrics_registry
+
+STAGE_BUCKETS = (0.00001, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.1, 1.0)
+
+MAX_PROFILE_SECONDS = 60.0
+# Shortest stack sampling interval; shorter ones would busy-loop the sampler
+MIN_PROFILE_INTERVAL = 0.001
+
+STAGE_LATENCY = get_metrics_registry().histogram(
+    'zos_request_stage_seconds', 'Time spent in each stage of sampled requests',
+    ('endpoint', 'stage'), buckets=STAGE_BUCKETS)
+
+
+class _NullTrace:
+    """Trace handed out when a request is not sampled"""
+    __slots__ = ()
+    sampled = False
+
+    def mark(self, stage):
+        pass
+
+    def finish(self):
+        pass
+
+    def server_timing(self):
+        return ''
+
+
+NULL_TRACE = _NullTrace()
+
+
+class RequestTrace:
+    """Stage durations of one sampled request"""
+    __slots__ = ('_profiler', '_last', 'started', 'stages')
+    sampled = True
+
+    def __init__(self, profiler):
+        self._profiler = profiler
+        self.started = self._last = perf_counter_ns()
+        self.stages = []
+
+    def mark(self, stage):
+        """End the current stage, naming it"""
+        now = perf_counter_ns()
+        self.stages.append((stage, now - self._last))
+        self._last = now
+
+    def finish(self):
+        self._profiler._record(self)
+
+    def server_timing(self):
+        """Stage durations as a Server-Timing header value"""
+        return ', '.join(f"{stage};dur={ns / 1e6:.3f}" for stage, ns in self.stages)
+
+
+class StageProfiler:
+    """Samples requests to an endpoint and aggregates their stage timings"""
+    def __init__(self, endpoint, enabled=False, sample_rate=1.0):
+        self.endpoint = endpoint
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.sampled_requests = 0
+        self._stages = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def configure(self, enabled=None, sample_rate=None):
+        """Switch profiling on or off, or change the sample rate, at runtime"""
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if enabled is not None:
+            self.enabled = bool(enabled)
+
+    def start(self):
+        """Trace for a new request; the no-op trace unless it is sampled"""
+        if not self.enabled:
+            return NULL_TRACE
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return NULL_TRACE
+        return RequestTrace(self)
+
+    def _record(self, trace):
+        for stage, ns in trace.stages:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = STAGE_LATENCY.labels(self.endpoint, stage)
+            histogram.observe(ns / 1e9)
+        with self._lock:
+            self.sampled_requests += 1
+            for stage, ns in trace.stages:
+                summary = self._stages.get(stage)
+                if summary is None:
+                    summary = self._stages[stage] = [0, 0, 0]
+                summary[0] += 1
+                summary[1] += ns
+                summary[2] = max(summary[2], ns)
+
+    def get_statistics(self):
+        """Configuration and mean/max duration of every stage seen so far"""
+        with self._lock:
+            stages = {
+                stage: {'count': count, 'mean_ms': total / count / 1e6, 'max_ms': peak / 1e6}
+                for stage, (count, total, peak) in self._stages.items()
+            }
+            return {
+                'endpoint': self.endpoint,
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'sampled_requests': self.sampled_requests,
+                'stages': stages
+            }
+
+    def reset(self):
+        with self._lock:
+            self.sampled_requests = 0
+            self._stages = {}
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f"{module}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def capture_stack_profile(seconds, interval=0.005, limit=50):
+    """Sample every thread's stack for a while and count collapsed stacks"""
+    seconds = min(max(float(seconds), 0.0), MAX_PROFILE_SECONDS)
+    interval = float(interval)
+    if interval < 0:
+        raise ValueError(f"Sampling interval must not be negative, got {interval}")
+    interval = max(interval, MIN_PROFILE_INTERVAL)
+    own_thread = threading.get_ident()
+    stacks = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while True:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id != own_thread:
+                stacks[_collapse(frame)] += 1
+        samples += 1
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(interval)
+    return {
+        'duration': seconds,
+        'interval': interval,
+        'samples': samples,
+        'stacks': [{'stack': stack, 'count': count} for stack, count in stacks.most_common(limit)]
+    }
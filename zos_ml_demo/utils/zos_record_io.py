@@ -0,0 +1,389 @@
+"""
+Fixed- and Variable-Length Record I/O
+
+Sequential datasets are read by memory-mapping the file.  Fixed-length
+(F/FB) records are exposed as a NumPy structured array laid directly over
+the mapping, so a file of a million records costs one array header rather
+than a million Python objects.  Variable-length (V/VB) records are located
+once by walking their record and block descriptor words (RDW/BDW), then
+gathered into a fixed-width array with one vectorized copy.
+
+A RecordLayout names the fields of a record -- character data in any
+single-byte code page, big-endian binary, packed decimal (COMP-3) or zoned
+decimal -- and decodes or encodes a whole column at a time.
+
+Each dataset's DCB attributes (RECFM, LRECL, BLKSIZE) are kept in a small
+catalog file next to it, written when the dataset is allocated or written.
+"""
+import os
+import json
+import mmap
+import struct
+import numpy as np
+
+DEFAULT_RECFM = 'FB'
+DEFAULT_LRECL = 80
+DEFAULT_BLKSIZE = 27920
+DEFAULT_ENCODING = 'cp037'
+
+# Python has no IBM-1047 codec; code page 037 differs from it only in a few
+# punctuation characters ([, ], ^ and a handful of others)
+CODECS = {'IBM-1047': 'cp037', 'IBM-037': 'cp037', 'IBM-500': 'cp500', 'ISO8859-1': 'latin-1'}
+
+VARIABLE_FORMATS = ('V', 'VB')
+FORMATS = ('F', 'FB') + VARIABLE_FORMATS
+
+_DESCRIPTOR = struct.Struct('>HH')  # RDW/BDW: length including the word itself, reserved
+_GATHER_ROWS = 65536
+
+
+def python_codec(encoding):
+    """Python codec name for a z/OS code page name such as IBM-1047"""
+    return CODECS.get(encoding, encoding)
+
+
+def dataset_path(config, dataset_name):
+    """Local file backing a dataset name under the configured dataset directory"""
+    directory = config.get('dataset_directory') or os.path.join(config.get('temp_space', '/tmp'), 'datasets')
+    return os.path.join(directory, dataset_name.strip("'").upper())
+
+
+class DCB:
+    """Data control block attributes of a sequential dataset"""
+    __slots__ = ('recfm', 'lrecl', 'blksize')
+
+    def __init__(self, recfm=DEFAULT_RECFM, lrecl=DEFAULT_LRECL, blksize=DEFAULT_BLKSIZE):
+        recfm = recfm.upper()
+        if recfm not in FORMATS:
+            raise ValueError(f"Unsupported record format: {recfm}")
+        if recfm == 'FB' and blksize % lrecl:
+            raise ValueError(f"BLKSIZE {blksize} is not a multiple of LRECL {lrecl}")
+        if recfm in VARIABLE_FORMATS and not _DESCRIPTOR.size < lrecl <= 32760:
+            raise ValueError(f"LRECL {lrecl} is not a valid variable record length")
+        if recfm == 'VB' and blksize < lrecl + _DESCRIPTOR.size:
+            raise ValueError(f"BLKSIZE {blksize} cannot hold a record of LRECL {lrecl}")
+        self.recfm = recfm
+        self.lrecl = lrecl
+        self.blksize = blksize
+
+    @property
+    def variable(self):
+        return self.recfm in VARIABLE_FORMATS
+
+    @property
+    def max_data_length(self):
+        """Longest record data, excluding the RDW of variable records"""
+        return self.lrecl - _DESCRIPTOR.size if self.variable else self.lrecl
+
+    def to_dict(self):
+        return {'recfm': self.recfm, 'lrecl': self.lrecl, 'blksize': self.blksize}
+
+    def __eq__(self, other):
+        return isinstance(other, DCB) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"DCB(recfm={self.recfm!r}, lrecl={self.lrecl}, blksize={self.blksize})"
+
+
+def catalog_path(path):
+    return path + '.dcb'
+
+
+def read_dcb(path):
+    """Cataloged DCB of a dataset, or the FB/80/27920 defaults if it has none"""
+    try:
+        with open(catalog_path(path)) as f:
+            return DCB(**json.load(f))
+    except FileNotFoundError:
+        return DCB()
+
+
+def write_dcb(path, dcb):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(catalog_path(path), 'w') as f:
+        json.dump(dcb.to_dict(), f)
+
+
+def allocate(path, dcb):
+    """Create an empty dataset and catalog its DCB"""
+    write_dcb(path, dcb)
+    open(path, 'ab').close()
+
+
+class RecordLayout:
+    """Named fields of a record and their column-wise encodings
+
+    ``fields`` are ``(name, length)`` for character data or
+    ``(name, length, kind[, scale])`` with kind one of char, binary,
+    packed or zoned; scale is the number of implied decimal places.
+    """
+    KINDS = ('char', 'binary', 'packed', 'zoned')
+
+    def __init__(self, fields, encoding=DEFAULT_ENCODING):
+        self.encoding = python_codec(encoding)
+        self.fields = []
+        offset = 0
+        for spec in fields:
+            name, length = spec[0], spec[1]
+            kind = spec[2] if len(spec) > 2 else 'char'
+            scale = spec[3] if len(spec) > 3 else 0
+            if kind not in self.KINDS:
+                raise ValueError(f"Unknown field kind for {name}: {kind}")
+            if kind == 'binary' and length not in (1, 2, 4, 8):
+                raise ValueError(f"Binary field {name} must be 1, 2, 4 or 8 bytes")
+            self.fields.append((name, offset, length, kind, scale))
+            offset += length
+        self.itemsize = offset
+        # Byte value of each code point once decoded to Latin-1, for column-wide translation
+        self._to_latin1 = np.frombuffer(bytes(range(256)).decode(self.encoding, 'replace')
+                                        .encode('latin-1', 'replace'), dtype=np.uint8)
+        self._space = ' '.encode(self.encoding)
+
+    def dtype(self, record_length=None):
+        """Structured dtype of one record, padded to record_length"""
+        formats = [f'>i{length}' if kind == 'binary' else f'S{length}' for _, _, length, kind, _ in self.fields]
+        return np.dtype({
+            'names': [name for name, _, _, _, _ in self.fields],
+            'formats': formats,
+            'offsets': [offset for _, offset, _, _, _ in self.fields],
+            'itemsize': max(record_length or 0, self.itemsize)
+        })
+
+    @staticmethod
+    def _raw(records):
+        records = np.ascontiguousarray(records)
+        return records.view(np.uint8).reshape(len(records), records.dtype.itemsize)
+
+    def decode(self, records):
+        """Columns of a structured record array: str, int64 or float64 arrays by field"""
+        raw = self._raw(records)
+        columns = {}
+        for name, offset, length, kind, scale in self.fields:
+            field = raw[:, offset:offset + length]
+            if kind == 'char':
+                # Latin-1 bytes are Unicode code points, so the translated bytes
+                # widen straight into a UCS-4 string array; trailing blanks
+                # become NULs, which NumPy strings drop
+                chars = self._to_latin1[field].astype(np.uint32)
+                chars[np.logical_and.accumulate(chars[:, ::-1] == 0x20, axis=1)[:, ::-1]] = 0
+                columns[name] = chars.view(f'U{length}').ravel()
+            elif kind == 'binary':
+                columns[name] = records[name].astype(np.int64)
+            else:
+                columns[name] = self._decode_decimal(field, kind, scale)
+        return columns
+
+    @staticmethod
+    def _decode_decimal(field, kind, scale):
+        if kind == 'packed':
+            # Two digits per byte; the last nibble is the sign
+            nibbles = np.empty((len(field), field.shape[1] * 2), dtype=np.int64)
+            nibbles[:, 0::2] = field >> 4
+            nibbles[:, 1::2] = field & 0x0F
+            digits, sign = nibbles[:, :-1], nibbles[:, -1]
+        else:
+            # One digit per byte; the zone of the last byte is the sign
+            digits, sign = (field & 0x0F).astype(np.int64), field[:, -1] >> 4
+        if digits.shape[1] <= 18:
+            values = digits @ (10 ** np.arange(digits.shape[1] - 1, -1, -1, dtype=np.int64))
+        else:
+            values = digits.astype(np.float64) @ (10.0 ** np.arange(digits.shape[1] - 1, -1, -1))
+        values = np.where((sign == 0x0B) | (sign == 0x0D), -values, values)
+        return values / 10.0 ** scale if scale else values
+
+    def encode(self, columns, record_length=None):
+        """Structured record array from a dict of column sequences"""
+        count = len(next(iter(columns.values()))) if columns else 0
+        dtype = self.dtype(record_length)
+        raw = np.empty((count, dtype.itemsize), dtype=np.uint8)
+        raw[:] = self._space[0]
+        for name, offset, length, kind, scale in self.fields:
+            values = columns[name]
+            if kind == 'char':
+                text = np.char.encode(np.char.ljust(np.asarray(values, dtype=str), length), self.encoding)
+                raw[:, offset:offset + length] = np.frombuffer(
+                    np.asarray(text, dtype=f'S{length}').tobytes(), dtype=np.uint8).reshape(count, length)
+            elif kind == 'binary':
+                raw[:, offset:offset + length] = np.asarray(values, dtype=f'>i{length}').view(np.uint8).reshape(count, length)
+            else:
+                raw[:, offset:offset + length] = self._encode_decimal(values, length, kind, scale)
+        return raw.view(dtype).ravel()
+
+    @staticmethod
+    def _encode_decimal(values, length, kind, scale):
+        values = np.rint(np.asarray(values, dtype=np.float64) * 10 ** scale).astype(np.int64)
+        magnitude = np.abs(values)
+        width = length * 2 - 1 if kind == 'packed' else length
+        digits = np.empty((len(values), width), dtype=np.uint8)
+        for position in range(width - 1, -1, -1):
+            digits[:, position] = magnitude % 10
+            magnitude //= 10
+        if kind == 'packed':
+            nibbles = np.empty((len(values), width + 1), dtype=np.uint8)
+            nibbles[:, :-1] = digits
+            nibbles[:, -1] = np.where(values < 0, 0x0D, 0x0C)
+            return (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+        zoned = digits | 0xF0
+        zoned[:, -1] = digits[:, -1] | np.where(values < 0, 0xD0, 0xC0).astype(np.uint8)
+        return zoned
+
+
+class DatasetReader:
+    """Memory-mapped sequential dataset; records stay valid while the reader is open"""
+    def __init__(self, path, dcb=None, layout=None):
+        self.path = path
+        self.dcb = dcb or read_dcb(path)
+        self.layout = layout
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        self._buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+        self._offsets = self._lengths = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._buffer = None
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Record views are still alive; the mapping is released with them
+                pass
+        self._file.close()
+
+    def __len__(self):
+        if self.dcb.variable:
+            return len(self._index()[0])
+        return len(self._buffer) // self.dcb.lrecl
+
+    def _index(self):
+        """(data offset, data length) of every variable record, found once"""
+        if self._offsets is None:
+            offsets, lengths = [], []
+            data = self._mmap
+            size = len(data)
+            unpack = _DESCRIPTOR.unpack_from
+            pos = 0
+            while pos < size:
+                if self.dcb.recfm == 'VB':
+                    block_end = pos + unpack(data, pos)[0]
+                    pos += _DESCRIPTOR.size
+                else:
+                    block_end = size
+                while pos < block_end:
+                    length = unpack(data, pos)[0]
+                    if length < _DESCRIPTOR.size or pos + length > size:
+                        raise ValueError(f"{self.path}: bad RDW at offset {pos}")
+                    offsets.append(pos + _DESCRIPTOR.size)
+                    lengths.append(length - _DESCRIPTOR.size)
+                    pos += length
+            self._offsets = np.array(offsets, dtype=np.int64)
+            self._lengths = np.array(lengths, dtype=np.int64)
+        return self._offsets, self._lengths
+
+    def record(self, index):
+        """Raw bytes of one record, as a zero-copy memoryview"""
+        if self.dcb.variable:
+            offsets, lengths = self._index()
+            start, length = int(offsets[index]), int(lengths[index])
+        else:
+            start, length = index * self.dcb.lrecl, self.dcb.lrecl
+        return memoryview(self._mmap)[start:start + length]
+
+    def records(self):
+        """All records as a structured array (a view of the mapping for fixed formats)"""
+        layout = self.layout
+        if not self.dcb.variable:
+            width = self.dcb.lrecl
+            dtype = layout.dtype(width) if layout else np.dtype(f'S{width}')
+            if dtype.itemsize != width:
+                raise ValueError(f"Layout of {dtype.itemsize} bytes does not fit LRECL {width}")
+            return np.frombuffer(self._mmap, dtype=dtype, count=len(self._buffer) // width)
+
+        offsets, lengths = self._index()
+        dtype = layout.dtype() if layout else np.dtype(f'S{self.dcb.max_data_length}')
+        width = dtype.itemsize
+        out = np.empty((len(offsets), width), dtype=np.uint8)
+        pad = layout._space[0] if layout else 0
+        columns = np.arange(width, dtype=np.int64)
+        # Bounded gathers keep the index array small for very large datasets
+        for start in range(0, len(offsets), _GATHER_ROWS):
+            stop = start + _GATHER_ROWS
+            index = offsets[start:stop, None] + columns
+            short = columns >= lengths[start:stop, None]
+            out[start:stop] = np.where(short, pad, self._buffer[np.minimum(index, len(self._buffer) - 1)])
+        return out.view(dtype).ravel()
+
+    def columns(self):
+        """Decoded columns of every record; requires a layout"""
+        return self.layout.decode(self.records())
+
+
+def _record_bytes(records, dcb, layout):
+    if isinstance(records, np.ndarray):
+        return [row.tobytes() for row in np.ascontiguousarray(records).view(
+            (np.uint8, records.dtype.itemsize))]
+    encoding = layout.encoding if layout else DEFAULT_ENCODING
+    return [record.encode(encoding) if isinstance(record, str) else bytes(record) for record in records]
+
+
+def write_records(path, records, dcb=None, layout=None):
+    """Write a structured array (or a sequence of bytes/str records) as a dataset and catalog its DCB
+
+    Fixed records are written through a memory map of the new file; short
+    records are padded with blanks.  Variable records get RDWs and, for VB,
+    are packed into blocks of at most BLKSIZE bytes behind a BDW.
+    """
+    dcb = dcb or read_dcb(path)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    pad = (layout._space if layout else ' '.encode(DEFAULT_ENCODING))[0]
+    temporary = path + '.tmp'
+
+    if not dcb.variable:
+        if isinstance(records, np.ndarray) and records.dtype.itemsize <= dcb.lrecl:
+            count, width = len(records), records.dtype.itemsize
+            source = np.ascontiguousarray(records).view(np.uint8).reshape(count, width)
+        else:
+            rows = _record_bytes(records, dcb, layout)
+            count, width = len(rows), dcb.lrecl
+            source = np.full((count, width), pad, dtype=np.uint8)
+            for i, row in enumerate(rows):
+                if len(row) > width:
+                    raise ValueError(f"Record {i} is longer than LRECL {dcb.lrecl}")
+                source[i, :len(row)] = np.frombuffer(row, dtype=np.uint8)
+        if count:
+            out = np.memmap(temporary, dtype=np.uint8, mode='w+', shape=(count, dcb.lrecl))
+            out[:, :width] = source
+            out[:, width:] = pad
+            out.flush()
+            del out
+        else:
+            open(temporary, 'wb').close()
+    else:
+        with open(temporary, 'wb') as f:
+            block = bytearray()
+            for i, row in enumerate(_record_bytes(records, dcb, layout)):
+                if len(row) > dcb.max_data_length:
+                    raise ValueError(f"Record {i} is longer than LRECL {dcb.lrecl} allows")
+                rdw = _DESCRIPTOR.pack(len(row) + _DESCRIPTOR.size, 0)
+                if dcb.recfm == 'VB':
+                    if block and _DESCRIPTOR.size + len(block) + len(rdw) + len(row) > dcb.blksize:
+                        f.write(_DESCRIPTOR.pack(len(block) + _DESCRIPTOR.size, 0) + block)
+                        block = bytearray()
+                    block += rdw + row
+                else:
+                    f.write(rdw + row)
+            if block:
+                f.write(_DESCRIPTOR.pack(len(block) + _DESCRIPTOR.size, 0) + block)
+    os.replace(temporary, path)
+    write_dcb(path, dcb)
+    return path
@@ -0,0 +1,309 @@
+"""
+Subsystem Resilience Layer
+
+Per-target circuit breakers, bulkheads and adaptive timeouts shared by the
+DB2, IMS, CICS, MQ, VSAM and advanced subsystem integrations.  A call is
+made inside ``guard(target)``:
+
+    with get_resilience_manager().guard('DB2') as call:
+        cursor.execute(sql, timeout=call.timeout)
+
+The guard rejects the call immediately when the target's breaker is open or
+its bulkhead is full, so a degraded backend sheds load instead of tying up
+request threads.  Call latencies feed a rolling window whose high
+percentile sets the timeout offered to the next call.
+"""
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from .zos_metrics_registry import get_metrics_registry
+
+CLOSED = 'CLOSED'
+OPEN = 'OPEN'
+HALF_OPEN = 'HALF_OPEN'
+
+# Breaker state as a gauge value
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+SUBSYSTEM_CALLS = get_metrics_registry().counter(
+    'zos_subsystem_calls_total', 'Subsystem calls by target and outcome', ('target', 'outcome'))
+SUBSYSTEM_LATENCY = get_metrics_registry().histogram(
+    'zos_subsystem_call_duration_seconds', 'Subsystem call latency', ('target',))
+BREAKER_STATE = get_metrics_registry().gauge(
+    'zos_subsystem_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)', ('target',))
+
+
+class SubsystemUnavailableError(RuntimeError):
+    """Raised when a call is rejected without reaching the subsystem"""
+
+
+class CircuitOpenError(SubsystemUnavailableError):
+    """The target's circuit breaker is open"""
+
+
+class BulkheadFullError(SubsystemUnavailableError):
+    """The target already has its maximum number of concurrent calls"""
+
+
+class CircuitBreaker:
+    """Failure-rate breaker over a sliding window of call outcomes"""
+    def __init__(self, failure_threshold=0.5, minimum_calls=10, window=50,
+                 reset_timeout=30.0, half_open_calls=3):
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.transitions = 0
+        self._outcomes = deque(maxlen=window)
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may proceed"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_calls:
+                    return False
+                self._half_open_in_flight += 1
+            return True
+
+    def record(self, success):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if not success:
+                    self._transition(OPEN)
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+            self._outcomes.append(success)
+            if len(self._outcomes) >= self.minimum_calls and self.failure_rate() >= self.failure_threshold:
+                self._transition(OPEN)
+
+    def cancel(self):
+        """Give back an admission that never reached the subsystem"""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+
+    def failure_rate(self):
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def _transition(self, state):
+        self.state = state
+        self.transitions += 1
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+        if state == CLOSED:
+            self._outcomes.clear()
+
+
+class AdaptiveTimeout:
+    """Timeout derived from a high percentile of recent call latencies"""
+    def __init__(self, initial=5.0, minimum=0.05, maximum=30.0, percentile=0.99,
+                 multiplier=2.0, window=200):
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self._latencies = deque(maxlen=window)
+        self._cached = initial
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._dirty = True
+
+    def latency_percentile(self, q):
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    @property
+    def current(self):
+        """Timeout for the next call"""
+        if self._dirty:
+            with self._lock:
+                samples = sorted(self._latencies)
+                self._dirty = False
+            if len(samples) >= 20:
+                p = samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+                self._cached = min(self.maximum, max(self.minimum, p * self.multiplier))
+        return self._cached
+
+
+class Bulkhead:
+    """Caps the number of concurrent calls to one target"""
+    def __init__(self, max_concurrent=16, max_wait=0.0):
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.rejected = 0
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        acquired = self._semaphore.acquire(timeout=self.max_wait) if self.max_wait else self._semaphore.acquire(
+            blocking=False)
+        with self._lock:
+            if acquired:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._semaphore.release()
+
+
+class _Call:
+    """Handle yielded by guard(); exposes the timeout for this call"""
+    __slots__ = ('target', 'timeout', 'started')
+
+    def __init__(self, target, timeout):
+        self.target = target
+        self.timeout = timeout
+        self.started = time.perf_counter()
+
+    @property
+    def remaining(self):
+        return max(0.0, self.timeout - (time.perf_counter() - self.started))
+
+
+class TargetPolicy:
+    """Breaker, bulkhead and timeout for one subsystem target"""
+    def __init__(self, name, settings=None):
+        settings = settings or {}
+        self.name = name
+        self.breaker = CircuitBreaker(**settings.get('breaker', {}))
+        self.bulkhead = Bulkhead(**settings.get('bulkhead', {}))
+        self.timeout = AdaptiveTimeout(**settings.get('timeout', {}))
+        self.stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'short_circuited': 0}
+
+    def metrics(self):
+        return {
+            'state': self.breaker.state,
+            'failure_rate': self.breaker.failure_rate(),
+            'breaker_transitions': self.breaker.transitions,
+            'in_flight': self.bulkhead.in_flight,
+            'max_concurrent': self.bulkhead.max_concurrent,
+            'bulkhead_rejections': self.bulkhead.rejected,
+            'timeout': self.timeout.current,
+            'latency_p50': self.timeout.latency_percentile(0.50),
+            'latency_p99': self.timeout.latency_percentile(0.99),
+            **self.stats
+        }
+
+
+class ZOSResilienceManager:
+    """Registry of per-target resilience policies"""
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.logger = logging.getLogger('zos_resilience')
+        self.policies = {}
+        self._lock = threading.Lock()
+
+    def policy(self, target):
+        policy = self.policies.get(target)
+        if policy is None:
+            with self._lock:
+                policy = self.policies.get(target)
+                if policy is None:
+                    settings = self.config.get('resilience', {})
+                    policy = TargetPolicy(target, settings.get(target, settings.get('default')))
+                    self.policies[target] = policy
+                    BREAKER_STATE.labels(target).set(STATE_VALUES[policy.breaker.state])
+        return policy
+
+    @contextmanager
+    def guard(self, target):
+        """Admit a call to target, timing it and recording its outcome"""
+        policy = self.policy(target)
+        state = policy.breaker.state
+        allowed = policy.breaker.allow()
+        if policy.breaker.state != state:
+            BREAKER_STATE.labels(target).set(STATE_VALUES[policy.breaker.state])
+        if not allowed:
+            policy.stats['short_circuited'] += 1
+            SUBSYSTEM_CALLS.labels(target, 'short_circuited').inc()
+            raise CircuitOpenError(f"{target} circuit is open")
+        if not policy.bulkhead.acquire():
+            policy.breaker.cancel()
+            policy.stats['short_circuited'] += 1
+            SUBSYSTEM_CALLS.labels(target, 'short_circuited').inc()
+            raise BulkheadFullError(f"{target} has {policy.bulkhead.max_concurrent} calls in flight")
+
+        call = _Call(target, policy.timeout.current)
+        success = False
+        try:
+            yield call
+            success = True
+        finally:
+            elapsed = time.perf_counter() - call.started
+            policy.bulkhead.release()
+            policy.timeout.observe(elapsed)
+            SUBSYSTEM_LATENCY.labels(target).observe(elapsed)
+            policy.stats['calls'] += 1
+            outcome = 'success' if success else 'failure'
+            if elapsed > call.timeout:
+                # A call that overran its timeout counts against the breaker
+                policy.stats['slow_calls'] += 1
+                success = False
+                outcome = 'slow'
+            if not success:
+                policy.stats['failures'] += 1
+            SUBSYSTEM_CALLS.labels(target, outcome).inc()
+            previous = policy.breaker.state
+            policy.breaker.record(success)
+            if policy.breaker.state != previous:
+                BREAKER_STATE.labels(target).set(STATE_VALUES[policy.breaker.state])
+                self.logger.warning(f"{target} circuit {previous} -> {policy.breaker.state}")
+
+    def get_metrics(self):
+        """Resilience state for every target that has been called"""
+        return {target: policy.metrics() for target, policy in list(self.policies.items())}
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_resilience_manager(config=None):
+    """Process-wide resilience manager shared by all subsystem integrations
+
+    The first caller's settings win; a later config with different
+    ``resilience`` settings is logged rather than silently ignored.
+    """
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = ZOSResilienceManager(config)
+                return _default_manager
+    if config is not None and config.get('resilience', {}) != _default_manager.config.get('resilience', {}):
+        _default_manager.logger.warning(
+            "Ignoring resilience settings that differ from the shared manager's; "
+            "pass a ZOSResilienceManager explicitly to use them")
+    return _default_manager
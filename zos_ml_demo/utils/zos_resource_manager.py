@@ -3,22 +3,29 @@ z/OS Resource Manager
 """
 import os
 import logging
+import threading
 from datetime import datetime
+from .zos_record_io import DCB, allocate, dataset_path
+from .zos_enqueue import get_enqueue_manager, EXCLUSIVE, SYSTEM
 
 class ZOSResourceManager:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_resource_manager')
+        self.enqueues = get_enqueue_manager(config)
+        self._held = {}
 
     def allocate_dataset(self, dataset_name, space_primary, space_secondary, 
                         record_format='FB', record_length=80, block_size=27920):
         """Allocate a new z/OS dataset"""
         try:
-            # In production, this would use proper dataset allocation
+            # In production, this would use proper dataset allocation; here the
+            # DCB is cataloged next to an empty file for the record I/O layer
             self.logger.info(
                 f"Allocating dataset {dataset_name} with "
                 f"space ({space_primary},{space_secondary})"
             )
+            allocate(dataset_path(self.config, dataset_name), DCB(record_format, record_length, block_size))
             return True
         except Exception as e:
             self.logger.error(f"Dataset allocation failed: {str(e)}")
@@ -92,22 +99,36 @@ class ZOSResourceManager:
             self.logger.error(f"Recovery setup failed: {str(e)}")
             return False
 
-    def establish_enqueue(self, resource_name):
-        """Establish an enqueue for resource serialization"""
+    def establish_enqueue(self, resource_name, mode=EXCLUSIVE, scope=SYSTEM, timeout=None):
+        """Establish an enqueue for resource serialization, held by this thread until release_enqueue"""
         try:
-            # In production, this would use proper ENQ facility
-            self.logger.info(f"Establishing ENQ for {resource_name}")
+            handle = self.enqueues.enq(resource_name, mode, scope, timeout)
+            self._held.setdefault((resource_name, threading.get_ident()), []).append(handle)
+            self.logger.info(f"Established ENQ {mode} on {resource_name}")
             return True
         except Exception as e:
             self.logger.error(f"ENQ establishment failed: {str(e)}")
             return False
 
     def release_enqueue(self, resource_name):
-        """Release an enqueue"""
+        """Release this thread's most recent enqueue of a resource"""
         try:
-            # In production, this would use proper DEQ facility
+            handles = self._held.get((resource_name, threading.get_ident()))
+            if not handles:
+                raise RuntimeError(f"{resource_name} is not enqueued by this thread")
+            handles.pop().release()
+            if not handles:
+                del self._held[(resource_name, threading.get_ident())]
             self.logger.info(f"Releasing ENQ for {resource_name}")
             return True
         except Exception as e:
             self.logger.error(f"ENQ release failed: {str(e)}")
             return False
+
+    def enqueue(self, resource_name, mode=EXCLUSIVE, scope=SYSTEM, timeout=None):
+        """Context manager holding an enqueue for the duration of a with block"""
+        return self.enqueues.enqueue(resource_name, mode, scope, timeout)
+
+    def enqueue_contention(self):
+        """Wait and hold statistics of every enqueued resource, most contended first"""
+        return self.enqueues.contention()
@@ -0,0 +1,473 @@
+"""
+In-Process Workload Scheduler
+
+Jobs run on a cron expression, on a fixed interval, or after the jobs they
+depend on complete successfully.  One timer thread keeps the next due run
+of every job in a heap and sleeps until the earliest of them; due runs are
+handed to a bounded worker pool, so a slow job never delays the others'
+timing.
+
+A job never runs twice at once: a run that comes due while the previous
+one is still executing is skipped (overlap='skip') or queued behind it
+(overlap='queue').  Runs missed while the process was suspended or the
+pool was saturated are handled per job: missed='skip' drops them,
+'run_once' coalesces them into a single run and 'catch_up' replays each
+one (at most MAX_CATCH_UP).
+"""
+import math
+import heapq
+import random
+import logging
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from itertools import count
+from .zos_metrics_registry import get_metrics_registry
+
+MAX_CATCH_UP = 100
+
+OVERLAP_POLICIES = ('skip', 'queue')
+MISSED_POLICIES = ('skip', 'run_once', 'catch_up')
+
+JOB_DURATION = get_metrics_registry().histogram(
+    'zos_scheduler_job_duration_seconds', 'Run time of scheduled jobs', ('job',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+JOB_RUNS = get_metrics_registry().counter(
+    'zos_scheduler_job_runs_total', 'Scheduled job runs by result', ('job', 'result'))
+JOB_SKIPS = get_metrics_registry().counter(
+    'zos_scheduler_job_skips_total', 'Scheduled job runs not started, by reason', ('job', 'reason'))
+
+_MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *'
+}
+_MONTHS = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+_DAYS = ('SUN', 'MON', 'TUE', 'WED', 'THU', 'FRI', 'SAT')
+
+# (name, minimum, maximum, value names)
+_FIELDS = (
+    ('minute', 0, 59, None),
+    ('hour', 0, 23, None),
+    ('day of month', 1, 31, None),
+    ('month', 1, 12, {name: i for i, name in enumerate(_MONTHS, 1)}),
+    ('day of week', 0, 7, {name: i for i, name in enumerate(_DAYS)})
+)
+
+# Days-or-months skipped before an expression is declared unsatisfiable (e.g. 30 February)
+_SEARCH_LIMIT = 20000
+
+
+def _parse_value(text, minimum, maximum, names, field):
+    value = names.get(text.upper()) if names else None
+    if value is None:
+        if not text.isdigit():
+            raise ValueError(f"Invalid cron {field} value: {text}")
+        value = int(text)
+    if not minimum <= value <= maximum:
+        raise ValueError(f"Cron {field} value {value} outside {minimum}-{maximum}")
+    return value
+
+
+def _parse_field(text, field, minimum, maximum, names):
+    """Sorted tuple of the values a cron field matches"""
+    values = set()
+    for part in text.split(','):
+        expr, _, step = part.partition('/')
+        step = int(step) if step.isdigit() else None
+        if part.count('/') and not step:
+            raise ValueError(f"Invalid cron {field} step: {part}")
+        if expr == '*':
+            low, high = minimum, maximum
+        elif '-' in expr:
+            low, high = (_parse_value(v, minimum, maximum, names, field) for v in expr.split('-', 1))
+            if low > high:
+                raise ValueError(f"Invalid cron {field} range: {expr}")
+        else:
+            low = high = _parse_value(expr, minimum, maximum, names, field)
+            if step:
+                # 'a/n' means every n-th value starting at a
+                high = maximum
+        values.update(range(low, high + 1, step or 1))
+    return tuple(sorted(values))
+
+
+class CronSchedule:
+    """Standard five-field cron expression, evaluated in local time"""
+    def __init__(self, expression):
+        self.expression = expression
+        fields = _MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression}")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(text, *spec) for text, spec in zip(fields, _FIELDS))
+        self.minutes, self.hours, self.days, self.months = minutes, hours, days, months
+        # Sunday is both 0 and 7
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # As in cron, a restricted day of month and day of week match either
+        self._any_day = fields[2].startswith('*')
+        self._any_weekday = fields[4].startswith('*')
+        self.next(time.time())
+
+    def _day_matches(self, moment):
+        in_month = moment.day in self.days
+        in_week = (moment.isoweekday() % 7) in self.weekdays
+        if self._any_day or self._any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next(self, after):
+        """First matching time (epoch seconds) strictly after the given one"""
+        moment = datetime.fromtimestamp(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(_SEARCH_LIMIT):
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = datetime(moment.year + year, month + 1, 1)
+                continue
+            if not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            i = bisect_left(self.hours, moment.hour)
+            if i == len(self.hours):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if self.hours[i] != moment.hour:
+                moment = moment.replace(hour=self.hours[i], minute=0)
+            i = bisect_left(self.minutes, moment.minute)
+            if i == len(self.minutes):
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            return moment.replace(minute=self.minutes[i]).timestamp()
+        raise ValueError(f"Cron expression never matches: {self.expression}")
+
+    def __repr__(self):
+        return self.expression
+
+
+class IntervalSchedule:
+    """Fixed period in seconds, anchored to the previous due time so it does not drift
+
+    With jitter, each run is delayed by a fresh random 0-jitter seconds from
+    a fixed grid of due times, so the delays never accumulate.
+    """
+    def __init__(self, seconds, jitter=0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        if not 0 <= jitter < seconds:
+            raise ValueError("Jitter must be at least 0 and less than the interval")
+        self.seconds = float(seconds)
+        self.jitter = float(jitter)
+        self._anchor = None
+
+    def next(self, after):
+        if not self.jitter:
+            return after + self.seconds
+        if self._anchor is None:
+            self._anchor = after
+        periods = math.floor((after - self._anchor) / self.seconds) + 1
+        return self._anchor + periods * self.seconds + random.uniform(0, self.jitter)
+
+    def __repr__(self):
+        return f'every {self.seconds:g}s' + (f' (+0-{self.jitter:g}s)' if self.jitter else '')
+
+
+def parse_schedule(schedule):
+    """A schedule object from a cron expression, a number of seconds or None (dependencies only)"""
+    if schedule is None or hasattr(schedule, 'next'):
+        return schedule
+    if isinstance(schedule, str):
+        return CronSchedule(schedule)
+    return IntervalSchedule(schedule)
+
+
+class Job:
+    """A scheduled callable and its run state"""
+    def __init__(self, name, action, schedule, after, stream, overlap, missed):
+        self.name = name
+        self.action = action
+        self.schedule = schedule
+        self.after = after
+        self.stream = stream
+        self.overlap = overlap
+        self.missed = missed
+        self.next_run = None
+        self.running = False
+        self.held = False
+        self.pending = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_start = None
+        self.last_end = None
+        self.last_result = None
+        self.last_error = None
+        self.last_duration = None
+        # Sequence numbers order starts and successes for dependency checks
+        self.start_seq = 0
+        self.success_seq = 0
+
+    def status(self):
+        if self.running:
+            state = 'RUNNING'
+        elif self.held:
+            state = 'HELD'
+        else:
+            state = 'WAITING'
+        return {
+            'name': self.name,
+            'stream': self.stream,
+            'schedule': repr(self.schedule) if self.schedule is not None else None,
+            'after': list(self.after),
+            'state': state,
+            'next_run': datetime.fromtimestamp(self.next_run).isoformat() if self.next_run else None,
+            'last_start': datetime.fromtimestamp(self.last_start).isoformat() if self.last_start else None,
+            'last_result': self.last_result,
+            'last_error': self.last_error,
+            'last_duration': self.last_duration,
+            'runs': self.runs,
+            'failures': self.failures,
+            'skipped': self.skipped
+        }
+
+
+class WorkloadScheduler:
+    """Cron, interval and dependency-triggered jobs on one timer thread and a bounded pool"""
+    def __init__(self, max_workers=4, misfire_grace=1.0, clock=time.time):
+        self.logger = logging.getLogger('zos_scheduler')
+        self.max_workers = max_workers
+        self.misfire_grace = misfire_grace
+        self.clock = clock
+        self._jobs = {}
+        self._heap = []
+        self._order = count()
+        self._runs = count(1)
+        self._cond = threading.Condition(threading.RLock())
+        self._pool = None
+        self._thread = None
+        self._stopping = False
+
+    def add_job(self, name, action, schedule=None, after=(), stream=None,
+                overlap='skip', missed='run_once', args=(), kwargs=None):
+        """Register a job; it needs a schedule, dependencies or both"""
+        schedule = parse_schedule(schedule)
+        after = tuple(after)
+        if overlap not in OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy: {overlap}")
+        if missed not in MISSED_POLICIES:
+            raise ValueError(f"Unknown missed-run policy: {missed}")
+        if schedule is None and not after:
+            raise ValueError(f"Job {name} has neither a schedule nor dependencies")
+        if args or kwargs:
+            action = (lambda f, a, k: lambda: f(*a, **k))(action, args, kwargs or {})
+        with self._cond:
+            if name in self._jobs:
+                raise ValueError(f"Job {name} is already scheduled")
+            # Dependencies must already exist, which also rules out cycles
+            unknown = [dep for dep in after if dep not in self._jobs]
+            if unknown:
+                raise ValueError(f"Job {name} depends on unknown jobs: {', '.join(unknown)}")
+            job = Job(name, action, schedule, after, stream or name, overlap, missed)
+            self._jobs[name] = job
+            if schedule is not None:
+                self._push(job, self._first_run(schedule))
+            return job
+
+    def remove_job(self, name):
+        with self._cond:
+            dependents = [job.name for job in self._jobs.values() if name in job.after]
+            if dependents:
+                raise ValueError(f"Jobs depend on {name}: {', '.join(dependents)}")
+            job = self._jobs.pop(name)
+            # Its heap entry is dropped when it surfaces
+            job.next_run = None
+
+    def _first_run(self, schedule):
+        now = self.clock()
+        # Interval jobs start right away, like the loops they replace
+        return now if isinstance(schedule, IntervalSchedule) else schedule.next(now)
+
+    def _push(self, job, due):
+        job.next_run = due
+        heapq.heappush(self._heap, (due, next(self._order), job))
+        self._cond.notify()
+
+    def start(self):
+        """Start the timer thread; safe to call again after a fork"""
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._pool = None
+            self._thread = threading.Thread(target=self._timer, daemon=True, name='zos-scheduler')
+            self._thread.start()
+
+    def stop(self, wait=True):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+            thread, pool = self._thread, self._pool
+            self._thread = self._pool = None
+        if thread is not None and wait:
+            thread.join()
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def _timer(self):
+        with self._cond:
+            while not self._stopping:
+                delay = self._heap[0][0] - self.clock() if self._heap else None
+                if delay is not None and delay <= 0:
+                    self.run_pending()
+                    continue
+                # Wake at least every 30s so a wall-clock jump is noticed
+                self._cond.wait(30.0 if delay is None else min(delay, 30.0))
+
+    def run_pending(self, now=None):
+        """Dispatch every run due at or before now; returns the names of jobs dispatched"""
+        dispatched = []
+        with self._cond:
+            now = self.clock() if now is None else now
+            while self._heap and self._heap[0][0] <= now:
+                due, _, job = heapq.heappop(self._heap)
+                if job.next_run != due or self._jobs.get(job.name) is not job:
+                    continue
+                runs = self._due_runs(job, due, now)
+                if runs and self._request(job, runs):
+                    dispatched.append(job.name)
+        return dispatched
+
+    def _due_runs(self, job, due, now):
+        """Apply the missed-run policy to every due time up to now and schedule the next"""
+        missed, latest = 1, due
+        following = job.schedule.next(due)
+        while following <= now and missed < MAX_CATCH_UP:
+            missed += 1
+            latest = following
+            following = job.schedule.next(following)
+        lateness = now - latest
+        if following <= now:
+            # Too far behind to count; resume from now
+            following = job.schedule.next(now)
+            lateness = float('inf')
+        self._push(job, following)
+        if missed == 1 and lateness <= self.misfire_grace:
+            return 1
+        if job.missed == 'catch_up':
+            runs = missed
+        elif job.missed == 'run_once':
+            runs = 1
+        else:
+            runs = 1 if lateness <= self.misfire_grace else 0
+        if missed > runs:
+            job.skipped += missed - runs
+            JOB_SKIPS.labels(job.name, 'missed').inc(missed - runs)
+            self.logger.warning(f"Job {job.name} missed {missed - runs} run(s)")
+        return runs
+
+    def _dependencies_met(self, job):
+        """Every dependency has succeeded since this job last started"""
+        return all(self._jobs[dep].success_seq > job.start_seq for dep in job.after)
+
+    def _request(self, job, runs):
+        """Start a job (or queue/skip it if it is running); True if a run started"""
+        if not self._dependencies_met(job):
+            job.held = True
+            return False
+        if job.running:
+            if job.overlap == 'queue':
+                job.pending += runs
+            else:
+                job.skipped += runs
+                JOB_SKIPS.labels(job.name, 'overlap').inc(runs)
+            return False
+        job.pending += runs - 1
+        self._dispatch(job)
+        return True
+
+    def _dispatch(self, job):
+        job.held = False
+        job.running = True
+        job.start_seq = next(self._runs)
+        job.last_start = self.clock()
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix='zos-job')
+        self._pool.submit(self._execute, job)
+
+    def _execute(self, job):
+        start = time.perf_counter()
+        error = None
+        try:
+            job.action()
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            self.logger.error(f"Job {job.name} failed: {error}")
+        duration = time.perf_counter() - start
+        JOB_DURATION.labels(job.name).observe(duration)
+        JOB_RUNS.labels(job.name, 'failure' if error else 'success').inc()
+        self._finished(job, error, duration)
+
+    def _finished(self, job, error, duration):
+        with self._cond:
+            job.running = False
+            job.runs += 1
+            job.last_end = self.clock()
+            job.last_duration = duration
+            job.last_error = error
+            job.last_result = 'FAILURE' if error else 'SUCCESS'
+            if error:
+                job.failures += 1
+            else:
+                job.success_seq = next(self._runs)
+                for dependent in list(self._jobs.values()):
+                    if job.name in dependent.after and (dependent.held or dependent.schedule is None) \
+                            and not self._stopping:
+                        self._request(dependent, 1)
+            if job.pending and not self._stopping:
+                job.pending -= 1
+                self._dispatch(job)
+            self._cond.notify_all()
+
+    def trigger(self, name):
+        """Run a job now, outside its schedule; dependencies and overlap rules still apply"""
+        with self._cond:
+            return self._request(self._jobs[name], 1)
+
+    def wait_idle(self, timeout=None):
+        """Block until no job is running or queued; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(job.running or job.pending for job in self._jobs.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def job_status(self, name):
+        with self._cond:
+            job = self._jobs.get(name)
+            return job.status() if job else None
+
+    def stream_status(self, stream):
+        """Combined state of the jobs in a job stream, or None if it has none"""
+        with self._cond:
+            jobs = [job.status() for job in self._jobs.values() if job.stream == stream]
+        if not jobs:
+            return None
+        states = {job['state'] for job in jobs}
+        status = next((state for state in ('RUNNING', 'HELD') if state in states), 'WAITING')
+        upcoming = [job['next_run'] for job in jobs if job['next_run']]
+        finished = [job for job in jobs if job['last_result']]
+        last = max(finished, key=lambda job: job['last_start'], default=None)
+        return {
+            'status': status,
+            'next_run': min(upcoming) if upcoming else None,
+            'last_completion': last['last_result'] if last else None,
+            'jobs': jobs
+        }
@@ -5,6 +5,12 @@ import logging
 from datetime import datetime
 import hashlib
 import json
+from .zos_metrics_registry import get_metrics_registry
+
+RACF_CHECKS = get_metrics_registry().counter(
+    'zos_racf_checks_total', 'RACF permission checks by resource and result', ('resource', 'result'))
+SECURITY_EVENTS = get_metrics_registry().counter(
+    'zos_security_events_total', 'Security events logged by type', ('type',))
 
 class ZOSSecurityManager:
     def __init__(self, config):
@@ -21,6 +27,7 @@ class ZOSSecurityManager:
                 # Check group access
                 group_access = self._check_group_access(user_id, resource)
                 if not group_access:
+                    RACF_CHECKS.labels(resource, 'denied').inc()
                     return False
                     
             # Log access attempt
@@ -32,9 +39,11 @@ class ZOSSecurityManager:
                 'granted': True
             })
             
+            RACF_CHECKS.labels(resource, 'granted').inc()
             return True
         except Exception as e:
             self.logger.error(f"RACF verification failed: {str(e)}")
+            RACF_CHECKS.labels(resource, 'error').inc()
             return False
 
     def _check_direct_access(self, user_id, resource):
@@ -187,6 +196,7 @@ class ZOSSecurityManager:
         try:
             event['timestamp'] = datetime.now().isoformat()
             self.security_events.append(event)
+            SECURITY_EVENTS.labels(event.get('type', 'UNKNOWN')).inc()
             
             # Keep last 1000 events
             if len(self.security_events) > 1000:
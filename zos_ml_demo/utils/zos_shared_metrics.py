@@ -0,0 +1,122 @@
+"""
+Cross-Worker Shared Metrics
+
+A block of shared memory split into one fixed slot per worker process.
+Each slot holds counters, gauges and latency histogram buckets.  A slot is
+only ever written by the process that owns it, so writers take no
+cross-process lock; readers sum every slot to get whole-server totals and
+estimate percentiles from the merged histogram, without any IPC round trip.
+
+The region must be created before the workers are forked.
+"""
+import threading
+from bisect import bisect_left
+from multiprocessing import RawArray
+
+COUNTERS = ('transactions', 'errors')
+GAUGES = ('in_flight',)
+
+# Upper bounds (ms) of the latency histogram buckets; one overflow bucket follows
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class SharedMetricsRegion:
+    """Fixed per-worker slots of counters, gauges and histogram buckets"""
+    def __init__(self, workers=1, counters=COUNTERS, gauges=GAUGES, buckets=LATENCY_BUCKETS_MS):
+        self.workers = workers
+        self.counters = {name: i for i, name in enumerate(counters)}
+        self.gauges = {name: len(counters) + i for i, name in enumerate(gauges)}
+        self.buckets = tuple(buckets)
+        self._histogram = len(counters) + len(gauges)
+        # bucket counts (including overflow) followed by the sum of observed values
+        self._sum = self._histogram + len(self.buckets) + 1
+        self._stride = self._sum + 1
+        self._values = RawArray('d', workers * self._stride)
+        self._slot = 0
+        # Only guards threads of the owning process; aligned doubles are
+        # written whole, so readers in other processes never see torn values
+        self._lock = threading.Lock()
+
+    def bind(self, slot):
+        """Make this process the writer of a slot (call after fork)"""
+        if not 0 <= slot < self.workers:
+            raise ValueError(f"Slot {slot} out of range for {self.workers} workers")
+        self._slot = slot
+        self._lock = threading.Lock()
+        base = slot * self._stride
+        # Counters and histogram carry over from the slot's previous owner;
+        # gauges describe the live process and start again from zero
+        for offset in self.gauges.values():
+            self._values[base + offset] = 0.0
+
+    def increment(self, name, amount=1):
+        index = self._slot * self._stride + self.counters[name]
+        with self._lock:
+            self._values[index] += amount
+
+    def add_gauge(self, name, amount):
+        index = self._slot * self._stride + self.gauges[name]
+        with self._lock:
+            self._values[index] = max(0.0, self._values[index] + amount)
+
+    def set_gauge(self, name, value):
+        self._values[self._slot * self._stride + self.gauges[name]] = value
+
+    def observe(self, value):
+        base = self._slot * self._stride
+        bucket = base + self._histogram + bisect_left(self.buckets, value)
+        with self._lock:
+            self._values[bucket] += 1
+            self._values[base + self._sum] += value
+
+    def _slot_values(self, slot):
+        base = slot * self._stride
+        return self._values[base:base + self._stride]
+
+    def _percentile(self, counts, total, q):
+        """Estimate a percentile by interpolating inside its histogram bucket"""
+        rank = q * total
+        seen = 0.0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return 0.0
+
+    def snapshot(self):
+        """Whole-server totals summed over every slot"""
+        totals = [0.0] * self._stride
+        for slot in range(self.workers):
+            for i, value in enumerate(self._slot_values(slot)):
+                totals[i] += value
+        counts = totals[self._histogram:self._sum]
+        observed = sum(counts)
+        return {
+            'workers': self.workers,
+            'counters': {name: int(totals[i]) for name, i in self.counters.items()},
+            'gauges': {name: totals[i] for name, i in self.gauges.items()},
+            'latency_ms': {
+                'count': int(observed),
+                'mean': totals[self._sum] / observed if observed else 0.0,
+                'p50': self._percentile(counts, observed, 0.50),
+                'p90': self._percentile(counts, observed, 0.90),
+                'p99': self._percentile(counts, observed, 0.99)
+            },
+            'histogram': {
+                'le': list(self.buckets) + ['+Inf'],
+                'counts': [int(c) for c in counts]
+            }
+        }
+
+    def per_worker(self):
+        """Counters and gauges of each slot"""
+        workers = []
+        for slot in range(self.workers):
+            values = self._slot_values(slot)
+            entry = {'slot': slot}
+            entry.update({name: int(values[i]) for name, i in self.counters.items()})
+            entry.update({name: values[i] for name, i in self.gauges.items()})
+            workers.append(entry)
+        return workers
@@ -0,0 +1,104 @@
+"""
+Versioned Snapshot Cache
+
+Read-mostly payloads (health, security report) are built once per refresh,
+serialized to JSON bytes and tagged with a version and an ETag.  Serving a
+probe is then a dictionary lookup plus a comparison against If-None-Match.
+
+A snapshot older than its max age is still served while a single
+background refresh builds the next version, so only the very first
+request for a payload ever waits for the builder.
+"""
+import time
+import hashlib
+import logging
+import threading
+from .zos_json import dumps
+
+
+class Snapshot:
+    """An immutable serialized payload"""
+    __slots__ = ('name', 'version', 'body', 'etag', 'created')
+
+    def __init__(self, name, version, body):
+        self.name = name
+        self.version = version
+        self.body = body
+        self.etag = f'"{version:x}-{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        self.created = time.monotonic()
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value names this snapshot"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        return self.etag in (tag.strip().replace('W/', '', 1) for tag in if_none_match.split(','))
+
+
+class SnapshotCache:
+    """Named snapshots, each rebuilt at most once per max age"""
+    def __init__(self, max_age=None, default_max_age=10.0):
+        self.logger = logging.getLogger('zos_snapshot_cache')
+        self.max_age = dict(max_age or {})
+        self.default_max_age = default_max_age
+        self._snapshots = {}
+        self._versions = {}
+        self._locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'builds': 0, 'stale_served': 0}
+
+    def _name_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def publish(self, name, payload):
+        """Serialize a payload as the next version of a snapshot"""
+        body = dumps(payload)
+        with self._lock:
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            snapshot = Snapshot(name, version, body)
+            self._snapshots[name] = snapshot
+        return snapshot
+
+    def get(self, name):
+        return self._snapshots.get(name)
+
+    def invalidate(self, name):
+        """Drop a snapshot so the next request rebuilds it"""
+        self._snapshots.pop(name, None)
+
+    def _build(self, name, builder):
+        self.stats['builds'] += 1
+        return self.publish(name, builder())
+
+    def _refresh(self, name, builder):
+        try:
+            self._build(name, builder)
+        except Exception as e:
+            self.logger.error(f"Refreshing snapshot {name} failed: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def get_or_build(self, name, builder):
+        """Current snapshot; builds it if missing, refreshes it in the background if stale"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            with self._name_lock(name):
+                snapshot = self._snapshots.get(name)
+                if snapshot is None:
+                    return self._build(name, builder)
+        if time.monotonic() - snapshot.created < self.max_age.get(name, self.default_max_age):
+            self.stats['hits'] += 1
+            return snapshot
+        with self._lock:
+            start = name not in self._refreshing
+            self._refreshing.add(name)
+        if start:
+            threading.Thread(target=self._refresh, args=(name, builder), daemon=True,
+                             name=f'snapshot-{name}').start()
+        self.stats['stale_served'] += 1
+        return snapshot
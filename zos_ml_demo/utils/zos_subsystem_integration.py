@@ -1,20 +1,27 @@
 """
 z/OS Subsystem Integration (DB2, IMS, CICS, MQ)
 """
+import os
+import json
 import logging
+import threading
 from datetime import datetime
+from .zos_resilience import get_resilience_manager
+from .zos_vsam_store import VSAMKSDSCluster, DEFAULT_CI_SIZE, DEFAULT_CACHE_BLOCKS, DEFAULT_KEY_LENGTH, encode_key
 
 class ZOSDB2Integration:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_db2_integration')
+        self.resilience = get_resilience_manager(config)
 
     def execute_sql(self, sql_statement, parameters=None):
         """Execute SQL statement"""
         try:
-            self.logger.info(f"Executing SQL: {sql_statement}")
-            # In production, this would use proper DB2 connection
-            return True
+            with self.resilience.guard('DB2'):
+                self.logger.info(f"Executing SQL: {sql_statement}")
+                # In production, this would use proper DB2 connection
+                return True
         except Exception as e:
             self.logger.error(f"SQL execution failed: {str(e)}")
             return False
@@ -36,12 +43,14 @@ class ZOSDB2Integration:
         return self.execute_sql(sql)
 
 class ZOSIMSIntegration:
-    def __init__(self, config):
+    def __init__(self, config, gateway=None):
         self.config = config
         self.logger = logging.getLogger('zos_ims_integration')
+        self.resilience = get_resilience_manager(config)
+        self.gateway = gateway
 
     def send_ims_transaction(self, transaction_code, data):
-        """Send IMS transaction"""
+        """Send IMS transaction; returns its correlation ID when a gateway is attached"""
         try:
             # Format IMS transaction
             ims_data = {
@@ -49,28 +58,37 @@ class ZOSIMSIntegration:
                 'data': data,
                 'timestamp': datetime.now().isoformat()
             }
-            self.logger.info(f"Sending IMS transaction: {ims_data}")
-            return True
+            if self.gateway is not None:
+                # The gateway guards the round trip itself
+                return self.gateway.submit('IMS', ims_data)
+            with self.resilience.guard('IMS'):
+                self.logger.info(f"Sending IMS transaction: {ims_data}")
+                return True
         except Exception as e:
             self.logger.error(f"IMS transaction failed: {str(e)}")
             return False
 
-    def get_ims_response(self, correlation_id):
+    def get_ims_response(self, correlation_id, timeout=0):
         """Get IMS transaction response"""
         try:
-            self.logger.info(f"Getting IMS response for: {correlation_id}")
-            return None
+            if self.gateway is not None:
+                return self.gateway.get_response(correlation_id, timeout)
+            with self.resilience.guard('IMS'):
+                self.logger.info(f"Getting IMS response for: {correlation_id}")
+                return None
         except Exception as e:
             self.logger.error(f"IMS response retrieval failed: {str(e)}")
             return None
 
 class ZOSCICSIntegration:
-    def __init__(self, config):
+    def __init__(self, config, gateway=None):
         self.config = config
         self.logger = logging.getLogger('zos_cics_integration')
+        self.resilience = get_resilience_manager(config)
+        self.gateway = gateway
 
     def send_cics_transaction(self, transaction_id, data):
-        """Send CICS transaction"""
+        """Send CICS transaction; returns its correlation ID when a gateway is attached"""
         try:
             # Format CICS transaction
             cics_data = {
@@ -78,17 +96,33 @@ class ZOSCICSIntegration:
                 'data': data,
                 'timestamp': datetime.now().isoformat()
             }
-            self.logger.info(f"Sending CICS transaction: {cics_data}")
-            return True
+            if self.gateway is not None:
+                # The gateway guards the round trip itself
+                return self.gateway.submit('CICS', cics_data)
+            with self.resilience.guard('CICS'):
+                self.logger.info(f"Sending CICS transaction: {cics_data}")
+                return True
         except Exception as e:
             self.logger.error(f"CICS transaction failed: {str(e)}")
             return False
 
+    def get_cics_response(self, correlation_id, timeout=0):
+        """Get CICS transaction response"""
+        try:
+            if self.gateway is not None:
+                return self.gateway.get_response(correlation_id, timeout)
+            with self.resilience.guard('CICS'):
+                return None
+        except Exception as e:
+            self.logger.error(f"CICS response retrieval failed: {str(e)}")
+            return None
+
     def start_cics_task(self, task_name, parameters=None):
         """Start CICS task"""
         try:
-            self.logger.info(f"Starting CICS task: {task_name}")
-            return True
+            with self.resilience.guard('CICS'):
+                self.logger.info(f"Starting CICS task: {task_name}")
+                return True
         except Exception as e:
             self.logger.error(f"CICS task start failed: {str(e)}")
             return False
@@ -97,18 +131,20 @@ class ZOSMQIntegration:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_mq_integration')
+        self.resilience = get_resilience_manager(config)
 
     def send_mq_message(self, queue_name, message):
         """Send MQ message"""
         try:
-            # Format MQ message
-            mq_data = {
-                'queue': queue_name,
-                'message': message,
-                'timestamp': datetime.now().isoformat()
-            }
-            self.logger.info(f"Sending MQ message: {mq_data}")
-            return True
+            with self.resilience.guard('MQ'):
+                # Format MQ message
+                mq_data = {
+                    'queue': queue_name,
+                    'message': message,
+                    'timestamp': datetime.now().isoformat()
+                }
+                self.logger.info(f"Sending MQ message: {mq_data}")
+                return True
         except Exception as e:
             self.logger.error(f"MQ message send failed: {str(e)}")
             return False
@@ -116,8 +152,9 @@ class ZOSMQIntegration:
     def receive_mq_message(self, queue_name):
         """Receive MQ message"""
         try:
-            self.logger.info(f"Receiving from queue: {queue_name}")
-            return None
+            with self.resilience.guard('MQ'):
+                self.logger.info(f"Receiving from queue: {queue_name}")
+                return None
         except Exception as e:
             self.logger.error(f"MQ message receive failed: {str(e)}")
             return None
@@ -126,12 +163,54 @@ class ZOSVSAMIntegration:
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger('zos_vsam_integration')
+        self.resilience = get_resilience_manager(config)
+        self.clusters = {}
+        self._lock = threading.Lock()
+
+    def open_cluster(self, dataset_name, key_length=DEFAULT_KEY_LENGTH):
+        """Open the KSDS cluster backing a dataset, defining it on first use"""
+        with self._lock:
+            cluster = self.clusters.get(dataset_name)
+            if cluster is None:
+                directory = self.config.get('vsam_directory', os.path.join(self.config.get('temp_space', '/tmp'), 'vsam'))
+                cluster = VSAMKSDSCluster(
+                    os.path.join(directory, f"{dataset_name}.KSDS"),
+                    key_length=key_length,
+                    ci_size=self.config.get('vsam_ci_size', DEFAULT_CI_SIZE),
+                    cache_blocks=self.config.get('vsam_cache_blocks', DEFAULT_CACHE_BLOCKS)
+                )
+                self.clusters[dataset_name] = cluster
+            return cluster
+
+    def _encode_record(self, record):
+        if isinstance(record, (bytes, bytearray, memoryview)):
+            return b'B' + bytes(record)
+        return b'J' + json.dumps(record, separators=(',', ':')).encode('utf-8')
+
+    def _decode_record(self, data):
+        if data is None:
+            return None
+        if data[:1] == b'J':
+            return json.loads(data[1:])
+        return data[1:]
+
+    def _key_length(self, dataset_name):
+        cluster = self.clusters.get(dataset_name)
+        return DEFAULT_KEY_LENGTH if cluster is None else cluster.key_length
 
-    def write_vsam_record(self, dataset_name, record):
-        """Write VSAM record"""
+    def write_vsam_record(self, dataset_name, record, key=None):
+        """Write VSAM record; key defaults to record['key']"""
+        # Caller errors are rejected here so they never count against the VSAM breaker
         try:
-            self.logger.info(f"Writing VSAM record to: {dataset_name}")
-            return True
+            key = encode_key(record['key'] if key is None else key, self._key_length(dataset_name))
+            data = self._encode_record(record)
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.error(f"VSAM write failed: invalid record: {str(e)}")
+            return False
+        try:
+            with self.resilience.guard('VSAM'):
+                self.open_cluster(dataset_name).put(key, data)
+                return True
         except Exception as e:
             self.logger.error(f"VSAM write failed: {str(e)}")
             return False
@@ -139,8 +218,36 @@ class ZOSVSAMIntegration:
     def read_vsam_record(self, dataset_name, key):
         """Read VSAM record"""
         try:
-            self.logger.info(f"Reading VSAM record from: {dataset_name}")
-            return None
+            with self.resilience.guard('VSAM'):
+                return self._decode_record(self.open_cluster(dataset_name).get(key))
         except Exception as e:
             self.logger.error(f"VSAM read failed: {str(e)}")
             return None
+
+    def browse_vsam_records(self, dataset_name, start_key=None, end_key=None, limit=None):
+        """Browse VSAM records in key sequence"""
+        try:
+            with self.resilience.guard('VSAM'):
+                return [
+                    (key.decode('utf-8', 'replace'), self._decode_record(data))
+                    for key, data in self.open_cluster(dataset_name).browse(start_key, end_key, limit)
+                ]
+        except Exception as e:
+            self.logger.error(f"VSAM browse failed: {str(e)}")
+            return []
+
+    def delete_vsam_record(self, dataset_name, key):
+        """Erase VSAM record"""
+        try:
+            with self.resilience.guard('VSAM'):
+                return self.open_cluster(dataset_name).delete(key)
+        except Exception as e:
+            self.logger.error(f"VSAM erase failed: {str(e)}")
+            return False
+
+    def close(self):
+        """Close all open clusters"""
+        with self._lock:
+            for cluster in self.clusters.values():
+                cluster.close()
+            self.clusters.clear()
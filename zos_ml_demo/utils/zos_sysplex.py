@@ -0,0 +1,167 @@
+"""
+Sysplex Membership and Workload Routing
+
+Each app instance joining a sysplex publishes its live capacity (queue
+depth, p99 latency, CPU) as its entry in a coupling facility cache
+structure named after the sysplex, and rewrites the entry every
+heartbeat interval.  Failure detection does not trust the members'
+clocks: a registry notes when it last saw each member's entry version
+change, and a member whose version has not moved for the failure timeout
+is marked failed (and its entry purged after a longer grace period).
+
+A router picks the member for the next unit of batch or MQ-driven
+scoring work from the active members, either by power-of-two-choices
+(sample two, take the less loaded) or by weighting every member by
+inverse load.  Load is the expected wait, (queue depth + 1) x p99
+latency; members over the CPU limit are only chosen when every member
+is.  Capacity is only as fresh as the last heartbeat, so the router also
+counts the work it sent each member since that member's last heartbeat,
+which keeps a burst from piling onto the member that looked idlest.
+"""
+import os
+import time
+import random
+import socket
+import logging
+import threading
+from .zos_metrics_registry import get_metrics_registry
+
+ROUTES = get_metrics_registry().counter(
+    'zos_sysplex_routes_total', 'Units of work routed to each sysplex member', ('member',))
+
+STRATEGIES = ('p2c', 'weighted')
+
+
+def default_member_name():
+    return f"{socket.gethostname()}.{os.getpid()}"
+
+
+class SysplexRegistry:
+    """Heartbeated membership of one sysplex, kept in a CF cache structure"""
+    def __init__(self, structure, member, capacity=None, heartbeat_interval=5.0,
+                 failure_timeout=None, purge_after=None, clock=time.monotonic):
+        self.structure = structure
+        self.member = member
+        self.capacity = capacity or (lambda: {})
+        self.heartbeat_interval = heartbeat_interval
+        self.failure_timeout = failure_timeout or 3 * heartbeat_interval
+        self.purge_after = purge_after or 10 * self.failure_timeout
+        self.clock = clock
+        self.logger = logging.getLogger('zos_sysplex')
+        self.refreshed = None
+        self._joined = time.time()
+        self._seen = {}
+        self._members = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def heartbeat(self):
+        """Publish this member's current capacity; returns the entry's new version"""
+        return self.structure.write(self.member, {
+            'capacity': self.capacity(),
+            'joined': self._joined,
+            'heartbeat_interval': self.heartbeat_interval
+        })
+
+    def refresh(self):
+        """Re-read every member's entry and update active/failed status"""
+        entries = self.structure.entries()
+        now = self.clock()
+        members = {}
+        with self._lock:
+            for name, (version, data) in entries.items():
+                seen = self._seen.get(name)
+                if seen is None or seen[0] != version:
+                    seen = self._seen[name] = (version, now)
+                silent = now - seen[1]
+                if silent > self.purge_after:
+                    self.structure.delete(name)
+                    continue
+                status = 'active' if silent <= self.failure_timeout else 'failed'
+                previous = self._members.get(name)
+                if status == 'failed' and (previous is None or previous['status'] == 'active'):
+                    self.logger.warning(f"Sysplex member {name} missed heartbeats for {silent:.1f}s; marked failed")
+                elif status == 'active' and previous is not None and previous['status'] == 'failed':
+                    self.logger.info(f"Sysplex member {name} is active again")
+                members[name] = {'name': name, 'status': status, 'version': version,
+                                 'silent_seconds': silent, 'capacity': data.get('capacity', {})}
+            self._seen = {name: seen for name, seen in self._seen.items() if name in members}
+            self._members = members
+            self.refreshed = now
+        return self.members()
+
+    def members(self, status=None):
+        """Members as of the last refresh, optionally only those with the given status"""
+        with self._lock:
+            members = sorted(self._members.values(), key=lambda m: m['name'])
+        return [m for m in members if status is None or m['status'] == status]
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.heartbeat()
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Sysplex heartbeat failed: {str(e)}")
+            self._stop.wait(self.heartbeat_interval)
+
+    def start(self):
+        """Heartbeat and refresh on a background thread"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='sysplex-heartbeat', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def leave(self):
+        """Stop heartbeating and remove this member's entry"""
+        self.stop()
+        self.structure.delete(self.member)
+
+
+class WorkloadRouter:
+    """Chooses the least-loaded active member for each unit of work"""
+    def __init__(self, registry, strategy='p2c', cpu_limit=90.0, max_age=None, rng=None):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown routing strategy {strategy}; expected one of {', '.join(STRATEGIES)}")
+        self.registry = registry
+        self.strategy = strategy
+        self.cpu_limit = cpu_limit
+        self.max_age = registry.heartbeat_interval if max_age is None else max_age
+        self.rng = rng or random.Random()
+        self._sent = {}
+        self._lock = threading.Lock()
+
+    def load(self, member):
+        """Expected wait at a member: (queue depth + work sent since its heartbeat + 1) x p99 latency"""
+        capacity = member['capacity']
+        version, sent = self._sent.get(member['name'], (None, 0))
+        if version != member['version']:
+            sent = 0
+        latency = max(capacity.get('p99_ms') or 0.0, 1.0)
+        return (capacity.get('queue_depth', 0) + sent + 1) * latency
+
+    def select(self, exclude=()):
+        """Name of the member that should take the next unit of work"""
+        if self.registry.refreshed is None or self.registry.clock() - self.registry.refreshed > self.max_age:
+            self.registry.refresh()
+        members = [m for m in self.registry.members('active') if m['name'] not in exclude]
+        if not members:
+            raise LookupError("No active sysplex members")
+        candidates = [m for m in members if m['capacity'].get('cpu_percent', 0) < self.cpu_limit] or members
+        with self._lock:
+            if self.strategy == 'p2c':
+                sample = self.rng.sample(candidates, 2) if len(candidates) > 1 else candidates
+                chosen = min(sample, key=self.load)
+            else:
+                chosen = self.rng.choices(candidates, weights=[1.0 / self.load(m) for m in candidates])[0]
+            version, sent = self._sent.get(chosen['name'], (None, 0))
+            self._sent[chosen['name']] = (chosen['version'], sent + 1 if version == chosen['version'] else 1)
+        ROUTES.labels(chosen['name']).inc()
+        return chosen['name']
@@ -0,0 +1,356 @@
+"""
+Asynchronous IMS/CICS Request Gateway
+
+Sends transactions to IMS (OTMA) and CICS (IPIC) targets over one
+multiplexed connection per target.  Each request carries a correlation ID;
+a reader task matches replies to waiting requests through a pending-request
+map, so replies may arrive in any order.  Per-target semaphores cap the
+number of requests in flight and every request has a timeout.  Each
+request runs under the target's resilience guard: an open breaker or a
+full bulkhead rejects it, its timeout is the guard's adaptive timeout
+(capped by the endpoint's), and timeouts and errors count as failures.
+
+The event loop runs on a dedicated thread, so synchronous Flask handlers can
+fan a transaction out to several targets and wait only as long as the
+slowest reply.
+"""
+import json
+import time
+import uuid
+import random
+import struct
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from datetime import datetime
+from .zos_resilience import get_resilience_manager
+
+_FRAME = struct.Struct('>I')
+_TIMEOUT_ERRORS = (asyncio.TimeoutError, concurrent.futures.TimeoutError, TimeoutError)
+
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_TIMEOUT = 5.0
+# Extra time a blocked caller allows the gateway loop beyond the request timeout
+RESULT_GRACE = 1.0
+# Seconds a completed reply from submit() is kept for get_response() to collect
+RESPONSE_TTL = 300.0
+
+
+def encode_frame(message):
+    """Length-prefixed JSON frame"""
+    body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return _FRAME.pack(len(body)) + body
+
+
+async def read_frame(reader):
+    header = await reader.readexactly(_FRAME.size)
+    (length,) = _FRAME.unpack(header)
+    return json.loads(await reader.readexactly(length))
+
+
+class _EventLoopThread:
+    """Runs an asyncio event loop on a daemon thread"""
+    def __init__(self, name):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+class ZOSSubsystemStandIn:
+    """Local stand-in for an IMS or CICS region, for tests and benchmarks"""
+    def __init__(self, subsystem, host='127.0.0.1', port=0, latency=0.0, jitter=0.0):
+        self.subsystem = subsystem
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_handled = 0
+        self.logger = logging.getLogger('zos_subsystem_standin')
+        self._runner = None
+        self._server = None
+        self._replies = set()
+
+    async def _reply(self, message, writer):
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        self.requests_handled += 1
+        writer.write(encode_frame({
+            'correlation_id': message.get('correlation_id'),
+            'subsystem': self.subsystem,
+            'status': 'OK',
+            'echo': message.get('payload'),
+            'timestamp': datetime.now().isoformat()
+        }))
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                message = await read_frame(reader)
+                # Reply concurrently so responses can overtake each other
+                task = asyncio.ensure_future(self._reply(message, writer))
+                self._replies.add(task)
+                task.add_done_callback(self._replies.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _start_server(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def start(self):
+        """Start listening; returns (host, port)"""
+        self._runner = _EventLoopThread(f"{self.subsystem}-standin")
+        self._runner.submit(self._start_server()).result(timeout=5)
+        self.logger.info(f"{self.subsystem} stand-in listening on {self.host}:{self.port}")
+        return self.host, self.port
+
+    async def _stop_server(self):
+        self._server.close()
+        for task in list(self._replies):
+            task.cancel()
+        await asyncio.gather(*self._replies, return_exceptions=True)
+
+    def stop(self):
+        if self._runner:
+            self._runner.submit(self._stop_server()).result(timeout=5)
+            self._runner.stop()
+            self._runner = None
+
+
+class _TargetConnection:
+    """Multiplexed connection to one target, correlating replies by ID"""
+    def __init__(self, name, host, port, max_in_flight, timeout):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.pending = {}
+        self.stats = {'requests': 0, 'timeouts': 0, 'errors': 0}
+        self._reader = None
+        self._writer = None
+        self._reader_task = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _ensure_connected(self):
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                self._reader_task = asyncio.ensure_future(self._read_replies())
+
+    async def _read_replies(self):
+        try:
+            while True:
+                message = await read_frame(self._reader)
+                future = self.pending.get(message.get('correlation_id'))
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"{self.name} connection lost: {e}"))
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    async def _exchange(self, correlation_id, payload):
+        async with self.semaphore:
+            await self._ensure_connected()
+            future = asyncio.get_running_loop().create_future()
+            self.pending[correlation_id] = future
+            try:
+                self._writer.write(encode_frame({'correlation_id': correlation_id, 'payload': payload}))
+                await self._writer.drain()
+                return await future
+            finally:
+                self.pending.pop(correlation_id, None)
+
+    async def request(self, correlation_id, payload, timeout=None):
+        """One request; the timeout also bounds the wait for a slot and for the connection"""
+        self.stats['requests'] += 1
+        try:
+            return await asyncio.wait_for(self._exchange(correlation_id, payload), timeout or self.timeout)
+        except _TIMEOUT_ERRORS:
+            self.stats['timeouts'] += 1
+            raise
+        except Exception:
+            self.stats['errors'] += 1
+            raise
+
+    async def close(self):
+        if self._reader_task:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ZOSTransactionGateway:
+    """Request/response layer for IMS and CICS targets"""
+    def __init__(self, config):
+        self.config = config
+        self.logger = logging.getLogger('zos_transaction_gateway')
+        self.endpoints = dict(config.get('subsystem_endpoints', {}))
+        self.resilience = get_resilience_manager(config)
+        self.connections = {}
+        self.response_ttl = config.get('gateway_response_ttl', RESPONSE_TTL)
+        # correlation ID -> (future, submit time)
+        self._responses = {}
+        self._responses_lock = threading.Lock()
+        self._next_sweep = 0.0
+        self._runner = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Start the gateway event loop thread"""
+        with self._start_lock:
+            if self._runner is None:
+                self._runner = _EventLoopThread('zos-transaction-gateway')
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            self._runner.submit(self._close_connections()).result(timeout=5)
+            self._runner.stop()
+            self._runner = None
+
+    async def _close_connections(self):
+        for connection in self.connections.values():
+            await connection.close()
+        self.connections.clear()
+        # Cancel requests still in flight so none is left pending when the loop stops
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _connection(self, target):
+        connection = self.connections.get(target)
+        if connection is None:
+            endpoint = self.endpoints[target]
+            connection = _TargetConnection(
+                target,
+                endpoint.get('host', '127.0.0.1'),
+                endpoint['port'],
+                endpoint.get('max_in_flight', DEFAULT_MAX_IN_FLIGHT),
+                endpoint.get('timeout', DEFAULT_TIMEOUT)
+            )
+            self.connections[target] = connection
+        return connection
+
+    async def request(self, target, payload, timeout=None, correlation_id=None):
+        """Send one request and wait for its correlated reply"""
+        correlation_id = correlation_id or uuid.uuid4().hex
+        connection = self._connection(target)
+        # The bulkhead check does not block unless a max_wait is configured for the target
+        with self.resilience.guard(target) as call:
+            return await connection.request(correlation_id, payload, timeout or min(call.timeout, connection.timeout))
+
+    async def fan_out(self, requests, timeout=None):
+        """Send {target: payload} concurrently; returns {target: reply}"""
+        targets = list(requests)
+        replies = await asyncio.gather(
+            *(self.request(target, requests[target], timeout) for target in targets),
+            return_exceptions=True
+        )
+        results = {}
+        for target, reply in zip(targets, replies):
+            if isinstance(reply, _TIMEOUT_ERRORS):
+                results[target] = {'subsystem': target, 'status': 'TIMEOUT'}
+            elif isinstance(reply, Exception):
+                self.logger.error(f"{target} request failed: {str(reply)}")
+                results[target] = {'subsystem': target, 'status': 'ERROR', 'error': str(reply)}
+            else:
+                results[target] = reply
+        return results
+
+    def _fan_out_timeout(self, requests, timeout):
+        """Longest any fan-out request may take, plus a margin for the event loop"""
+        if timeout is None:
+            timeout = max((self.endpoints[target].get('timeout', DEFAULT_TIMEOUT) for target in requests), default=0)
+        return timeout + RESULT_GRACE
+
+    def fan_out_sync(self, requests, timeout=None):
+        """Blocking fan-out for synchronous callers"""
+        self.start()
+        future = self._runner.submit(self.fan_out(requests, timeout))
+        try:
+            return future.result(self._fan_out_timeout(requests, timeout))
+        except _TIMEOUT_ERRORS:
+            # The gateway loop itself is stalled; do not hold the calling thread any longer
+            future.cancel()
+            return {target: {'subsystem': target, 'status': 'TIMEOUT'} for target in requests}
+
+    def request_async(self, target, payload, timeout=None):
+        """Awaitable single request usable from any other event loop"""
+        self.start()
+        return asyncio.wrap_future(self._runner.submit(self.request(target, payload, timeout)))
+
+    def fan_out_async(self, requests, timeout=None):
+        """Awaitable fan-out usable from any other event loop"""
+        self.start()
+        return asyncio.wrap_future(self._runner.submit(self.fan_out(requests, timeout)))
+
+    def submit(self, target, payload, timeout=None):
+        """Send a request without waiting; returns its correlation ID"""
+        self.start()
+        correlation_id = uuid.uuid4().hex
+        future = self._runner.submit(self.request(target, payload, timeout, correlation_id))
+        now = time.monotonic()
+        with self._responses_lock:
+            self._responses[correlation_id] = (future, now)
+            if now >= self._next_sweep:
+                self._expire_responses(now)
+        return correlation_id
+
+    def _expire_responses(self, now):
+        """Drop completed replies nobody collected within the TTL; caller holds the lock"""
+        expired = [
+            correlation_id for correlation_id, (future, submitted) in self._responses.items()
+            if future.done() and now - submitted > self.response_ttl
+        ]
+        for correlation_id in expired:
+            del self._responses[correlation_id]
+        if expired:
+            self.logger.warning(f"Discarded {len(expired)} uncollected gateway replies")
+        self._next_sweep = now + min(self.response_ttl, 1.0)
+
+    def get_response(self, correlation_id, timeout=0):
+        """Return the reply for a submitted request, or None if not yet available"""
+        with self._responses_lock:
+            entry = self._responses.get(correlation_id)
+        if entry is None:
+            return None
+        future = entry[0]
+        try:
+            reply = future.result(timeout=timeout)
+        except Exception as e:
+            if not future.done():
+                return None
+            reply = {'status': 'TIMEOUT' if isinstance(e, _TIMEOUT_ERRORS) else 'ERROR', 'error': str(e)}
+        with self._responses_lock:
+            self._responses.pop(correlation_id, None)
+        return reply
+
+    def get_statistics(self):
+        """Per-target request counters and current in-flight depth"""
+        return {
+            target: {**connection.stats, 'in_flight': len(connection.pending)}
+            for target, connection in self.connections.items()
+        }
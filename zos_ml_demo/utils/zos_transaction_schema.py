@@ -0,0 +1,211 @@
+"""
+Compiled Transaction Schema Validation
+
+The transaction schema (required fields, types, ranges and the accepted
+``type`` values) is compiled once into a tuple of per-field checks.  A
+record is validated by running those checks in order, and each accepted
+value that the model uses is written straight into a caller-supplied
+feature row of FEATURE_COLUMNS, so no intermediate dict is built.
+
+Batch uploads are checked column by column: every field is gathered into
+one NumPy array and range-checked as a whole, and only the records that
+fail are run through the per-record checks again to name their error.
+"""
+from datetime import datetime
+import numpy as np
+
+# Model feature row (see TransactionAnalyzer): amount, hour of day, type code
+FEATURE_COLUMNS = ('amount', 'time_of_day', 'transaction_type')
+
+DEFAULT_TRANSACTION_TYPES = ('TRANSFER', 'PAYMENT', 'WITHDRAWAL', 'DEPOSIT')
+DEFAULT_AMOUNT_RANGE = (0.0, 1e9)
+MAX_ACCOUNT_LENGTH = 64
+
+_NUMBER_TYPES = (int, float)
+_MISSING = object()
+
+
+class ValidationError(ValueError):
+    """A record does not match the transaction schema"""
+
+
+def _hour_of(value):
+    """Hour of an ISO-8601 timestamp string, or -1.0 if it is not one"""
+    if value.__class__ is not str:
+        return -1.0
+    try:
+        return float(datetime.fromisoformat(value).hour)
+    except ValueError:
+        # Before Python 3.11 fromisoformat does not accept a trailing Z
+        if value.endswith('Z'):
+            return _hour_of(value[:-1] + '+00:00')
+        return -1.0
+
+
+def transaction_schema(transaction_types=DEFAULT_TRANSACTION_TYPES, amount_range=DEFAULT_AMOUNT_RANGE):
+    """Declarative transaction schema, in the order fields are checked"""
+    return {
+        'amount': {'type': 'number', 'minimum': amount_range[0], 'maximum': amount_range[1],
+                   'feature': 'amount'},
+        'type': {'type': 'enum', 'values': tuple(transaction_types), 'feature': 'transaction_type'},
+        'source_account': {'type': 'string', 'max_length': MAX_ACCOUNT_LENGTH},
+        'target_account': {'type': 'string', 'max_length': MAX_ACCOUNT_LENGTH},
+        'timestamp': {'type': 'timestamp', 'feature': 'time_of_day'}
+    }
+
+
+class _NumberField:
+    def __init__(self, name, spec):
+        self.name = name
+        self.minimum = float(spec['minimum'])
+        self.maximum = float(spec['maximum'])
+
+    def convert(self, value):
+        if value.__class__ not in _NUMBER_TYPES:
+            raise ValidationError(f"Field {self.name} must be a number")
+        # NaN fails both comparisons
+        if not self.minimum <= value <= self.maximum:
+            raise ValidationError(f"Field {self.name} must be between {self.minimum:g} and {self.maximum:g}")
+        return value
+
+    def convert_column(self, values):
+        try:
+            numbers = np.fromiter((v if v.__class__ in _NUMBER_TYPES else np.nan for v in values),
+                                  dtype=np.float64, count=len(values))
+        except OverflowError:
+            # An int too large for a double; let the per-record checks sort it out
+            return np.zeros(len(values), dtype=bool), None
+        return (numbers >= self.minimum) & (numbers <= self.maximum), numbers
+
+
+class _EnumField:
+    def __init__(self, name, spec):
+        self.name = name
+        # Feature code is the 1-based position in the schema's value list
+        self.codes = {value: float(code) for code, value in enumerate(spec['values'], 1)}
+        self.message = f"Field {name} must be one of {', '.join(spec['values'])}"
+
+    def convert(self, value):
+        code = self.codes.get(value) if value.__class__ is str else None
+        if code is None:
+            raise ValidationError(self.message)
+        return code
+
+    def convert_column(self, values):
+        codes = self.codes
+        numbers = np.fromiter((codes.get(v, 0.0) if v.__class__ is str else 0.0 for v in values),
+                              dtype=np.float64, count=len(values))
+        return numbers > 0.0, numbers
+
+
+class _StringField:
+    def __init__(self, name, spec):
+        self.name = name
+        self.max_length = spec['max_length']
+
+    def convert(self, value):
+        if value.__class__ is not str or not 0 < len(value) <= self.max_length:
+            raise ValidationError(f"Field {self.name} must be a string of 1 to {self.max_length} characters")
+        return value
+
+    def convert_column(self, values):
+        limit = self.max_length
+        ok = np.fromiter((v.__class__ is str and 0 < len(v) <= limit for v in values),
+                         dtype=bool, count=len(values))
+        return ok, None
+
+
+class _TimestampField:
+    def __init__(self, name, spec):
+        self.name = name
+
+    def convert(self, value):
+        hour = _hour_of(value)
+        if hour < 0.0:
+            raise ValidationError(f"Field {self.name} must be an ISO-8601 timestamp")
+        return hour
+
+    def convert_column(self, values):
+        hours = np.fromiter(map(_hour_of, values), dtype=np.float64, count=len(values))
+        return hours >= 0.0, hours
+
+
+_FIELD_TYPES = {
+    'number': _NumberField,
+    'enum': _EnumField,
+    'string': _StringField,
+    'timestamp': _TimestampField
+}
+
+
+class TransactionValidator:
+    """Transaction schema compiled into per-field checks and feature columns"""
+    def __init__(self, schema=None):
+        schema = schema or transaction_schema()
+        columns = []
+        for name, spec in schema.items():
+            if spec['type'] not in _FIELD_TYPES:
+                raise ValueError(f"Unknown schema type for {name}: {spec['type']}")
+            field = _FIELD_TYPES[spec['type']](name, spec)
+            column = FEATURE_COLUMNS.index(spec['feature']) if 'feature' in spec else None
+            columns.append((name, field, column))
+        self._columns = tuple(columns)
+        # Per-record checks bind the converters directly to skip attribute lookups
+        self._fields = tuple((name, field.convert, column) for name, field, column in columns)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(transaction_schema(config['transaction_types'], config['transaction_amount_range']))
+
+    @staticmethod
+    def new_rows(count):
+        """Preallocated feature matrix with one FEATURE_COLUMNS row per record"""
+        return np.empty((count, len(FEATURE_COLUMNS)), dtype=np.float64)
+
+    def validate_into(self, record, row):
+        """Check one record, writing its features into row; returns an error message or None"""
+        if record.__class__ is not dict:
+            return 'Invalid request data'
+        try:
+            for name, convert, column in self._fields:
+                value = record.get(name, _MISSING)
+                if value is _MISSING:
+                    return f'Missing required field: {name}'
+                value = convert(value)
+                if column is not None:
+                    row[column] = value
+        except ValidationError as e:
+            return str(e)
+        return None
+
+    def validate(self, record):
+        """Error message for a record, or None if it matches the schema"""
+        return self.validate_into(record, self.new_rows(1)[0])
+
+    @property
+    def fields(self):
+        """Schema field names in check order"""
+        return tuple(name for name, _, _ in self._columns)
+
+    def validate_columns(self, columns, features):
+        """Check records given as one value list per field; fills features and returns the valid-row mask"""
+        valid = np.ones(len(features), dtype=bool)
+        for name, field, column in self._columns:
+            ok, numbers = field.convert_column(columns[name])
+            valid &= ok
+            if column is not None and numbers is not None:
+                features[:, column] = numbers
+        return valid
+
+    def validate_batch(self, records, out=None):
+        """Check a list of records at once; returns (feature matrix, per-record error or None)"""
+        count = len(records)
+        features = self.new_rows(count) if out is None else out
+        columns = {name: [r.get(name, _MISSING) if r.__class__ is dict else _MISSING for r in records]
+                   for name in self.fields}
+        valid = self.validate_columns(columns, features)
+        errors = [None] * count
+        # Only failing records pay for the per-record checks that name the problem
+        for i in np.flatnonzero(~valid).tolist():
+            errors[i] = self.validate_into(records[i], features[i])
+        return features, errors
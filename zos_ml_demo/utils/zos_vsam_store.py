@@ -0,0 +1,294 @@
+"""
+Keyed VSAM KSDS Emulation
+
+Records are packed into fixed-size control intervals (CIs) in a local data
+file.  A sorted in-memory key index maps each key to the CI and offset that
+holds the current version of the record, and recently used CIs are kept in
+an LRU block cache so point reads of hot keys never touch the file.
+
+Updates are written log-structured: the new record image is appended to the
+active CI and the index entry is repointed, leaving the old image as dead
+space until the cluster is reorganized.
+"""
+import os
+import struct
+import logging
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Record descriptor: key length, data length
+_RDF = struct.Struct('>HI')
+_DELETED = 0xFFFFFFFF
+
+DEFAULT_CI_SIZE = 4096
+DEFAULT_CACHE_BLOCKS = 1024
+DEFAULT_KEY_LENGTH = 64
+
+
+def encode_key(key, key_length=DEFAULT_KEY_LENGTH):
+    """Encode a record key, rejecting keys that do not fit the cluster"""
+    if isinstance(key, str):
+        key = key.encode('utf-8')
+    if not isinstance(key, (bytes, bytearray, memoryview)):
+        raise TypeError(f"Key must be str or bytes, got {type(key).__name__}")
+    if not key or len(key) > key_length:
+        raise ValueError(f"Key length must be 1-{key_length} bytes, got {len(key)}")
+    return bytes(key)
+
+class VSAMKSDSCluster:
+    """File-backed key-sequenced dataset with CI-sized blocks"""
+    def __init__(self, path, key_length=DEFAULT_KEY_LENGTH, ci_size=DEFAULT_CI_SIZE,
+                 cache_blocks=DEFAULT_CACHE_BLOCKS):
+        self.path = path
+        self.key_length = key_length
+        self.ci_size = ci_size
+        self.cache_blocks = cache_blocks
+        self.logger = logging.getLogger('zos_vsam_store')
+
+        # key -> (ci_number << 32) | offset within CI
+        self._index = {}
+        self._sorted_keys = []
+        self._pending_keys = set()
+        self._deleted_keys = set()
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self._superseded = 0
+        self.stats = {
+            'reads': 0,
+            'writes': 0,
+            'deletes': 0,
+            'cache_hits': 0,
+            'cache_misses': 0
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._ci_count = os.fstat(self._fd).st_size // ci_size
+        self._active_ci = None
+        self._active_pos = 0
+        self._load_index()
+
+    @property
+    def max_record_length(self):
+        """Largest key plus data length that fits in one CI"""
+        return self.ci_size - _RDF.size
+
+    def _load_index(self):
+        """Rebuild the key index by scanning every control interval"""
+        for ci_number in range(self._ci_count):
+            block = os.pread(self._fd, self.ci_size, ci_number * self.ci_size)
+            pos = 0
+            for key, offset, data_length in self._iter_block(block):
+                self._index_record(key, ci_number, offset, data_length)
+                pos = offset + _RDF.size + len(key) + (0 if data_length == _DELETED else data_length)
+            self._active_ci, self._active_pos = ci_number, pos
+        self._merge_pending_keys()
+        self.logger.info(f"Opened KSDS {self.path}: {len(self._index)} records in {self._ci_count} CIs")
+
+    def _iter_block(self, block):
+        """Yield (key, offset, data_length) for every record image in a CI"""
+        offset = 0
+        while offset + _RDF.size <= len(block):
+            key_length, data_length = _RDF.unpack_from(block, offset)
+            if key_length == 0:
+                break
+            key_start = offset + _RDF.size
+            yield bytes(block[key_start:key_start + key_length]), offset, data_length
+            offset = key_start + key_length + (0 if data_length == _DELETED else data_length)
+
+    def _index_record(self, key, ci_number, offset, data_length):
+        existing = self._index.get(key)
+        if existing is not None:
+            self._superseded += 1
+        if data_length == _DELETED:
+            if existing is not None:
+                del self._index[key]
+                self._unlist_key(key)
+            return
+        if existing is None:
+            self._list_key(key)
+        self._index[key] = (ci_number << 32) | offset
+
+    def _list_key(self, key):
+        """Make a newly inserted key visible to browse"""
+        if key in self._deleted_keys:
+            # Still present in the sorted list from before the delete
+            self._deleted_keys.discard(key)
+        else:
+            self._pending_keys.add(key)
+
+    def _unlist_key(self, key):
+        if key in self._pending_keys:
+            self._pending_keys.discard(key)
+        else:
+            self._deleted_keys.add(key)
+
+    def _merge_pending_keys(self):
+        """Fold newly inserted keys into the sorted key list"""
+        if self._deleted_keys and len(self._deleted_keys) * 8 > len(self._sorted_keys):
+            self._sorted_keys = [key for key in self._sorted_keys if key not in self._deleted_keys]
+            self._deleted_keys.clear()
+        if self._pending_keys:
+            self._sorted_keys.extend(sorted(self._pending_keys))
+            # Two sorted runs: timsort merges them in linear time
+            self._sorted_keys.sort()
+            self._pending_keys.clear()
+
+    def _encode_key(self, key):
+        return encode_key(key, self.key_length)
+
+    def _get_block(self, ci_number):
+        """Return a CI from the LRU cache, reading it on a miss"""
+        block = self._cache.get(ci_number)
+        if block is not None:
+            self._cache.move_to_end(ci_number)
+            self.stats['cache_hits'] += 1
+            return block
+        self.stats['cache_misses'] += 1
+        block = bytearray(os.pread(self._fd, self.ci_size, ci_number * self.ci_size))
+        if len(block) < self.ci_size:
+            block.extend(bytes(self.ci_size - len(block)))
+        self._cache[ci_number] = block
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return block
+
+    def _append_image(self, key, data):
+        """Append a record image to the active CI, starting a new CI when full"""
+        image_length = _RDF.size + len(key) + (0 if data is None else len(data))
+        if image_length > self.ci_size:
+            raise ValueError(f"Record of {image_length} bytes exceeds CI size {self.ci_size}")
+        if self._active_ci is None or self._active_pos + image_length > self.ci_size:
+            self._active_ci = self._ci_count
+            self._active_pos = 0
+            self._ci_count += 1
+            os.ftruncate(self._fd, self._ci_count * self.ci_size)
+            self._cache[self._active_ci] = bytearray(self.ci_size)
+            if len(self._cache) > self.cache_blocks:
+                self._cache.popitem(last=False)
+
+        image = _RDF.pack(len(key), _DELETED if data is None else len(data)) + key + (data or b'')
+        offset = self._active_pos
+        os.pwrite(self._fd, image, self._active_ci * self.ci_size + offset)
+        block = self._cache.get(self._active_ci)
+        if block is not None:
+            block[offset:offset + image_length] = image
+        self._active_pos += image_length
+        return self._active_ci, offset
+
+    def put(self, key, data):
+        """Insert or update the record stored under key"""
+        key = self._encode_key(key)
+        data = bytes(data)
+        with self._lock:
+            ci_number, offset = self._append_image(key, data)
+            self._index_record(key, ci_number, offset, len(data))
+            self.stats['writes'] += 1
+
+    def get(self, key):
+        """Point read; returns the record data or None"""
+        key = self._encode_key(key)
+        with self._lock:
+            self.stats['reads'] += 1
+            location = self._index.get(key)
+            if location is None:
+                return None
+            block = self._get_block(location >> 32)
+            offset = location & 0xFFFFFFFF
+            _, data_length = _RDF.unpack_from(block, offset)
+            start = offset + _RDF.size + len(key)
+            return bytes(block[start:start + data_length])
+
+    def delete(self, key):
+        """Erase the record stored under key"""
+        key = self._encode_key(key)
+        with self._lock:
+            if key not in self._index:
+                return False
+            ci_number, offset = self._append_image(key, None)
+            self._index_record(key, ci_number, offset, _DELETED)
+            self.stats['deletes'] += 1
+            return True
+
+    def browse(self, start_key=None, end_key=None, limit=None):
+        """Yield (key, data) in key sequence for start_key <= key <= end_key"""
+        with self._lock:
+            self._merge_pending_keys()
+            low = 0 if start_key is None else bisect_left(self._sorted_keys, self._encode_key(start_key))
+            high = len(self._sorted_keys) if end_key is None else bisect_right(
+                self._sorted_keys, self._encode_key(end_key))
+            keys = self._sorted_keys[low:high]
+        returned = 0
+        for key in keys:
+            if limit is not None and returned >= limit:
+                break
+            data = self.get(key)
+            if data is not None:
+                returned += 1
+                yield key, data
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return self._encode_key(key) in self._index
+
+    def sync(self):
+        """Flush written CIs to stable storage"""
+        os.fsync(self._fd)
+
+    def reorganize(self):
+        """Rewrite the cluster in key sequence, reclaiming dead space"""
+        with self._lock:
+            self._merge_pending_keys()
+            temp_path = f"{self.path}.reorg"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            reorganized = VSAMKSDSCluster(temp_path, self.key_length, self.ci_size, self.cache_blocks)
+            try:
+                for key in self._sorted_keys:
+                    # Deleted keys stay in the sorted list until it is next compacted
+                    if key not in self._deleted_keys:
+                        reorganized.put(key, self.get(key))
+                reorganized.sync()
+            except BaseException:
+                reorganized.close()
+                os.remove(temp_path)
+                raise
+            reorganized.close()
+            os.close(self._fd)
+            os.replace(temp_path, self.path)
+            self._fd = os.open(self.path, os.O_RDWR)
+            self._index = {}
+            self._sorted_keys = []
+            self._deleted_keys.clear()
+            self._cache.clear()
+            self._superseded = 0
+            self._ci_count = os.fstat(self._fd).st_size // self.ci_size
+            self._active_ci = None
+            self._active_pos = 0
+            self._load_index()
+
+    def get_statistics(self):
+        """Return LISTCAT-style cluster statistics"""
+        with self._lock:
+            lookups = self.stats['cache_hits'] + self.stats['cache_misses']
+            return {
+                'records': len(self._index),
+                'control_intervals': self._ci_count,
+                'ci_size': self.ci_size,
+                'superseded_images': self._superseded,
+                'cached_blocks': len(self._cache),
+                'cache_hit_ratio': self.stats['cache_hits'] / lookups if lookups else 0.0,
+                **self.stats
+            }
+
+    def close(self):
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+                self._cache.clear()
@@ -0,0 +1,270 @@
+"""
+WLM-Style Service Classes and Admission Control
+
+Requests are classified by path into service classes (online scoring,
+batch scoring, health probes, reports), each with an importance from 1
+(highest) to 5 and one goal:
+
+* a response-time goal, on average or at a percentile ("95% within
+  250 ms"); the performance index (PI) is the achieved response time at
+  that percentile, or the mean, over the goal;
+* a velocity goal; velocity is the share of a request's time spent
+  running rather than queued for admission, 100 x run / (run + queued),
+  and the PI is the goal over the achieved velocity;
+* no goal (discretionary work), which never has a PI.
+
+A PI above 1 means the class is missing its goal.  PIs are computed over
+a sliding window of recent completions and refreshed at most every
+``pi_interval`` seconds, so admission decisions stay cheap.
+
+The server runs at most ``max_concurrent`` requests at once, and each
+class at most its own ``max_concurrent``.  A request that cannot run
+waits in its class's queue, and a free slot goes to the most important
+waiting class first.  While a more important class misses its goal, a
+less important one only runs its reserved ``min_concurrent`` requests
+and defers the rest.  A request is shed -- rejected with a retry hint --
+when its class's queue is full or it has waited ``max_queue_wait``
+seconds.  Limits apply per process; a pre-fork server applies them in
+each worker.
+"""
+import math
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from .zos_metrics_registry import get_metrics_registry
+
+ADMISSIONS = get_metrics_registry().counter(
+    'zos_wlm_admissions_total', 'Requests admitted, deferred or shed by service class', ('service_class', 'outcome'))
+QUEUE_TIME = get_metrics_registry().histogram(
+    'zos_wlm_queue_seconds', 'Time admitted requests waited for a slot', ('service_class',),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+PERFORMANCE_INDEX = get_metrics_registry().gauge(
+    'zos_wlm_performance_index', 'Performance index by service class (above 1 misses the goal)', ('service_class',))
+
+DISCRETIONARY = 'SYSOTHER'
+
+
+class AdmissionRejectedError(RuntimeError):
+    """A request was shed instead of being admitted"""
+    def __init__(self, service_class, reason, retry_after):
+        super().__init__(f"{service_class} request shed: {reason}")
+        self.service_class = service_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ServiceClass:
+    """Goal, importance, concurrency limits and recent completions of one class of work"""
+    def __init__(self, name, importance=3, response_time=None, percentile=None, velocity=None,
+                 max_concurrent=None, min_concurrent=1, queue_limit=64, max_queue_wait=1.0, window=30.0):
+        if response_time is not None and velocity is not None:
+            raise ValueError(f"Service class {name} has both a response-time and a velocity goal")
+        self.name = name
+        self.importance = importance
+        self.response_time = response_time
+        self.percentile = percentile
+        self.velocity = velocity
+        self.max_concurrent = max_concurrent
+        self.min_concurrent = min_concurrent
+        self.queue_limit = queue_limit
+        self.max_queue_wait = max_queue_wait
+        self.window = window
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {'admitted': 0, 'deferred': 0, 'shed': 0, 'completed': 0}
+        self._samples = deque(maxlen=4096)
+
+    @property
+    def goal(self):
+        if self.response_time is not None:
+            target = f"{self.response_time * 1000:g} ms"
+            return f"{self.percentile * 100:g}% within {target}" if self.percentile else f"average {target}"
+        if self.velocity is not None:
+            return f"velocity {self.velocity:g}"
+        return 'discretionary'
+
+    def record(self, now, response, queued):
+        self._samples.append((now, response, queued))
+
+    def performance_index(self, now):
+        """PI over the completions of the last window seconds; None without a goal or completions"""
+        while self._samples and self._samples[0][0] < now - self.window:
+            self._samples.popleft()
+        if not self._samples or (self.response_time is None and self.velocity is None):
+            return None
+        if self.velocity is not None:
+            queued = sum(sample[2] for sample in self._samples)
+            running = sum(sample[1] for sample in self._samples) - queued
+            achieved = 100.0 * running / (running + queued) if running + queued > 0 else 100.0
+            return self.velocity / max(achieved, 1.0)
+        times = [sample[1] for sample in self._samples]
+        if self.percentile:
+            times.sort()
+            achieved = times[max(0, math.ceil(self.percentile * len(times)) - 1)]
+        else:
+            achieved = sum(times) / len(times)
+        return achieved / self.response_time
+
+
+class Ticket:
+    """An admitted request; hand it back to release()"""
+    __slots__ = ('service_class', 'arrived', 'started')
+
+    def __init__(self, service_class, arrived, started):
+        self.service_class = service_class
+        self.arrived = arrived
+        self.started = started
+
+
+class WorkloadManager:
+    """Classifies requests and admits, defers or sheds them by importance and goal attainment"""
+    def __init__(self, service_classes=None, routes=None, default_class=DISCRETIONARY, max_concurrent=32,
+                 pi_interval=0.5, clock=time.monotonic):
+        self.classes = {name: ServiceClass(name, **settings) for name, settings in (service_classes or {}).items()}
+        if default_class not in self.classes:
+            self.classes[default_class] = ServiceClass(default_class, importance=5, min_concurrent=0)
+        self.routes = dict(routes or {})
+        self.default_class = default_class
+        self.max_concurrent = max_concurrent
+        self.pi_interval = pi_interval
+        self.clock = clock
+        self.logger = logging.getLogger('zos_wlm')
+        self.in_flight = 0
+        self._indexes = {}
+        self._indexes_at = None
+        self._missing = set()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config):
+        settings = dict(config.get('wlm') or {})
+        return cls(settings.pop('service_classes', None), **settings)
+
+    def classify(self, path):
+        """Service class for a request path"""
+        return self.routes.get(path, self.default_class)
+
+    def _refresh_indexes(self, now):
+        if self._indexes_at is not None and now - self._indexes_at < self.pi_interval:
+            return
+        self._indexes = {name: sc.performance_index(now) for name, sc in self.classes.items()}
+        missing = {name for name, pi in self._indexes.items() if pi is not None and pi > 1.0}
+        for name in missing - self._missing:
+            self.logger.warning(f"Service class {name} is missing its goal (PI {self._indexes[name]:.2f})")
+        self._missing = missing
+        self._indexes_at = now
+        for name, pi in self._indexes.items():
+            if pi is not None:
+                PERFORMANCE_INDEX.labels(name).set(pi)
+
+    def _can_run(self, sc):
+        if self.in_flight >= self.max_concurrent:
+            return False
+        if sc.max_concurrent is not None and sc.in_flight >= sc.max_concurrent:
+            return False
+        for other in self.classes.values():
+            if other.importance >= sc.importance:
+                continue
+            # A freed slot goes to a more important class that is waiting for one
+            if other.waiting and (other.max_concurrent is None or other.in_flight < other.max_concurrent):
+                return False
+            # Less important work is held to its reserved share while a more important goal is missed
+            if other.name in self._missing and sc.in_flight >= sc.min_concurrent:
+                return False
+        return True
+
+    def _shed(self, sc, reason):
+        sc.stats['shed'] += 1
+        ADMISSIONS.labels(sc.name, 'shed').inc()
+        raise AdmissionRejectedError(sc.name, reason, max(1, math.ceil(sc.max_queue_wait)))
+
+    def _admit(self, sc, arrived, now):
+        self.in_flight += 1
+        sc.in_flight += 1
+        sc.stats['admitted'] += 1
+        ADMISSIONS.labels(sc.name, 'admitted').inc()
+        QUEUE_TIME.labels(sc.name).observe(now - arrived)
+        return Ticket(sc, arrived, now)
+
+    def acquire(self, service_class, block=True):
+        """Admit a request of a class, waiting for a slot if needed.
+
+        Raises AdmissionRejectedError when the request is shed.  With
+        block=False returns None instead of waiting, so an event loop can
+        do the wait on an executor."""
+        sc = self.classes[service_class]
+        arrived = self.clock()
+        with self._condition:
+            self._refresh_indexes(arrived)
+            if self._can_run(sc):
+                return self._admit(sc, arrived, arrived)
+            if not block:
+                return None
+            if sc.waiting >= sc.queue_limit or sc.max_queue_wait <= 0:
+                self._shed(sc, 'queue full')
+            sc.waiting += 1
+            sc.stats['deferred'] += 1
+            ADMISSIONS.labels(sc.name, 'deferred').inc()
+            try:
+                deadline = arrived + sc.max_queue_wait
+                while True:
+                    now = self.clock()
+                    if now >= deadline:
+                        self._shed(sc, f"waited {sc.max_queue_wait:g}s for a slot")
+                    # Wake up at least every pi_interval: goal attainment can change without a release
+                    self._condition.wait(min(deadline - now, self.pi_interval))
+                    now = self.clock()
+                    self._refresh_indexes(now)
+                    if self._can_run(sc):
+                        return self._admit(sc, arrived, now)
+            finally:
+                sc.waiting -= 1
+
+    def release(self, ticket):
+        """Record an admitted request's completion and free its slot"""
+        now = self.clock()
+        sc = ticket.service_class
+        with self._condition:
+            self.in_flight -= 1
+            sc.in_flight -= 1
+            sc.stats['completed'] += 1
+            sc.record(now, now - ticket.arrived, ticket.started - ticket.arrived)
+            self._condition.notify_all()
+
+    @contextmanager
+    def admit(self, service_class):
+        ticket = self.acquire(service_class)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def status(self):
+        """Goal, live performance index and queue state of every service class"""
+        with self._condition:
+            self._refresh_indexes(self.clock())
+            return [{
+                'service_class': sc.name,
+                'importance': sc.importance,
+                'goal': sc.goal,
+                'performance_index': self._indexes.get(sc.name),
+                'in_flight': sc.in_flight,
+                'waiting': sc.waiting,
+                **sc.stats
+            } for sc in sorted(self.classes.values(), key=lambda sc: (sc.importance, sc.name))]
+
+
+_default_manager = None
+_default_manager_lock = threading.Lock()
+
+
+def get_workload_manager(config=None):
+    """Process-wide workload manager shared by the request handlers and monitors"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = WorkloadManager.from_config(config or {})
+    return _default_manager